@@ -0,0 +1,588 @@
+import argparse
+import glob
+import http.client
+import json
+import os
+import platform
+import re
+import shutil
+import sqlite3
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from main import Database, ReportData
+
+START_DATE = "2016-01-01"
+YEARS = 10
+CHUNK_SIZE = 100000
+EXCEL_MAX_ROWS = 1048575
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+SERVER_START_TIMEOUT = 30
+# endpoint, share of requests
+LOAD_MIX = [
+    ("balance", 0.25),
+    ("summary[month]", 0.15),
+    ("summary[day,year]", 0.05),
+    ("categories", 0.10),
+    ("transactions", 0.20),
+    ("transactions[next]", 0.15),
+    ("transactions[search]", 0.05),
+    ("transactions[category]", 0.05),
+]
+
+# name, parent, type, share of rows, median amount (TRY), spread, fixed day of month
+CATEGORY_MIX = [
+    ("Maaş", None, "Income", 0.03, 32000, 0.05, 15),
+    ("Serbest Çalışma", None, "Income", 0.02, 6000, 0.6, None),
+    ("Yatırımlar", None, "Income", 0.01, 2500, 0.8, 28),
+    ("Konut", None, "Expense", 0.03, 15000, 0.05, 1),
+    ("Fatura", None, "Expense", 0.06, 900, 0.4, 20),
+    ("Market", "Yiyecek", "Expense", 0.25, 650, 0.7, None),
+    ("Restoran", "Yiyecek", "Expense", 0.15, 450, 0.6, None),
+    ("Yakıt", "Ulaşım", "Expense", 0.08, 1500, 0.3, None),
+    ("Toplu Taşıma", "Ulaşım", "Expense", 0.12, 40, 0.3, None),
+    ("Eğlence", None, "Expense", 0.08, 600, 0.8, None),
+    ("Sağlık", None, "Expense", 0.03, 1200, 1.0, None),
+    ("Alışveriş", None, "Expense", 0.10, 1100, 0.9, None),
+    ("Diğer", None, "Expense", 0.04, 300, 1.0, None),
+]
+SEASONALITY = {
+    "Fatura": [1.6, 1.5, 1.3, 1.0, 0.8, 0.7, 0.8, 0.8, 0.8, 1.0, 1.3, 1.5],
+    "Yakıt": [0.9, 0.9, 0.9, 1.0, 1.1, 1.3, 1.4, 1.3, 1.0, 0.9, 0.9, 0.9],
+    "Eğlence": [0.8, 0.8, 0.9, 1.0, 1.1, 1.3, 1.4, 1.3, 1.0, 0.9, 0.9, 1.4],
+    "Alışveriş": [0.9, 0.8, 0.9, 1.0, 1.0, 1.0, 1.0, 1.0, 1.1, 1.0, 1.5, 1.8],
+    "Market": [1.0, 0.95, 1.0, 1.0, 1.0, 0.95, 0.95, 0.95, 1.0, 1.0, 1.05, 1.2],
+}
+DESCRIPTIONS = {
+    "Maaş": ["Maaş ödemesi", "Aylık maaş"],
+    "Serbest Çalışma": ["Web sitesi projesi", "Danışmanlık faturası", "Çeviri işi"],
+    "Yatırımlar": ["Temettü", "Fon getirisi", "Faiz"],
+    "Konut": ["Kira", "Aidat"],
+    "Fatura": ["Elektrik faturası", "Doğalgaz faturası", "İnternet", "Su faturası"],
+    "Market": ["Migros alışverişi", "Pazar", "Bakkal", "Şok market"],
+    "Restoran": ["Öğle yemeği", "Kahve", "Akşam yemeği", "Dışarıda kahvaltı"],
+    "Yakıt": ["Benzin", "Motorin"],
+    "Toplu Taşıma": ["İstanbulkart dolum", "Metro", "Taksi"],
+    "Eğlence": ["Sinema", "Konser bileti", "Dizi aboneliği"],
+    "Sağlık": ["Eczane", "Diş hekimi", "Muayene"],
+    "Alışveriş": ["Kıyafet", "Elektronik", "Kitap"],
+    "Diğer": ["Hediye", "Bağış", "Çeşitli"],
+}
+ANNUAL_GROWTH = 0.2
+FX_SHARE = 0.03
+INVESTMENT_FX_SHARE = 0.6
+# base currency per unit at START_DATE and the yearly drift
+FX_START = {"USD": 9.0, "EUR": 10.5}
+FX_GROWTH = 0.25
+
+
+def fx_rates(rng, years):
+    rows = []
+    months = np.arange(np.datetime64(START_DATE, "M"), np.datetime64(START_DATE, "M") + years * 12)
+    for currency, start in FX_START.items():
+        noise = np.cumsum(rng.normal(0, 0.02, len(months)))
+        rates = start * (1 + FX_GROWTH) ** (np.arange(len(months)) / 12) * np.exp(noise)
+        rows += [(str(month) + "-01", currency, round(float(rate), 4)) for month, rate in zip(months, rates)]
+    return rows
+
+
+def generate_ledger(path, rows, seed=0, years=YEARS):
+    if os.path.exists(path):
+        raise ValueError(f"{path} zaten mevcut")
+    rng = np.random.default_rng(seed)
+    db = Database(path)
+    for name, parent, *_ in CATEGORY_MIX:
+        if parent and db.get_category_id(parent) is None:
+            db.add_category(parent)
+        if db.get_category_id(name) is None:
+            db.add_category(name, parent)
+        elif parent:
+            db.move_category(name, parent)
+
+    rates_file = os.path.join(os.path.dirname(os.path.abspath(path)), f".fx_{seed}.csv")
+    rates = fx_rates(rng, years)
+    with open(rates_file, "w", encoding="utf-8") as f:
+        f.write("date,currency,rate\n")
+        f.writelines(f"{date},{currency},{rate}\n" for date, currency, rate in rates)
+    try:
+        db.load_fx_rates(rates_file)
+    finally:
+        os.remove(rates_file)
+
+    shares = np.array([share for _, _, _, share, *_ in CATEGORY_MIX])
+    picks = rng.choice(len(CATEGORY_MIX), size=rows, p=shares / shares.sum())
+    start = np.datetime64(START_DATE, "D")
+    span = ((np.datetime64(START_DATE, "Y") + years).astype("datetime64[D]") - start).astype(np.int64)
+    dates = start + rng.integers(0, span, size=rows)
+    fixed = np.array([fixed_day or 0 for *_, fixed_day in CATEGORY_MIX])[picks]
+    dates = np.where(fixed > 0, dates.astype("datetime64[M]").astype("datetime64[D]") + (fixed - 1), dates)
+
+    days = dates.astype(np.int64)
+    month_index = dates.astype("datetime64[M]").astype(np.int64)
+    months = (month_index // 12 + 1970) * 100 + month_index % 12 + 1
+
+    medians = np.array([median for _, _, _, _, median, _, _ in CATEGORY_MIX])[picks]
+    spreads = np.array([spread for _, _, _, _, _, spread, _ in CATEGORY_MIX])[picks]
+    season = np.array([SEASONALITY.get(name, [1.0] * 12) for name, *_ in CATEGORY_MIX])
+    growth = (1 + ANNUAL_GROWTH) ** ((dates - start).astype(np.int64) / 365.25)
+    amounts = medians * season[picks, month_index % 12] * growth * rng.lognormal(0, spreads)
+
+    investment = [name for name, *_ in CATEGORY_MIX].index("Yatırımlar")
+    foreign = rng.random(rows) < np.where(picks == investment, INVESTMENT_FX_SHARE, FX_SHARE)
+    currencies = np.where(foreign, rng.choice(list(FX_START), size=rows), Database.BASE_CURRENCY)
+    months_since_start = month_index - np.datetime64(START_DATE, "M").astype(np.int64)
+    for currency in FX_START:
+        series = np.array([rate for _, rate_currency, rate in rates if rate_currency == currency])
+        selected = currencies == currency
+        amounts[selected] /= series[np.clip(months_since_start[selected], 0, len(series) - 1)]
+    minors = np.maximum(np.rint(amounts * Database.MINOR_UNITS), 1).astype(np.int64)
+
+    vocabulary = [DESCRIPTIONS[name] for name, *_ in CATEGORY_MIX]
+    phrase = rng.integers(0, 1 << 30, size=rows)
+
+    category_ids = np.array([db.get_category_id(name) for name, *_ in CATEGORY_MIX])[picks]
+    types = np.array([trans_type for _, _, trans_type, *_ in CATEGORY_MIX])[picks]
+    order = np.argsort(days, kind="stable")
+
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        for offset in range(0, rows, CHUNK_SIZE):
+            chunk = order[offset:offset + CHUNK_SIZE]
+            batch = [(day, month, trans_type, category_id, minor,
+                      vocabulary[pick][choice % len(vocabulary[pick])], currency)
+                     for day, month, trans_type, category_id, minor, pick, choice, currency in zip(
+                         days[chunk].tolist(), months[chunk].tolist(), types[chunk].tolist(),
+                         category_ids[chunk].tolist(), minors[chunk].tolist(), picks[chunk].tolist(),
+                         phrase[chunk].tolist(), currencies[chunk].tolist())]
+            cursor.execute("BEGIN IMMEDIATE")
+            db._insert_batch(cursor, batch, [])  # a fresh file, never in memory mode, so nothing to mirror
+            conn.commit()
+    finally:
+        conn.close()
+
+    db.set_budget("Market", "month", 12000)
+    db.set_budget("Eğlence", "year", 40000, block=True)
+    return db
+
+
+def ledger_path(cache_dir, rows, seed, sharded):
+    return os.path.join(cache_dir, f"ledger_{rows}_s{seed}{'_sharded' if sharded else ''}.db")
+
+
+def copy_ledger(path, target_dir):
+    root, ext = os.path.splitext(path)
+    for source in [path] + glob.glob(f"{root}_*{ext}"):
+        shutil.copy(source, target_dir)
+    return os.path.join(target_dir, os.path.basename(path))
+
+
+def consume(result):
+    if hasattr(result, "__next__"):
+        for _ in result:
+            pass
+
+
+def measure(fn, repeat, setup=None):
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        consume(fn())
+        runs.append((time.perf_counter() - started) * 1000)
+    return {"min_ms": min(runs), "median_ms": statistics.median(runs), "runs_ms": runs}
+
+
+def read_cases(db):
+    latest = db.get_monthly_summary(limit=1)
+    last_month = latest[0][0] if latest else datetime.now().strftime("%Y-%m")
+    year_start = f"{last_month[:4]}-01-01"
+
+    def cold():
+        db.cache.clear()
+
+    cases = [
+        ("get_balance", db.get_balance, None),
+        ("get_total_income", db.get_total_income, None),
+        ("get_total_expenses", db.get_total_expenses, None),
+        ("get_monthly_income", db.get_monthly_income, None),
+        ("get_monthly_expenses", db.get_monthly_expenses, None),
+        ("get_recent_transactions", db.get_recent_transactions, None),
+        ("get_category_summary", db.get_category_summary, None),
+        ("get_category_summary[year,top7]", lambda: db.get_category_summary(year_start, limit=7), None),
+        ("get_expenses_by_category", db.get_expenses_by_category, None),
+        ("get_expenses_by_category[Yiyecek]", lambda: db.get_expenses_by_category(parent="Yiyecek"), None),
+        ("get_daily_summary", db.get_daily_summary, cold),
+        ("get_monthly_summary", db.get_monthly_summary, cold),
+        ("get_monthly_summary[limit6]", lambda: db.get_monthly_summary(limit=6), cold),
+        ("get_monthly_summary[cached]", db.get_monthly_summary, db.get_monthly_summary),
+        ("get_yearly_summary", db.get_yearly_summary, cold),
+        ("_daily_rollup", db._daily_rollup, None),
+        ("get_monthly_category_matrix", db.get_monthly_category_matrix, None),
+        ("get_all_transactions[year]", lambda: db.get_all_transactions(year_start), None),
+        ("get_transaction_page", lambda: db.get_transaction_page(limit=100), None),
+        ("iter_transaction_batches", db.iter_transaction_batches, None),
+        ("iter_transaction_pages[search]", lambda: db.iter_transaction_pages({"search": "migros"}), None),
+        ("iter_transaction_pages[category]", lambda: db.iter_transaction_pages({"category": "Ulaşım"}), None),
+        ("get_categories", db.get_categories, None),
+        ("get_category_tree", db.get_category_tree, None),
+        ("is_category_in_use", lambda: db.is_category_in_use("Diğer"), None),
+        ("get_budget_status", db.get_budget_status, None),
+        ("check_budget", lambda: db.check_budget("Expense", 100, "Market", f"{last_month}-15"), None),
+        ("get_anomalies", lambda: db.get_anomalies(limit=50), None),
+        ("get_recurring_rules", db.get_recurring_rules, None),
+        ("get_currencies", db.get_currencies, None),
+        ("get_rate_series", db.get_rate_series, None),
+        ("data_version", db.data_version, None),
+        ("search_archive", db.search_archive, None),
+    ]
+    cases += [(f"get_summary[{bucket}]", lambda bucket=bucket: db.get_summary(bucket, fiscal_start=4), cold)
+              for bucket in Database.TIME_BUCKETS]
+    # every getter goes through the query cache, so each run starts empty unless the case primes it
+    return [(f"Database.{name}", fn, setup or cold) for name, fn, setup in cases]
+
+
+def write_cases(db):
+    sample = [("Expense", 125.5, "Market", "Migros alışverişi", "2020-03-14")] * 1000
+
+    cases = [
+        ("add_transaction", lambda: db.add_transaction("Expense", 42.0, "Restoran", "Kahve", "2020-03-14"), None),
+        ("import_transactions[1000]", lambda: db.import_transactions(sample), None),
+        ("rebuild_budget_counters", db.rebuild_budget_counters, None),
+        ("rescore_anomalies", db.rescore_anomalies, None),
+    ]
+    return [(f"Database.{name}", fn, setup) for name, fn, setup in cases]
+
+
+def screen_cases(db, rows, export_dir):
+    # every screen step starts from empty forecast, rolling-window and summary caches
+    screens = {}
+
+    def cold():
+        screens["report"] = ReportData(db)
+        db.cache.clear()
+
+    cold()
+    cases = [
+        ("dashboard", lambda: screens["report"].dashboard(), cold),
+        ("category_breakdown[Yiyecek]", lambda: screens["report"].category_breakdown(
+            db.get_monthly_summary(limit=ReportData.DASHBOARD_MONTHS), "Yiyecek"), cold),
+        ("report[month,30 gün]", lambda: screens["report"].report("month", "30 gün"), cold),
+        ("report[month,Aylık değişim]", lambda: screens["report"].report("month", "Aylık değişim"), cold),
+        ("report[week,Bakiye]", lambda: screens["report"].report("week", "Bakiye"), cold),
+        ("statistics", lambda: screens["report"].statistics(), None),
+        ("analysis_3d", lambda: screens["report"].analysis_3d(), cold),
+    ]
+    cases += [(f"report[{bucket}]", lambda bucket=bucket: screens["report"].report(bucket, fiscal_start=4), cold)
+              for bucket in Database.TIME_BUCKETS]
+    if rows <= EXCEL_MAX_ROWS:
+        cases.append(("export_excel", lambda: screens["report"].export_excel(os.path.join(export_dir, "report.xlsx")),
+                      None))
+    return [(f"ReportData.{name}", fn, setup) for name, fn, setup in cases]
+
+
+def open_ledger(path, args):
+    db = Database(path, sharded=args.sharded, parallel=args.parallel)
+    if args.memory:
+        db.enable_memory_mode(args.memory)
+    return db
+
+
+def run_size(rows, args):
+    path = ledger_path(args.cache_dir, rows, args.seed, args.sharded)
+    build_s = None
+    if not os.path.exists(path):
+        print(f"{rows} satırlık defter oluşturuluyor: {path}", flush=True)
+        started = time.perf_counter()
+        generate_ledger(path, rows, args.seed)
+        if args.sharded:
+            Database(path, sharded=True)
+        build_s = time.perf_counter() - started
+
+    only = re.compile(args.only) if args.only else None
+    results = {}
+
+    def run(cases):
+        for name, fn, setup in cases:
+            if only and not only.search(name):
+                continue
+            try:
+                results[name] = measure(fn, args.repeat, setup)
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"  {name}: " + (f"{results[name]['min_ms']:.2f} ms" if "min_ms" in results[name]
+                                   else results[name]["error"]), flush=True)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        db = open_ledger(path, args)
+        run(read_cases(db))
+        run(screen_cases(db, rows, scratch))
+        db.disable_memory_mode()
+        run(write_cases(open_ledger(copy_ledger(path, scratch), args)))
+
+    return {"build_s": build_s, "cases": results}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path, port, workers, cache_size):
+    server = subprocess.Popen([sys.executable, SERVER_SCRIPT, "--db", db_path, "--port", str(port),
+                               "--workers", str(workers), "--cache-size", str(cache_size)],
+                              stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"API sunucusu başlatılamadı (çıkış kodu {server.returncode})")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/status")
+            conn.getresponse().read()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("API sunucusu zamanında yanıt vermedi")
+
+
+def load_client(port, deadline, seed, years, write_ratio, samples):
+    rng = np.random.default_rng(seed)
+    names = [name for name, _ in LOAD_MIX]
+    shares = np.array([share for _, share in LOAD_MIX])
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    next_page = None
+    while time.monotonic() < deadline:
+        if rng.random() < write_ratio:
+            name, method = "POST transactions", "POST"
+            body = json.dumps({"type": "Expense", "amount": round(float(rng.uniform(10, 500)), 2),
+                               "category": "Restoran", "description": "Yük testi", "force": True})
+            url = "/api/transactions"
+        else:
+            name, method, body = names[rng.choice(len(names), p=shares / shares.sum())], "GET", None
+            year = years[rng.integers(len(years))]
+            url = {
+                "balance": "/api/balance",
+                "summary[month]": "/api/summary?granularity=month&limit=12",
+                "summary[day,year]": f"/api/summary?granularity=day&start={year}-01-01&end={year}-12-31",
+                "categories": f"/api/categories?start={year}-01-01&limit=7",
+                "transactions": "/api/transactions?limit=50",
+                "transactions[next]": f"/api/transactions?limit=50&after={next_page}" if next_page else
+                "/api/transactions?limit=50",
+                "transactions[search]": "/api/transactions?search=migros&limit=50",
+                "transactions[category]": f"/api/transactions?category=Ula%C5%9F%C4%B1m&end={year}-12-31&limit=50",
+            }[name]
+
+        started = time.perf_counter()
+        try:
+            conn.request(method, url, body, {"Content-Type": "application/json"} if body else {})
+            response = conn.getresponse()
+            payload = response.read()
+            ok = response.status < 300
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            payload, ok = b"", False
+        samples.append((name, (time.perf_counter() - started) * 1000, ok))
+        if ok and name.startswith("transactions"):
+            next_page = json.loads(payload)["next"]
+    conn.close()
+
+
+def latency_stats(latencies, elapsed):
+    latencies = np.array(latencies)
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+        "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+        "max_ms": float(latencies.max()) if len(latencies) else None,
+    }
+
+
+def load_test(args):
+    os.makedirs(args.cache_dir, exist_ok=True)
+    path = ledger_path(args.cache_dir, args.rows, args.seed, False)
+    if not os.path.exists(path):
+        print(f"{args.rows} satırlık defter oluşturuluyor: {path}", flush=True)
+        generate_ledger(path, args.rows, args.seed)
+    years = [int(year) for year, *_ in Database(path).get_yearly_summary()] or [datetime.now().year]
+
+    with tempfile.TemporaryDirectory() as scratch:
+        port = free_port()
+        server = start_server(copy_ledger(path, scratch), port, args.workers, args.cache_size)
+        try:
+            samples = []
+            started = time.monotonic()
+            clients = [threading.Thread(target=load_client,
+                                        args=(port, started + args.duration, args.seed + i, years,
+                                              args.write_ratio, samples))
+                       for i in range(args.concurrency)]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.monotonic() - started
+
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/api/status")
+            status = json.loads(conn.getresponse().read())
+        finally:
+            server.terminate()
+            server.wait()
+
+    results = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "rows": args.rows,
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "cache_size": args.cache_size,
+            "duration_s": elapsed,
+            "write_ratio": args.write_ratio,
+        },
+        "total": latency_stats([ms for _, ms, _ in samples], elapsed),
+        "errors": sum(1 for _, _, ok in samples if not ok),
+        "endpoints": {name: latency_stats([ms for sample, ms, _ in samples if sample == name], elapsed)
+                      for name in sorted({name for name, _, _ in samples})},
+        "server": status,
+    }
+
+    print(f"{'uç nokta':<26} {'istek':>8} {'istek/sn':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, stats in list(results["endpoints"].items()) + [("TOPLAM", results["total"])]:
+        print(f"{name:<26} {stats['requests']:>8} {stats['rps']:>10.1f} {stats['p50_ms']:>9.2f} "
+              f"{stats['p99_ms']:>9.2f}")
+    print(f"hata: {results['errors']}  önbellek: {status['cache']['hits']} isabet / "
+          f"{status['cache']['misses']} kayıp  açılan bağlantı: {status['pool']['opened']}")
+
+    output = args.output or os.path.join(args.cache_dir, "load.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Sonuçlar kaydedildi: {output}")
+    return 1 if results["errors"] else 0
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    regressions, lines = [], []
+    for size, current in results["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if not previous:
+            continue
+        for name, timing in current["cases"].items():
+            old = previous["cases"].get(name, {})
+            if "min_ms" not in timing or "min_ms" not in old:
+                continue
+            ratio = timing["min_ms"] / old["min_ms"] if old["min_ms"] else 1.0
+            delta = timing["min_ms"] - old["min_ms"]
+            if abs(delta) < min_delta_ms or abs(ratio - 1) <= tolerance:
+                continue
+            status = "YAVAŞLADI" if ratio > 1 else "hızlandı"
+            lines.append(f"{status:>10}  {size:>9}  {name:<45} {old['min_ms']:10.2f} -> {timing['min_ms']:10.2f} ms "
+                         f"(x{ratio:.2f})")
+            if ratio > 1:
+                regressions.append((size, name, ratio))
+    return regressions, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Finans veritabanı ve ekran verisi kıyaslamaları")
+    commands = parser.add_subparsers(dest="command")
+
+    generate = commands.add_parser("generate", help="sentetik bir finance.db oluştur")
+    generate.add_argument("rows", type=int, help="işlem sayısı")
+    generate.add_argument("--db", default="finance.db", help="oluşturulacak veritabanı dosyası")
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--years", type=int, default=YEARS)
+
+    run = commands.add_parser("run", help="kıyaslamaları çalıştır")
+    run.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                     help="defter boyutları (ör. 1000 10000 100000 1000000 10000000)")
+    run.add_argument("--repeat", type=int, default=5, help="her ölçüm için tekrar sayısı")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--only", help="yalnızca bu düzenli ifadeye uyan ölçümleri çalıştır")
+    run.add_argument("--cache-dir", default=".benchmark", help="oluşturulan defterlerin saklandığı klasör")
+    run.add_argument("--output", help="sonuç JSON dosyası (varsayılan: <cache-dir>/results.json)")
+    run.add_argument("--baseline", help="karşılaştırma için temel JSON (varsayılan: <cache-dir>/baseline.json)")
+    run.add_argument("--save-baseline", action="store_true", help="sonuçları yeni temel olarak kaydet")
+    run.add_argument("--tolerance", type=float, default=0.15, help="göz ardı edilen göreli fark")
+    run.add_argument("--min-delta-ms", type=float, default=1.0, help="göz ardı edilen mutlak fark")
+    run.add_argument("--sharded", action="store_true")
+    run.add_argument("--parallel", action="store_true")
+    run.add_argument("--memory", choices=["memory", "mmap"])
+
+    load = commands.add_parser("load", help="yerel API sunucusuna yük testi uygula (server.py)")
+    load.add_argument("--rows", type=int, default=100000, help="sentetik defterdeki işlem sayısı")
+    load.add_argument("--seed", type=int, default=0)
+    load.add_argument("--duration", type=float, default=10, help="test süresi (sn)")
+    load.add_argument("--concurrency", type=int, default=16, help="eşzamanlı istemci sayısı")
+    load.add_argument("--workers", type=int, default=8, help="sunucudaki iş parçacığı/bağlantı sayısı")
+    load.add_argument("--cache-size", type=int, default=512, help="sunucunun yanıt önbelleği (0: kapalı)")
+    load.add_argument("--write-ratio", type=float, default=0.01, help="POST isteklerinin oranı")
+    load.add_argument("--cache-dir", default=".benchmark", help="oluşturulan defterlerin saklandığı klasör")
+    load.add_argument("--output", help="sonuç JSON dosyası (varsayılan: <cache-dir>/load.json)")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        started = time.perf_counter()
+        generate_ledger(args.db, args.rows, args.seed, args.years)
+        print(f"{args.rows} işlem {time.perf_counter() - started:.1f} sn içinde oluşturuldu: {args.db}")
+        return 0
+    if args.command == "load":
+        return load_test(args)
+    if args.command != "run":
+        parser.print_help()
+        return 2
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    output = args.output or os.path.join(args.cache_dir, "results.json")
+    baseline_path = args.baseline or os.path.join(args.cache_dir, "baseline.json")
+
+    results = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "storage_version": Database.STORAGE_VERSION,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "sharded": args.sharded,
+            "parallel": args.parallel,
+            "memory": args.memory,
+        },
+        "sizes": {},
+    }
+    for rows in args.sizes:
+        print(f"== {rows} işlem", flush=True)
+        results["sizes"][str(rows)] = run_size(rows, args)
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Sonuçlar kaydedildi: {output}")
+
+    regressions = []
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, encoding="utf-8") as f:
+            regressions, lines = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        print(f"Temel ile karşılaştırma ({baseline_path}):")
+        print("\n".join(lines) if lines else "  anlamlı fark yok")
+    if args.save_baseline:
+        shutil.copy(output, baseline_path)
+        print(f"Temel güncellendi: {baseline_path}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
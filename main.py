@@ -1,13 +1,35 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import sqlite3
 from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 import numpy as np
 from mpl_toolkits.mplot3d import Axes3D
 import os
+import calendar
+import itertools
+import heapq
+import re
+import unicodedata
+import json
+import uuid
+import zlib
+import time
+import pathlib
+import threading
+import argparse
+import asyncio
+import bisect
+import copy
+import functools
+import inspect
+import multiprocessing
+import queue
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import pandas as pd
 import openpyxl
 from openpyxl.chart import (
@@ -21,7 +43,15 @@ from tkcalendar import DateEntry
 
 
 class FinanceTracker:
-    def __init__(self, root):
+    RECURRING_INTERVAL = 60 * 60 * 1000
+    JOB_POLL_INTERVAL = 200
+    JOB_BACKENDS = {"thread": "İş parçacığı", "process": "Süreç", "celery": "Celery"}
+    CURRENCY_SYMBOLS = {"TRY": "T", "USD": "$", "EUR": "€", "GBP": "£"}
+    TAG_PIVOT_PERIODS = 12
+    MAINTENANCE_POLL = 60 * 1000
+    MAINTENANCE_IDLE = 5 * 60
+
+    def __init__(self, root, db=None, instrumentation=None, jobs=None):
         self.root = root
         self.root.title("💰 Kişisel Finans Yönetimi Pro")
 
@@ -38,7 +68,25 @@ class FinanceTracker:
         self.root.grid_rowconfigure(0, weight=1)
         self.root.grid_columnconfigure(0, weight=1)
 
-        self.db = Database()
+        self.db = db or Database()
+        self.analytics = RollingAnalytics(self.db)
+        self.forecaster = Forecaster(self.db)
+        self.report_data = ReportData(self.db, self.analytics, self.forecaster)
+        self.instrumentation = instrumentation or Instrumentation()
+        self.instrumentation.attach(self.db)
+        self.instrumentation.instrument(self.report_data, "report")
+        self.instrumentation.instrument(self, "screen", Instrumentation.public_methods(self, "show_"))
+        self.debug_window = None
+        self.jobs = jobs or JobQueue()
+        self.jobs_window = None
+        self.maintenance_window = None
+        self.refresh_maintenance = None
+        self.maintenance_job = None
+        self.maintenance_automatic = True
+        self.last_activity = time.time()
+        self.adb = AsyncDatabase(self.db)
+        self.bridge = TkAsyncBridge(root)
+        self.db.cache.subscribe(self.on_data_change)
 
         self.colors = {
             'primary': '#2c3e50',
@@ -50,6 +98,21 @@ class FinanceTracker:
             'dark': '#34495e',
             'bg': '#ffffff'
         }
+        self.budget_periods = {"month": "Aylık", "year": "Yıllık"}
+        self.recurring_frequencies = {"daily": "Günlük", "weekly": "Haftalık", "monthly": "Aylık", "cron": "Özel"}
+        self.report_periods = {
+            "day": ("Günlük", "Gün"),
+            "week": ("Haftalık", "Hafta"),
+            "month": ("Aylık", "Ay"),
+            "quarter": ("Çeyreklik", "Çeyrek"),
+            "year": ("Yıllık", "Yıl"),
+            "fiscal": ("Mali Yıl", "Mali yıl"),
+        }
+        self.dashboard_visible = False
+        self.dashboard_request = 0
+        self.dashboard_generation = 0
+        self.dashboard_panels = {}
+        self.refresh_transactions = None
 
         self.setup_styles()
 
@@ -59,95 +122,39 @@ class FinanceTracker:
         self.main_frame.grid_columnconfigure(0, weight=1)
 
         self.create_menu()
+        self.root.bind("<Control-z>", self.undo_edit)
+        self.root.bind("<Control-y>", self.redo_edit)
+        self.root.bind_all("<Any-KeyPress>", self.note_activity, add="+")
+        self.root.bind_all("<Any-ButtonPress>", self.note_activity, add="+")
+        self.schedule_recurring()
+        self.schedule_maintenance()
+        self.poll_jobs()
         self.show_dashboard()
 
     def export_to_excel(self):
-        try:
-            file_path = os.path.join(os.path.expanduser('~'), 'Downloads', 'finance_report.xlsx')
-            writer = pd.ExcelWriter(file_path, engine='openpyxl')
+        file_path = os.path.join(os.path.expanduser('~'), 'Downloads', 'finance_report.xlsx')
 
-            transactions = self.db.get_all_transactions()
-            if not transactions:
+        def done(job):
+            if job.status == Job.FAILED:
+                messagebox.showerror("Dışa aktarma Hatası",
+                                     f"Excel'e dışa aktarılırken bir hata oluştu:\n{job.error}")
+            elif job.status == Job.DONE and not job.result:
                 messagebox.showinfo(" Data yok", "Dışa aktarılacak işlem bulunamadı.")
-                return
-
-            df = pd.DataFrame(transactions)
-
-            df.to_excel(writer, sheet_name='İşlemler', index=False)
-
-            category_summary = self.db.get_category_summary()
-            if category_summary:
-                df_summary = pd.DataFrame(category_summary)
-                df_summary.to_excel(writer, sheet_name='Kategori Özeti', index=False)
-
-            workbook = writer.book
-            ws_trans = writer.sheets['İşlemler']
-
-            for column in ws_trans.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = (max_length + 2) * 1.2
-                ws_trans.column_dimensions[column_letter].width = min(adjusted_width, 30)
-
-            if 'Kategori Özeti' in writer.sheets:
-                ws_summary = writer.sheets['Kategori Özeti']
-
-                self._create_pie_chart(workbook, ws_summary, df_summary, 'Gelir', 'Gelir Tablosu')
-                self._create_pie_chart(workbook, ws_summary, df_summary, 'Gider', 'Gider Tablosu')
-
-                total_income = df_summary[df_summary['type'] == 'Gelir']['total_amount'].sum()
-                total_expenses = df_summary[df_summary['type'] == 'Gider']['total_amount'].sum()
-                net_balance = total_income - total_expenses
-
-                stats = [
-                    ['Toplam Gelir', total_income],
-                    ['Toplam Gider', total_expenses],
-                    ['Net Bakiye', net_balance],
-                    ['Tasarruf Oranı',
-                     f"{(net_balance / total_income * 100 if total_income > 0 else 0):.1f}%" if total_income > 0 else 'N/A']
-                ]
-
-                ws_summary['E1'] = 'İstatistikler'
-                ws_summary['E1'].font = Font(bold=True, size=12)
-
-                for i, (label, value) in enumerate(stats, start=2):
-                    ws_summary[f'E{i}'] = label
-                    ws_summary[f'F{i}'] = value
-                    ws_summary[f'E{i}'].font = Font(bold=True)
-                    if i == 3:
-                        ws_summary[f'F{i}'].font = Font(bold=True, color='FF0000' if net_balance < 0 else '008000')
-
-            writer.close()
-
-            messagebox.showinfo("Dışa aktarma başarılı",
-                                f"Rapor şu konuma başarıyla dışa aktarıldı:\n{file_path}")
-
-        except Exception as e:
-            messagebox.showerror("Dışa aktarma Hatası", f"Excel'e dışa aktarılırken bir hata oluştu:\n{str(e)}")
-
-    def _create_pie_chart(self, workbook, ws, df, trans_type, title):
-        df_filtered = df[df['type'] == trans_type]
-        if df_filtered.empty:
-            return
-
-        pie = PieChart3D()
-        labels = Reference(ws, min_col=1, min_row=2, max_row=len(df_filtered) + 1)
-        data = Reference(ws, min_col=3, min_row=1, max_row=len(df_filtered) + 1)
+            elif job.status == Job.DONE:
+                messagebox.showinfo("Dışa aktarma başarılı",
+                                    f"Rapor şu konuma başarıyla dışa aktarıldı:\n{file_path}")
 
-        pie.add_data(data, titles_from_data=True)
-        pie.set_categories(labels)
-        pie.title = title
+        self.jobs.submit("Excel'e aktar", export_excel_job, os.path.abspath(self.db.db_file), self.db.sharded,
+                         file_path, on_done=done, remote=True)
+        self.manage_jobs()
 
-        max_row = ws.max_row + 2
-        ws.add_chart(pie, f"E{max_row}")
+    def symbol(self, currency=None):
+        currency = currency or self.db.reporting_currency
+        return self.CURRENCY_SYMBOLS.get(currency, currency)
 
-        return pie
+    def money(self, value, currency=None, decimals=2):
+        symbol = self.symbol(currency)
+        return f"{symbol}{'' if len(symbol) == 1 else ' '}{value:,.{decimals}f}"
 
     def setup_styles(self):
         style = ttk.Style()
@@ -177,12 +184,28 @@ class FinanceTracker:
                         borderwidth=0,
                         padding=10)
 
+        style.configure('Budget.Horizontal.TProgressbar', background=self.colors['success'])
+        style.configure('Near.Horizontal.TProgressbar', background=self.colors['warning'])
+        style.configure('Over.Horizontal.TProgressbar', background=self.colors['danger'])
+
     def create_menu(self):
         menubar = tk.Menu(self.root)
 
         file_menu = tk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="Excel'e Aktar", command=self.export_to_excel)
         file_menu.add_command(label="Pano", command=self.show_dashboard)
+        file_menu.add_command(label="Eski İşlemleri Arşivle", command=self.archive_old_transactions)
+        file_menu.add_command(label="Döviz Kurlarını Yükle", command=self.load_fx_rates)
+        file_menu.add_command(label="Başka Bir Defterle Eşitle", command=lambda: self.sync_ledger(folder=False))
+        file_menu.add_command(label="Paylaşılan Klasörle Eşitle", command=lambda: self.sync_ledger(folder=True))
+        file_menu.add_command(label="Arka Plan İşleri", command=self.manage_jobs)
+        file_menu.add_command(label="Veritabanı Bakımı", command=self.show_maintenance)
+        currency_menu = tk.Menu(file_menu, tearoff=0)
+        self.reporting_currency_var = tk.StringVar(value=self.db.reporting_currency)
+        for currency in self.db.get_currencies():
+            currency_menu.add_radiobutton(label=currency, value=currency, variable=self.reporting_currency_var,
+                                          command=self.change_reporting_currency)
+        file_menu.add_cascade(label="Raporlama Para Birimi", menu=currency_menu)
         file_menu.add_separator()
         file_menu.add_command(label="Çıkış", command=self.root.quit)
 
@@ -191,18 +214,31 @@ class FinanceTracker:
         trans_menu.add_command(label="Gider Ekle", command=lambda: self.show_add_transaction("Expense"))
         trans_menu.add_separator()
         trans_menu.add_command(label="Tüm İşlemleri Görüntüle", command=self.show_transactions)
+        trans_menu.add_command(label="Tekrarlayan İşlemler", command=self.manage_recurring)
+        trans_menu.add_separator()
+        trans_menu.add_command(label="Geri Al", accelerator="Ctrl+Z", command=self.undo_edit)
+        trans_menu.add_command(label="Yinele", accelerator="Ctrl+Y", command=self.redo_edit)
 
         report_menu = tk.Menu(menubar, tearoff=0)
-        report_menu.add_command(label="Günlük Rapor", command=lambda: self.show_report("Daily"))
-        report_menu.add_command(label="Aylık Rapor", command=lambda: self.show_report("Monthly"))
-        report_menu.add_command(label="Yıllık Rapor", command=lambda: self.show_report("Yearly"))
+        for bucket, (name, _) in self.report_periods.items():
+            report_menu.add_command(label=f"{name} Rapor", command=lambda bucket=bucket: self.show_report(bucket))
 
         analytics_menu = tk.Menu(menubar, tearoff=0)
         analytics_menu.add_command(label="İstatistiksel Analiz", command=self.show_statistics)
         analytics_menu.add_command(label="3 Boyutlu Görselleştirme", command=self.show_3d_analysis)
+        analytics_menu.add_command(label="Anomalileri Yeniden Puanla", command=self.rescore_anomalies)
+        analytics_menu.add_separator()
+        self.memory_mode_var = tk.BooleanVar(value=self.db.memory_mode is not None)
+        analytics_menu.add_checkbutton(label="Hızlı Bellek Modu", variable=self.memory_mode_var,
+                                       command=self.toggle_memory_mode)
+        self.debug_panel_var = tk.BooleanVar(value=self.debug_window is not None)
+        analytics_menu.add_checkbutton(label="Hata Ayıklama Paneli", variable=self.debug_panel_var,
+                                       command=self.toggle_debug_panel)
 
         cat_menu = tk.Menu(menubar, tearoff=0)
         cat_menu.add_command(label="Kategorileri Yönet", command=self.manage_categories)
+        cat_menu.add_command(label="Bütçeleri Yönet", command=self.manage_budgets)
+        cat_menu.add_command(label="Etiketleri Yönet", command=self.manage_tags)
 
         menubar.add_cascade(label="Dosya", menu=file_menu)
         menubar.add_cascade(label="İşlemler", menu=trans_menu)
@@ -212,12 +248,436 @@ class FinanceTracker:
 
         self.root.config(menu=menubar)
 
+    def archive_old_transactions(self):
+        months = simpledialog.askinteger("Arşivle", "Son kaç ayın işlemleri ana tabloda kalsın?",
+                                         initialvalue=12, minvalue=1, parent=self.root)
+        if not months:
+            return
+
+        today = datetime.now()
+        month_index = today.year * 12 + today.month - 1 - months
+        cutoff = f"{month_index // 12:04d}-{month_index % 12 + 1:02d}-01"
+
+        if not messagebox.askyesno("Arşivle",
+                                   f"{cutoff} tarihinden önceki işlemler sıkıştırılmış arşive taşınacak.\n\n"
+                                   f"Toplamlar ve raporlar değişmeyecek. Devam edilsin mi?"):
+            return
+
+        def done(job):
+            if job.status == Job.FAILED:
+                messagebox.showerror("❌ Hata", f"Arşivleme sırasında bir hata oluştu:\n{job.error}")
+            elif job.status == Job.DONE:
+                self.db.reload_memory()
+                messagebox.showinfo("✅ Başarılı", f"{job.result} işlem arşive taşındı.")
+                if self.dashboard_visible:
+                    self.show_dashboard()
+
+        self.jobs.submit(f"{cutoff} öncesini arşivle", archive_transactions_job, os.path.abspath(self.db.db_file),
+                         self.db.sharded, cutoff, on_done=done, remote=True)
+        self.manage_jobs()
+
+    def sync_ledger(self, folder=False):
+        if folder:
+            path = filedialog.askdirectory(title="Paylaşılan eşitleme klasörünü seçin")
+        else:
+            path = filedialog.askopenfilename(title="Eşitlenecek defteri seçin",
+                                              filetypes=[("SQLite veritabanı", "*.db"), ("Tüm dosyalar", "*.*")])
+        if not path:
+            return
+
+        def done(job):
+            if job.status == Job.FAILED:
+                messagebox.showerror("❌ Hata", f"Eşitleme sırasında bir hata oluştu:\n{job.error}")
+            elif job.status == Job.DONE:
+                pulled, pushed = job.result
+                self.db.reload_memory()
+                messagebox.showinfo("✅ Başarılı", f"{pulled} değişiklik alındı, {pushed} değişiklik gönderildi.")
+                if self.refresh_transactions:
+                    self.refresh_transactions()
+                elif self.dashboard_visible:
+                    self.show_dashboard()
+
+        self.jobs.submit(f"{os.path.basename(path)} ile eşitle", sync_job, os.path.abspath(self.db.db_file),
+                         self.db.sharded, path, on_done=done, remote=True)
+        self.manage_jobs()
+
+    def load_fx_rates(self):
+        path = filedialog.askopenfilename(title="Döviz Kurları",
+                                          filetypes=[("Kur dosyası", "*.csv *.json"), ("Tümü", "*.*")])
+        if not path:
+            return
+
+        try:
+            loaded = self.db.load_fx_rates(path)
+        except Exception as e:
+            messagebox.showerror("❌ Hata", f"Kurlar yüklenemedi:\n{str(e)}")
+            return
+
+        self.analytics.invalidate()
+        self.create_menu()
+        messagebox.showinfo("✅ Başarılı", f"{loaded} günlük kur yüklendi.\n\n"
+                                          f"Dosya 'date,currency,rate' sütunları içermeli; kur, 1 birimin "
+                                          f"{Database.BASE_CURRENCY} karşılığıdır.")
+
+    def change_reporting_currency(self):
+        try:
+            self.db.set_reporting_currency(self.reporting_currency_var.get())
+        except Exception as e:
+            self.reporting_currency_var.set(self.db.reporting_currency)
+            messagebox.showerror("❌ Hata", str(e))
+            return
+
+        self.analytics.invalidate()
+        self.show_dashboard()
+
+    def toggle_memory_mode(self):
+        if not self.memory_mode_var.get():
+            self.db.disable_memory_mode()
+            messagebox.showinfo("Bellek Modu", "Bellek modu kapatıldı, sorgular yeniden diskten okunuyor.")
+            return
+
+        try:
+            self.db.enable_memory_mode("memory")
+            report = self.db.memory_report()
+        except Exception as e:
+            self.db.disable_memory_mode()
+            self.memory_mode_var.set(False)
+            messagebox.showerror("❌ Hata", f"Bellek modu açılamadı:\n{str(e)}")
+            return
+
+        messagebox.showinfo("⚡ Bellek Modu", report)
+        self.show_dashboard()
+
+    def shutdown(self):
+        self.db.cache.unsubscribe(self.on_data_change)
+        self.jobs.shutdown()
+        self.bridge.close(self.adb.close())
+
+    def poll_jobs(self):
+        self.jobs.dispatch()
+        self.root.after(self.JOB_POLL_INTERVAL, self.poll_jobs)
+
+    def manage_jobs(self):
+        if self.jobs_window is not None and self.jobs_window.winfo_exists():
+            self.jobs_window.lift()
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("⚙️ Arka Plan İşleri")
+        window.geometry("800x320")
+        self.jobs_window = window
+
+        columns = ("İş", "Arka uç", "Durum", "İlerleme", "Süre", "Ayrıntı")
+        tree = ttk.Treeview(window, columns=columns, show="headings", height=10)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=250 if col == "Ayrıntı" else 160 if col == "İş" else 80)
+        tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+        def cancel():
+            for iid in tree.selection():
+                job = next((job for job in self.jobs.jobs if str(job.id) == iid), None)
+                if job is not None:
+                    self.jobs.cancel(job)
+
+        def clear():
+            self.jobs.clear_finished()
+            refresh(reschedule=False)
+
+        button_frame = ttk.Frame(window)
+        button_frame.pack(fill='x', padx=10, pady=(0, 10))
+        ttk.Label(button_frame, text=f"Varsayılan arka uç: {self.JOB_BACKENDS[self.jobs.backend]}").pack(side='left')
+        ttk.Button(button_frame, text="Bitenleri Temizle", command=clear).pack(side='right')
+        ttk.Button(button_frame, text="İptal Et", command=cancel).pack(side='right', padx=5)
+
+        def refresh(reschedule=True):
+            if not window.winfo_exists():
+                return
+            current = {str(job.id): job for job in self.jobs.jobs}
+            for iid in tree.get_children():
+                if iid not in current:
+                    tree.delete(iid)
+            for iid, job in current.items():
+                values = (job.name, self.JOB_BACKENDS[job.backend], job.status, f"%{job.progress * 100:.0f}",
+                          f"{job.elapsed():.1f} sn", job.error or job.message)
+                if tree.exists(iid):
+                    tree.item(iid, values=values)
+                else:
+                    tree.insert("", 0, iid=iid, values=values)
+            if reschedule:
+                window.after(500, refresh)
+
+        refresh()
+
+    def note_activity(self, event):
+        self.last_activity = time.time()
+        # maintenance gives way to the user at once and what is left runs the next time the app is idle; a run
+        # started from the status view only stops for typing, so clicking through the job list does not cancel it
+        job = self.maintenance_job
+        if job is not None and not job.done and (self.maintenance_automatic or event.type == tk.EventType.KeyPress):
+            self.jobs.cancel(job)
+
+    def schedule_maintenance(self):
+        self.root.after(self.MAINTENANCE_POLL, self.schedule_maintenance)
+        if time.time() - self.last_activity < self.MAINTENANCE_IDLE or self.jobs.running():
+            return
+        job = self.maintenance_job
+        if job is not None and job.status == Job.FAILED and job.finished > self.last_activity:
+            return
+
+        try:
+            tasks = self.db.due_maintenance()
+        except sqlite3.Error:
+            return
+        if tasks:
+            self.start_maintenance(tasks)
+
+    def start_maintenance(self, tasks=None, automatic=True):
+        def done(job):
+            if job.status == Job.FAILED and not automatic:
+                messagebox.showerror("❌ Hata", f"Bakım sırasında bir hata oluştu:\n{job.error}")
+            elif job.status == Job.DONE:
+                problems = [result for task, result, ok in job.result if not ok]
+                if problems:
+                    messagebox.showwarning("⚠️ Bütünlük Denetimi",
+                                           "Veritabanında sorun bulundu:\n" + "\n".join(problems))
+                elif not automatic:
+                    messagebox.showinfo("✅ Başarılı", "\n".join(f"{Database.MAINTENANCE_TASKS[task]}: {result}"
+                                                                 for task, result, ok in job.result))
+            if self.refresh_maintenance:
+                self.refresh_maintenance()
+
+        self.maintenance_automatic = automatic
+        self.maintenance_job = self.jobs.submit("Veritabanı bakımı", maintenance_job, os.path.abspath(self.db.db_file),
+                                                self.db.sharded, tasks, on_done=done, remote=True)
+        return self.maintenance_job
+
+    def show_maintenance(self):
+        if self.maintenance_window is not None and self.maintenance_window.winfo_exists():
+            self.maintenance_window.lift()
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("🧰 Veritabanı Bakımı")
+        window.geometry("900x460")
+        self.maintenance_window = window
+
+        columns = ("Dosya", "Boyut", "Sayfa", "Boş sayfa", "Parçalanma", "Boş alan", "Artımlı", "Son ölçüm")
+        file_tree = ttk.Treeview(window, columns=columns, show="headings", height=6)
+        for col in columns:
+            file_tree.heading(col, text=col)
+            file_tree.column(col, width=180 if col == "Dosya" else 140 if col == "Son ölçüm" else 80)
+        file_tree.pack(fill='x', padx=10, pady=(10, 5))
+
+        columns = ("Görev", "Son çalışma", "Süre", "Sonuç")
+        task_tree = ttk.Treeview(window, columns=columns, show="headings", height=3)
+        for col in columns:
+            task_tree.heading(col, text=col)
+            task_tree.column(col, width=400 if col == "Sonuç" else 150)
+        task_tree.pack(fill='both', expand=True, padx=10, pady=5)
+
+        status_var = tk.StringVar()
+        ttk.Label(window, textvariable=status_var, wraplength=860).pack(fill='x', padx=10)
+
+        def run():
+            self.start_maintenance(automatic=False)
+            self.manage_jobs()
+
+        def percent(value):
+            return "-" if value is None else f"%{value * 100:.1f}"
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            try:
+                stats, log, due = self.db.storage_stats(), self.db.get_maintenance_log(), self.db.due_maintenance()
+            except sqlite3.Error as e:
+                status_var.set(f"Bakım durumu okunamadı: {e}")
+                return
+
+            file_tree.delete(*file_tree.get_children())
+            for item in stats:
+                file_tree.insert("", "end", values=(
+                    f"{item['name']} ({item['file']})", f"{item['size'] / 1048576:.1f} MB", item["pages"],
+                    f"{item['free_pages']} ({percent(item['free_ratio'])})", percent(item["fragmentation"]),
+                    percent(item["unused"]), "Evet" if item["incremental"] else "Hayır", item["measured_at"] or "-"))
+            task_tree.delete(*task_tree.get_children())
+            for task, label in Database.MAINTENANCE_TASKS.items():
+                ran_at, seconds, result = log.get(task, ("-", None, "Henüz çalışmadı"))
+                task_tree.insert("", "end", values=(label, ran_at, "-" if seconds is None else f"{seconds:.1f} sn",
+                                                    result))
+            pending = ", ".join(Database.MAINTENANCE_TASKS[task] for task in due) or "yok"
+            status_var.set(f"Sırada bekleyen: {pending}. Bakım, program {self.MAINTENANCE_IDLE // 60} dakika boşta "
+                           f"kalınca arka planda başlar ve klavye ya da fare kullanıldığında hemen durur.")
+
+        button_frame = ttk.Frame(window)
+        button_frame.pack(fill='x', padx=10, pady=10)
+        ttk.Button(button_frame, text="Şimdi Bakım Yap", command=run).pack(side='right')
+        ttk.Button(button_frame, text="Yenile", command=refresh).pack(side='right', padx=5)
+
+        self.refresh_maintenance = refresh
+        refresh()
+
+    def draw_canvas(self, canvas):
+        started = time.perf_counter()
+        canvas.draw()
+        self.instrumentation.observe_draw(time.perf_counter() - started)
+
+    def toggle_debug_panel(self):
+        if self.debug_panel_var.get():
+            self.open_debug_panel()
+        elif self.debug_window is not None:
+            self.close_debug_panel()
+
+    def open_debug_panel(self):
+        if self.debug_window is not None:
+            self.debug_window.lift()
+            return
+
+        self.instrumentation.enabled = True
+        self.debug_panel_var.set(True)
+        window = tk.Toplevel(self.root)
+        window.title("🔍 Hata Ayıklama Paneli")
+        window.geometry("900x600")
+        window.protocol("WM_DELETE_WINDOW", self.close_debug_panel)
+        self.debug_window = window
+
+        top = ttk.Frame(window)
+        top.pack(fill='x', padx=10, pady=5)
+        summary = ttk.Label(top)
+        summary.pack(side='left')
+        ttk.Button(top, text="Sıfırla", command=self.instrumentation.reset).pack(side='right')
+
+        threshold = tk.DoubleVar(value=self.instrumentation.slow_query_ms)
+
+        def set_threshold(*_):
+            try:
+                self.instrumentation.slow_query_ms = max(0, threshold.get())
+            except tk.TclError:
+                pass
+
+        threshold.trace_add("write", set_threshold)
+        ttk.Spinbox(top, from_=0, to=10000, increment=10, width=7,
+                    textvariable=threshold).pack(side='right', padx=5)
+        ttk.Label(top, text="Yavaş sorgu eşiği (ms):").pack(side='right')
+
+        paned = ttk.PanedWindow(window, orient='vertical')
+        paned.pack(fill='both', expand=True, padx=10, pady=5)
+
+        columns = ("Tür", "Ad", "Çağrı", "Toplam ms", "Ort ms", "p95 ms", "Maks ms", "Satır", "Hata")
+        table_frame = ttk.Frame(paned)
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=160 if col == "Ad" else 80, anchor='w' if col in ("Tür", "Ad") else 'e')
+        scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+        paned.add(table_frame, weight=3)
+
+        slow_frame = ttk.LabelFrame(paned, text="Yavaş Sorgular")
+        slow_text = tk.Text(slow_frame, height=12, wrap='none', font=('Courier', 9))
+        slow_text.pack(fill='both', expand=True)
+        paned.add(slow_frame, weight=2)
+
+        def refresh():
+            if self.debug_window is not window:
+                return
+            rows, connections, slow_queries = self.instrumentation.snapshot()
+            port = self.instrumentation.exporter_port
+            cache = self.db.cache.stats()
+            summary.config(text=f"Açılan bağlantı: {connections}   Yavaş sorgu: {len(slow_queries)}   "
+                                f"Önbellek: {cache['entries']}/{cache['size']}, {cache['hits']} isabet, "
+                                f"{cache['misses']} ıska, {cache['evictions']} çıkarma, "
+                                f"{cache['invalidations']} geçersiz" +
+                                (f"   Prometheus: 127.0.0.1:{port}/metrics" if port else ""))
+            tree.delete(*tree.get_children())
+            for kind, name, calls, total, average, p95, peak, returned, errors in rows:
+                tree.insert("", "end", values=(kind, name, calls, f"{total:.1f}", f"{average:.2f}",
+                                               f"{p95:.1f}", f"{peak:.1f}", returned, errors))
+            slow_text.delete("1.0", "end")
+            slow_text.insert("end", "\n\n".join(Instrumentation.format_slow_query(entry)
+                                                  for entry in reversed(slow_queries)))
+            window.after(1000, refresh)
+
+        refresh()
+
+    def close_debug_panel(self):
+        if self.debug_window is not None:
+            self.debug_window.destroy()
+            self.debug_window = None
+        self.debug_panel_var.set(False)
+        if self.instrumentation.exporter_port is None:
+            self.instrumentation.enabled = False
+
+    def run_recurring(self):
+        try:
+            created = self.db.run_recurring()
+        except Exception as e:
+            created = []
+            messagebox.showerror("❌ Hata", f"Tekrarlayan işlemler oluşturulamadı:\n{str(e)}")
+
+        if created:
+            self.analytics.note_change(created[0])
+        return created
+
+    def schedule_recurring(self):
+        self.run_recurring()
+        self.root.after(self.RECURRING_INTERVAL, self.schedule_recurring)
+
     def clear_frame(self):
+        self.dashboard_visible = False
+        self.dashboard_panels = {}
+        self.refresh_transactions = None
         for widget in self.main_frame.winfo_children():
             widget.destroy()
 
     def show_dashboard(self):
         self.clear_frame()
+        self.dashboard_visible = True
+        self.dashboard_request += 1
+        self.dashboard_generation = self.db.cache.generation
+        ttk.Label(self.main_frame, text="Pano yükleniyor...").pack(pady=20)
+        self.bridge.run(self.load_dashboard(self.dashboard_request))
+
+    async def load_dashboard(self, request, panels=None):
+        try:
+            data = await self.report_data.dashboard_async(self.adb, panels)
+        except Exception as e:
+            messagebox.showerror("❌ Hata", f"Pano yüklenemedi:\n{str(e)}")
+            return
+        # another screen, or a newer dashboard, may have replaced this one while the queries were running
+        if not self.dashboard_visible or request != self.dashboard_request:
+            return
+        if panels is None:
+            self.render_dashboard(data)
+        else:
+            for panel in panels:
+                self.render_panel(panel, data)
+
+    def on_data_change(self, event):
+        if event.start and "transactions" in event.tables:
+            self.analytics.note_change(event.start)
+        # writes may run on the async writer thread; the bridge hands the event over to the Tk thread
+        self.bridge.loop.call_soon_threadsafe(self.refresh_dashboard, event)
+
+    def refresh_dashboard(self, event):
+        # a dashboard loaded after the write was published already shows it
+        if not self.dashboard_visible or event.generation <= self.dashboard_generation:
+            return
+        panels = self.report_data.dashboard_changes(event)
+        if not panels:
+            return
+        if not self.dashboard_panels:
+            # still loading, and the queries in flight may have read the data before this write
+            self.show_dashboard()
+            return
+        self.bridge.run(self.load_dashboard(self.dashboard_request, panels))
+
+    def render_dashboard(self, data):
+        self.clear_frame()
+        self.dashboard_visible = True
 
         main_paned = ttk.PanedWindow(self.main_frame, orient=tk.VERTICAL)
         main_paned.pack(fill=tk.BOTH, expand=True)
@@ -225,7 +685,36 @@ class FinanceTracker:
         top_frame = tk.Frame(main_paned, bg=self.colors['light'])
         main_paned.add(top_frame, weight=1)
 
-        header_frame = tk.Frame(top_frame, bg=self.colors['primary'], height=80)
+        bottom_frame = tk.Frame(main_paned, bg=self.colors['light'])
+        main_paned.add(bottom_frame, weight=3)
+
+        self.dashboard_panels = {panel: tk.Frame(top_frame, bg=self.colors['light'])
+                                 for panel in ('summary', 'budgets', 'anomalies')}
+        for frame in self.dashboard_panels.values():
+            frame.pack(fill=tk.X)
+        self.dashboard_panels['charts'] = bottom_frame
+
+        for panel in self.dashboard_panels:
+            self.render_panel(panel, data)
+
+    def render_panel(self, panel, data):
+        parent = self.dashboard_panels[panel]
+        for widget in parent.winfo_children():
+            widget.destroy()
+
+        if panel == 'summary':
+            self.create_summary_cards(parent, data)
+        elif panel == 'budgets':
+            self.create_budget_bars(parent, data['budgets'])
+        elif panel == 'anomalies':
+            self.create_anomaly_list(parent, data['anomalies'])
+        else:
+            charts_paned = ttk.PanedWindow(parent, orient=tk.HORIZONTAL)
+            charts_paned.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            self.create_resizable_charts(charts_paned, data)
+
+    def create_summary_cards(self, parent, data):
+        header_frame = tk.Frame(parent, bg=self.colors['primary'], height=80)
         header_frame.pack(fill=tk.X)
         header_frame.pack_propagate(False)
 
@@ -234,27 +723,22 @@ class FinanceTracker:
                  bg=self.colors['primary'],
                  fg='white').pack(side=tk.LEFT, padx=30, pady=20)
 
-        balance = self.db.get_balance()
+        balance = data['balance']
         balance_color = self.colors['success'] if balance >= 0 else self.colors['danger']
 
-        tk.Label(header_frame, text=f"💰 Balance: T{balance:,.2f}",
+        tk.Label(header_frame, text=f"💰 Balance: {self.money(balance)}",
                  font=('Segoe UI', 20, 'bold'),
                  bg=self.colors['primary'],
                  fg=balance_color).pack(side=tk.RIGHT, padx=30, pady=20)
 
-        stats_container = tk.Frame(top_frame, bg=self.colors['light'])
+        stats_container = tk.Frame(parent, bg=self.colors['light'])
         stats_container.pack(fill=tk.X, padx=20, pady=15)
 
-        total_income = self.db.get_total_income()
-        total_expenses = self.db.get_total_expenses()
-        monthly_income = self.db.get_monthly_income()
-        monthly_expenses = self.db.get_monthly_expenses()
-
         stats_data = [
-            ("📈", "Toplam Gelir", f"T{total_income:,.2f}", self.colors['success']),
-            ("📉", "Toplam Gider", f"T{total_expenses:,.2f}", self.colors['danger']),
-            ("📅", "Aylık Gelir", f"T{monthly_income:,.2f}", self.colors['secondary']),
-            ("💸", "Aylık Gider", f"T{monthly_expenses:,.2f}", self.colors['warning'])
+            ("📈", "Toplam Gelir", self.money(data['income']), self.colors['success']),
+            ("📉", "Toplam Gider", self.money(data['expenses']), self.colors['danger']),
+            ("📅", "Aylık Gelir", self.money(data['monthly_income']), self.colors['secondary']),
+            ("💸", "Aylık Gider", self.money(data['monthly_expenses']), self.colors['warning'])
         ]
 
         for i, (icon, title, value, color) in enumerate(stats_data):
@@ -269,18 +753,69 @@ class FinanceTracker:
             tk.Label(card, text=value, font=('Segoe UI', 18, 'bold'),
                      bg='white', fg=color).pack(pady=(5, 15))
 
-        bottom_frame = tk.Frame(main_paned, bg=self.colors['light'])
-        main_paned.add(bottom_frame, weight=3)
+    def create_budget_bars(self, parent, budgets):
+        if not budgets:
+            return
 
-        charts_paned = ttk.PanedWindow(bottom_frame, orient=tk.HORIZONTAL)
-        charts_paned.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        budget_container = tk.Frame(parent, bg='white', relief='solid', bd=1)
+        budget_container.pack(fill=tk.X, padx=30, pady=(0, 15))
+
+        tk.Label(budget_container, text="🎯 Bütçeler",
+                 font=('Segoe UI', 12, 'bold'),
+                 bg='white', fg=self.colors['primary']).grid(row=0, column=0, sticky='w', padx=15, pady=(10, 5))
+        budget_container.grid_columnconfigure(1, weight=1)
+
+        for i, (category, period, limit, spent, block) in enumerate(budgets, start=1):
+            ratio = spent / limit if limit else 0
+            style = 'Over' if ratio > 1 else 'Near' if ratio >= 0.8 else 'Budget'
+
+            tk.Label(budget_container, text=f"{category} ({self.budget_periods[period]})",
+                     font=('Segoe UI', 10), bg='white',
+                     fg=self.colors['dark']).grid(row=i, column=0, sticky='w', padx=15, pady=3)
+            ttk.Progressbar(budget_container, maximum=limit, value=min(spent, limit),
+                            style=f'{style}.Horizontal.TProgressbar').grid(row=i, column=1, sticky='ew', pady=3)
+            usage = f"{self.money(spent, Database.BASE_CURRENCY)} / {self.money(limit, Database.BASE_CURRENCY)}"
+            tk.Label(budget_container, text=usage + (" ⛔" if block else ""),
+                     font=('Segoe UI', 10, 'bold'), bg='white',
+                     fg=self.colors['danger'] if ratio > 1 else self.colors['dark']).grid(row=i, column=2, sticky='e',
+                                                                                         padx=15, pady=3)
+
+    def create_anomaly_list(self, parent, anomalies):
+        if not anomalies:
+            return
+
+        anomaly_container = tk.Frame(parent, bg='white', relief='solid', bd=1)
+        anomaly_container.pack(fill=tk.X, padx=30, pady=(0, 15))
+
+        tk.Label(anomaly_container, text="⚠️ Olağandışı Harcamalar (son 30 gün)",
+                 font=('Segoe UI', 12, 'bold'),
+                 bg='white', fg=self.colors['danger']).pack(anchor='w', padx=15, pady=(10, 5))
+
+        for trans_id, date, category, amount, score in anomalies:
+            amount = self.money(amount, Database.BASE_CURRENCY)
+            tk.Label(anomaly_container, text=f"{date}  •  {category}  •  {amount}  •  skor {score:.1f}",
+                     font=('Segoe UI', 10), bg='white',
+                     fg=self.colors['dark']).pack(anchor='w', padx=15, pady=2)
 
-        self.create_resizable_charts(charts_paned)
+    def rescore_anomalies(self):
+        def done(job):
+            if job.status == Job.FAILED:
+                messagebox.showerror("❌ Hata", f"Anomaliler hesaplanamadı:\n{job.error}")
+            elif job.status == Job.DONE:
+                self.db.reload_memory()
+                messagebox.showinfo("✅ Başarılı",
+                                    f"Tüm harcamalar yeniden puanlandı, {job.result} olağandışı işlem bulundu.")
+                if self.dashboard_visible:
+                    self.show_dashboard()
 
-    def create_resizable_charts(self, parent_paned):
+        self.jobs.submit("Anomalileri yeniden puanla", rescore_anomalies_job, os.path.abspath(self.db.db_file),
+                         self.db.sharded, on_done=done, remote=True)
+        self.manage_jobs()
 
-        expense_data = self.db.get_expenses_by_category()
-        monthly_data = self.db.get_monthly_summary()
+    def create_resizable_charts(self, parent_paned, data):
+
+        monthly_data = data['monthly']
+        expense_data = data['categories']
 
         if not monthly_data or len(monthly_data) == 0:
             no_data_label = tk.Label(parent_paned, text="Veri yok. Grafik görmek için işlem ekleyin!",
@@ -296,20 +831,42 @@ class FinanceTracker:
 
         self.create_left_charts(left_frame, expense_data, monthly_data)
 
-        self.create_right_charts(right_frame, monthly_data)
+        self.create_right_charts(right_frame, monthly_data, data['forecast'])
 
-    def create_left_charts(self, parent, expense_data, monthly_data):
+    def create_left_charts(self, parent, expense_data, monthly_data, drill=None):
 
         fig = Figure(figsize=(8, 10), facecolor='white')
 
         colors_pie = ['#e74c3c', '#3498db', '#f39c12', '#2ecc71', '#9b59b6', '#1abc9c', '#e67e22', '#34495e']
+        categories, amounts = [], []
+        parents = {name: parent_name for name, parent_name, _ in self.db.get_category_tree()}
+        drillable = set(parents.values())
+
+        def show_subtree(category):
+            for widget in parent.winfo_children():
+                widget.destroy()
+            self.create_left_charts(parent, self.report_data.category_breakdown(monthly_data, category),
+                                    monthly_data, category)
+
+        if drill:
+            up = parents.get(drill)
+            tk.Button(parent, text=f"⬆ {up or 'Tüm kategoriler'}",
+                      command=lambda: show_subtree(up),
+                      bg=self.colors['secondary'],
+                      fg='white',
+                      font=('Segoe UI', 10, 'bold'),
+                      relief='flat',
+                      cursor='hand2',
+                      padx=15, pady=5).pack(anchor='w', padx=10, pady=(10, 0))
 
         if expense_data:
             ax1 = fig.add_subplot(2, 1, 1)
-            categories = [item[0] for item in expense_data[:8]]
-            amounts = [abs(item[1]) for item in expense_data[:8]]
+            categories = [item[0] for item in expense_data]
+            amounts = [abs(item[1]) for item in expense_data]
+            labels = [f"{category} ▸" if category in drillable and category != drill else category
+                      for category in categories]
 
-            wedges, texts, autotexts = ax1.pie(amounts, labels=categories, autopct='%1.1f%%',
+            wedges, texts, autotexts = ax1.pie(amounts, labels=labels, autopct='%1.1f%%',
                                                startangle=90, colors=colors_pie[:len(categories)],
                                                wedgeprops=dict(width=0.5, edgecolor='white', linewidth=2),
                                                textprops={'fontsize': 10, 'weight': 'bold'})
@@ -317,7 +874,9 @@ class FinanceTracker:
             for autotext in autotexts:
                 autotext.set_color('white')
 
-            ax1.set_title('Kategoriye Göre Giderler', fontsize=14, weight='bold', pad=15)
+            ax1.set_title(f'Kategoriye Göre Giderler{f" › {drill}" if drill else ""} '
+                          f'({monthly_data[0][0]} – {monthly_data[-1][0]})',
+                          fontsize=14, weight='bold', pad=15)
 
             ax2 = fig.add_subplot(2, 1, 2)
             y_pos = np.arange(len(categories))
@@ -327,7 +886,7 @@ class FinanceTracker:
 
             ax2.set_yticks(y_pos)
             ax2.set_yticklabels(categories, fontsize=10)
-            ax2.set_xlabel('Tutar (T)', fontsize=11, weight='bold')
+            ax2.set_xlabel(f'Tutar ({self.symbol()})', fontsize=11, weight='bold')
             ax2.set_title('En Çok Harcanan Kategoriler', fontsize=14, weight='bold', pad=15)
             ax2.grid(True, alpha=0.3, axis='x', linestyle='--')
             ax2.set_facecolor('#f8f9fa')
@@ -335,29 +894,43 @@ class FinanceTracker:
             for i, (bar, value) in enumerate(zip(bars, amounts)):
                 width = bar.get_width()
                 ax2.text(width, bar.get_y() + bar.get_height() / 2.,
-                         f'T{value:,.0f}',
+                         self.money(value, decimals=0),
                          ha='left', va='center', fontsize=9, weight='bold')
 
         fig.tight_layout(pad=2.0)
 
         canvas = FigureCanvasTkAgg(fig, master=parent)
-        canvas.draw()
+        self.draw_canvas(canvas)
         canvas_widget = canvas.get_tk_widget()
         canvas_widget.pack(fill=tk.BOTH, expand=True)
 
         data_dict = {cat: amt for cat, amt in zip(categories, amounts)}
         self.add_category_tooltip(canvas, fig, data_dict)
 
-    def create_right_charts(self, parent, monthly_data):
+        def on_click(event):
+            for category, wedge, bar in zip(categories, wedges, bars):
+                if category in drillable and category != drill and (wedge.contains(event)[0] or
+                                                                    bar.contains(event)[0]):
+                    parent.after_idle(show_subtree, category)
+                    return
+
+        if expense_data:
+            canvas.mpl_connect('button_press_event', on_click)
+
+    def create_right_charts(self, parent, monthly_data, forecast):
 
         fig = Figure(figsize=(8, 10), facecolor='white')
 
-        months = [item[0] for item in monthly_data[-6:]]
-        income = [item[1] for item in monthly_data[-6:]]
-        expenses = [abs(item[2]) for item in monthly_data[-6:]]
+        months = [item[0] for item in monthly_data]
+        income = [item[1] for item in monthly_data]
+        expenses = [abs(item[2]) for item in monthly_data]
 
         x = np.arange(len(months))
 
+        forecast_months = forecast['months'] if forecast else []
+        forecast_x = np.arange(len(months), len(months) + len(forecast_months))
+        all_months = months + [f"{month}*" for month in forecast_months]
+
         ax1 = fig.add_subplot(2, 1, 1)
         ax1.plot(x, income, marker='o', linewidth=3, markersize=8,
                  color=self.colors['success'], label='Gelir', linestyle='-')
@@ -367,10 +940,17 @@ class FinanceTracker:
                  color=self.colors['danger'], label='Gider', linestyle='-')
         ax1.fill_between(x, expenses, alpha=0.3, color=self.colors['danger'])
 
-        ax1.set_xticks(x)
-        ax1.set_xticklabels(months, rotation=45, ha='right', fontsize=9)
+        if forecast:
+            ax1.plot(np.append(x[-1], forecast_x), np.append(income[-1], forecast['income']),
+                     marker='o', linewidth=2, markersize=5, color=self.colors['success'],
+                     linestyle='--', label='Tahmin')
+            ax1.plot(np.append(x[-1], forecast_x), np.append(expenses[-1], forecast['expenses']),
+                     marker='s', linewidth=2, markersize=5, color=self.colors['danger'], linestyle='--')
+
+        ax1.set_xticks(np.append(x, forecast_x))
+        ax1.set_xticklabels(all_months, rotation=45, ha='right', fontsize=9)
         ax1.set_title('Gelir ve Gider eğilimi', fontsize=14, weight='bold', pad=15)
-        ax1.set_ylabel('Tatur (T)', fontsize=11, weight='bold')
+        ax1.set_ylabel(f'Tatur ({self.symbol()})', fontsize=11, weight='bold')
         ax1.legend(loc='upper left', framealpha=0.9, fontsize=10)
         ax1.grid(True, alpha=0.3, linestyle='--')
         ax1.set_facecolor('#f8f9fa')
@@ -385,29 +965,33 @@ class FinanceTracker:
         for i, (bar, value) in enumerate(zip(bars, net)):
             height = bar.get_height()
             ax2.text(bar.get_x() + bar.get_width() / 2., height,
-                     f'T{value:,.0f}',
+                     self.money(value, decimals=0),
                      ha='center', va='bottom' if value >= 0 else 'top',
                      fontsize=9, weight='bold')
 
-        ax2.set_xticks(x)
-        ax2.set_xticklabels(months, rotation=45, ha='right', fontsize=9)
+        if forecast:
+            ax2.bar(forecast_x, forecast['net'], fill=False, linestyle='--', linewidth=1.5,
+                    edgecolor=[self.colors['success'] if n >= 0 else self.colors['danger'] for n in forecast['net']])
+
+        ax2.set_xticks(np.append(x, forecast_x))
+        ax2.set_xticklabels(all_months, rotation=45, ha='right', fontsize=9)
         ax2.set_title('Net Tasarruf', fontsize=14, weight='bold', pad=15)
-        ax2.set_ylabel('Tutar (T)', fontsize=11, weight='bold')
+        ax2.set_ylabel(f'Tutar ({self.symbol()})', fontsize=11, weight='bold')
         ax2.grid(True, alpha=0.3, axis='y', linestyle='--')
         ax2.set_facecolor('#f8f9fa')
 
         fig.tight_layout(pad=2.0)
 
         canvas = FigureCanvasTkAgg(fig, master=parent)
-        canvas.draw()
+        self.draw_canvas(canvas)
         canvas_widget = canvas.get_tk_widget()
         canvas_widget.pack(fill=tk.BOTH, expand=True)
 
         data_dict = {
-            'months': months,
-            'income': income,
-            'expenses': expenses,
-            'net': net
+            'months': all_months,
+            'income': income + (list(forecast['income']) if forecast else []),
+            'expenses': expenses + (list(forecast['expenses']) if forecast else []),
+            'net': net + (list(forecast['net']) if forecast else [])
         }
         self.add_monthly_tooltip(canvas, fig, data_dict)
 
@@ -434,7 +1018,7 @@ class FinanceTracker:
                         category = categories[idx]
                         amount = data_dict[category]
 
-                        tooltip_text = f"🏷 {category}\n💰 T{amount:,.2f}"
+                        tooltip_text = f"🏷 {category}\n💰 {self.money(amount)}"
                         tooltip.config(text=tooltip_text)
 
                         canvas_x = event.x + 20
@@ -481,9 +1065,9 @@ class FinanceTracker:
                         net_val = net[idx]
 
                         tooltip_text = f"📅 {month}\n"
-                        tooltip_text += f"📈 Gelir: T{inc:,.2f}\n"
-                        tooltip_text += f"📉 Gedirler: T{exp:,.2f}\n"
-                        tooltip_text += f"💰 Net: T{net_val:,.2f}"
+                        tooltip_text += f"📈 Gelir: {self.money(inc)}\n"
+                        tooltip_text += f"📉 Gedirler: {self.money(exp)}\n"
+                        tooltip_text += f"💰 Net: {self.money(net_val)}"
 
                         tooltip.config(text=tooltip_text)
 
@@ -503,8 +1087,8 @@ class FinanceTracker:
         canvas.mpl_connect('axes_leave_event', on_leave)
 
     def create_expense_chart(self):
-        expense_data = self.db.get_expenses_by_category()
-        monthly_data = self.db.get_monthly_summary()
+        expense_data = self.db.get_expenses_by_category(limit=ReportData.TOP_CATEGORIES)
+        monthly_data = self.db.get_monthly_summary(limit=ReportData.DASHBOARD_MONTHS)
 
         if not expense_data and not monthly_data:
             return
@@ -530,9 +1114,9 @@ class FinanceTracker:
 
         if monthly_data and len(monthly_data) > 0:
             ax2 = fig.add_subplot(2, 3, 2)
-            months = [item[0] for item in monthly_data[-6:]]
-            income = [item[1] for item in monthly_data[-6:]]
-            expenses = [abs(item[2]) for item in monthly_data[-6:]]
+            months = [item[0] for item in monthly_data]
+            income = [item[1] for item in monthly_data]
+            expenses = [abs(item[2]) for item in monthly_data]
 
             x = np.arange(len(months))
             ax2.plot(x, income, marker='o', linewidth=2.5, markersize=7,
@@ -546,7 +1130,7 @@ class FinanceTracker:
             ax2.set_xticks(x)
             ax2.set_xticklabels(months, rotation=45, ha='right', fontsize=8)
             ax2.set_title('Gelir ve Gider Eğilimi', fontsize=12, weight='bold', pad=15)
-            ax2.set_ylabel('Tutar (T)', fontsize=9)
+            ax2.set_ylabel(f'Tutar ({self.symbol()})', fontsize=9)
             ax2.legend(loc='upper left', framealpha=0.9, fontsize=8)
             ax2.grid(True, alpha=0.3, linestyle='--')
             ax2.set_facecolor('#f8f9fa')
@@ -561,7 +1145,7 @@ class FinanceTracker:
             ax3.set_xticks(x)
             ax3.set_xticklabels(months, rotation=45, ha='right', fontsize=8)
             ax3.set_title('Aylık Karşılaştırma', fontsize=12, weight='bold', pad=15)
-            ax3.set_ylabel('Tutar (T)', fontsize=9)
+            ax3.set_ylabel(f'Tutar ({self.symbol()})', fontsize=9)
             ax3.legend(framealpha=0.9, fontsize=8)
             ax3.grid(True, alpha=0.3, axis='y', linestyle='--')
             ax3.set_facecolor('#f8f9fa')
@@ -576,14 +1160,14 @@ class FinanceTracker:
             for i, (bar, value) in enumerate(zip(bars, net)):
                 height = bar.get_height()
                 ax4.text(bar.get_x() + bar.get_width() / 2., height,
-                         f'T{value:,.0f}',
+                         self.money(value, decimals=0),
                          ha='center', va='bottom' if value >= 0 else 'top',
                          fontsize=7, weight='bold')
 
             ax4.set_xticks(x)
             ax4.set_xticklabels(months, rotation=45, ha='right', fontsize=8)
             ax4.set_title('💰 Net Tasarruf', fontsize=12, weight='bold', pad=15)
-            ax4.set_ylabel('Tutar (T)', fontsize=9)
+            ax4.set_ylabel(f'Tutar ({self.symbol()})', fontsize=9)
             ax4.grid(True, alpha=0.3, axis='y', linestyle='--')
             ax4.set_facecolor('#f8f9fa')
 
@@ -599,7 +1183,7 @@ class FinanceTracker:
 
                 ax5.set_yticks(y_pos)
                 ax5.set_yticklabels(categories_top, fontsize=8)
-                ax5.set_xlabel('Tutar (T)', fontsize=9)
+                ax5.set_xlabel(f'Tutar ({self.symbol()})', fontsize=9)
                 ax5.set_title('En Popüler Kategoriler', fontsize=12, weight='bold', pad=15)
                 ax5.grid(True, alpha=0.3, axis='x', linestyle='--')
                 ax5.set_facecolor('#f8f9fa')
@@ -607,7 +1191,7 @@ class FinanceTracker:
                 for i, (bar, value) in enumerate(zip(bars, amounts_top)):
                     width = bar.get_width()
                     ax5.text(width, bar.get_y() + bar.get_height() / 2.,
-                             f'T{value:,.0f}',
+                             self.money(value, decimals=0),
                              ha='left', va='center', fontsize=7, weight='bold')
 
             ax6 = fig.add_subplot(2, 3, 6)
@@ -625,7 +1209,7 @@ class FinanceTracker:
             ax6.set_xticks(x)
             ax6.set_xticklabels(months, rotation=45, ha='right', fontsize=8)
             ax6.set_title('Kümülatif Analiz', fontsize=12, weight='bold', pad=15)
-            ax6.set_ylabel('Tutar (T)', fontsize=9)
+            ax6.set_ylabel(f'Tutar ({self.symbol()})', fontsize=9)
             ax6.legend(loc='upper left', framealpha=0.9, fontsize=8)
             ax6.grid(True, alpha=0.3, linestyle='--')
             ax6.set_facecolor('#f8f9fa')
@@ -633,7 +1217,7 @@ class FinanceTracker:
         fig.tight_layout(pad=2.5)
 
         canvas = FigureCanvasTkAgg(fig, master=self.main_frame)
-        canvas.draw()
+        self.draw_canvas(canvas)
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
     def show_add_transaction(self, trans_type):
@@ -694,10 +1278,19 @@ class FinanceTracker:
         amount_container = tk.Frame(amount_frame, bg='#ecf0f1', relief='flat', bd=1)
         amount_container.pack(fill=tk.X)
 
-        tk.Label(amount_container, text="T",
-                 font=('Segoe UI', 20, 'bold'),
-                 bg='#ecf0f1',
-                 fg=self.colors['primary']).pack(side=tk.LEFT, padx=(15, 10))
+        currency_var = tk.StringVar(value=Database.BASE_CURRENCY)
+        symbol_label = tk.Label(amount_container, text=self.symbol(Database.BASE_CURRENCY),
+                                font=('Segoe UI', 20, 'bold'),
+                                bg='#ecf0f1',
+                                fg=self.colors['primary'])
+        symbol_label.pack(side=tk.LEFT, padx=(15, 10))
+
+        currency_dropdown = ttk.Combobox(amount_container, textvariable=currency_var,
+                                         values=self.db.get_currencies(), state="readonly",
+                                         font=('Segoe UI', 14), width=5)
+        currency_dropdown.pack(side=tk.RIGHT, padx=(0, 15))
+        currency_dropdown.bind('<<ComboboxSelected>>',
+                               lambda e: symbol_label.config(text=self.symbol(currency_var.get())))
 
         amount_var = tk.DoubleVar()
         amount_entry = tk.Entry(amount_container, textvariable=amount_var,
@@ -748,6 +1341,25 @@ class FinanceTracker:
                                      bd=0)
         description_entry.pack(fill=tk.X, pady=15, padx=15)
 
+        tags_frame = tk.Frame(right_column, bg='white')
+        tags_frame.pack(fill=tk.X, pady=15)
+
+        tk.Label(tags_frame, text="🔖 Etiketler (virgülle ayırın)",
+                 font=('Segoe UI', 14, 'bold'),
+                 bg='white',
+                 fg=self.colors['dark']).pack(anchor='w', pady=(0, 10))
+
+        tags_container = tk.Frame(tags_frame, bg='#ecf0f1', relief='flat', bd=1)
+        tags_container.pack(fill=tk.X)
+
+        tags_var = tk.StringVar()
+        tk.Entry(tags_container, textvariable=tags_var,
+                 font=('Segoe UI', 14),
+                 bg='#ecf0f1',
+                 fg=self.colors['dark'],
+                 relief='flat',
+                 bd=0).pack(fill=tk.X, pady=15, padx=15)
+
         date_frame = tk.Frame(right_column, bg='white')
         date_frame.pack(fill=tk.X, pady=15)
 
@@ -772,6 +1384,7 @@ class FinanceTracker:
                 category = category_var.get()
                 description = description_var.get()
                 date = date_entry.get_date().strftime("%Y-%m-%d")
+                currency = currency_var.get() or Database.BASE_CURRENCY
 
                 if not amount or amount <= 0:
                     messagebox.showerror("Hata", "Lütfen geçerli bir tutar girin!")
@@ -781,18 +1394,46 @@ class FinanceTracker:
                     messagebox.showerror("Hata", "Lütfen bir kategori seçin!")
                     return
 
-                self.db.add_transaction(
+                try:
+                    tags = Database.split_tags(tags_var.get())
+                except ValueError as e:
+                    messagebox.showerror("❌ Hata", str(e))
+                    return
+
+                overruns = self.db.check_budget(trans_type, amount, category, date, currency)
+                if overruns:
+                    details = "\n".join(f"{name} – {self.budget_periods[period]} bütçe: "
+                                        f"{self.money(spent, Database.BASE_CURRENCY)} / "
+                                        f"{self.money(limit, Database.BASE_CURRENCY)}"
+                                        for name, period, limit, spent, block in overruns)
+                    names = "', '".join(dict.fromkeys(name for name, period, limit, spent, block in overruns))
+                    if any(block for name, period, limit, spent, block in overruns):
+                        messagebox.showerror("⛔ Bütçe Aşımı",
+                                             f"Bu işlem '{names}' bütçesini aşıyor ve engellendi.\n\n{details}")
+                        return
+                    if not messagebox.askyesno("⚠️ Bütçe Uyarısı",
+                                               f"Bu işlem '{names}' bütçesini aşacak.\n\n{details}\n\n"
+                                               f"Yine de kaydedilsin mi?"):
+                        return
+
+                trans_id = self.db.add_transaction(
                     trans_type=trans_type,
                     amount=amount,
                     category=category,
                     description=description,
-                    date=date
+                    date=date,
+                    currency=currency,
+                    tags=tags
                 )
+                self.analytics.note_change(date)
 
+                score = self.db.get_anomaly(trans_id)
                 messagebox.showinfo("✅ Success",
-                                    f"{trans_type} of T{amount:,.2f} added successfully!\n\n"
+                                    f"{trans_type} of {self.money(amount, currency)} added successfully!\n\n"
                                     f"Category: {category}\n"
-                                    f"Date: {date}")
+                                    f"Date: {date}" +
+                                    (f"\n\n⚠️ Bu tutar '{category}' için olağandışı (skor {score:.1f})."
+                                     if score is not None else ""))
                 self.show_dashboard()
             except ValueError as e:
                 messagebox.showerror("❌ Hata", "Please enter a valid amount!")
@@ -855,7 +1496,31 @@ class FinanceTracker:
         to_date_var = tk.StringVar()
         ttk.Entry(filter_frame, textvariable=to_date_var, width=10).pack(side=tk.LEFT, padx=5)
 
-        columns = ("ID", "Date", "Type", "Category", "Amount", "Description")
+        include_archive_var = tk.BooleanVar()
+        ttk.Checkbutton(filter_frame, text="Arşiv dahil",
+                        variable=include_archive_var).pack(side=tk.LEFT, padx=5)
+
+        search_frame = ttk.Frame(self.main_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+
+        ttk.Label(search_frame, text="Ara:").pack(side=tk.LEFT, padx=5)
+        search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=search_var, width=40)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind('<Return>', lambda e: load_transactions())
+        ttk.Label(search_frame, text='Açıklama ve kategori içinde; "tam ifade", önek*',
+                  foreground='gray').pack(side=tk.LEFT, padx=5)
+        ttk.Label(search_frame, text="Etiket:").pack(side=tk.LEFT, padx=(15, 5))
+        tags_var = tk.StringVar()
+        tags_entry = ttk.Entry(search_frame, textvariable=tags_var, width=25)
+        tags_entry.pack(side=tk.LEFT, padx=5)
+        tags_entry.bind('<Return>', lambda e: load_transactions())
+        ttk.Label(search_frame, text="VE, VEYA, DEĞİL, -etiket, ( )",
+                  foreground='gray').pack(side=tk.LEFT, padx=5)
+        status_var = tk.StringVar()
+        ttk.Label(search_frame, textvariable=status_var).pack(side=tk.RIGHT, padx=10)
+
+        columns = ("ID", "Date", "Type", "Category", "Amount", "Description", "Currency", "Etiketler")
         tree = ttk.Treeview(self.main_frame, columns=columns, show="headings", height=20)
 
         for col in columns:
@@ -864,41 +1529,95 @@ class FinanceTracker:
 
         tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        actions = ttk.Frame(self.main_frame)
+        actions.pack(fill=tk.X, padx=10)
+
+        def selected_ids():
+            return [int(tree.item(item, "values")[0]) for item in tree.selection()]
+
+        def edit_selected(event=None):
+            ids = selected_ids()
+            if len(ids) != 1:
+                messagebox.showerror("❌ Hata", "Lütfen düzenlemek için tek bir işlem seçin!")
+                return
+            self.edit_transaction(ids[0])
+
+        def delete_selected():
+            ids = selected_ids()
+            if not ids:
+                messagebox.showerror("❌ Hata", "Lütfen silinecek işlemleri seçin!")
+                return
+            if not messagebox.askyesno("🗑️ Sil",
+                                       f"{len(ids)} işlem silinsin mi?\n\nGeri Al (Ctrl+Z) ile geri alınabilir."):
+                return
+            try:
+                self.db.delete_transactions(ids)
+            except ValueError as e:
+                messagebox.showerror("❌ Hata", str(e))
+                return
+            load_transactions()
+
+        def recategorize_selected():
+            ids = selected_ids()
+            if not ids:
+                messagebox.showerror("❌ Hata", "Lütfen kategorisi değişecek işlemleri seçin!")
+                return
+            self.recategorize_dialog(ids)
+
+        def tag_selected():
+            ids = selected_ids()
+            if not ids:
+                messagebox.showerror("❌ Hata", "Lütfen etiketlenecek işlemleri seçin!")
+                return
+            self.tag_dialog(ids)
+
+        ttk.Button(actions, text="✏️ Düzenle", command=edit_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(actions, text="🗑️ Sil", command=delete_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(actions, text="🏷️ Kategori Değiştir",
+                   command=recategorize_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(actions, text="🔖 Etiketle", command=tag_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(actions, text="↪️ Yinele", command=self.redo_edit).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(actions, text="↩️ Geri Al", command=self.undo_edit).pack(side=tk.RIGHT, padx=5)
+        tree.bind("<Double-1>", edit_selected)
+        tree.bind("<Delete>", lambda e: delete_selected())
+
         def load_transactions():
             for item in tree.get_children():
                 tree.delete(item)
 
-            all_transactions = self.db.get_all_transactions()
-
             selected_type = type_var.get()
             selected_category = category_var.get()
             from_date = from_date_var.get().strip()
             to_date = to_date_var.get().strip()
 
-            for trans in all_transactions:
-                trans_id, trans_date, trans_type, trans_category, trans_amount, trans_desc = trans
-
-                if selected_type != "All" and trans_type != selected_type:
-                    continue
-
-                if selected_category != "All" and trans_category != selected_category:
-                    continue
-
-                if from_date:
-                    try:
-                        if trans_date < from_date:
-                            continue
-                    except:
-                        pass
-
-                if to_date:
-                    try:
-                        if trans_date > to_date:
-                            continue
-                    except:
-                        pass
+            filters = {
+                "type": selected_type,
+                "category": selected_category,
+                "start": from_date or None,
+                "end": to_date or None,
+                "include_archive": include_archive_var.get(),
+                "search": search_var.get().strip(),
+                "tags": tags_var.get().strip()
+            }
+
+            if filters["tags"]:
+                try:
+                    self.db.match_tags(filters["tags"])
+                except ValueError as e:
+                    messagebox.showerror("❌ Hata", str(e))
+                    return
 
-                tree.insert("", "end", values=trans)
+            started = time.perf_counter()
+            count = 0
+            try:
+                for rows in self.db.iter_transaction_pages(filters):
+                    tags = self.db.get_transaction_tags([trans[0] for trans in rows])
+                    for trans in rows:
+                        tree.insert("", "end", values=trans + (", ".join(tags[trans[0]]),))
+                    count += len(rows)
+            except ValueError:
+                messagebox.showerror("❌ Hata", "Tarihler YYYY-AA-GG biçiminde olmalı!")
+            status_var.set(f"{count} işlem, {(time.perf_counter() - started) * 1000:.0f} ms")
 
         def search_transactions():
             load_transactions()
@@ -910,30 +1629,210 @@ class FinanceTracker:
             category_var.set("All")
             from_date_var.set("")
             to_date_var.set("")
+            include_archive_var.set(False)
+            search_var.set("")
+            tags_var.set("")
             load_transactions()
 
         ttk.Button(filter_frame, text="Reset", command=reset_filters).pack(side=tk.LEFT, padx=5)
 
         load_transactions()
+        self.refresh_transactions = load_transactions
 
         ttk.Button(self.main_frame, text="Back to Dashboard",
                    command=self.show_dashboard).pack(pady=10)
 
-    def show_report(self, period):
-        self.clear_frame()
+    def edit_transaction(self, trans_id):
+        row = self.db.get_transaction(trans_id)
+        if row is None:
+            messagebox.showerror("❌ Hata", f"{trans_id} numaralı işlem bulunamadı (arşivlenmiş olabilir)")
+            return
+        _, date, trans_type, category, amount, description, currency = row
+        tags = self.db.get_transaction_tags([trans_id])[trans_id]
+
+        window = tk.Toplevel(self.root)
+        window.title(f"✏️ İşlemi Düzenle #{trans_id}")
+        window.transient(self.root)
+        form = ttk.Frame(window, padding=15)
+        form.pack(fill=tk.BOTH, expand=True)
+
+        type_var = tk.StringVar(value=trans_type)
+        amount_var = tk.StringVar(value=f"{amount:.2f}")
+        category_var = tk.StringVar(value=category)
+        description_var = tk.StringVar(value=description or "")
+        date_var = tk.StringVar(value=date)
+        currency_var = tk.StringVar(value=currency)
+        tags_var = tk.StringVar(value=", ".join(tags))
+        fields = (
+            ("Tür", ttk.Combobox(form, textvariable=type_var, values=["Income", "Expense"], state="readonly")),
+            ("Tutar", ttk.Entry(form, textvariable=amount_var)),
+            ("Kategori", ttk.Combobox(form, textvariable=category_var, values=self.db.get_categories(),
+                                      state="readonly")),
+            ("Açıklama", ttk.Entry(form, textvariable=description_var, width=40)),
+            ("Tarih", ttk.Entry(form, textvariable=date_var)),
+            ("Para Birimi", ttk.Combobox(form, textvariable=currency_var, values=self.db.get_currencies(),
+                                         state="readonly")),
+            ("Etiketler", ttk.Entry(form, textvariable=tags_var, width=40)),
+        )
+        for index, (label, widget) in enumerate(fields):
+            ttk.Label(form, text=f"{label}:").grid(row=index, column=0, sticky='w', pady=4)
+            widget.grid(row=index, column=1, sticky='ew', padx=(10, 0), pady=4)
+
+        def save():
+            try:
+                amount = float(amount_var.get().replace(",", "."))
+            except ValueError:
+                messagebox.showerror("❌ Hata", "Lütfen geçerli bir tutar girin!", parent=window)
+                return
+            try:
+                self.db.update_transaction(trans_id, type_var.get(), amount, category_var.get(),
+                                           description_var.get(), date_var.get().strip(), currency_var.get(),
+                                           Database.split_tags(tags_var.get()))
+            except ValueError as e:
+                messagebox.showerror("❌ Hata", str(e), parent=window)
+                return
+            window.destroy()
+            if self.refresh_transactions:
+                self.refresh_transactions()
+
+        buttons = ttk.Frame(form)
+        buttons.grid(row=len(fields), column=0, columnspan=2, sticky='e', pady=(10, 0))
+        ttk.Button(buttons, text="İptal", command=window.destroy).pack(side=tk.RIGHT)
+        ttk.Button(buttons, text="💾 Kaydet", command=save).pack(side=tk.RIGHT, padx=5)
+
+    def recategorize_dialog(self, ids):
+        window = tk.Toplevel(self.root)
+        window.title("🏷️ Kategori Değiştir")
+        window.transient(self.root)
+        ttk.Label(window, text=f"{len(ids)} işlemin yeni kategorisi:").pack(padx=15, pady=(15, 5))
+        category_var = tk.StringVar()
+        ttk.Combobox(window, textvariable=category_var, values=self.db.get_categories(),
+                     state="readonly", width=30).pack(padx=15)
 
-        ttk.Label(self.main_frame, text=f"{period} Repor",
+        def save():
+            if not category_var.get():
+                messagebox.showerror("❌ Hata", "Lütfen bir kategori seçin!", parent=window)
+                return
+            try:
+                self.db.recategorize_transactions(ids, category_var.get())
+            except ValueError as e:
+                messagebox.showerror("❌ Hata", str(e), parent=window)
+                return
+            window.destroy()
+            if self.refresh_transactions:
+                self.refresh_transactions()
+
+        ttk.Button(window, text="💾 Kaydet", command=save).pack(pady=15)
+
+    def tag_dialog(self, ids):
+        window = tk.Toplevel(self.root)
+        window.title("🔖 Etiketle")
+        window.transient(self.root)
+        form = ttk.Frame(window, padding=15)
+        form.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(form, text=f"{len(ids)} işlem için etiketler (virgülle ayırın):").grid(row=0, column=0, columnspan=2,
+                                                                                      sticky='w', pady=(0, 8))
+        add_var, remove_var = tk.StringVar(), tk.StringVar()
+        for index, (label, variable) in enumerate((("Ekle", add_var), ("Çıkar", remove_var)), start=1):
+            ttk.Label(form, text=f"{label}:").grid(row=index, column=0, sticky='w', pady=4)
+            ttk.Entry(form, textvariable=variable, width=35).grid(row=index, column=1, padx=(10, 0), pady=4)
+        ttk.Label(form, text=f"Mevcut: {', '.join(self.db.get_tags()) or '-'}", foreground='gray',
+                  wraplength=320).grid(row=3, column=0, columnspan=2, sticky='w', pady=4)
+
+        def save():
+            try:
+                self.db.tag_transactions(ids, Database.split_tags(add_var.get()),
+                                         Database.split_tags(remove_var.get()))
+            except ValueError as e:
+                messagebox.showerror("❌ Hata", str(e), parent=window)
+                return
+            window.destroy()
+            if self.refresh_transactions:
+                self.refresh_transactions()
+
+        ttk.Button(form, text="💾 Kaydet", command=save).grid(row=4, column=0, columnspan=2, pady=(10, 0))
+
+    def undo_edit(self, event=None):
+        self.replay_edit(self.db.undo)
+
+    def redo_edit(self, event=None):
+        self.replay_edit(self.db.redo)
+
+    def replay_edit(self, step):
+        try:
+            label = step()
+        except ValueError as e:
+            messagebox.showerror("❌ Hata", str(e))
+            return
+        if label is None:
+            self.root.bell()
+            return
+        if self.refresh_transactions:
+            self.refresh_transactions()
+
+    def show_report(self, period, overlay="Yok", tags=""):
+        self.clear_frame()
+
+        name, x_label = self.report_periods[period]
+        ttk.Label(self.main_frame, text=f"{name} Rapor" + (f" 🔖 {tags}" if tags else ""),
                   font=("Arial", 16, "bold")).pack(pady=10)
 
-        if period == "Daily":
-            data = self.db.get_daily_summary()
-            x_label = "Gün"
-        elif period == "Monthly":
-            data = self.db.get_monthly_summary()
-            x_label = "Ay"
-        else:
-            data = self.db.get_yearly_summary()
-            x_label = "Yıl"
+        overlay_frame = ttk.Frame(self.main_frame)
+        overlay_frame.pack(pady=5)
+
+        overlays = ["Yok", "7 gün", "30 gün", "90 gün", "Bakiye"]
+        if period == "month":
+            overlays.append("Aylık değişim")
+
+        ttk.Label(overlay_frame, text="Katman:").pack(side=tk.LEFT, padx=5)
+        overlay_var = tk.StringVar(value=overlay)
+        overlay_dropdown = ttk.Combobox(overlay_frame, textvariable=overlay_var,
+                                        values=overlays, state="readonly", width=15)
+        overlay_dropdown.pack(side=tk.LEFT, padx=5)
+        overlay_dropdown.bind("<<ComboboxSelected>>",
+                              lambda e: self.show_report(period, overlay_var.get(), tags_var.get().strip()))
+
+        ttk.Label(overlay_frame, text="Etiket:").pack(side=tk.LEFT, padx=(15, 5))
+        tags_var = tk.StringVar(value=tags)
+        tags_entry = ttk.Entry(overlay_frame, textvariable=tags_var, width=25)
+        tags_entry.pack(side=tk.LEFT, padx=5)
+        tags_entry.bind('<Return>', lambda e: self.show_report(period, overlay_var.get(), tags_var.get().strip()))
+        ttk.Button(overlay_frame, text="Uygula",
+                   command=lambda: self.show_report(period, overlay_var.get(),
+                                                    tags_var.get().strip())).pack(side=tk.LEFT, padx=5)
+
+        fiscal_start = int(self.db.get_setting("fiscal_start", "1"))
+        if period == "fiscal":
+            ttk.Label(overlay_frame, text="Başlangıç ayı:").pack(side=tk.LEFT, padx=5)
+            fiscal_var = tk.StringVar(value=str(fiscal_start))
+            fiscal_dropdown = ttk.Combobox(overlay_frame, textvariable=fiscal_var,
+                                           values=[str(month) for month in range(1, 13)], state="readonly", width=4)
+            fiscal_dropdown.pack(side=tk.LEFT, padx=5)
+
+            def change_fiscal_start(event):
+                self.db.set_setting("fiscal_start", fiscal_var.get())
+                self.show_report(period, overlay_var.get(), tags_var.get().strip())
+
+            fiscal_dropdown.bind("<<ComboboxSelected>>", change_fiscal_start)
+
+        status = ttk.Label(self.main_frame, text="Rapor hazırlanıyor...")
+        status.pack(pady=20)
+
+        def done(job):
+            if not status.winfo_exists():
+                return
+            status.destroy()
+            if job.status == Job.FAILED:
+                messagebox.showerror("❌ Hata", f"Rapor hazırlanamadı:\n{job.error}")
+            elif job.status == Job.DONE:
+                self.render_report(name, x_label, overlay, job.result)
+
+        self.jobs.submit(f"{name} rapor",
+                         lambda progress: self.report_data.report(period, overlay, fiscal_start, tags),
+                         on_done=done)
+
+    def render_report(self, name, x_label, overlay, report):
+        data, forecast = report['summary'], report['forecast']
 
         if not data:
             ttk.Label(self.main_frame, text="Veri mevcut değil").pack(pady=20)
@@ -950,21 +1849,39 @@ class FinanceTracker:
         ax1.bar(dates, income, width=0.4, label='Gelir', color='green')
         ax1.bar([str(d) for d in dates], expenses, width=0.4, label='Gedir', color='red',
                 bottom=income)
-        ax1.set_ylabel('Tutar (T)')
-        ax1.set_title(f'{period} Gelir vs Gedir')
+        ax1.set_ylabel(f'Tutar ({self.symbol()})')
+        ax1.set_title(f'{name} Gelir vs Gedir')
         ax1.legend()
 
         net = [i - e for i, e in zip(income, expenses)]
         ax2.bar(dates, net, color='blue' if net[-1] >= 0 else 'red')
         ax2.axhline(0, color='black', linewidth=0.5)
         ax2.set_xlabel(x_label)
-        ax2.set_ylabel('Net Gelir (T)')
-        ax2.set_title(f'{period}Net Gelir')
+        ax2.set_ylabel(f'Net Gelir ({self.symbol()})')
+        ax2.set_title(f'{name} Net Gelir')
+
+        if forecast:
+            forecast_months = [f"{month}*" for month in forecast['months']]
+            ax1.bar(forecast_months, forecast['income'], width=0.4, fill=False,
+                    edgecolor='green', linestyle='--', label='Tahmin')
+            ax1.bar(forecast_months, forecast['expenses'], width=0.4, fill=False,
+                    edgecolor='red', linestyle='--', bottom=forecast['income'])
+            ax1.legend()
+            ax2.plot([dates[-1]] + forecast_months, [net[-1]] + list(forecast['net']),
+                     color='blue', linestyle='--', marker='o', label='Tahmin')
+            ax2.tick_params(axis='x', labelrotation=45)
+
+        if report['overlay'] is not None:
+            ax3 = ax2.twinx()
+            ax3.plot(dates, report['overlay'],
+                     color='#f39c12', marker='o', linewidth=2, label=overlay)
+            ax3.set_ylabel(f'{overlay} ({self.symbol()})')
+            ax3.legend(loc='upper left')
 
         plt.tight_layout()
 
         canvas = FigureCanvasTkAgg(fig, master=self.main_frame)
-        canvas.draw()
+        self.draw_canvas(canvas)
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         ttk.Button(self.main_frame, text="Panoya geri dön",
@@ -976,18 +1893,9 @@ class FinanceTracker:
         ttk.Label(self.main_frame, text="📊 Analiz",
                   font=("Arial", 20, "bold")).pack(pady=15)
 
-        all_transactions = self.db.get_all_transactions()
-
-        if not all_transactions:
-            ttk.Label(self.main_frame, text="Hem gelir hem de gider verisi gerekli",
-                      font=("Arial", 12)).pack(pady=50)
-            ttk.Button(self.main_frame, text="Geri", command=self.show_dashboard).pack(pady=10)
-            return
-
-        income_amounts = [t[4] for t in all_transactions if t[2] == 'Income']
-        expense_amounts = [t[4] for t in all_transactions if t[2] == 'Expense']
+        income_amounts, expense_amounts = self.report_data.statistics()
 
-        if not income_amounts or not expense_amounts:
+        if not income_amounts.size or not expense_amounts.size:
             ttk.Label(self.main_frame, text="Hem gelir hem de gider verisi gerekli",
                       font=("Arial", 12)).pack(pady=50)
             ttk.Button(self.main_frame, text="Geri", command=self.show_dashboard).pack(pady=10)
@@ -998,22 +1906,22 @@ class FinanceTracker:
         ax1 = fig.add_subplot(2, 3, 1)
         ax1.hist(income_amounts, bins=20, color='#2ecc71', alpha=0.7, edgecolor='black')
         ax1.set_title('📈 Gelir Dağılımı', fontsize=12, weight='bold')
-        ax1.set_xlabel('Tutar (T)')
+        ax1.set_xlabel(f'Tutar ({self.symbol()})')
         ax1.set_ylabel('Sıklık')
         ax1.grid(True, alpha=0.3)
         mean_income = np.mean(income_amounts)
         ax1.axvline(mean_income, color='red', linestyle='--', linewidth=2, label=f'Ortalama: T'
-                                                                                 f'T{mean_income:.2f}')
+                                                                                 f'{self.money(mean_income)}')
         ax1.legend()
 
         ax2 = fig.add_subplot(2, 3, 2)
         ax2.hist(expense_amounts, bins=20, color='#e74c3c', alpha=0.7, edgecolor='black')
         ax2.set_title('📉 Gider Dağılımı', fontsize=12, weight='bold')
-        ax2.set_xlabel('Tutar (T)')
+        ax2.set_xlabel(f'Tutar ({self.symbol()})')
         ax2.set_ylabel('Sıklık')
         ax2.grid(True, alpha=0.3)
         mean_expense = np.mean(expense_amounts)
-        ax2.axvline(mean_expense, color='darkred', linestyle='--', linewidth=2, label=f'Ortalama: T{mean_expense:.2f}')
+        ax2.axvline(mean_expense, color='darkred', linestyle='--', linewidth=2, label=f'Ortalama: {self.money(mean_expense)}')
         ax2.legend()
 
         ax3 = fig.add_subplot(2, 3, 3)
@@ -1021,13 +1929,13 @@ class FinanceTracker:
         bp['boxes'][0].set_facecolor('#2ecc71')
         bp['boxes'][1].set_facecolor('#e74c3c')
         ax3.set_title('📦 Kutu Grafiği', fontsize=12, weight='bold')
-        ax3.set_ylabel('Tutar (T)')
+        ax3.set_ylabel(f'Tutar ({self.symbol()})')
         ax3.grid(True, alpha=0.3, axis='y')
 
         fig.tight_layout(pad=2.5)
 
         canvas = FigureCanvasTkAgg(fig, master=self.main_frame)
-        canvas.draw()
+        self.draw_canvas(canvas)
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         ttk.Button(self.main_frame, text="Geri", command=self.show_dashboard).pack(pady=10)
@@ -1038,7 +1946,7 @@ class FinanceTracker:
         ttk.Label(self.main_frame, text="🎯 3D Analiz",
                   font=("Arial", 20, "bold")).pack(pady=15)
 
-        monthly_data = self.db.get_monthly_summary()
+        monthly_data = self.report_data.analysis_3d()
 
         if not monthly_data or len(monthly_data) < 3:
             ttk.Label(self.main_frame, text="3D boyutlu görselleştirme için yeterli veri yok",
@@ -1049,9 +1957,9 @@ class FinanceTracker:
 
         ax1 = fig.add_subplot(1, 2, 1, projection='3d')
 
-        months = [item[0] for item in monthly_data[-12:]]
-        income = [item[1] for item in monthly_data[-12:]]
-        expenses = [abs(item[2]) for item in monthly_data[-12:]]
+        months = [item[0] for item in monthly_data]
+        income = [item[1] for item in monthly_data]
+        expenses = [abs(item[2]) for item in monthly_data]
 
         x_pos = np.arange(len(months))
         y_pos = np.array([0, 1])
@@ -1073,7 +1981,7 @@ class FinanceTracker:
         ax1.bar3d(xpos, ypos, zpos, dx, dy, dz, color=colors, alpha=0.8)
         ax1.set_xlabel('Ay')
         ax1.set_ylabel('Tür')
-        ax1.set_zlabel('Tutar (T)')
+        ax1.set_zlabel(f'Tutar ({self.symbol()})')
         ax1.set_title('3D Boyutlu Gelir ve Giderler', fontsize=12, weight='bold')
         ax1.set_yticks([0, 1])
         ax1.set_yticklabels(['Gelir', 'Giderler'])
@@ -1089,7 +1997,7 @@ class FinanceTracker:
         surf = ax2.plot_surface(X, Y, Z, cmap='viridis', alpha=0.8)
         ax2.set_xlabel('Ay')
         ax2.set_ylabel('Ölçüt')
-        ax2.set_zlabel('Tutar (T)')
+        ax2.set_zlabel(f'Tutar ({self.symbol()})')
         ax2.set_title('🌊 Finansal Yüzey', fontsize=12, weight='bold')
         ax2.set_yticks([0, 1, 2])
         ax2.set_yticklabels(['Gelir', 'Giderler', 'Net'])
@@ -1097,7 +2005,7 @@ class FinanceTracker:
         fig.tight_layout(pad=2.0)
 
         canvas = FigureCanvasTkAgg(fig, master=self.main_frame)
-        canvas.draw()
+        self.draw_canvas(canvas)
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
         ttk.Button(self.main_frame, text="Geri", command=self.show_dashboard).pack(pady=10)
@@ -1183,11 +2091,18 @@ class FinanceTracker:
         category_entry.bind('<FocusOut>', on_focusout)
         category_entry.config(fg='gray')
 
+        no_parent = "(Üst kategori yok)"
+        parent_var = tk.StringVar(value=no_parent)
+        parent_dropdown = ttk.Combobox(input_container, textvariable=parent_var, state="readonly",
+                                       font=('Segoe UI', 12), width=20)
+        parent_dropdown.pack(side=tk.LEFT, padx=(0, 10), ipady=8)
+
         def add_category():
             category = new_category_var.get().strip()
             if category and category != "Kategori adını girin...":
+                parent = parent_var.get() if parent_var.get() != no_parent else None
                 try:
-                    self.db.add_category(category)
+                    self.db.add_category(category, parent)
                     messagebox.showinfo("✅ Başarılı", f"{category}' kategorisi başarıyla eklendi!")
                     new_category_var.set("")
                     category_entry.delete(0, tk.END)
@@ -1196,6 +2111,8 @@ class FinanceTracker:
                     refresh_categories()
                 except sqlite3.IntegrityError:
                     messagebox.showerror("❌ Hata", "Kategori zaten mevcut")
+                except ValueError as e:
+                    messagebox.showerror("❌ Hata", str(e))
             else:
                 messagebox.showerror("❌ Hata", "Lütfen bir kategori adı girin")
 
@@ -1230,141 +2147,1293 @@ class FinanceTracker:
                  bg='white',
                  fg=self.colors['primary']).pack(anchor='w', pady=(0, 15))
 
-        categories_canvas = tk.Canvas(list_section, bg='white', highlightthickness=0)
-        categories_scrollbar = ttk.Scrollbar(list_section, orient="vertical", command=categories_canvas.yview)
-        categories_frame = tk.Frame(categories_canvas, bg='white')
+        actions = tk.Frame(list_section, bg='white')
+        actions.pack(side=tk.BOTTOM, fill=tk.X, pady=(10, 0))
+
+        tree = ttk.Treeview(list_section, columns=("usage",), show="tree headings", selectmode="browse")
+        tree.heading("#0", text="Kategori")
+        tree.heading("usage", text="Durum")
+        tree.column("#0", width=350)
+        tree.column("usage", width=120, anchor='center')
+        tree_scrollbar = ttk.Scrollbar(list_section, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=tree_scrollbar.set)
+
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        category_icons = {
+            'Maaş': '💰',  # Salary
+            'Serbest Çalışma': '💼',  # Freelance
+            'Yatırımlar': '📈',  # Investments
+            'Konut': '🏠',  # Housing
+            'Yiyecek': '🍔',  # Food
+            'Ulaşım': '🚗',  # Transportation
+            'Fatura': '💡',  # Utilities (Literally "Bill")
+            'Eğlence': '🎬',  # Entertainment
+            'Sağlık': '⚕️',  # Health
+            'Alışveriş': '🛍',  # Shopping
+            'Diğer': '📦'  # Others
+        }
 
-        categories_frame.bind("<Configure>",
-                              lambda e: categories_canvas.configure(scrollregion=categories_canvas.bbox("all")))
-        categories_canvas.create_window((0, 0), window=categories_frame, anchor="nw")
-        categories_canvas.configure(yscrollcommand=categories_scrollbar.set)
+        tk.Label(actions, text="Seçili kategoriyi taşı:",
+                 font=('Segoe UI', 11),
+                 bg='white',
+                 fg=self.colors['dark']).pack(side=tk.LEFT, padx=(0, 10))
+
+        move_var = tk.StringVar(value=no_parent)
+        move_dropdown = ttk.Combobox(actions, textvariable=move_var, state="readonly",
+                                     font=('Segoe UI', 11), width=20)
+        move_dropdown.pack(side=tk.LEFT, padx=(0, 10))
+
+        def selected_category():
+            selection = tree.selection()
+            if not selection:
+                messagebox.showerror("❌ Hata", "Lütfen bir kategori seçin")
+                return None
+            return selection[0]
+
+        def move_category():
+            category = selected_category()
+            if category is None:
+                return
+            parent = move_var.get() if move_var.get() != no_parent else None
+            try:
+                self.db.move_category(category, parent)
+            except ValueError as e:
+                messagebox.showerror("❌ Hata", str(e))
+                return
+            refresh_categories()
 
-        categories_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        categories_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        def delete_category():
+            category = selected_category()
+            if category is None:
+                return
+            if self.db.is_category_in_use(category):
+                messagebox.showerror("❌ Hata", f"'{category}' kategorisi kullanımda ve silinemez.")
+                return
+            if messagebox.askyesno("⚠️ Silme Onayı",
+                                   f"'{category}' kategorisini silmek istediğinizden emin misiniz?\n\n"
+                                   f"Alt kategorileri bir üst seviyeye taşınır. Bu eylem geri alınamaz."):
+                self.db.delete_category(category)
+                messagebox.showinfo("✅ Başarılı", f" '{category}' kategorisi başarıyla silindi!")
+                refresh_categories()
+
+        for text, command, color, hover in (("↕ Taşı", move_category, self.colors['secondary'], '#2980b9'),
+                                             ("🗑 Sil", delete_category, self.colors['danger'], '#c0392b')):
+            action_btn = tk.Button(actions, text=text,
+                                   command=command,
+                                   bg=color,
+                                   fg='white',
+                                   font=('Segoe UI', 10, 'bold'),
+                                   relief='flat',
+                                   cursor='hand2',
+                                   padx=15, pady=5)
+            action_btn.pack(side=tk.LEFT, padx=5)
+            action_btn.bind('<Enter>', lambda e, btn=action_btn, c=hover: btn.config(bg=c))
+            action_btn.bind('<Leave>', lambda e, btn=action_btn, c=color: btn.config(bg=c))
 
         def refresh_categories():
-            for widget in categories_frame.winfo_children():
-                widget.destroy()
+            closed = {item for item in self._tree_items(tree) if not tree.item(item, "open")}
+            tree.delete(*tree.get_children())
 
-            categories = self.db.get_categories()
+            rows = self.db.get_category_tree()
+            names = [no_parent] + [name for name, _, _ in rows]
+            parent_dropdown['values'] = names
+            move_dropdown['values'] = names
 
-            if not categories:
-                no_cat_label = tk.Label(categories_frame, text="Henüz kategori yok. Yukarıdan bir tane ekleyin!",
-                                        font=('Segoe UI', 12),
-                                        bg='white',
-                                        fg='gray')
-                no_cat_label.pack(pady=50)
+            if not rows:
+                tree.insert("", "end", text="Henüz kategori yok. Yukarıdan bir tane ekleyin!", values=("",))
                 return
 
-            for i, category in enumerate(categories):
-                cat_card = tk.Frame(categories_frame, bg='#f8f9fa', relief='solid', bd=1)
-                cat_card.pack(fill=tk.X, pady=5, padx=5)
-
-                left_frame = tk.Frame(cat_card, bg='#f8f9fa')
-                left_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=15, pady=12)
-
-                category_icons = {
-                    'Maaş': '💰',  # Salary
-                    'Serbest Çalışma': '💼',  # Freelance
-                    'Yatırımlar': '📈',  # Investments
-                    'Konut': '🏠',  # Housing
-                    'Yiyecek': '🍔',  # Food
-                    'Ulaşım': '🚗',  # Transportation
-                    'Fatura': '💡',  # Utilities (Literally "Bill")
-                    'Eğlence': '🎬',  # Entertainment
-                    'Sağlık': '⚕️',  # Health
-                    'Alışveriş': '🛍',  # Shopping
-                    'Diğer': '📦'  # Others
-                }
+            for category, parent, _ in rows:
                 icon = category_icons.get(category, '🏷')
+                tree.insert(parent or "", "end", iid=category, text=f"{icon}  {category}",
+                            values=("Kullanımda" if self.db.is_category_in_use(category) else "",),
+                            open=category not in closed)
+
+        refresh_categories()
+
+    @staticmethod
+    def _tree_items(tree, item=""):
+        for child in tree.get_children(item):
+            yield child
+            yield from FinanceTracker._tree_items(tree, child)
+
+    def manage_tags(self, granularity="month"):
+        self.clear_frame()
+
+        ttk.Label(self.main_frame, text="🔖 Etiketler",
+                  font=("Arial", 16, "bold")).pack(pady=10)
+
+        controls = ttk.Frame(self.main_frame)
+        controls.pack(fill=tk.X, padx=10, pady=5)
+
+        ttk.Label(controls, text="Yeni etiket:").pack(side=tk.LEFT, padx=5)
+        name_var = tk.StringVar()
+        name_entry = ttk.Entry(controls, textvariable=name_var, width=25)
+        name_entry.pack(side=tk.LEFT, padx=5)
+
+        def add_tag(event=None):
+            try:
+                self.db.add_tag(name_var.get())
+            except ValueError as e:
+                messagebox.showerror("❌ Hata", str(e))
+                return
+            self.manage_tags(granularity)
+
+        def delete_tag():
+            selection = totals_tree.selection()
+            if not selection:
+                messagebox.showerror("❌ Hata", "Lütfen silinecek etiketi seçin!")
+                return
+            name = totals_tree.item(selection[0], "values")[0]
+            if not messagebox.askyesno("🗑️ Sil", f"'{name}' etiketi silinsin mi?\n\n"
+                                                 f"İşlemler silinmez, yalnızca bu etiketi kaybeder."):
+                return
+            self.db.delete_tag(name)
+            self.manage_tags(granularity)
+
+        name_entry.bind('<Return>', add_tag)
+        ttk.Button(controls, text="➕ Ekle", command=add_tag).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="🗑️ Sil", command=delete_tag).pack(side=tk.LEFT, padx=5)
+
+        periods = {name: bucket for bucket, (name, _) in self.report_periods.items() if bucket != "day"}
+        period_var = tk.StringVar(value=self.report_periods[granularity][0])
+        period_dropdown = ttk.Combobox(controls, textvariable=period_var, values=list(periods),
+                                       state="readonly", width=12)
+        period_dropdown.pack(side=tk.RIGHT, padx=5)
+        period_dropdown.bind("<<ComboboxSelected>>", lambda e: self.manage_tags(periods[period_var.get()]))
+        ttk.Label(controls, text="Dönem:").pack(side=tk.RIGHT, padx=5)
+
+        totals_tree = ttk.Treeview(self.main_frame, columns=("Etiket", "Gelir", "Gider", "Net"),
+                                   show="headings", height=8)
+        for col in totals_tree["columns"]:
+            totals_tree.heading(col, text=col)
+            totals_tree.column(col, width=150, anchor='w' if col == "Etiket" else 'e')
+        totals_tree.pack(fill=tk.X, padx=10, pady=10)
+
+        summary = self.db.get_tag_summary()
+        unused = sorted(set(self.db.get_tags()) - {name for name, _, _ in summary})
+        for name, income, expenses in summary + [(name, 0, 0) for name in unused]:
+            totals_tree.insert("", "end", values=(name, self.money(income), self.money(expenses),
+                                                  self.money(income - expenses)))
+
+        ttk.Label(self.main_frame, text=f"{self.report_periods[granularity][0]} etiket tablosu "
+                                        f"(son {self.TAG_PIVOT_PERIODS} dönem)",
+                  font=("Arial", 12, "bold")).pack(anchor='w', padx=10)
+        labels, keys, matrix = self.db.get_tag_matrix(granularity,
+                                                      fiscal_start=int(self.db.get_setting("fiscal_start", "1")))
+        labels, matrix = labels[-self.TAG_PIVOT_PERIODS:], matrix[:, -self.TAG_PIVOT_PERIODS:]
+        pivot_tree = ttk.Treeview(self.main_frame, columns=("Etiket", "Tür", *labels), show="headings", height=10)
+        for col in pivot_tree["columns"]:
+            pivot_tree.heading(col, text=col)
+            pivot_tree.column(col, width=90, anchor='w' if col in ("Etiket", "Tür") else 'e')
+        for (name, trans_type), values in zip(keys, matrix):
+            pivot_tree.insert("", "end", values=(name, "Gelir" if trans_type == "Income" else "Gider",
+                                                 *(self.money(value) for value in values)))
+        pivot_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        ttk.Button(self.main_frame, text="Panoya geri dön",
+                   command=self.show_dashboard).pack(pady=10)
+
+    def manage_budgets(self):
+        self.clear_frame()
+
+        main_container = tk.Frame(self.main_frame, bg=self.colors['light'])
+        main_container.pack(fill=tk.BOTH, expand=True)
+
+        header = tk.Frame(main_container, bg=self.colors['secondary'], height=80)
+        header.pack(fill=tk.X)
+        header.pack_propagate(False)
+
+        tk.Label(header, text="🎯 Bütçeleri Yönet",
+                 font=('Segoe UI', 28, 'bold'),
+                 bg=self.colors['secondary'],
+                 fg='white').pack(side=tk.LEFT, padx=30, pady=20)
+
+        back_btn = tk.Button(header, text="Panoya geri dön",
+                             command=self.show_dashboard,
+                             bg='white',
+                             fg=self.colors['secondary'],
+                             font=('Segoe UI', 12, 'bold'),
+                             relief='flat',
+                             cursor='hand2',
+                             padx=20,
+                             pady=10)
+        back_btn.pack(side=tk.RIGHT, padx=30, pady=20)
+
+        content = tk.Frame(main_container, bg='white')
+        content.pack(fill=tk.BOTH, expand=True, padx=40, pady=30)
+
+        add_section = tk.Frame(content, bg='white')
+        add_section.pack(fill=tk.X, pady=(0, 30))
+
+        tk.Label(add_section, text="Bütçe Tanımla",
+                 font=('Segoe UI', 16, 'bold'),
+                 bg='white',
+                 fg=self.colors['primary']).pack(anchor='w', pady=(0, 15))
+
+        input_container = tk.Frame(add_section, bg='white')
+        input_container.pack(fill=tk.X)
+
+        category_var = tk.StringVar()
+        ttk.Combobox(input_container, textvariable=category_var, values=self.db.get_categories(),
+                     state="readonly", font=('Segoe UI', 12), width=20).pack(side=tk.LEFT, padx=(0, 10), ipady=6)
+
+        period_var = tk.StringVar(value=self.budget_periods["month"])
+        ttk.Combobox(input_container, textvariable=period_var, values=list(self.budget_periods.values()),
+                     state="readonly", font=('Segoe UI', 12), width=10).pack(side=tk.LEFT, padx=(0, 10), ipady=6)
+
+        amount_var = tk.StringVar()
+        tk.Entry(input_container, textvariable=amount_var,
+                 font=('Segoe UI', 14),
+                 bg='#ecf0f1',
+                 fg=self.colors['dark'],
+                 relief='flat',
+                 width=12).pack(side=tk.LEFT, padx=(0, 10), ipady=8)
+
+        block_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(input_container, text="Aşımı engelle", variable=block_var,
+                       font=('Segoe UI', 11), bg='white').pack(side=tk.LEFT, padx=(0, 10))
+
+        def save_budget():
+            category = category_var.get()
+            if not category:
+                messagebox.showerror("❌ Hata", "Lütfen bir kategori seçin!")
+                return
+            period = next(key for key, label in self.budget_periods.items() if label == period_var.get())
+            try:
+                amount = float(amount_var.get().replace(",", "."))
+                self.db.set_budget(category, period, amount, block_var.get())
+            except ValueError as e:
+                messagebox.showerror("❌ Hata", f"Lütfen geçerli bir tutar girin!\n{str(e)}")
+                return
+            amount_var.set("")
+            refresh_budgets()
+
+        tk.Button(input_container, text="💾 Kaydet",
+                  command=save_budget,
+                  bg=self.colors['success'],
+                  fg='white',
+                  font=('Segoe UI', 12, 'bold'),
+                  relief='flat',
+                  cursor='hand2',
+                  padx=30,
+                  pady=8).pack(side=tk.LEFT)
+
+        separator = tk.Frame(content, bg='#bdc3c7', height=2)
+        separator.pack(fill=tk.X, pady=20)
+
+        list_section = tk.Frame(content, bg='white')
+        list_section.pack(fill=tk.BOTH, expand=True)
+
+        tk.Label(list_section, text="Mevcut Bütçeler",
+                 font=('Segoe UI', 16, 'bold'),
+                 bg='white',
+                 fg=self.colors['primary']).pack(anchor='w', pady=(0, 15))
+
+        budgets_frame = tk.Frame(list_section, bg='white')
+        budgets_frame.pack(fill=tk.BOTH, expand=True)
+
+        def refresh_budgets():
+            for widget in budgets_frame.winfo_children():
+                widget.destroy()
 
-                tk.Label(left_frame, text=icon,
-                         font=('Segoe UI', 20),
-                         bg='#f8f9fa').pack(side=tk.LEFT, padx=(0, 10))
+            budgets = self.db.get_budget_status()
+            if not budgets:
+                tk.Label(budgets_frame, text="Henüz bütçe yok. Yukarıdan bir tane tanımlayın!",
+                         font=('Segoe UI', 12),
+                         bg='white',
+                         fg='gray').pack(pady=50)
+                return
+
+            for category, period, limit, spent, block in budgets:
+                card = tk.Frame(budgets_frame, bg='#f8f9fa', relief='solid', bd=1)
+                card.pack(fill=tk.X, pady=5, padx=5)
 
-                tk.Label(left_frame, text=category,
+                tk.Label(card, text=f"{category} ({self.budget_periods[period]})" + (" ⛔" if block else ""),
                          font=('Segoe UI', 13, 'bold'),
                          bg='#f8f9fa',
-                         fg=self.colors['dark']).pack(side=tk.LEFT)
+                         fg=self.colors['dark']).pack(side=tk.LEFT, padx=15, pady=12)
+
+                def delete_budget(cat=category, per=period):
+                    self.db.delete_budget(cat, per)
+                    refresh_budgets()
+
+                tk.Button(card, text="🗑 Sil",
+                          command=delete_budget,
+                          bg=self.colors['danger'],
+                          fg='white',
+                          font=('Segoe UI', 10, 'bold'),
+                          relief='flat',
+                          cursor='hand2',
+                          padx=15, pady=5).pack(side=tk.RIGHT, padx=15)
+
+                usage = f"{self.money(spent, Database.BASE_CURRENCY)} / {self.money(limit, Database.BASE_CURRENCY)}"
+                tk.Label(card, text=usage,
+                         font=('Segoe UI', 11, 'bold'),
+                         bg='#f8f9fa',
+                         fg=self.colors['danger'] if spent > limit else self.colors['dark']).pack(side=tk.RIGHT,
+                                                                                                  padx=15)
 
-                right_frame = tk.Frame(cat_card, bg='#f8f9fa')
-                right_frame.pack(side=tk.RIGHT, padx=15, pady=12)
+        refresh_budgets()
 
-                in_use = self.db.is_category_in_use(category)
+    def manage_recurring(self):
+        self.clear_frame()
 
-                if in_use:
-                    badge = tk.Label(right_frame, text="Kullanımda",
-                                     font=('Segoe UI', 9, 'bold'),
-                                     bg=self.colors['success'],
-                                     fg='white',
-                                     padx=10,
-                                     pady=5)
-                    badge.pack(side=tk.LEFT, padx=5)
-                else:
-                    def delete_category(cat=category):
-                        if messagebox.askyesno("⚠️ Silme Onayı",
-                                               f"'{cat}' kategorisini silmek istediğinizden emin misiniz?\n\nBu eylem geri alınamaz."):
-                            self.db.delete_category(cat)
-                            messagebox.showinfo("✅ Başarılı", f" '{cat}' kategorisi başarıyla silindi!")
-                            refresh_categories()
-
-                    delete_btn = tk.Button(right_frame, text="🗑 Sil",
-                                           command=delete_category,
-                                           bg=self.colors['danger'],
-                                           fg='white',
-                                           font=('Segoe UI', 10, 'bold'),
-                                           relief='flat',
-                                           cursor='hand2',
-                                           padx=15, pady=5)
-                    delete_btn.pack(side=tk.LEFT, padx=5)
-
-                    def on_enter_del(e, btn=delete_btn):
-                        btn['bg'] = '#c0392b'
-
-                    def on_leave_del(e, btn=delete_btn):
-                        btn['bg'] = self.colors['danger']
-
-                    delete_btn.bind('<Enter>', on_enter_del)
-                    delete_btn.bind('<Leave>', on_leave_del)
+        main_container = tk.Frame(self.main_frame, bg=self.colors['light'])
+        main_container.pack(fill=tk.BOTH, expand=True)
 
-        refresh_categories()
+        header = tk.Frame(main_container, bg=self.colors['secondary'], height=80)
+        header.pack(fill=tk.X)
+        header.pack_propagate(False)
+
+        tk.Label(header, text="🔁 Tekrarlayan İşlemler",
+                 font=('Segoe UI', 28, 'bold'),
+                 bg=self.colors['secondary'],
+                 fg='white').pack(side=tk.LEFT, padx=30, pady=20)
+
+        back_btn = tk.Button(header, text="Panoya geri dön",
+                             command=self.show_dashboard,
+                             bg='white',
+                             fg=self.colors['secondary'],
+                             font=('Segoe UI', 12, 'bold'),
+                             relief='flat',
+                             cursor='hand2',
+                             padx=20,
+                             pady=10)
+        back_btn.pack(side=tk.RIGHT, padx=30, pady=20)
+
+        content = tk.Frame(main_container, bg='white')
+        content.pack(fill=tk.BOTH, expand=True, padx=40, pady=30)
+
+        add_section = tk.Frame(content, bg='white')
+        add_section.pack(fill=tk.X, pady=(0, 20))
+
+        tk.Label(add_section, text="Yeni Kural Ekle",
+                 font=('Segoe UI', 16, 'bold'),
+                 bg='white',
+                 fg=self.colors['primary']).grid(row=0, column=0, columnspan=4, sticky='w', pady=(0, 15))
+
+        type_var = tk.StringVar(value="Gider")
+        category_var = tk.StringVar()
+        amount_var = tk.StringVar()
+        description_var = tk.StringVar()
+        frequency_var = tk.StringVar(value=self.recurring_frequencies["monthly"])
+        every_var = tk.IntVar(value=1)
+        cron_var = tk.StringVar()
+
+        fields = [
+            ("Tür", ttk.Combobox(add_section, textvariable=type_var, values=["Gelir", "Gider"],
+                                 state="readonly", width=18)),
+            ("Kategori", ttk.Combobox(add_section, textvariable=category_var, values=self.db.get_categories(),
+                                      state="readonly", width=18)),
+            ("Tutar", ttk.Entry(add_section, textvariable=amount_var, width=20)),
+            ("Açıklama", ttk.Entry(add_section, textvariable=description_var, width=20)),
+            ("Sıklık", ttk.Combobox(add_section, textvariable=frequency_var,
+                                    values=list(self.recurring_frequencies.values()), state="readonly", width=18)),
+            ("Her", ttk.Spinbox(add_section, from_=1, to=365, textvariable=every_var, width=18)),
+            ("Özel (gün ay hgünü)", ttk.Entry(add_section, textvariable=cron_var, width=20)),
+            ("Başlangıç", DateEntry(add_section, width=18, date_pattern='yyyy-mm-dd'))
+        ]
+        for i, (label, widget) in enumerate(fields):
+            row, column = divmod(i, 4)
+            tk.Label(add_section, text=label, font=('Segoe UI', 11), bg='white').grid(
+                row=row * 2 + 1, column=column, sticky='w', padx=5)
+            widget.grid(row=row * 2 + 2, column=column, sticky='ew', padx=5, pady=(0, 10))
+        start_entry = fields[-1][1]
+
+        def add_rule():
+            category = category_var.get()
+            if not category:
+                messagebox.showerror("❌ Hata", "Lütfen bir kategori seçin!")
+                return
+            frequency = next(key for key, label in self.recurring_frequencies.items()
+                             if label == frequency_var.get())
+            try:
+                amount = float(amount_var.get().replace(",", "."))
+                if amount <= 0:
+                    raise ValueError("Tutar sıfırdan büyük olmalı")
+                self.db.add_recurring_rule(
+                    trans_type="Income" if type_var.get() == "Gelir" else "Expense",
+                    amount=amount,
+                    category=category,
+                    frequency=frequency,
+                    start_date=start_entry.get_date().strftime("%Y-%m-%d"),
+                    every=every_var.get(),
+                    cron=cron_var.get().strip(),
+                    description=description_var.get()
+                )
+            except (ValueError, tk.TclError) as e:
+                messagebox.showerror("❌ Hata", str(e))
+                return
+            run_now()
+
+        def run_now():
+            created = self.run_recurring()
+            refresh_rules()
+            if created:
+                messagebox.showinfo("✅ Başarılı", f"{len(created)} işlem oluşturuldu.")
+
+        buttons = tk.Frame(add_section, bg='white')
+        buttons.grid(row=5, column=0, columnspan=4, sticky='w', padx=5)
+
+        tk.Button(buttons, text="➕ Kural Ekle",
+                  command=add_rule,
+                  bg=self.colors['success'],
+                  fg='white',
+                  font=('Segoe UI', 12, 'bold'),
+                  relief='flat',
+                  cursor='hand2',
+                  padx=30,
+                  pady=8).pack(side=tk.LEFT, padx=(0, 10))
+
+        tk.Button(buttons, text="▶ Şimdi Çalıştır",
+                  command=run_now,
+                  bg=self.colors['secondary'],
+                  fg='white',
+                  font=('Segoe UI', 12, 'bold'),
+                  relief='flat',
+                  cursor='hand2',
+                  padx=30,
+                  pady=8).pack(side=tk.LEFT)
+
+        separator = tk.Frame(content, bg='#bdc3c7', height=2)
+        separator.pack(fill=tk.X, pady=20)
+
+        rules_frame = tk.Frame(content, bg='white')
+        rules_frame.pack(fill=tk.BOTH, expand=True)
+
+        def refresh_rules():
+            for widget in rules_frame.winfo_children():
+                widget.destroy()
+
+            rules = self.db.get_recurring_rules()
+            if not rules:
+                tk.Label(rules_frame, text="Henüz tekrarlayan kural yok.",
+                         font=('Segoe UI', 12),
+                         bg='white',
+                         fg='gray').pack(pady=50)
+                return
+
+            for rule_id, trans_type, category, amount, description, frequency, every, cron, \
+                    start, end, last in rules:
+                card = tk.Frame(rules_frame, bg='#f8f9fa', relief='solid', bd=1)
+                card.pack(fill=tk.X, pady=5, padx=5)
+
+                schedule = cron if frequency == "cron" else self.recurring_frequencies[frequency]
+                if frequency != "cron" and every > 1:
+                    schedule += f" (her {every})"
+                amount = self.money(amount, Database.BASE_CURRENCY)
+                tk.Label(card, text=f"{category} • {amount} • {schedule} • {start} başlangıç",
+                         font=('Segoe UI', 12, 'bold'),
+                         bg='#f8f9fa',
+                         fg=self.colors['success'] if trans_type == "Income" else self.colors['danger']).pack(
+                    side=tk.LEFT, padx=15, pady=12)
+
+                def delete_rule(rule=rule_id):
+                    if messagebox.askyesno("⚠️ Silme Onayı",
+                                           "Kural silinsin mi?\n\nDaha önce oluşturulan işlemler korunur."):
+                        self.db.delete_recurring_rule(rule)
+                        refresh_rules()
+
+                tk.Button(card, text="🗑 Sil",
+                          command=delete_rule,
+                          bg=self.colors['danger'],
+                          fg='white',
+                          font=('Segoe UI', 10, 'bold'),
+                          relief='flat',
+                          cursor='hand2',
+                          padx=15, pady=5).pack(side=tk.RIGHT, padx=15)
+
+                tk.Label(card, text=f"Son: {last or '-'}",
+                         font=('Segoe UI', 10),
+                         bg='#f8f9fa',
+                         fg='gray').pack(side=tk.RIGHT, padx=15)
+
+        refresh_rules()
 
 
 class Database:
-    def __init__(self, db_file="finance.db"):
+    STORAGE_VERSION = 3
+    EPOCH = datetime(1970, 1, 1)
+    MINOR_UNITS = 100
+    BASE_CURRENCY = "TRY"
+    TRANSACTION_COLUMNS = "id, day, month, type, category_id, amount, description, created_at, currency"
+    TRANSACTION_FIELDS = ("id", "date", "type", "category", "amount", "description", "currency")
+    ARCHIVED = "archived"
+    BUDGET_PERIODS = ("month", "year")
+    BUDGET_COUNTER_UPSERT = """
+        INSERT INTO budget_counters (category_id, period, period_key, spent) VALUES (?, ?, ?, ?)
+        ON CONFLICT (category_id, period, period_key) DO UPDATE SET spent = spent + excluded.spent
+    """
+    LEDGER_SHARD_UPSERT = """
+        INSERT INTO ledger_shards (year, path, row_count) VALUES (?, ?, ?)
+        ON CONFLICT (year) DO UPDATE SET row_count = row_count + excluded.row_count
+    """
+    ARCHIVED_ROLLUP_UPSERT = """
+        INSERT INTO archived_rollups (day, month, type, category_id, amount, row_count, currency)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (day, type, category_id, currency) DO UPDATE SET
+            amount = amount + excluded.amount,
+            row_count = row_count + excluded.row_count
+    """
+    RECURRING_FREQUENCIES = ("daily", "weekly", "monthly", "cron")
+    CRON_FIELDS = ((1, 31), (1, 12), (0, 7))
+    VERSIONED_TABLES = ("transactions", "archived_rollups", "categories", "fx_rates", "settings", "budgets",
+                        "budget_counters", "anomalies", "recurring_rules", "tags", "tag_bitmaps",
+                        "archived_tag_rollups")
+    LEDGER_TABLES = ("transactions", "archived_rollups", "fx_rates")
+    TAG_TABLES = ("tags", "tag_bitmaps", "archived_tag_rollups")
+    LEDGER_WRITE_TABLES = ("transactions", "budget_counters", "anomalies")
+    # tables each cached getter reads
+    QUERY_DEPENDENCIES = {
+        "get_categories": ("categories",),
+        "get_category_tree": ("categories",),
+        "get_subcategories": ("categories",),
+        "get_category_id": ("categories",),
+        "is_category_in_use": ("categories", "recurring_rules") + LEDGER_TABLES,
+        "get_setting": ("settings",),
+        "get_currencies": ("fx_rates",),
+        "get_rate_series": ("fx_rates",),
+        "get_anomaly": ("anomalies",),
+        "get_anomalies": ("anomalies", "categories"),
+        "get_recurring_rules": ("recurring_rules", "categories"),
+        "get_budget_status": ("budgets", "budget_counters", "categories"),
+        "get_balance": LEDGER_TABLES,
+        "get_total_income": LEDGER_TABLES,
+        "get_total_expenses": LEDGER_TABLES,
+        "get_monthly_income": LEDGER_TABLES,
+        "get_monthly_expenses": LEDGER_TABLES,
+        "get_recent_transactions": ("categories",) + LEDGER_TABLES,
+        "get_category_summary": ("categories",) + LEDGER_TABLES,
+        "count_transactions": ("transactions",),
+        "get_transaction_page": ("categories",) + LEDGER_TABLES + TAG_TABLES,
+        "get_expenses_by_category": ("categories",) + LEDGER_TABLES,
+        "get_summary": LEDGER_TABLES + TAG_TABLES,
+        "_daily_rollup": LEDGER_TABLES,
+        "get_monthly_category_matrix": ("categories",) + LEDGER_TABLES,
+        "get_tags": ("tags",),
+        "get_tag_summary": LEDGER_TABLES + TAG_TABLES,
+        "get_tag_matrix": LEDGER_TABLES + TAG_TABLES,
+    }
+    CURRENT_MONTH_QUERIES = ("get_monthly_income", "get_monthly_expenses")
+    # thin wrappers whose results are cached by get_summary underneath
+    SUMMARY_QUERIES = ("get_daily_summary", "get_monthly_summary", "get_yearly_summary")
+    FX_RATE_UPSERT = """
+        INSERT INTO fx_rates (currency, day, rate) VALUES (?, ?, ?)
+        ON CONFLICT (currency, day) DO UPDATE SET rate = excluded.rate
+    """
+    SETTING_UPSERT = """
+        INSERT INTO settings (key, value) VALUES (?, ?)
+        ON CONFLICT (key) DO UPDATE SET value = excluded.value
+    """
+    # latest rate on or before the day, falling back to the earliest one for days before the first rate
+    RATE_SQL = """COALESCE(
+        (SELECT rate FROM main.fx_rates WHERE currency = {currency} AND day <= {day} ORDER BY day DESC LIMIT 1),
+        (SELECT rate FROM main.fx_rates WHERE currency = {currency} ORDER BY day LIMIT 1))"""
+    ANOMALY_THRESHOLD = 3.5
+    ANOMALY_MIN_COUNT = 5
+    MAD_SCALE = 0.6745
+    SKETCH_RATE = 0.02
+    # categories keep their sorted amounts and exact median/MAD until this many expenses, then switch to the sketch
+    SKETCH_WARMUP = 200
+    CATEGORY_STATS_UPSERT = """
+        INSERT OR REPLACE INTO category_stats (category_id, count, mean, m2, median, mad, sample)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    ANOMALY_UPSERT = """
+        INSERT OR REPLACE INTO anomalies (transaction_id, day, category_id, amount, score) VALUES (?, ?, ?, ?, ?)
+    """
+    # bucket: (source column, size, offset); keys are contiguous integers so empty buckets can be zero-filled
+    TIME_BUCKETS = {
+        "day": ("day", 1, 0),
+        "week": ("day", 7, -3),  # ISO weeks start on Monday and 1970-01-01 was a Thursday
+        "month": ("month", 1, 0),
+        "quarter": ("month", 3, 0),
+        "year": ("month", 12, 0),
+        "fiscal": ("month", 12, None),  # offset comes from the fiscal start month
+    }
+    OTHER_CATEGORY = "Diğerleri"
+    MMAP_SIZE = 1 << 30
+    JOURNAL_SIZE = 100
+    MAX_ATTACHED = 10  # SQLite's default SQLITE_MAX_ATTACHED
+    SYNC_BATCH = 1000
+    SYNC_NAMESPACE = uuid.UUID("6f1c2a54-8d0e-4b7a-9c3e-2f5d7a1b9e40")
+    CHANGE_LOG_UPSERT = """
+        INSERT INTO change_log (uuid, transaction_id, clock, replica, seq) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (transaction_id) DO UPDATE SET
+            clock = excluded.clock, replica = excluded.replica, seq = excluded.seq, deleted = 0
+    """
+    TAG_BITMAP_UPSERT = "INSERT OR REPLACE INTO tag_bitmaps (tag_id, chunk, bits) VALUES (?, ?, ?)"
+    TAG_BITMAP_DELETE = "DELETE FROM tag_bitmaps WHERE tag_id = ? AND chunk = ?"
+    TAG_ROLLUP_UPSERT = """
+        INSERT INTO archived_tag_rollups (tag_ids, day, month, type, amount, row_count, currency)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (tag_ids, day, type, currency) DO UPDATE SET
+            amount = amount + excluded.amount,
+            row_count = row_count + excluded.row_count
+    """
+    # tag filter keywords, compared after fold_text; juxtaposed tags are ANDed and -tag negates
+    TAG_OPERATORS = {"and": "AND", "ve": "AND", "or": "OR", "veya": "OR", "not": "NOT", "degil": "NOT"}
+    SYNC_PEER_UPSERT = """
+        INSERT INTO sync_peers (peer, received, sent) VALUES (?, ?, ?)
+        ON CONFLICT (peer) DO UPDATE SET
+            received = MAX(received, excluded.received), sent = MAX(sent, excluded.sent)
+    """
+    MAINTENANCE_TASKS = {"vacuum": "Boş alanı geri kazan", "analyze": "İstatistikleri güncelle",
+                         "integrity": "Bütünlük denetimi"}
+    # how often each task runs when nothing else makes it due; vacuum is also due as soon as pages are free
+    MAINTENANCE_INTERVALS = {"vacuum": timedelta(days=7), "analyze": timedelta(days=1), "integrity": timedelta(days=7)}
+    VACUUM_FREE_RATIO = 0.1
+    VACUUM_STEP = 256  # pages released per incremental_vacuum transaction
+    # out-of-order leaf pages or unused page space past this share needs a full VACUUM; freeing pages is not enough
+    FRAGMENTATION_LIMIT = 0.25
+    ANALYSIS_LIMIT = 1000
+    UNUSED_LIMIT = 0.5  # btrees filled by random inserts settle around a third empty
+    FRAGMENTATION_MIN_PAGES = 16
+    FRAGMENTATION_SQL = """
+        SELECT avg(CASE WHEN previous IS NOT NULL THEN pageno != previous + 1 END),
+               1.0 * sum(CASE WHEN pages >= ? THEN unused END) / sum(CASE WHEN pages >= ? THEN pgsize END)
+        FROM (
+            SELECT pageno, unused, pgsize, lag(pageno) OVER (PARTITION BY name ORDER BY path) AS previous,
+                   count(*) OVER (PARTITION BY name) AS pages
+            FROM dbstat WHERE pagetype = 'leaf'
+        )
+    """
+    MAINTENANCE_OPCODES = 1000
+    MAINTENANCE_CHECK = 0.1
+    MAINTENANCE_LOG_UPSERT = """
+        INSERT OR REPLACE INTO maintenance_log (task, ran_at, seconds, result) VALUES (?, ?, ?, ?)
+    """
+    STORAGE_LOG_UPSERT = """
+        INSERT OR REPLACE INTO storage_log (file, measured_at, page_count, free_pages, fragmentation, unused)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+    READ_QUERIES = (
+        "get_balance", "get_total_income", "get_total_expenses", "get_monthly_income",
+        "get_monthly_expenses", "get_category_summary", "get_expenses_by_category",
+        "get_daily_summary", "get_monthly_summary", "get_yearly_summary", "get_all_transactions"
+    )
+
+    def __init__(self, db_file="finance.db", sharded=False, parallel=False):
         self.db_file = db_file
+        self.sharded = sharded
+        self.parallel = parallel
+        self.memory_mode = None
+        self.memory_load_time = None
+        self._memory_conn = None
+        self._memory_lock = threading.Lock()
+        self._version_conn = None
+        self._version_lock = threading.Lock()
+        self._version = None
+        self._file_changes = None
+        self.cache = QueryCache()
+        self.instrumentation = None
+        self.pool = None
+        # (label, rows before, rows after, tags before, tags after) per edit; rows are full transaction rows keyed
+        # by id, None when absent
+        self._undo = deque(maxlen=self.JOURNAL_SIZE)
+        self._redo = []
         self.create_tables()
         self.initialize_default_categories()
+        self.reporting_currency = self.get_setting("reporting_currency", self.BASE_CURRENCY)
+        self.replica_id = self._replica_id()
+        for name in self.QUERY_DEPENDENCIES:
+            setattr(self, name, self._cached(name, getattr(self, name)))
+        if self.sharded:
+            self.rotate_shards()
+
+    def _connect(self, database, **kwargs):
+        instrumentation = self.instrumentation if self.instrumentation and self.instrumentation.enabled else None
+        if self.pool is not None:
+            return self.pool.acquire(database, instrumentation, **kwargs)
+        if instrumentation:
+            return instrumentation.connect(database, **kwargs)
+        return sqlite3.connect(database, **kwargs)
+
+    def _cached(self, name, method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def cached(*args, **kwargs):
+            if not self.cache.enabled:
+                return method(*args, **kwargs)
+            self.cache.sync(self.data_version())
+            tables, start, end = self.query_scope(name, *args, **kwargs)
+            # a few getters default to the current day or month, so the day is part of every key
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            key = (name, repr(arguments.arguments), self.reporting_currency, datetime.now().strftime("%Y-%m-%d"))
+            return self.cache.get(key, (tables, start, end), lambda: method(*args, **kwargs))
+        return cached
+
+    def query_scope(self, name, *args, **kwargs):
+        arguments = inspect.signature(getattr(type(self), name)).bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        arguments = arguments.arguments
+        if name in self.CURRENT_MONTH_QUERIES:
+            start, end = self._current_month_range()
+        else:
+            start, end = arguments.get("start") or arguments.get("since"), arguments.get("end")
+        tables = self.QUERY_DEPENDENCIES["get_summary" if name in self.SUMMARY_QUERIES else name]
+        return frozenset(tables), start, end
+
+    def _begin_write(self, cursor):
+        # attaching a new shard may have left its schema setup open; it stands on its own, so settle it first
+        if cursor.connection.in_transaction:
+            cursor.connection.commit()
+        # with the write lock held no other connection can commit between the two version reads
+        cursor.execute("BEGIN IMMEDIATE")
+        return self._read_version(cursor)
+
+    def _change(self, cursor, before, tables, start=None, end=None):
+        return ChangeEvent(tables, start, end, before, self._read_version(cursor))
+
+    @staticmethod
+    def _read_version(cursor):
+        cursor.execute("SELECT version FROM data_version")
+        return cursor.fetchone()[0]
+
+    def _day_span(self, days):
+        return (self.from_day(min(days)), self.from_day(max(days))) if days else (None, None)
+
+    def enable_pool(self, size=8, wal=False):
+        # WAL lets pooled readers keep going while another process (e.g. the Tk window) writes; it stays set on the
+        # file, so it is only switched on when asked for
+        if wal:
+            with self.get_connection() as conn:
+                conn.execute("PRAGMA journal_mode = WAL")
+        self.disable_pool()
+        self.pool = ConnectionPool(size)
+        return self.pool
+
+    def disable_pool(self):
+        if self.pool is not None:
+            self.pool.clear()
+            self.pool = None
 
     def get_connection(self):
-        return sqlite3.connect(self.db_file)
+        return self._connect(self.db_file, uri=True)
+
+    def get_read_connection(self):
+        if self.memory_mode == "memory":
+            conn = self._connect(self._memory_uri, uri=True)
+            conn.execute("PRAGMA read_uncommitted = 1")
+            return conn
+        if self.memory_mode == "mmap":
+            conn = self._connect(pathlib.Path(os.path.abspath(self.db_file)).as_uri() + "?mode=ro", uri=True)
+            conn.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+            return conn
+        return self.get_connection()
+
+    def enable_memory_mode(self, mode="memory"):
+        if mode not in ("memory", "mmap"):
+            raise ValueError(f"Bilinmeyen bellek modu: {mode}")
+
+        self.disable_memory_mode()
+        started = time.perf_counter()
+        if mode == "memory":
+            self._memory_uri = f"file:finance_memory_{id(self)}?mode=memory&cache=shared"
+            self._memory_conn = sqlite3.connect(self._memory_uri, uri=True, check_same_thread=False)
+            with self.get_connection() as disk:
+                disk.backup(self._memory_conn)
+        else:
+            with self.get_read_connection() as conn:
+                conn.execute("SELECT COUNT(*) FROM transactions").fetchone()
+        self.memory_mode = mode
+        self.memory_load_time = time.perf_counter() - started
+        return self.memory_load_time
+
+    def disable_memory_mode(self):
+        if self._memory_conn is not None:
+            self._memory_conn.close()
+            self._memory_conn = None
+        if self.pool is not None:
+            self.pool.clear()
+        self.memory_mode = None
+        # cached results were read from the copy, which may have drifted from the file
+        self.cache.clear()
+
+    def reload_memory(self):
+        if self.memory_mode == "memory":
+            self.enable_memory_mode("memory")
+
+    def _mirror(self, sql, params=(), many=False):
+        if self.memory_mode != "memory":
+            return
+        with self._memory_lock:
+            if many:
+                self._memory_conn.executemany(sql, params)
+            else:
+                self._memory_conn.execute(sql, params)
+            self._memory_conn.commit()
+
+    def measure_memory_speedup(self, repeat=3):
+        mode, cached = self.memory_mode, self.cache.enabled
+        self.cache.enabled = False
+        results = []
+        try:
+            for name in self.READ_QUERIES:
+                timings = []
+                for current in (None, mode):
+                    self.memory_mode = current
+                    best = None
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        getattr(self, name)()
+                        elapsed = time.perf_counter() - started
+                        best = elapsed if best is None else min(best, elapsed)
+                    timings.append(best)
+                disk, fast = timings
+                results.append((name, disk, fast, disk / fast if fast else 0))
+        finally:
+            self.memory_mode = mode
+            self.cache.enabled = cached
+        return results
+
+    def memory_report(self):
+        lines = [f"Yükleme süresi ({self.memory_mode}): {self.memory_load_time * 1000:.1f} ms", ""]
+        for name, disk, fast, speedup in self.measure_memory_speedup():
+            lines.append(f"{name}: disk {disk * 1000:.2f} ms, bellek {fast * 1000:.2f} ms (x{speedup:.1f})")
+        return "\n".join(lines)
+
+    @classmethod
+    def to_day(cls, date):
+        return (datetime.strptime(date[:10], "%Y-%m-%d") - cls.EPOCH).days
+
+    @classmethod
+    def from_day(cls, day):
+        return (cls.EPOCH + timedelta(days=day)).strftime("%Y-%m-%d")
+
+    @staticmethod
+    def to_month(date):
+        return int(date[:4]) * 100 + int(date[5:7])
+
+    @staticmethod
+    def month_label(month):
+        return f"{month // 100:04d}-{month % 100:02d}"
+
+    @classmethod
+    def to_minor(cls, amount):
+        return int((Decimal(str(amount)) * cls.MINOR_UNITS).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+    @classmethod
+    def from_minor(cls, minor):
+        return (minor or 0) / cls.MINOR_UNITS
+
+    def _from_minor_rows(self, rows, key_len=1):
+        return [tuple(row[:key_len]) + tuple(self.from_minor(value) for value in row[key_len:]) for row in rows]
 
     def create_tables(self):
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("PRAGMA user_version")
+            migrating = cursor.fetchone()[0] < self.STORAGE_VERSION
+            self._init_storage(cursor)
+            if migrating:
+                cursor.execute("BEGIN")
 
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS categories (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL
+                    name TEXT UNIQUE NOT NULL,
+                    parent_id INTEGER REFERENCES categories (id)
+                )
+            ''')
+            cursor.execute("PRAGMA table_info(categories)")
+            if "parent_id" not in [row[1] for row in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE categories ADD COLUMN parent_id INTEGER REFERENCES categories (id)")
+            self.create_category_tree(cursor)
+
+            self.create_transactions_table(cursor)
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ledger_shards (
+                    year INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    row_count INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+
+            legacy_rollups = self._rename_legacy(cursor, "archived_rollups", required="currency")
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS archived_rollups (
+                    day INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    type TEXT NOT NULL,
+                    category_id INTEGER NOT NULL,
+                    amount INTEGER NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    currency TEXT NOT NULL DEFAULT '{self.BASE_CURRENCY}',
+                    PRIMARY KEY (day, type, category_id, currency)
+                )
+            ''')
+            if legacy_rollups and "date" in legacy_rollups:
+                cursor.execute(f"""
+                    INSERT INTO archived_rollups (day, month, type, category_id, amount, row_count)
+                    SELECT CAST(julianday(date) - 2440587.5 AS INTEGER), CAST(strftime('%Y%m', date) AS INTEGER),
+                           type, category_id, CAST(ROUND(amount * {self.MINOR_UNITS}) AS INTEGER), row_count
+                    FROM archived_rollups_legacy
+                """)
+            elif legacy_rollups:
+                cursor.execute("""
+                    INSERT INTO archived_rollups (day, month, type, category_id, amount, row_count)
+                    SELECT day, month, type, category_id, amount, row_count FROM archived_rollups_legacy
+                """)
+            if legacy_rollups:
+                cursor.execute("DROP TABLE archived_rollups_legacy")
+
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'archived_tag_rollups'")
+            tag_rollups_missing = cursor.fetchone() is None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS archived_tag_rollups (
+                    tag_ids TEXT NOT NULL,  -- JSON sorted ids of the tags the rows carried when archived
+                    day INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    type TEXT NOT NULL,
+                    amount INTEGER NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    currency TEXT NOT NULL,
+                    PRIMARY KEY (tag_ids, day, type, currency)
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS fx_rates (
+                    currency TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    rate REAL NOT NULL,  -- units of the base currency per unit of currency
+                    PRIMARY KEY (currency, day)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            ''')
+
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'budget_counters'")
+            counters_missing = cursor.fetchone() is None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS budgets (
+                    category_id INTEGER NOT NULL,
+                    period TEXT NOT NULL CHECK (period IN ('month', 'year')),
+                    amount INTEGER NOT NULL,
+                    block INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (category_id, period)
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS budget_counters (
+                    category_id INTEGER NOT NULL,
+                    period TEXT NOT NULL,
+                    period_key INTEGER NOT NULL,
+                    spent INTEGER NOT NULL,
+                    PRIMARY KEY (category_id, period, period_key)
+                ) WITHOUT ROWID
+            ''')
+
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'category_stats'")
+            stats_missing = cursor.fetchone() is None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS category_stats (
+                    category_id INTEGER PRIMARY KEY,
+                    count INTEGER NOT NULL,
+                    mean REAL NOT NULL,
+                    m2 REAL NOT NULL,  -- Welford sum of squared deviations
+                    median REAL NOT NULL,  -- streaming estimate
+                    mad REAL NOT NULL,  -- streaming median absolute deviation
+                    sample TEXT  -- JSON sorted amounts during the warm-up, NULL once the sketch takes over
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS anomalies (
+                    transaction_id INTEGER PRIMARY KEY,
+                    day INTEGER NOT NULL,
+                    category_id INTEGER NOT NULL,
+                    amount INTEGER NOT NULL,
+                    score REAL NOT NULL
                 )
             ''')
 
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS transactions (
+                CREATE TABLE IF NOT EXISTS recurring_rules (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date DATE NOT NULL,
-                    type TEXT NOT NULL,  -- 'Income' or 'Expense'
+                    type TEXT NOT NULL,
                     category_id INTEGER NOT NULL,
-                    amount REAL NOT NULL,
+                    amount INTEGER NOT NULL,
                     description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (category_id) REFERENCES categories (id)
+                    frequency TEXT NOT NULL CHECK (frequency IN ('daily', 'weekly', 'monthly', 'cron')),
+                    every INTEGER NOT NULL DEFAULT 1,
+                    cron TEXT,
+                    start_day INTEGER NOT NULL,
+                    end_day INTEGER,
+                    last_day INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS recurring_occurrences (
+                    rule_id INTEGER NOT NULL,
+                    day INTEGER NOT NULL,
+                    PRIMARY KEY (rule_id, day)
+                ) WITHOUT ROWID
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS data_version (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL
                 )
             ''')
+            cursor.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
 
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'change_log'")
+            log_missing = cursor.fetchone() is None
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS change_log (
+                    uuid TEXT PRIMARY KEY,  -- identity of the row in every ledger it reaches
+                    transaction_id INTEGER UNIQUE,  -- local id; NULL for rows deleted elsewhere before they got here
+                    clock INTEGER NOT NULL,  -- Lamport clock of the last change
+                    replica TEXT NOT NULL,  -- ledger that made the last change; breaks clock ties
+                    seq INTEGER NOT NULL,  -- local order of recording, so a peer can ask for "everything after n"
+                    deleted INTEGER NOT NULL DEFAULT 0,
+                    archived INTEGER NOT NULL DEFAULT 0  -- moved to the archive here, no longer exchanged
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_seq ON change_log (seq)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_clock ON change_log (clock)")
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS sync_peers (
+                    peer TEXT PRIMARY KEY,  -- replica id of another ledger, or folder:<path> for a shared folder
+                    received INTEGER NOT NULL DEFAULT 0,  -- its last change applied here (its seq)
+                    sent INTEGER NOT NULL DEFAULT 0  -- our last change written for it (our seq)
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS tags (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS tag_bitmaps (
+                    tag_id INTEGER NOT NULL,
+                    chunk INTEGER NOT NULL,  -- transaction id >> 16
+                    bits BLOB NOT NULL,  -- the tagged ids of the chunk, see Bitmap
+                    PRIMARY KEY (tag_id, chunk)
+                ) WITHOUT ROWID
+            ''')
+            # the two maintenance tables stay out of VERSIONED_TABLES: a maintenance run must not drop the caches
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS maintenance_log (
+                    task TEXT PRIMARY KEY,
+                    ran_at TIMESTAMP NOT NULL,
+                    seconds REAL NOT NULL,
+                    result TEXT NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS storage_log (
+                    file TEXT PRIMARY KEY,
+                    measured_at TIMESTAMP NOT NULL,
+                    page_count INTEGER NOT NULL,
+                    free_pages INTEGER NOT NULL,
+                    fragmentation REAL,  -- share of leaf pages not stored right after the previous one
+                    unused REAL  -- share of btree page space left empty
+                )
+            ''')
+            for table in self.VERSIONED_TABLES:
+                for event in ("INSERT", "UPDATE", "DELETE"):
+                    cursor.execute(f"""
+                        CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_version AFTER {event} ON {table}
+                        BEGIN
+                            UPDATE data_version SET version = version + 1;
+                        END
+                    """)
+
+            cursor.execute(f"PRAGMA user_version = {self.STORAGE_VERSION}")
             conn.commit()
 
+            if migrating:
+                cursor.execute("SELECT year FROM ledger_shards")
+                for year, in cursor.fetchall():
+                    cursor.execute("ATTACH DATABASE ? AS cold", (self._resolve_shard(self.shard_path(year)),))
+                    cursor.execute("BEGIN")
+                    self.create_transactions_table(cursor, "cold")
+                    conn.commit()
+                    cursor.execute("DETACH DATABASE cold")
+
+        if log_missing:
+            self._backfill_change_log()
+        if counters_missing:
+            self.rebuild_budget_counters()
+        if stats_missing:
+            self.rescore_anomalies()
+        if tag_rollups_missing:
+            self._backfill_tag_rollups()
+
+    def _rename_legacy(self, cursor, table, schema="main", required=None):
+        cursor.execute(f"PRAGMA {schema}.table_info({table})")
+        columns = [row[1] for row in cursor.fetchall()]
+        if not columns or "date" not in columns and (required is None or required in columns):
+            return None
+        cursor.execute(f"ALTER TABLE {schema}.{table} RENAME TO {table}_legacy")
+        return columns
+
+    def create_transactions_table(self, cursor, schema="main"):
+        cursor.execute(f"DROP INDEX IF EXISTS {schema}.idx_transactions_date")
+        cursor.execute(f"DROP INDEX IF EXISTS {schema}.idx_transactions_month")
+        legacy = self._rename_legacy(cursor, "transactions", schema)
+
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {schema}.transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                day INTEGER NOT NULL,  -- days since 1970-01-01
+                month INTEGER NOT NULL,  -- YYYYMM
+                type TEXT NOT NULL,  -- 'Income' or 'Expense'
+                category_id INTEGER NOT NULL,
+                amount INTEGER NOT NULL,  -- minor units (kuruş/tiyn)
+                description TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                currency TEXT NOT NULL DEFAULT '{self.BASE_CURRENCY}',
+                FOREIGN KEY (category_id) REFERENCES categories (id)
+            )
+        ''')
+        cursor.execute(f"PRAGMA {schema}.table_info(transactions)")
+        if "currency" not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {schema}.transactions "
+                           f"ADD COLUMN currency TEXT NOT NULL DEFAULT '{self.BASE_CURRENCY}'")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_transactions_day ON transactions (day)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_transactions_month_currency "
+                       f"ON transactions (month, type, amount, currency)")
+
+        if legacy:
+            cursor.execute(f"""
+                INSERT INTO {schema}.transactions ({self.TRANSACTION_COLUMNS})
+                SELECT id, CAST(julianday(date) - 2440587.5 AS INTEGER), CAST(strftime('%Y%m', date) AS INTEGER),
+                       type, category_id, CAST(ROUND(amount * {self.MINOR_UNITS}) AS INTEGER),
+                       description, created_at, '{self.BASE_CURRENCY}'
+                FROM {schema}.transactions_legacy
+            """)
+            cursor.execute(f"DELETE FROM {schema}.sqlite_sequence WHERE name = 'transactions'")
+            cursor.execute(f"UPDATE {schema}.sqlite_sequence SET name = 'transactions' "
+                           f"WHERE name = 'transactions_legacy'")
+            cursor.execute(f"DROP TABLE {schema}.transactions_legacy")
+
+        self.create_search_index(cursor, schema)
+
+    def create_search_index(self, cursor, schema="main"):
+        cursor.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'transactions_fts'")
+        if cursor.fetchone():
+            return
+
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE {schema}.transactions_fts USING fts5(
+                description, category,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        """)
+        cursor.execute(f"""
+            INSERT INTO {schema}.transactions_fts (rowid, description, category)
+            SELECT id, replace(description, 'ı', 'i'),
+                   replace((SELECT name FROM main.categories WHERE id = category_id), 'ı', 'i')
+            FROM {schema}.transactions
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {schema}.transactions_fts_delete AFTER DELETE ON transactions
+            BEGIN
+                DELETE FROM transactions_fts WHERE rowid = old.id;
+            END
+        """)
+        if schema != "main":
+            # triggers cannot see main.categories from a shard; _move_to_shard fills its index
+            return
+
+        # unicode61 folds ş/ğ/ü/ö/ç/İ but treats dotless ı as its own letter, so it is folded here
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions
+            BEGIN
+                INSERT INTO transactions_fts (rowid, description, category)
+                VALUES (new.id, replace(new.description, 'ı', 'i'),
+                        replace((SELECT name FROM categories WHERE id = new.category_id), 'ı', 'i'));
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description, category_id
+            ON transactions
+            BEGIN
+                UPDATE transactions_fts
+                SET description = replace(new.description, 'ı', 'i'),
+                    category = replace((SELECT name FROM categories WHERE id = new.category_id), 'ı', 'i')
+                WHERE rowid = new.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS categories_fts_update AFTER UPDATE OF name ON categories
+            BEGIN
+                UPDATE transactions_fts SET category = replace(new.name, 'ı', 'i')
+                WHERE rowid IN (SELECT id FROM transactions WHERE category_id = new.id);
+            END
+        """)
+
+    def create_category_tree(self, cursor):
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'category_tree'")
+        tree_missing = cursor.fetchone() is None
+        # closure table: one row per (ancestor, descendant) pair, including each category with itself at depth 0
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS category_tree (
+                ancestor_id INTEGER NOT NULL,
+                descendant_id INTEGER NOT NULL,
+                depth INTEGER NOT NULL,
+                PRIMARY KEY (descendant_id, ancestor_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_category_tree_ancestor ON category_tree (ancestor_id, depth)")
+        if tree_missing:
+            cursor.execute("""
+                INSERT INTO category_tree (ancestor_id, descendant_id, depth)
+                WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+                    SELECT id, id, 0 FROM categories
+                    UNION ALL
+                    SELECT tree.ancestor_id, c.id, tree.depth + 1
+                    FROM tree JOIN categories c ON c.parent_id = tree.descendant_id
+                )
+                SELECT ancestor_id, descendant_id, depth FROM tree
+            """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS categories_tree_insert AFTER INSERT ON categories
+            BEGIN
+                INSERT INTO category_tree (ancestor_id, descendant_id, depth)
+                SELECT ancestor_id, new.id, depth + 1 FROM category_tree WHERE descendant_id = new.parent_id
+                UNION ALL
+                SELECT new.id, new.id, 0;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS categories_tree_move AFTER UPDATE OF parent_id ON categories
+            WHEN old.parent_id IS NOT new.parent_id
+            BEGIN
+                DELETE FROM category_tree
+                WHERE descendant_id IN (SELECT descendant_id FROM category_tree WHERE ancestor_id = new.id)
+                  AND ancestor_id NOT IN (SELECT descendant_id FROM category_tree WHERE ancestor_id = new.id);
+                INSERT INTO category_tree (ancestor_id, descendant_id, depth)
+                SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+                FROM category_tree above, category_tree below
+                WHERE above.descendant_id = new.parent_id AND below.ancestor_id = new.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS categories_tree_delete AFTER DELETE ON categories
+            BEGIN
+                DELETE FROM category_tree WHERE descendant_id = old.id OR ancestor_id = old.id;
+            END
+        """)
+
     def initialize_default_categories(self):
         default_categories = [
             "Maaş", "Serbest Çalışma", "Yatırımlar",
@@ -1381,199 +3450,3969 @@ class Database:
                     pass
             conn.commit()
 
-    def add_category(self, name):
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO categories (name) VALUES (?)", (name,))
+    def shard_path(self, year):
+        root, ext = os.path.splitext(os.path.basename(self.db_file))
+        return f"{root}_{year}{ext or '.db'}"
+
+    def _resolve_shard(self, path):
+        return os.path.join(os.path.dirname(os.path.abspath(self.db_file)), path)
+
+    def get_shards(self):
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT year, path, row_count FROM ledger_shards ORDER BY year DESC")
+            return cursor.fetchall()
+
+    def _is_cold_year(self, cursor, year):
+        if year >= datetime.now().year:
+            return False
+        if self.sharded:
+            return True
+        cursor.execute("SELECT 1 FROM ledger_shards WHERE year = ?", (year,))
+        return cursor.fetchone() is not None
+
+    @staticmethod
+    def _init_storage(cursor, schema="main"):
+        # auto_vacuum can only be chosen before the first table exists; older files switch on their first vacuum
+        cursor.execute(f"PRAGMA {schema}.page_count")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"PRAGMA {schema}.auto_vacuum = INCREMENTAL")
+
+    def _attach_shard(self, cursor, year):
+        cursor.execute("ATTACH DATABASE ? AS cold", (self._resolve_shard(self.shard_path(year)),))
+        self._init_storage(cursor, "cold")
+        self.create_transactions_table(cursor, "cold")
+
+    def _move_to_shard(self, cursor, year, condition, params=()):
+        cursor.execute(f"""
+            INSERT INTO cold.transactions ({self.TRANSACTION_COLUMNS})
+            SELECT {self.TRANSACTION_COLUMNS} FROM main.transactions WHERE {condition}
+        """, params)
+        moved = cursor.rowcount
+        cursor.execute(f"""
+            INSERT INTO cold.transactions_fts (rowid, description, category)
+            SELECT id, replace(description, 'ı', 'i'),
+                   replace((SELECT name FROM main.categories WHERE id = category_id), 'ı', 'i')
+            FROM main.transactions WHERE {condition}
+        """, params)
+        cursor.execute(f"DELETE FROM main.transactions WHERE {condition}", params)
+        cursor.execute(self.LEDGER_SHARD_UPSERT, (year, self.shard_path(year), moved))
+        return moved
+
+    def rotate_shards(self):
+        hot_start = datetime.now().year * 100
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT month / 100 FROM transactions WHERE month < ?", (hot_start,))
+            years = [row[0] for row in cursor.fetchall()]
+
+            for year in years:
+                self._attach_shard(cursor, year)
+                bounds = (year * 100, (year + 1) * 100)
+                moved = self._move_to_shard(cursor, year, "month >= ? AND month < ?", bounds)
+                conn.commit()
+                cursor.execute("DETACH DATABASE cold")
+                self._mirror("DELETE FROM transactions WHERE month >= ? AND month < ?", bounds)
+                self._mirror(self.LEDGER_SHARD_UPSERT, (year, self.shard_path(year), moved))
+        return years
+
+    def _shard_connection(self, path):
+        conn = self.get_read_connection()
+        uri = pathlib.Path(self._resolve_shard(path)).as_uri() + "?mode=ro"
+        conn.execute("ATTACH DATABASE ? AS cold", (uri,))
+        return conn
+
+    def _ledger_parts(self, start=None, end=None, rollups=False):
+        start_day = self.to_day(start) if start else None
+        end_day = self.to_day(end) if end else None
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MIN(day), MAX(day) FROM transactions")
+            first, last = cursor.fetchone()
+            parts = []
+            if first is None or ((end_day is None or first <= end_day) and (start_day is None or last >= start_day)):
+                parts.append(None)
+
+            cursor.execute("SELECT year, path FROM ledger_shards ORDER BY year DESC")
+            for year, path in cursor.fetchall():
+                if (not start or start <= f"{year}-12-31") and (not end or end >= f"{year}-01-01"):
+                    parts.append(path)
+
+            if rollups:
+                cursor.execute("SELECT MIN(day), MAX(day) FROM archived_rollups")
+                first, last = cursor.fetchone()
+                if first is not None and (end_day is None or first <= end_day) and \
+                        (start_day is None or last >= start_day):
+                    parts.append(self.ARCHIVED)
+            return parts
+
+    def _part_connection(self, part, currency=None):
+        if part is None:
+            conn, table = self.get_read_connection(), "main.transactions"
+        elif part == self.ARCHIVED:
+            conn, table = self.get_read_connection(), \
+                "(SELECT day, month, type, category_id, amount, currency FROM main.archived_rollups)"
+        else:
+            conn, table = self._shard_connection(part), "cold.transactions"
+        if currency:
+            table = self._converted_table(table, part == self.ARCHIVED, currency)
+        return conn, table
+
+    def _converted_table(self, table, rollups, currency, columns=None):
+        columns = columns or ("t.day, t.month, t.type, t.category_id, t.currency" if rollups else
+                              "t.id, t.day, t.month, t.type, t.category_id, t.description, t.created_at, t.currency")
+        amount = f"t.amount * CASE t.currency WHEN '{self.BASE_CURRENCY}' THEN 1.0 ELSE " \
+                 f"{self.RATE_SQL.format(currency='t.currency', day='t.day')} END"
+        if currency != self.BASE_CURRENCY:
+            amount += " / " + self.RATE_SQL.format(currency=f"'{currency}'", day="t.day")
+        return f"(SELECT {columns}, CASE t.currency WHEN '{currency}' THEN t.amount ELSE {amount} END AS amount " \
+               f"FROM {table} t)"
+
+    @staticmethod
+    def _bind_id_sets(cursor, params):
+        # Bitmap parameters (e.g. the ids a tag expression matches) are loaded into this connection's temp.id_sets
+        # and replaced by their set_id, for conditions of the form "id IN (SELECT id FROM temp.id_sets WHERE
+        # set_id = ?)"; the ids never go through the SQL text or a json_each() string
+        if not any(isinstance(param, Bitmap) for param in params):
+            return params
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS id_sets (set_id INTEGER, id INTEGER, PRIMARY KEY (set_id, id)) "
+                       "WITHOUT ROWID")
+        # pooled connections keep their temp tables between queries
+        cursor.execute("DELETE FROM temp.id_sets")
+        bound = []
+        for param in params:
+            if isinstance(param, Bitmap):
+                set_id = len(bound)
+                cursor.executemany("INSERT INTO temp.id_sets (set_id, id) VALUES (?, ?)",
+                                   ((set_id, trans_id) for trans_id in param.ids().tolist()))
+                param = set_id
+            bound.append(param)
+        cursor.connection.commit()
+        return bound
+
+    def _query_part(self, part, sql, params, currency=None):
+        conn, table = self._part_connection(part, currency)
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute(sql.format(transactions=table, search=f"{table}_fts"), self._bind_id_sets(cursor, params))
+            return cursor.fetchall()
+
+    def _iter_part(self, part, sql, params, batch_size):
+        conn, table = self._part_connection(part)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql.format(transactions=table, search=f"{table}_fts"), self._bind_id_sets(cursor, params))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    def _query_ledger(self, sql, params=(), start=None, end=None, rollups=False, currency=None):
+        parts = self._ledger_parts(start, end, rollups)
+        if self.parallel and len(parts) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(parts), os.cpu_count() or 1)) as executor:
+                return list(executor.map(lambda part: self._query_part(part, sql, params, currency), parts))
+        return [self._query_part(part, sql, params, currency) for part in parts]
+
+    @staticmethod
+    def _merge_totals(results, key_len=1):
+        totals = {}
+        for rows in results:
+            for row in rows:
+                key, values = tuple(row[:key_len]), row[key_len:]
+                if key in totals:
+                    totals[key] = [(a or 0) + (b or 0) for a, b in zip(totals[key], values)]
+                else:
+                    totals[key] = list(values)
+        return [key + tuple(values) for key, values in totals.items()]
+
+    def add_category(self, name, parent=None):
+        sql = "INSERT INTO categories (name, parent_id) VALUES (?, (SELECT id FROM categories WHERE name = ?))"
+        if parent and self.get_category_id(parent) is None:
+            raise ValueError(f"Bilinmeyen kategori: {parent}")
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            before = self._begin_write(cursor)
+            cursor.execute(sql, (name, parent))
+            change = self._change(cursor, before, ("categories",))
+            conn.commit()
+        self._mirror(sql, (name, parent))
+        self.cache.publish(change)
+
+    def move_category(self, name, parent=None):
+        category_id = self.get_category_id(name)
+        parent_id = self.get_category_id(parent) if parent else None
+        if category_id is None or parent and parent_id is None:
+            raise ValueError(f"Bilinmeyen kategori: {name if category_id is None else parent}")
+        if parent_id is not None and parent_id in self._subtree_ids(category_id):
+            raise ValueError(f"'{name}' kendi alt kategorisinin altına taşınamaz")
+
+        sql = "UPDATE categories SET parent_id = ? WHERE id = ?"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            before = self._begin_write(cursor)
+            cursor.execute(sql, (parent_id, category_id))
+            change = self._change(cursor, before, ("categories",))
             conn.commit()
+        self._mirror(sql, (parent_id, category_id))
+        self.cache.publish(change)
 
     def delete_category(self, name):
+        # subcategories move up to the deleted category's parent
+        statements = [
+            "DELETE FROM budgets WHERE category_id = (SELECT id FROM categories WHERE name = ?)",
+            "DELETE FROM budget_counters WHERE category_id = (SELECT id FROM categories WHERE name = ?)",
+            """
+            UPDATE categories SET parent_id = (SELECT parent_id FROM categories WHERE name = ?1)
+            WHERE parent_id = (SELECT id FROM categories WHERE name = ?1)
+            """,
+            "DELETE FROM categories WHERE name = ?"
+        ]
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM categories WHERE name = ?", (name,))
+            before = self._begin_write(cursor)
+            for sql in statements:
+                cursor.execute(sql, (name,))
+            change = self._change(cursor, before, ("categories", "budgets", "budget_counters"))
             conn.commit()
+        for sql in statements:
+            self._mirror(sql, (name,))
+        self.cache.publish(change)
 
     def get_categories(self):
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT name FROM categories ORDER BY name")
             return [row[0] for row in cursor.fetchall()]
 
+    def get_category_tree(self):
+        # parents always come before their children, so the rows can be inserted into a tree widget in order
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.name, p.name, MAX(ct.depth) AS depth
+                FROM categories c
+                JOIN category_tree ct ON ct.descendant_id = c.id
+                LEFT JOIN categories p ON p.id = c.parent_id
+                GROUP BY c.id
+                ORDER BY depth, c.name
+            """)
+            return cursor.fetchall()
+
+    def _subtree_ids(self, category_id):
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT descendant_id FROM category_tree WHERE ancestor_id = ?", (category_id,))
+            return {row[0] for row in cursor.fetchall()}
+
+    def get_subcategories(self, name, recursive=False):
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT c.name FROM category_tree ct
+                JOIN categories c ON c.id = ct.descendant_id
+                WHERE ct.ancestor_id = (SELECT id FROM categories WHERE name = ?)
+                  AND {"ct.depth > 0" if recursive else "ct.depth = 1"}
+                ORDER BY ct.depth, c.name
+            """, (name,))
+            return [row[0] for row in cursor.fetchall()]
+
     def get_category_id(self, name):
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT id FROM categories WHERE name = ?", (name,))
             result = cursor.fetchone()
             return result[0] if result else None
 
     def is_category_in_use(self, name):
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT COUNT(*) FROM transactions 
-                WHERE category_id = (SELECT id FROM categories WHERE name = ?)
+                SELECT EXISTS (
+                    SELECT 1 FROM recurring_rules
+                    WHERE category_id = (SELECT id FROM categories WHERE name = ?)
+                )
             """, (name,))
-            return cursor.fetchone()[0] > 0
+            if cursor.fetchone()[0]:
+                return True
+        for part in self._ledger_parts(rollups=True):
+            rows = self._query_part(part, """
+                SELECT EXISTS (
+                    SELECT 1 FROM {transactions}
+                    WHERE category_id = (SELECT id FROM categories WHERE name = ?)
+                )
+            """, (name,))
+            if rows[0][0]:
+                return True
+        return False
+
+    @classmethod
+    def _tag_name(cls, name):
+        name = (name or "").strip()
+        if not name or re.search(r'[\s(),"]', name) or name.startswith("-") or cls.fold_text(name) in cls.TAG_OPERATORS:
+            raise ValueError(f"Geçersiz etiket adı: '{name}' (boşluk, parantez ve virgül içeremez)")
+        return name
+
+    @classmethod
+    def split_tags(cls, text):
+        return [cls._tag_name(name) for name in re.split(r"[,\s]+", text or "") if name]
+
+    def add_tag(self, name):
+        name = self._tag_name(name)
+        sql = "INSERT INTO tags (name) VALUES (?)"
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            before = self._begin_write(cursor)
+            try:
+                cursor.execute(sql, (name,))
+            except sqlite3.IntegrityError:
+                raise ValueError(f"'{name}' etiketi zaten mevcut")
+            change = self._change(cursor, before, ("tags",))
+            conn.commit()
+        self._mirror(sql, (name,))
+        self.cache.publish(change)
+
+    def delete_tag(self, name):
+        statements = [
+            "DELETE FROM tag_bitmaps WHERE tag_id = (SELECT id FROM tags WHERE name = ?)",
+            "DELETE FROM tags WHERE name = ?"
+        ]
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            before = self._begin_write(cursor)
+            for sql in statements:
+                cursor.execute(sql, (name,))
+            if not cursor.rowcount:
+                raise ValueError(f"Bilinmeyen etiket: {name}")
+            change = self._change(cursor, before, self.TAG_TABLES)
+            conn.commit()
+        for sql in statements:
+            self._mirror(sql, (name,))
+        self.cache.publish(change)
+
+    def get_tags(self):
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM tags ORDER BY name")
+            return [row[0] for row in cursor.fetchall()]
+
+    def _tag_ids(self, names, create=False):
+        names = {self._tag_name(name) for name in names}
+        if not names:
+            return set()
+        sql = "SELECT name, id FROM tags WHERE name IN (SELECT value FROM json_each(?))"
+        with self.get_read_connection() as conn:
+            ids = dict(conn.execute(sql, (json.dumps(sorted(names)),)).fetchall())
+        missing = names - ids.keys()
+        if missing and not create:
+            raise ValueError(f"Bilinmeyen etiket: {', '.join(sorted(missing))}")
+        if missing:
+            for name in sorted(missing):
+                self.add_tag(name)
+            with self.get_read_connection() as conn:
+                ids = dict(conn.execute(sql, (json.dumps(sorted(names)),)).fetchall())
+        return set(ids.values())
+
+    def _tag_chunks(self, cursor, chunks):
+        cursor.execute("SELECT tag_id, chunk, bits FROM tag_bitmaps WHERE chunk IN (SELECT value FROM json_each(?))",
+                       (json.dumps(sorted(chunks)),))
+        return {(tag_id, chunk): Bitmap.decode_chunk(bits) for tag_id, chunk, bits in cursor.fetchall()}
+
+    @staticmethod
+    def _tag_sets(chunks, ids):
+        ids = np.array(sorted(ids), dtype=np.int64)
+        tags = {trans_id: set() for trans_id in ids.tolist()}
+        for (tag_id, chunk), offsets in chunks.items():
+            candidates = ids[ids >> Bitmap.CHUNK_BITS == chunk]
+            for trans_id in candidates[np.isin(candidates & 0xFFFF, offsets)].tolist():
+                tags[trans_id].add(tag_id)
+        return {trans_id: frozenset(tag_ids) for trans_id, tag_ids in tags.items()}
+
+    def _retag(self, cursor, targets):
+        # targets: {id: (tag ids to add, tag ids to remove, or None to drop every other tag)}; only the chunks
+        # holding those ids are read and rewritten. Returns the tag sets before and after and the bitmap rows.
+        chunks = self._tag_chunks(cursor, {trans_id >> Bitmap.CHUNK_BITS for trans_id in targets})
+        cursor.execute("SELECT id FROM tags")
+        existing = {row[0] for row in cursor.fetchall()}
+        before, after = self._tag_sets(chunks, targets), {}
+        for trans_id, (added, removed) in targets.items():
+            tags = set(added) if removed is None else before[trans_id] - set(removed) | set(added)
+            if tags & existing != before[trans_id]:
+                after[trans_id] = frozenset(tags & existing)
+
+        grouped = {}
+        for trans_id, tags in after.items():
+            key = trans_id >> Bitmap.CHUNK_BITS
+            for index, tag_ids in enumerate((before[trans_id] - tags, tags - before[trans_id])):
+                for tag_id in tag_ids:
+                    grouped.setdefault((tag_id, key), ([], []))[index].append(trans_id & 0xFFFF)
+        upserts, deletes = [], []
+        for key, (removed, added) in grouped.items():
+            offsets = chunks.get(key, np.array([], dtype=np.uint16))
+            offsets = np.union1d(np.setdiff1d(offsets, removed), added).astype(np.uint16)
+            if len(offsets):
+                upserts.append(key + (Bitmap.encode_chunk(offsets),))
+            else:
+                deletes.append(key)
+        return {trans_id: before[trans_id] for trans_id in after}, after, upserts, deletes
+
+    def tag_transactions(self, ids, add=(), remove=()):
+        current = self._require_rows(ids)
+        added, removed = self._tag_ids(add, create=True), self._tag_ids(remove)
+        return self._rewrite(f"{len(current)} işlemin etiketleri değiştirildi", current, {},
+                             tags=dict.fromkeys(current, (added, removed)))
+
+    def get_transaction_tags(self, ids):
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            chunks = self._tag_chunks(cursor, {trans_id >> Bitmap.CHUNK_BITS for trans_id in ids})
+            cursor.execute("SELECT id, name FROM tags")
+            names = dict(cursor.fetchall())
+        return {trans_id: sorted(names[tag_id] for tag_id in tag_ids)
+                for trans_id, tag_ids in self._tag_sets(chunks, ids).items()}
+
+    def _tag_bitmaps(self, names=None):
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT t.name, b.chunk, b.bits FROM tags t
+                LEFT JOIN tag_bitmaps b ON b.tag_id = t.id
+                {"WHERE t.name IN (SELECT value FROM json_each(?))" if names is not None else ""}
+            """, (json.dumps(sorted(names)),) if names is not None else ())
+            chunks = {}
+            for name, chunk, bits in cursor.fetchall():
+                chunks.setdefault(name, [])
+                if chunk is not None:
+                    chunks[name].append((chunk, bits))
+        return {name: Bitmap.decode(rows) for name, rows in chunks.items()}
+
+    @staticmethod
+    def _tag_and(left, right):
+        (a, a_negated), (b, b_negated) = left, right
+        if a_negated and b_negated:
+            return a | b, True
+        if a_negated or b_negated:
+            return (b - a, False) if a_negated else (a - b, False)
+        return a & b, False
+
+    @staticmethod
+    def _tag_or(left, right):
+        (a, a_negated), (b, b_negated) = left, right
+        if a_negated and b_negated:
+            return a & b, True
+        if a_negated or b_negated:
+            return (a - b, True) if a_negated else (b - a, True)
+        return a | b, False
+
+    def match_tags(self, expression, bitmaps=None):
+        # evaluates e.g. "tatil VE (iş VEYA -proje)" to (bitmap, negated): the matching ids are the bitmap or,
+        # when negated, every id outside it, so NOT never has to enumerate the whole ledger. bitmaps replaces the
+        # tag bitmaps, e.g. with sets of archived tag combinations.
+        tokens = [self.TAG_OPERATORS.get(self.fold_text(token), token)
+                  for token in re.findall(r"[()]|[^\s()]+", expression or "")]
+        if bitmaps is None:
+            bitmaps = self._tag_bitmaps({token[1:] if token.startswith("-") else token for token in tokens
+                                         if token not in ("(", ")", "AND", "OR", "NOT", "-")})
+        error = ValueError(f"Etiket ifadesi hatalı: {expression}")
+
+        def operand():
+            if not tokens:
+                raise error
+            token = tokens.pop(0)
+            if token == "NOT":
+                bitmap, negated = operand()
+                return bitmap, not negated
+            if token == "(":
+                result = either()
+                if not tokens or tokens.pop(0) != ")":
+                    raise error
+                return result
+            name = token[1:] if token.startswith("-") else token
+            if token in (")", "AND", "OR") or not name:
+                raise error
+            if name not in bitmaps:
+                raise ValueError(f"Bilinmeyen etiket: {name}")
+            return bitmaps[name], token.startswith("-")
+
+        def both():
+            result = operand()
+            while tokens and tokens[0] not in ("OR", ")"):
+                if tokens[0] == "AND":
+                    tokens.pop(0)
+                result = self._tag_and(result, operand())
+            return result
+
+        def either():
+            result = both()
+            while tokens and tokens[0] == "OR":
+                tokens.pop(0)
+                result = self._tag_or(result, both())
+            return result
+
+        result = either()
+        if tokens:
+            raise error
+        return result
+
+    def _tag_condition(self, expression, column="t.id"):
+        # the parameter is the matching bitmap itself; the part connection binds it through temp.id_sets
+        bitmap, negated = self.match_tags(expression)
+        return f"{column} {'NOT IN' if negated else 'IN'} (SELECT id FROM temp.id_sets WHERE set_id = ?)", bitmap
+
+    def _archived_tag_combinations(self, expression=None):
+        # archived rows have no ids left to look up: their tags live on in archived_tag_rollups, one key per
+        # combination, so an expression is matched against the combinations instead
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT tag_ids FROM archived_tag_rollups")
+            combinations = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT id, name FROM tags")
+            names = dict(cursor.fetchall())
+        members = {name: [] for name in names.values()}
+        for index, combination in enumerate(combinations):
+            for tag_id in json.loads(combination):
+                if tag_id in names:
+                    members[names[tag_id]].append(index)
+        if expression is None:
+            return combinations, members
+        bitmap, negated = self.match_tags(expression, {name: Bitmap.from_ids(indices)
+                                                       for name, indices in members.items()})
+        return [combinations[index] for index in bitmap.ids().tolist()], negated
+
+    def _query_tag_rollups(self, columns, start=None, end=None, conditions=(), params=(), group_by=None,
+                           currency=None):
+        table = self._converted_table("main.archived_tag_rollups", True, currency or self.reporting_currency,
+                                      "t.tag_ids, t.day, t.month, t.type, t.currency")
+        where, day_params = self._day_range(start, end, conditions=conditions)
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {columns} FROM {table} {where} {f'GROUP BY {group_by}' if group_by else ''}",
+                           list(params) + day_params)
+            return cursor.fetchall()
 
-    def add_transaction(self, trans_type, amount, category, description="", date=None):
+    def _tag_rollup_rows(self, cursor, rows):
+        # rows: (id, day, month, type, minor amount, currency) about to leave the ledger; the tagged ones are summed
+        # per tag combination
+        rows = list(rows)
+        tags = self._tag_sets(self._tag_chunks(cursor, {row[0] >> Bitmap.CHUNK_BITS for row in rows}),
+                              [row[0] for row in rows])
+        totals = {}
+        for trans_id, day, month, trans_type, minor, currency in rows:
+            if tags[trans_id]:
+                key = (json.dumps(sorted(tags[trans_id])), day, month, trans_type, currency)
+                amount, count = totals.get(key, (0, 0))
+                totals[key] = (amount + minor, count + 1)
+        return [key[:4] + value + key[4:] for key, value in totals.items()]
+
+    def _backfill_tag_rollups(self):
+        rows = [(trans_id, self.to_day(date), self.to_month(date), trans_type, self.to_minor(amount), currency)
+                for page in self._iter_archive_pages({})
+                for trans_id, date, trans_type, _, amount, _, currency in page]
+        if not rows:
+            return
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            before = self._begin_write(cursor)
+            rollups = self._tag_rollup_rows(cursor, rows)
+            cursor.executemany(self.TAG_ROLLUP_UPSERT, rollups)
+            change = self._change(cursor, before, ("archived_tag_rollups",))
+            conn.commit()
+        self._mirror(self.TAG_ROLLUP_UPSERT, rollups, many=True)
+        self.cache.publish(change)
+
+    def get_setting(self, key, default=None):
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
+            result = cursor.fetchone()
+            return result[0] if result else default
+
+    def set_setting(self, key, value):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            before = self._begin_write(cursor)
+            cursor.execute(self.SETTING_UPSERT, (key, value))
+            change = self._change(cursor, before, ("settings",))
+            conn.commit()
+        self._mirror(self.SETTING_UPSERT, (key, value))
+        self.cache.publish(change)
+
+    def get_currencies(self):
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT currency FROM fx_rates ORDER BY currency")
+            return [self.BASE_CURRENCY] + [row[0] for row in cursor.fetchall()]
+
+    def _check_currency(self, currency):
+        currency = (currency or self.BASE_CURRENCY).strip().upper()
+        if currency not in self.get_currencies():
+            raise ValueError(f"'{currency}' için döviz kuru yüklenmemiş")
+        return currency
+
+    def set_reporting_currency(self, currency):
+        currency = self._check_currency(currency)
+        self.set_setting("reporting_currency", currency)
+        self.reporting_currency = currency
+
+    def load_fx_rates(self, path):
+        frame = pd.read_json(path, convert_dates=False) if path.lower().endswith(".json") else pd.read_csv(path)
+        missing = {"date", "currency", "rate"} - set(frame.columns)
+        if missing:
+            raise ValueError(f"Kur dosyasında eksik sütunlar: {', '.join(sorted(missing))}")
+
+        currencies = frame["currency"].astype(str).str.strip().str.upper()
+        if not currencies.str.fullmatch(r"[A-Z]{3}").all():
+            raise ValueError("Para birimi kodları üç harfli olmalı (ör. USD)")
+        rates = pd.to_numeric(frame["rate"], errors="coerce")
+        if rates.isna().any() or (rates <= 0).any():
+            raise ValueError("Kurlar sıfırdan büyük sayılar olmalı")
+        days = (pd.to_datetime(frame["date"].astype(str).str[:10], format="%Y-%m-%d", errors="coerce")
+                - self.EPOCH).dt.days
+        if days.isna().any():
+            raise ValueError("Tarihler YYYY-AA-GG biçiminde olmalı!")
+
+        keep = (currencies != self.BASE_CURRENCY).to_numpy()
+        rows = list(zip(currencies[keep].tolist(), days[keep].astype(int).tolist(), rates[keep].astype(float).tolist()))
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            before = self._begin_write(cursor)
+            cursor.executemany(self.FX_RATE_UPSERT, rows)
+            change = self._change(cursor, before, ("fx_rates",))
+            conn.commit()
+        self._mirror(self.FX_RATE_UPSERT, rows, many=True)
+        self.cache.publish(change)
+        return len(rows)
+
+    def _rate(self, cursor, currency, day):
+        if currency == self.BASE_CURRENCY:
+            return 1.0
+        cursor.execute(f"SELECT {self.RATE_SQL.format(currency=':currency', day=':day')}",
+                       {"currency": currency, "day": day})
+        rate = cursor.fetchone()[0]
+        if rate is None:
+            raise ValueError(f"'{currency}' için döviz kuru yüklenmemiş")
+        return rate
+
+    def _rate_series(self, cursor):
+        cursor.execute("SELECT currency, day, rate FROM fx_rates ORDER BY currency, day")
+        series = {}
+        for currency, rows in itertools.groupby(cursor.fetchall(), key=lambda row: row[0]):
+            _, days, rates = zip(*rows)
+            series[currency] = (np.array(days, dtype=np.int64), np.array(rates, dtype=np.float64))
+        return series
+
+    def get_rate_series(self):
+        with self.get_read_connection() as conn:
+            return self._rate_series(conn.cursor())
+
+    def _rates_at(self, rates, currency, days):
+        if currency == self.BASE_CURRENCY:
+            return np.ones(len(days))
+        if currency not in rates:
+            raise ValueError(f"'{currency}' için döviz kuru yüklenmemiş")
+        series_days, values = rates[currency]
+        return values[np.maximum(np.searchsorted(series_days, days, side="right") - 1, 0)]
+
+    def convert_amounts(self, amounts, currencies, days, currency=None, rates=None):
+        currency = currency or self.reporting_currency
+        amounts = np.asarray(amounts, dtype=np.float64)
+        currencies = np.asarray(currencies, dtype=str)
+        days = np.asarray(days, dtype=np.int64)
+        codes = np.unique(currencies)
+        if not codes.size or codes.tolist() == [currency]:
+            return amounts
+
+        if rates is None:
+            rates = self.get_rate_series()
+        factors = np.empty(len(amounts))
+        for code in codes:
+            mask = currencies == code
+            factors[mask] = self._rates_at(rates, code, days[mask])
+        return amounts * factors / self._rates_at(rates, currency, days)
+
+    def add_transaction(self, trans_type, amount, category, description="", date=None, currency=None, tags=()):
         if not date:
             date = datetime.now().strftime("%Y-%m-%d")
 
         category_id = self.get_category_id(category)
         if not category_id:
             raise ValueError(f"'{category}' kategorisi mevcut değil")
+        currency = self._check_currency(currency)
+        tag_ids = self._tag_ids(tags, create=True)
 
+        day, month, minor = self.to_day(date), self.to_month(date), self.to_minor(amount)
+        year = month // 100
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            base_minor = int(round(minor * self._rate(cursor, currency, day)))
+            counters = self._budget_counter_rows(category_id, month, base_minor) if trans_type == "Expense" else []
+            cold = self._is_cold_year(cursor, year)
+            if cold:
+                self._attach_shard(cursor, year)
+            before = self._begin_write(cursor)
+
             cursor.execute("""
-                INSERT INTO transactions (date, type, category_id, amount, description)
-                VALUES (?, ?, ?, ?, ?)
-            """, (date, trans_type, category_id, amount, description))
+                INSERT INTO transactions (day, month, type, category_id, amount, description, currency)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (day, month, trans_type, category_id, minor, description, currency))
+            trans_id = cursor.lastrowid
+
+            self._log_changes(cursor, [trans_id])
+            _, _, tag_upserts, _ = self._retag(cursor, {trans_id: (tag_ids, ())}) if tag_ids else ({}, {}, [], [])
+            cursor.executemany(self.TAG_BITMAP_UPSERT, tag_upserts)
+            if cold:
+                self._move_to_shard(cursor, year, "id = ?", (trans_id,))
+            else:
+                cursor.execute(f"SELECT {self.TRANSACTION_COLUMNS} FROM transactions WHERE id = ?", (trans_id,))
+                row = cursor.fetchone()
+            cursor.executemany(self.BUDGET_COUNTER_UPSERT, counters)
+            stats, anomalies = self._track_expenses(cursor,
+                                                    [(trans_id, day, category_id, base_minor)] if counters else [])
+            change = self._change(cursor, before, self.LEDGER_WRITE_TABLES + (self.TAG_TABLES if tag_ids else ()),
+                                  date, date)
             conn.commit()
-
-    def get_balance(self):
+            if cold:
+                cursor.execute("DETACH DATABASE cold")
+                self._mirror(self.LEDGER_SHARD_UPSERT, (year, self.shard_path(year), 1))
+            else:
+                self._mirror(f"INSERT INTO transactions ({self.TRANSACTION_COLUMNS}) "
+                             f"VALUES ({', '.join('?' * len(row))})", row)
+        self._mirror(self.TAG_BITMAP_UPSERT, tag_upserts, many=True)
+        if counters:
+            self._mirror(self.BUDGET_COUNTER_UPSERT, counters, many=True)
+            self._mirror(self.CATEGORY_STATS_UPSERT, stats, many=True)
+            self._mirror(self.ANOMALY_UPSERT, anomalies, many=True)
+        self.cache.publish(change)
+        return trans_id
+
+    def import_transactions(self, transactions):
+        with self.get_read_connection() as conn:
+            categories = dict(conn.execute("SELECT name, id FROM categories").fetchall())
+        currencies = set(self.get_currencies())
+
+        rows = []
+        for trans_type, amount, category, description, date, *currency in transactions:
+            if category not in categories:
+                raise ValueError(f"'{category}' kategorisi mevcut değil")
+            currency = currency[0] if currency and currency[0] else self.BASE_CURRENCY
+            if currency not in currencies:
+                raise ValueError(f"'{currency}' için döviz kuru yüklenmemiş")
+            rows.append((self.to_day(date), self.to_month(date), trans_type, categories[category],
+                         self.to_minor(amount), description or "", currency))
+
+        mirrored = []
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            before = self._begin_write(cursor)
+            self._insert_batch(cursor, rows, mirrored)
+            change = self._change(cursor, before, self.LEDGER_WRITE_TABLES, *self._day_span([row[0] for row in rows]))
+            conn.commit()
+        if rows:
+            self._refresh_after_bulk_write(mirrored)
+        self.cache.publish(change)
+        return len(rows)
+
+    def _insert_batch(self, cursor, transactions, mirrored):
+        # statements for the memory-mode copy are appended to mirrored and replayed after the commit
+        if not transactions:
+            return []
+
+        cursor.executemany("""
+            INSERT INTO transactions (day, month, type, category_id, amount, description, currency)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, transactions)
+        # the caller holds the write lock, so AUTOINCREMENT handed out one contiguous id range
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'")
+        last_id = cursor.fetchone()[0]
+        ids = list(range(last_id - len(transactions) + 1, last_id + 1))
+        cursor.execute(f"SELECT {self.TRANSACTION_COLUMNS} FROM transactions WHERE id >= ?", (ids[0],))
+        rows = cursor.fetchall()
+        mirrored.append((f"INSERT INTO transactions ({self.TRANSACTION_COLUMNS}) "
+                         f"VALUES ({', '.join('?' * len(rows[0]))})", rows, True))
+        self._log_changes(cursor, ids)
+
+        expenses = [(trans_id, day, category_id, minor, month, currency)
+                    for trans_id, (day, month, trans_type, category_id, minor, _, currency) in zip(ids, transactions)
+                    if trans_type == "Expense"]
+        if not expenses:
+            return ids
+
+        trans_ids, days, category_ids, minors, months, currencies = zip(*expenses)
+        base = np.rint(self.convert_amounts(minors, currencies, days, self.BASE_CURRENCY,
+                                            self._rate_series(cursor))).astype(np.int64).tolist()
+        counters = [counter for category_id, month, minor in zip(category_ids, months, base)
+                    for counter in self._budget_counter_rows(category_id, month, minor)]
+        cursor.executemany(self.BUDGET_COUNTER_UPSERT, counters)
+        stats, anomalies = self._track_expenses(cursor, list(zip(trans_ids, days, category_ids, base)))
+        mirrored += [(self.BUDGET_COUNTER_UPSERT, counters, True), (self.CATEGORY_STATS_UPSERT, stats, True),
+                     (self.ANOMALY_UPSERT, anomalies, True)]
+        return ids
+
+    def _refresh_after_bulk_write(self, mirrored):
+        for sql, params, many in mirrored:
+            self._mirror(sql, params, many)
+        if self.sharded:
+            self.rotate_shards()
+
+    def get_transaction(self, trans_id):
+        found = self._current_rows([trans_id]).get(trans_id)
+        if found is None:
+            return None
+        trans_id, day, _, trans_type, category_id, amount, description, _, currency = found[1]
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM categories WHERE id = ?", (category_id,))
+            category = cursor.fetchone()[0]
+        return trans_id, self.from_day(day), trans_type, category, self.from_minor(amount), description, currency
+
+    def update_transaction(self, trans_id, trans_type=None, amount=None, category=None, description=None,
+                           date=None, currency=None, tags=None):
+        current = self._require_rows([trans_id])
+        columns = self.TRANSACTION_COLUMNS.split(", ")
+        row = dict(zip(columns, current[trans_id][1]))
+        if trans_type is not None:
+            if trans_type not in ("Income", "Expense"):
+                raise ValueError(f"Bilinmeyen işlem türü: {trans_type}")
+            row["type"] = trans_type
+        if amount is not None:
+            row["amount"] = self.to_minor(amount)
+            if row["amount"] <= 0:
+                raise ValueError("Tutar sıfırdan büyük olmalı")
+        if category is not None:
+            row["category_id"] = self.get_category_id(category)
+            if not row["category_id"]:
+                raise ValueError(f"'{category}' kategorisi mevcut değil")
+        if description is not None:
+            row["description"] = description
+        if date:
+            try:
+                row["day"], row["month"] = self.to_day(date), self.to_month(date)
+            except ValueError:
+                raise ValueError(f"Tarih YYYY-AA-GG biçiminde olmalı: {date}")
+        if currency is not None:
+            row["currency"] = self._check_currency(currency)
+        retag = {trans_id: (self._tag_ids(tags, create=True), None)} if tags is not None else None
+        return self._rewrite(f"{trans_id} numaralı işlem düzenlendi", current,
+                             {trans_id: tuple(row[column] for column in columns)}, tags=retag)
+
+    def recategorize_transactions(self, ids, category):
+        category_id = self.get_category_id(category)
+        if not category_id:
+            raise ValueError(f"'{category}' kategorisi mevcut değil")
+        current = self._require_rows(ids)
+        return self._rewrite(f"{len(current)} işlem '{category}' kategorisine taşındı", current,
+                             {trans_id: row[:4] + (category_id,) + row[5:] for trans_id, (_, row) in current.items()})
+
+    def delete_transaction(self, trans_id):
+        return self.delete_transactions([trans_id])
+
+    def delete_transactions(self, ids):
+        current = self._require_rows(ids)
+        return self._rewrite(f"{len(current)} işlem silindi", current, dict.fromkeys(current))
+
+    @property
+    def undo_label(self):
+        return self._undo[-1][0] if self._undo else None
+
+    @property
+    def redo_label(self):
+        return self._redo[-1][0] if self._redo else None
+
+    def undo(self):
+        return self._replay(self._undo, self._redo, True)
+
+    def redo(self):
+        return self._replay(self._redo, self._undo, False)
+
+    def _replay(self, stack, other, reverse):
+        if not stack:
+            return None
+        label, before, after, tags_before, tags_after = stack[-1]
+        expected, rows, tags = (after, before, tags_before) if reverse else (before, after, tags_after)
+        current = self._current_rows(rows.keys() | tags.keys())
+        if {trans_id: row for trans_id, (_, row) in current.items() if trans_id in rows} != \
+                {trans_id: row for trans_id, row in expected.items() if row is not None} or \
+                not tags.keys() - rows.keys() <= current.keys():
+            stack.pop()
+            raise ValueError(f"'{label}' adımı uygulanamıyor: işlemler o zamandan beri değişti veya arşivlendi")
+        self._rewrite(None, current, rows, tags=tags)
+        other.append(stack.pop())
+        return label
+
+    def _current_rows(self, ids):
+        ids = json.dumps(sorted(set(ids)))
+        rows = {}
+        for part in self._ledger_parts():
+            for row in self._query_part(part, f"SELECT {self.TRANSACTION_COLUMNS} FROM {{transactions}} "
+                                              f"WHERE id IN (SELECT value FROM json_each(?))", (ids,)):
+                rows[row[0]] = (part, row)
+        return rows
+
+    def _require_rows(self, ids):
+        current = self._current_rows(ids)
+        missing = [str(trans_id) for trans_id in ids if trans_id not in current]
+        if missing:
+            raise ValueError(f"İşlem bulunamadı (arşivlenmiş olabilir): {', '.join(missing)}")
+        return current
+
+    def _expense_amounts(self, rows, rates):
+        expenses = [row for row in rows if row[3] == "Expense"]
+        if not expenses:
+            return {}
+        ids, days, months, _, category_ids, minors, _, _, currencies = zip(*expenses)
+        base = np.rint(self.convert_amounts(minors, currencies, days, self.BASE_CURRENCY, rates)).astype(np.int64)
+        return {trans_id: (day, month, category_id, minor)
+                for trans_id, day, month, category_id, minor in zip(ids, days, months, category_ids, base.tolist())}
+
+    def _rewrite(self, label, current, target, origins=None, tags=None):
+        # current: {id: (part, row)} as read, target: {id: row or None}; rows are in TRANSACTION_COLUMNS order.
+        # Everything, including the budget counters and category stats, is adjusted by the difference in one
+        # write transaction, with one statement per part and kind of change however many rows are involved.
+        # origins carries the change log entries of merged rows; local edits get a new clock tick instead.
+        # tags: {id: (tag ids to add, to remove or None)} as taken by _retag; deleted rows lose all their tags.
+        columns = self.TRANSACTION_COLUMNS.split(", ")
+        target = {trans_id: row for trans_id, row in target.items()
+                  if row != (current[trans_id][1] if trans_id in current else None)}
+        if not target and not origins and not tags:
+            return 0
+        old = {trans_id: current[trans_id][1] for trans_id in target if trans_id in current}
+        new = {trans_id: row for trans_id, row in target.items() if row is not None}
 
-            cursor.execute("SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE type = 'Income'")
-            total_income = cursor.fetchone()[0] or 0
-
-            cursor.execute("SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE type = 'Expense'")
-            total_expenses = cursor.fetchone()[0] or 0
-
-            return total_income - total_expenses
-
-    def get_recent_transactions(self, limit=10):
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("SELECT path, year FROM ledger_shards")
+            years = dict(cursor.fetchall())
+            destinations = {}
+            for trans_id, row in new.items():
+                year = row[2] // 100
+                destinations[trans_id] = self.shard_path(year) if self._is_cold_year(cursor, year) else None
+                if destinations[trans_id]:
+                    years[destinations[trans_id]] = year
+            shards = sorted(({current[trans_id][0] for trans_id in old} | set(destinations.values())) - {None})
+            if len(shards) > self.MAX_ATTACHED:
+                raise ValueError(f"Tek seferde en fazla {self.MAX_ATTACHED} yılın işlemleri değiştirilebilir")
+            schemas = {None: "main"}
+            for index, path in enumerate(shards):
+                schemas[path] = f"shard{index}"
+                cursor.execute(f"ATTACH DATABASE ? AS {schemas[path]}", (self._resolve_shard(path),))
+                self.create_transactions_table(cursor, schemas[path])
+            before = self._begin_write(cursor)
+
+            # the rows were read before the write lock was taken
+            ids = json.dumps(sorted(target))
+            found = {}
+            for schema in schemas.values():
+                cursor.execute(f"SELECT {self.TRANSACTION_COLUMNS} FROM {schema}.transactions "
+                               f"WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+                found.update((row[0], row) for row in cursor.fetchall())
+            if found != old:
+                raise ValueError("İşlemler bu arada değiştirildi, lütfen tekrar deneyin")
+
+            # rows that stay in their part are updated in place, grouped by the columns and values that change
+            removed, added, changed = {}, {}, {}
+            for trans_id, row in target.items():
+                part = current[trans_id][0] if trans_id in old else None
+                if trans_id in old and row is not None and part == destinations[trans_id]:
+                    diff = tuple((column, value) for column, value, previous in zip(columns, row, old[trans_id])
+                                 if value != previous)
+                    changed.setdefault((part, diff), []).append(trans_id)
+                    continue
+                if trans_id in old:
+                    removed.setdefault(part, []).append(trans_id)
+                if row is not None:
+                    added.setdefault(destinations[trans_id], []).append(row)
+
+            statements = []
+            for part, trans_ids in removed.items():
+                statements.append((part, f"DELETE FROM {schemas[part]}.transactions "
+                                         f"WHERE id IN (SELECT value FROM json_each(?))",
+                                   (json.dumps(trans_ids),), False))
+            for (part, diff), trans_ids in changed.items():
+                statements.append((part, f"UPDATE {schemas[part]}.transactions "
+                                         f"SET {', '.join(column + ' = ?' for column, _ in diff)} "
+                                         f"WHERE id IN (SELECT value FROM json_each(?))",
+                                   tuple(value for _, value in diff) + (json.dumps(trans_ids),), False))
+            values = ", ".join(f"json_extract(value, '$[{index}]')" for index in range(len(columns)))
+            for part, rows in added.items():
+                statements.append((part, f"INSERT INTO {schemas[part]}.transactions ({self.TRANSACTION_COLUMNS}) "
+                                         f"SELECT {values} FROM json_each(?)", (json.dumps(rows),), False))
+
+            shard_ids = [row[0] for part, rows in added.items() if part for row in rows]
+            if shard_ids:
+                # ids are handed out by the main table, which has to know about rows that only reached a shard
+                statements.append((None, "INSERT INTO sqlite_sequence (name, seq) SELECT 'transactions', 0 "
+                                         "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'transactions')",
+                                   (), False))
+                statements.append((None, "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'transactions'",
+                                   (max(shard_ids),), False))
+            if shards:
+                counts = dict.fromkeys(shards, 0)
+                for part, trans_ids in removed.items():
+                    if part:
+                        counts[part] -= len(trans_ids)
+                for part, rows in added.items():
+                    if part:
+                        counts[part] += len(rows)
+                statements.append((None, self.LEDGER_SHARD_UPSERT,
+                                   [(years[path], path, count) for path, count in counts.items() if count], True))
+                # shard tables have no version triggers
+                statements.append((None, "UPDATE data_version SET version = version + 1", (), False))
+
+            rates = self._rate_series(cursor)
+            old_expenses = self._expense_amounts(old.values(), rates)
+            new_expenses = self._expense_amounts(new.values(), rates)
+            removed_expenses = [(trans_id,) + expense for trans_id, expense in old_expenses.items()
+                                if new_expenses.get(trans_id) != expense]
+            added_expenses = [(trans_id,) + expense for trans_id, expense in new_expenses.items()
+                              if old_expenses.get(trans_id) != expense]
+
+            counters, stats = {}, {}
+            for sign, expenses in ((-1, removed_expenses), (1, added_expenses)):
+                for _, _, month, category_id, minor in expenses:
+                    for category, period, key, spent in self._budget_counter_rows(category_id, month, sign * minor):
+                        counters[category, period, key] = counters.get((category, period, key), 0) + spent
+            for _, _, _, category_id, minor in removed_expenses:
+                if category_id not in stats:
+                    cursor.execute("SELECT count, mean, m2, median, mad, sample FROM category_stats "
+                                   "WHERE category_id = ?", (category_id,))
+                    stats[category_id] = cursor.fetchone()
+                if stats[category_id]:
+                    stats[category_id] = self._remove_stats(stats[category_id], minor)
+            statements.append((None, self.BUDGET_COUNTER_UPSERT,
+                               [key + (spent,) for key, spent in counters.items() if spent], True))
+            statements.append((None, self.CATEGORY_STATS_UPSERT,
+                               [(category_id,) + tuple(values) for category_id, values in stats.items() if values],
+                               True))
+            statements.append((None, "DELETE FROM anomalies WHERE transaction_id IN (SELECT value FROM json_each(?))",
+                               (json.dumps([expense[0] for expense in removed_expenses]),), False))
+
+            retag = dict(tags or {})
+            retag.update((trans_id, ((), None)) for trans_id, row in target.items() if row is None)
+            tags_before, tags_after, upserts, deletes = self._retag(cursor, retag) if retag else ({}, {}, [], [])
+            statements.append((None, self.TAG_BITMAP_UPSERT, upserts, True))
+            statements.append((None, self.TAG_BITMAP_DELETE, deletes, True))
+
+            for _, sql, params, many in statements:
+                if many:
+                    cursor.executemany(sql, params)
+                else:
+                    cursor.execute(sql, params)
+            stats, anomalies = self._track_expenses(cursor, [(trans_id, day, category_id, minor)
+                                                             for trans_id, day, _, category_id, minor in
+                                                             added_expenses])
+
+            # shard search indexes are not kept up by triggers (see create_search_index)
+            reindex = {}
+            for (part, diff), trans_ids in changed.items():
+                if part and {"description", "category_id"} & dict(diff).keys():
+                    reindex.setdefault(part, []).extend(trans_ids)
+            for part, rows in added.items():
+                if part:
+                    reindex.setdefault(part, []).extend(row[0] for row in rows)
+            for part, trans_ids in reindex.items():
+                cursor.execute(f"DELETE FROM {schemas[part]}.transactions_fts "
+                               f"WHERE rowid IN (SELECT value FROM json_each(?))", (json.dumps(trans_ids),))
+                cursor.execute(f"""
+                    INSERT INTO {schemas[part]}.transactions_fts (rowid, description, category)
+                    SELECT id, replace(description, 'ı', 'i'),
+                           replace((SELECT name FROM main.categories WHERE id = category_id), 'ı', 'i')
+                    FROM {schemas[part]}.transactions WHERE id IN (SELECT value FROM json_each(?))
+                """, (json.dumps(trans_ids),))
+
+            if origins is None:
+                self._log_changes(cursor, [trans_id for trans_id in new], [trans_id for trans_id in old
+                                                                          if trans_id not in new])
+            else:
+                self._log_origins(cursor, origins)
+            days = [row[1] for row in itertools.chain(old.values(), new.values())]
+            days += [current[trans_id][1][1] for trans_id in tags_after if trans_id in current]
+            change = self._change(cursor, before, (self.LEDGER_WRITE_TABLES if target else ()) +
+                                  (self.TAG_TABLES if tags_after else ()), *self._day_span(days))
+            conn.commit()
+            for path in shards:
+                cursor.execute(f"DETACH DATABASE {schemas[path]}")
+
+        for part, sql, params, many in statements:
+            if part is None:
+                self._mirror(sql, params, many)
+        self._mirror(self.CATEGORY_STATS_UPSERT, stats, many=True)
+        self._mirror(self.ANOMALY_UPSERT, anomalies, many=True)
+        if label is not None and (target or tags_after):
+            self._undo.append((label, {trans_id: old.get(trans_id) for trans_id in target}, target,
+                               {trans_id: (tag_ids, None) for trans_id, tag_ids in tags_before.items()},
+                               {trans_id: (tag_ids, None) for trans_id, tag_ids in tags_after.items()}))
+            self._redo.clear()
+        self.cache.publish(change)
+        return len(target.keys() | tags_after.keys())
+
+    def _replica_id(self):
+        # a copied file must not keep the identity of the original, or the two could never tell each other apart
+        path = os.path.realpath(self.db_file)
+        replica = self.get_setting("replica_id")
+        if replica and self.get_setting("replica_path") == path:
+            return replica
+        replica = str(uuid.uuid4())
+        with self.get_connection() as conn:
+            conn.executemany(self.SETTING_UPSERT, [("replica_id", replica), ("replica_path", path)])
+        return replica
+
+    def _backfill_change_log(self):
+        # rows older than the log get ids derived from their content, so copies of one file agree on them
+        entries = []
+        for part in self._ledger_parts():
+            for row in self._query_part(part, f"SELECT {self.TRANSACTION_COLUMNS} FROM {{transactions}}", ()):
+                entries.append((str(uuid.uuid5(self.SYNC_NAMESPACE, json.dumps(row))), row[0]))
+        with self.get_connection() as conn:
+            conn.executemany("INSERT OR IGNORE INTO change_log (uuid, transaction_id, clock, replica, seq) "
+                             "VALUES (?, ?, 0, '', 1)", entries)
+
+    def _next_seq(self, cursor):
+        cursor.execute("SELECT COALESCE((SELECT MAX(seq) FROM change_log), 0) + 1")
+        return cursor.fetchone()[0]
+
+    def _log_changes(self, cursor, live=(), deleted=()):
+        # one Lamport tick per write, past every clock seen so far including the ones merged in from other ledgers
+        cursor.execute("SELECT COALESCE((SELECT MAX(clock) FROM change_log), 0) + 1")
+        clock, seq = cursor.fetchone()[0], self._next_seq(cursor)
+        cursor.executemany(self.CHANGE_LOG_UPSERT,
+                           [(str(uuid.uuid4()), trans_id, clock, self.replica_id, seq) for trans_id in live])
+        if deleted:
             cursor.execute("""
-                SELECT t.date, t.type, c.name, t.amount, t.description
-                FROM transactions t
-                JOIN categories c ON t.category_id = c.id
-                ORDER BY t.date DESC, t.created_at DESC
-                LIMIT ?
-            """, (limit,))
-            return cursor.fetchall()
-
-    def get_category_summary(self):
+                UPDATE change_log SET deleted = 1, clock = ?, replica = ?, seq = ?
+                WHERE transaction_id IN (SELECT value FROM json_each(?))
+            """, (clock, self.replica_id, seq, json.dumps(list(deleted))))
+
+    def _log_origins(self, cursor, origins):
+        seq = self._next_seq(cursor)
+        cursor.executemany("""
+            INSERT INTO change_log (uuid, transaction_id, clock, replica, seq, deleted) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (uuid) DO UPDATE SET
+                transaction_id = COALESCE(excluded.transaction_id, transaction_id), clock = excluded.clock,
+                replica = excluded.replica, seq = excluded.seq, deleted = excluded.deleted
+        """, [(entry_uuid, trans_id, clock, replica, seq, deleted)
+              for entry_uuid, trans_id, clock, replica, deleted in origins])
+
+    def iter_changes(self, since=0, exclude=None, batch_size=SYNC_BATCH):
+        # read from the file itself: the memory-mode copy does not follow the change log
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute("SELECT c.id, c.name, p.name FROM categories c LEFT JOIN categories p ON c.parent_id = p.id")
+            categories = {category_id: (name, parent) for category_id, name, parent in cursor.fetchall()}
             cursor.execute("""
-                SELECT 
-                    c.name as category,
-                    t.type,
-                    SUM(t.amount) as total_amount
-                FROM transactions t
-                JOIN categories c ON t.category_id = c.id
-                GROUP BY c.name, t.type
-                ORDER BY t.type, total_amount DESC
-            """)
-            columns = [desc[0] for desc in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+                SELECT seq, uuid, transaction_id, clock, replica, deleted
+                FROM change_log
+                WHERE seq > ? AND archived = 0 AND (? IS NULL OR replica != ?)
+                ORDER BY seq
+            """, (since, exclude, exclude))
+            while True:
+                entries = cursor.fetchmany(batch_size)
+                if not entries:
+                    return
+                rows = self._current_rows([entry[2] for entry in entries if not entry[5]])
+                changes = []
+                for seq, entry_uuid, trans_id, clock, replica, deleted in entries:
+                    change = {"seq": seq, "uuid": entry_uuid, "clock": clock, "replica": replica,
+                              "deleted": bool(deleted)}
+                    if not deleted:
+                        if trans_id not in rows:
+                            continue
+                        _, day, _, trans_type, category_id, amount, description, created_at, currency = \
+                            rows[trans_id][1]
+                        category, parent = categories[category_id]
+                        change.update(date=self.from_day(day), type=trans_type, category=category, parent=parent,
+                                      amount=amount, description=description, created_at=created_at,
+                                      currency=currency)
+                    changes.append(change)
+                if changes:
+                    yield changes
+
+    def apply_changes(self, changes):
+        if not changes:
+            return 0
+        unknown = {change["currency"] for change in changes if not change["deleted"]} - set(self.get_currencies())
+        if unknown:
+            raise ValueError(f"'{', '.join(sorted(unknown))}' için döviz kuru yüklenmemiş")
 
-    def get_all_transactions(self):
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                           SELECT t.id, t.date, t.type, c.name, t.amount, t.description
-                           FROM transactions t
-                                    JOIN categories c ON t.category_id = c.id
-                           ORDER BY t.date DESC, t.created_at DESC
-                           """)
-            return cursor.fetchall()
-
-    def get_expenses_by_category(self):
+            cursor.execute("SELECT uuid, transaction_id, clock, replica, archived FROM change_log "
+                           "WHERE uuid IN (SELECT value FROM json_each(?))",
+                           (json.dumps([change["uuid"] for change in changes]),))
+            local = {row[0]: row[1:] for row in cursor.fetchall()}
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'")
+            last_id = (cursor.fetchone() or (0,))[0]
+
+        # the last writer wins by (clock, replica), so every ledger ends up with the same rows in any sync order;
+        # rows archived here stay as they are
+        winners = [change for change in changes if change["uuid"] not in local or
+                   not local[change["uuid"]][3] and (change["clock"], change["replica"]) > local[change["uuid"]][1:3]]
+        for change in winners:
+            if not change["deleted"] and not self.get_category_id(change["category"]):
+                parent = change.get("parent")
+                self.add_category(change["category"], parent if parent and self.get_category_id(parent) else None)
+        current = self._current_rows([local[change["uuid"]][0] for change in winners if change["uuid"] in local])
+
+        # a batch spanning more yearly shards than can be attached at once is applied in several transactions
+        groups = []
+        for change in sorted(winners, key=lambda change: change.get("date") or ""):
+            trans_id = local[change["uuid"]][0] if change["uuid"] in local else None
+            years = {current[trans_id][1][2] // 100} if trans_id in current else set()
+            row = None
+            if not change["deleted"]:
+                if trans_id is None:
+                    last_id += 1
+                    trans_id = last_id
+                row = (trans_id, self.to_day(change["date"]), self.to_month(change["date"]), change["type"],
+                       self.get_category_id(change["category"]), change["amount"], change["description"],
+                       change["created_at"], change["currency"])
+                years.add(row[2] // 100)
+            if not groups or len(groups[-1][0] | years) > self.MAX_ATTACHED:
+                groups.append((set(), {}, []))
+            group_years, target, origins = groups[-1]
+            group_years |= years
+            if row is not None or trans_id in current:
+                target[trans_id] = row
+            origins.append((change["uuid"], trans_id, change["clock"], change["replica"], int(change["deleted"])))
+
+        for _, target, origins in groups:
+            self._rewrite(None, {trans_id: current[trans_id] for trans_id in target if trans_id in current},
+                          target, origins)
+        return len(winners)
+
+    def _sync_peer(self, peer):
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT c.name, SUM(t.amount) as total
-                FROM transactions t
-                JOIN categories c ON t.category_id = c.id
-                WHERE t.type = 'Expense'
-                GROUP BY c.name
-                HAVING total > 0
-                ORDER BY total DESC
-            """)
-            return cursor.fetchall()
+            cursor.execute("SELECT received, sent FROM sync_peers WHERE peer = ?", (peer,))
+            return cursor.fetchone() or (0, 0)
 
-    def get_daily_summary(self):
+    def _mark_synced(self, peer, received=0, sent=0):
+        with self.get_connection() as conn:
+            conn.execute(self.SYNC_PEER_UPSERT, (peer, received, sent))
+
+    def _pull(self, source):
+        received, _ = self._sync_peer(source.replica_id)
+        applied = 0
+        # changes the receiving side made itself are never newer there, so they are not sent back
+        for changes in source.iter_changes(received, self.replica_id):
+            applied += self.apply_changes(changes)
+            self._mark_synced(source.replica_id, received=changes[-1]["seq"])
+        return applied
+
+    def sync(self, path, progress=None):
+        if os.path.isdir(path):
+            return self._sync_folder(path, progress)
+        if not os.path.exists(path):
+            raise ValueError(f"Eşitlenecek dosya bulunamadı: {path}")
+        if os.path.realpath(path) == os.path.realpath(self.db_file):
+            raise ValueError("Bir defter kendisiyle eşitlenemez")
+
+        other = Database(path)
+        if progress:
+            progress(0.1, f"{os.path.basename(path)} dosyasındaki değişiklikler alınıyor")
+        pulled = self._pull(other)
+        if progress:
+            progress(0.5, f"Değişiklikler {os.path.basename(path)} dosyasına gönderiliyor")
+        pushed = other._pull(self)
+        return pulled, pushed
+
+    def _sync_folder(self, folder, progress=None):
+        # every ledger appends its changes to <folder>/<replica id>/ as segments named by their seq range,
+        # and reads the other ledgers' segments past what it has already applied
+        pulled, replicas = 0, set()
+        for name in sorted(os.listdir(folder)):
+            source = os.path.join(folder, name)
+            if name == self.replica_id or not os.path.isdir(source):
+                continue
+            replicas.add(name)
+            if progress:
+                progress(0.1, f"{name} kopyasının değişiklikleri alınıyor")
+            received, _ = self._sync_peer(name)
+            for file_name in sorted(os.listdir(source)):
+                if not re.fullmatch(r"\d+-\d+\.json", file_name) or int(file_name[:-5].split("-")[1]) <= received:
+                    continue
+                with open(os.path.join(source, file_name), encoding="utf-8") as f:
+                    changes = [change for change in json.load(f)["changes"] if change["seq"] > received]
+                for start in range(0, len(changes), self.SYNC_BATCH):
+                    batch = changes[start:start + self.SYNC_BATCH]
+                    pulled += self.apply_changes(batch)
+                    self._mark_synced(name, received=batch[-1]["seq"])
+                    received = batch[-1]["seq"]
+
+        if progress:
+            progress(0.6, "Değişiklikler klasöre yazılıyor")
+        peer = "folder:" + os.path.realpath(folder)
+        _, sent = self._sync_peer(peer)
+        batches = list(self.iter_changes(sent))
+        # ledgers with a directory here publish their own changes; only ours and those relayed from ledgers synced
+        # file-to-file are written, so nothing read from the folder goes back into it
+        changes = [change for batch in batches for change in batch if change["replica"] not in replicas]
+        if changes:
+            target = os.path.join(folder, self.replica_id)
+            os.makedirs(target, exist_ok=True)
+            path = os.path.join(target, f"{changes[0]['seq']:012d}-{changes[-1]['seq']:012d}.json")
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"replica": self.replica_id, "changes": changes}, f, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+        if batches:
+            self._mark_synced(peer, sent=batches[-1][-1]["seq"])
+        return pulled, len(changes)
+
+    @classmethod
+    def _anomaly_score(cls, stats, minor):
+        count, mean, m2, median, mad, _ = stats
+        if count < cls.ANOMALY_MIN_COUNT:
+            return None
+        if mad > 0:
+            return cls.MAD_SCALE * (minor - median) / mad
+        std = (m2 / (count - 1)) ** 0.5
+        return (minor - mean) / std if std > 0 else None
+
+    @staticmethod
+    def _median_mad(values):
+        # same midpoint rule as rescore_anomalies, over sorted values
+        lower, upper = (len(values) - 1) // 2, len(values) // 2
+        median = (values[lower] + values[upper]) / 2
+        deviations = sorted(abs(value - median) for value in values)
+        return median, (deviations[lower] + deviations[upper]) / 2
+
+    @classmethod
+    def _update_stats(cls, stats, minor):
+        count, mean, m2, median, mad, sample = stats
+        count += 1
+        delta = minor - mean
+        mean += delta / count
+        m2 += delta * (minor - mean)
+        if sample is not None:
+            # exact while the category is small: the sketch needs a long history before it settles
+            values = json.loads(sample)
+            bisect.insort(values, minor)
+            median, mad = cls._median_mad(values)
+            sample = json.dumps(values) if count <= cls.SKETCH_WARMUP else None
+        else:
+            # stochastic-approximation sketch: steps scale with the spread and shrink as history grows
+            step = max(cls.SKETCH_RATE, 1.5 / count ** 0.5) * (m2 / (count - 1)) ** 0.5
+            median += max(-step, min(step, minor - median))
+            mad += max(-step, min(step, abs(minor - median) - mad))
+        return count, mean, m2, median, mad, sample
+
+    @classmethod
+    def _remove_stats(cls, stats, minor):
+        # inverse Welford step; past the warm-up the median/MAD sketch cannot forget a value, so it is left for the
+        # next rescore
+        count, mean, m2, median, mad, sample = stats
+        if count <= 1:
+            return 0, 0.0, 0.0, 0.0, 0.0, "[]"
+        count -= 1
+        previous, mean = mean, (mean * (count + 1) - minor) / count
+        m2 = max(m2 - (minor - previous) * (minor - mean), 0.0)
+        if sample is not None:
+            values = json.loads(sample)
+            index = bisect.bisect_left(values, minor)
+            if index < len(values) and values[index] == minor:
+                del values[index]
+                median, mad = cls._median_mad(values)
+                sample = json.dumps(values)
+        return count, mean, m2, median, mad, sample
+
+    def _track_expenses(self, cursor, expenses):
+        stats, anomalies = {}, []
+        for trans_id, day, category_id, minor in expenses:
+            if category_id not in stats:
+                cursor.execute("SELECT count, mean, m2, median, mad, sample FROM category_stats "
+                               "WHERE category_id = ?", (category_id,))
+                stats[category_id] = cursor.fetchone() or (0, 0.0, 0.0, 0.0, 0.0, "[]")
+            score = self._anomaly_score(stats[category_id], minor)
+            if score is not None and score > self.ANOMALY_THRESHOLD:
+                anomalies.append((trans_id, day, category_id, minor, score))
+            stats[category_id] = self._update_stats(stats[category_id], minor)
+
+        stats = [(category_id,) + tuple(values) for category_id, values in stats.items()]
+        cursor.executemany(self.CATEGORY_STATS_UPSERT, stats)
+        cursor.executemany(self.ANOMALY_UPSERT, anomalies)
+        return stats, anomalies
+
+    def rescore_anomalies(self, progress=None):
+        with self.get_read_connection() as conn:
+            category_ids = dict(conn.execute("SELECT name, id FROM categories").fetchall())
+
+        if progress:
+            progress(0.05, "Harcamalar okunuyor")
+        batches = list(self.iter_transaction_batches({"type": "Expense"}))
+        if progress:
+            progress(0.6, "Skorlar hesaplanıyor")
+        stats, anomalies = [], []
+        if batches:
+            ids = np.concatenate([batch["id"] for batch in batches])
+            days = np.concatenate([batch["date"] for batch in batches]).astype(np.int64)
+            amounts = np.rint(self.convert_amounts(
+                np.concatenate([batch["amount"] for batch in batches]) * self.MINOR_UNITS,
+                np.concatenate([batch["currency"] for batch in batches]), days, self.BASE_CURRENCY))
+            names, group = np.unique(np.concatenate([batch["category"] for batch in batches]).astype(str),
+                                     return_inverse=True)
+
+            counts = np.bincount(group)
+            means = np.bincount(group, amounts) / counts
+            m2 = np.bincount(group, (amounts - means[group]) ** 2)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            lower, upper = starts + (counts - 1) // 2, starts + counts // 2
+
+            ordered = amounts[np.lexsort((amounts, group))]
+            medians = (ordered[lower] + ordered[upper]) / 2
+            samples = [json.dumps(ordered[start:start + count].astype(np.int64).tolist())
+                       if count <= self.SKETCH_WARMUP else None for start, count in zip(starts, counts)]
+            deviations = np.abs(amounts - medians[group])
+            ordered = deviations[np.lexsort((deviations, group))]
+            mads = (ordered[lower] + ordered[upper]) / 2
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                std = np.sqrt(m2 / (counts - 1))
+                scores = np.where(mads[group] > 0, self.MAD_SCALE * (amounts - medians[group]) / mads[group],
+                                  (amounts - means[group]) / std[group])
+            flagged = (counts[group] >= self.ANOMALY_MIN_COUNT) & np.isfinite(scores) & \
+                (scores > self.ANOMALY_THRESHOLD)
+
+            group_ids = np.array([category_ids.get(name, 0) for name in names])
+            stats = list(zip(group_ids.tolist(), counts.tolist(), means.tolist(), m2.tolist(),
+                             medians.tolist(), mads.tolist(), samples))
+            anomalies = list(zip(ids[flagged].tolist(), days[flagged].tolist(), group_ids[group[flagged]].tolist(),
+                                 amounts[flagged].astype(np.int64).tolist(), scores[flagged].tolist()))
+
+        if progress:
+            progress(0.9, "Kaydediliyor")
         with self.get_connection() as conn:
+            cursor = conn.cursor()
+            before = self._begin_write(cursor)
+            cursor.execute("DELETE FROM category_stats")
+            cursor.execute("DELETE FROM anomalies")
+            cursor.executemany(self.CATEGORY_STATS_UPSERT, stats)
+            cursor.executemany(self.ANOMALY_UPSERT, anomalies)
+            change = self._change(cursor, before, ("anomalies",))
+            conn.commit()
+        self._mirror("DELETE FROM category_stats")
+        self._mirror("DELETE FROM anomalies")
+        self._mirror(self.CATEGORY_STATS_UPSERT, stats, many=True)
+        self._mirror(self.ANOMALY_UPSERT, anomalies, many=True)
+        self.cache.publish(change)
+        return len(anomalies)
+
+    def get_anomaly(self, transaction_id):
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT score FROM anomalies WHERE transaction_id = ?", (transaction_id,))
+            result = cursor.fetchone()
+            return result[0] if result else None
+
+    def get_anomalies(self, limit=5, since=None):
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT 
-                    date,
-                    COALESCE(SUM(CASE WHEN type = 'Income' THEN amount ELSE 0 END), 0) as income,
-                    COALESCE(SUM(CASE WHEN type = 'Expense' THEN amount ELSE 0 END), 0) as expenses
-                FROM transactions
-                GROUP BY date
-                ORDER BY date
-            """)
-            return cursor.fetchall()
+                SELECT a.transaction_id, date(a.day * 86400, 'unixepoch'), c.name, a.amount, a.score
+                FROM anomalies a
+                JOIN categories c ON a.category_id = c.id
+                WHERE a.day >= ?
+                ORDER BY a.day DESC, a.transaction_id DESC
+                LIMIT ?
+            """, (self.to_day(since) if since else 0, limit))
+            return [(trans_id, date, category, self.from_minor(amount), score)
+                    for trans_id, date, category, amount, score in cursor.fetchall()]
+
+    def _budget_counter_rows(self, category_id, month, minor):
+        return [(category_id, "month", month, minor), (category_id, "year", month // 100, minor)]
+
+    def rebuild_budget_counters(self):
+        rows = self._merge_totals(self._query_ledger("""
+            SELECT category_id, month, SUM(amount)
+            FROM {transactions}
+            WHERE type = 'Expense'
+            GROUP BY category_id, month
+        """, rollups=True, currency=self.BASE_CURRENCY), key_len=2)
+        counters = [counter for category_id, month, minor in rows
+                    for counter in self._budget_counter_rows(category_id, month, int(round(minor)))]
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            before = self._begin_write(cursor)
+            cursor.execute("DELETE FROM budget_counters")
+            cursor.executemany(self.BUDGET_COUNTER_UPSERT, counters)
+            change = self._change(cursor, before, ("budget_counters",))
+            conn.commit()
+        self._mirror("DELETE FROM budget_counters")
+        self._mirror(self.BUDGET_COUNTER_UPSERT, counters, many=True)
+        self.cache.publish(change)
 
-    def get_monthly_summary(self):
+    def set_budget(self, category, period, amount, block=False):
+        if period not in self.BUDGET_PERIODS:
+            raise ValueError(f"Bilinmeyen bütçe dönemi: {period}")
+        category_id = self.get_category_id(category)
+        if not category_id:
+            raise ValueError(f"'{category}' kategorisi mevcut değil")
+        minor = self.to_minor(amount)
+        if minor <= 0:
+            raise ValueError("Bütçe tutarı sıfırdan büyük olmalı")
+
+        sql = """
+            INSERT INTO budgets (category_id, period, amount, block) VALUES (?, ?, ?, ?)
+            ON CONFLICT (category_id, period) DO UPDATE SET amount = excluded.amount, block = excluded.block
+        """
+        params = (category_id, period, minor, int(bool(block)))
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    strftime('%Y-%m', date) as month,
-                    COALESCE(SUM(CASE WHEN type = 'Income' THEN amount ELSE 0 END), 0) as income,
-                    COALESCE(SUM(CASE WHEN type = 'Expense' THEN amount ELSE 0 END), 0) as expenses
-                FROM transactions
-                GROUP BY month
-                ORDER BY month
-            """)
-            return cursor.fetchall()
+            before = self._begin_write(cursor)
+            cursor.execute(sql, params)
+            change = self._change(cursor, before, ("budgets",))
+            conn.commit()
+        self._mirror(sql, params)
+        self.cache.publish(change)
 
-    def get_yearly_summary(self):
+    def delete_budget(self, category, period):
+        sql = "DELETE FROM budgets WHERE category_id = (SELECT id FROM categories WHERE name = ?) AND period = ?"
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            before = self._begin_write(cursor)
+            cursor.execute(sql, (category, period))
+            change = self._change(cursor, before, ("budgets",))
+            conn.commit()
+        self._mirror(sql, (category, period))
+        self.cache.publish(change)
+
+    def check_budget(self, trans_type, amount, category, date=None, currency=None):
+        if trans_type != "Expense":
+            return []
+        if not date:
+            date = datetime.now().strftime("%Y-%m-%d")
+
+        month, minor = self.to_month(date), self.to_minor(amount)
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            minor = int(round(minor * self._rate(cursor, currency or self.BASE_CURRENCY, self.to_day(date))))
+            # budgets on the category and its ancestors, each against the spend of its whole subtree
             cursor.execute("""
-                SELECT 
-                    strftime('%Y', date) as year,
-                    COALESCE(SUM(CASE WHEN type = 'Income' THEN amount ELSE 0 END), 0) as income,
-                    COALESCE(SUM(CASE WHEN type = 'Expense' THEN amount ELSE 0 END), 0) as expenses
-                FROM transactions
-                GROUP BY year
-                ORDER BY year
-            """)
-            return cursor.fetchall()
+                SELECT c.name, b.period, b.amount, (
+                    SELECT COALESCE(SUM(bc.spent), 0)
+                    FROM category_tree below
+                    JOIN budget_counters bc ON bc.category_id = below.descendant_id
+                    WHERE below.ancestor_id = b.category_id AND bc.period = b.period
+                      AND bc.period_key = CASE b.period WHEN 'month' THEN ? ELSE ? END
+                ), b.block
+                FROM category_tree up
+                JOIN budgets b ON b.category_id = up.ancestor_id
+                JOIN categories c ON b.category_id = c.id
+                WHERE up.descendant_id = (SELECT id FROM categories WHERE name = ?)
+                ORDER BY up.depth, b.period
+            """, (month, month // 100, category))
+            return [(name, period, self.from_minor(limit), self.from_minor(spent + minor), bool(block))
+                    for name, period, limit, spent, block in cursor.fetchall() if spent + minor > limit]
+
+    def add_recurring_rule(self, trans_type, amount, category, frequency, start_date, every=1, cron=None,
+                           description="", end_date=None):
+        if frequency not in self.RECURRING_FREQUENCIES:
+            raise ValueError(f"Bilinmeyen tekrar sıklığı: {frequency}")
+        if frequency == "cron":
+            self._parse_cron(cron)
+        if every < 1:
+            raise ValueError("Tekrar aralığı en az 1 olmalı")
+        category_id = self.get_category_id(category)
+        if not category_id:
+            raise ValueError(f"'{category}' kategorisi mevcut değil")
 
-    def get_total_income(self):
+        start_day = self.to_day(start_date)
+        columns = "type, category_id, amount, description, frequency, every, cron, start_day, end_day, last_day"
+        params = (trans_type, category_id, self.to_minor(amount), description, frequency, every,
+                  cron if frequency == "cron" else None, start_day,
+                  self.to_day(end_date) if end_date else None, start_day - 1)
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE type = 'Income'")
-            return cursor.fetchone()[0] or 0
+            before = self._begin_write(cursor)
+            cursor.execute(f"INSERT INTO recurring_rules ({columns}) VALUES ({', '.join('?' * len(params))})",
+                           params)
+            rule_id = cursor.lastrowid
+            change = self._change(cursor, before, ("recurring_rules",))
+            conn.commit()
+        self._mirror(f"INSERT INTO recurring_rules (id, {columns}) VALUES (?, {', '.join('?' * len(params))})",
+                     (rule_id,) + params)
+        self.cache.publish(change)
+        return rule_id
 
-    def get_total_expenses(self):
+    def delete_recurring_rule(self, rule_id):
+        statements = ["DELETE FROM recurring_occurrences WHERE rule_id = ?", "DELETE FROM recurring_rules WHERE id = ?"]
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE type = 'Expense'")
-            return cursor.fetchone()[0] or 0
+            before = self._begin_write(cursor)
+            for sql in statements:
+                cursor.execute(sql, (rule_id,))
+            change = self._change(cursor, before, ("recurring_rules",))
+            conn.commit()
+        for sql in statements:
+            self._mirror(sql, (rule_id,))
+        self.cache.publish(change)
 
-    def get_monthly_expenses(self):
+    def get_recurring_rules(self):
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT r.id, r.type, c.name, r.amount, r.description, r.frequency, r.every, r.cron,
+                       r.start_day, r.end_day, r.last_day
+                FROM recurring_rules r
+                JOIN categories c ON r.category_id = c.id
+                ORDER BY r.id
+            """)
+            return [(rule_id, trans_type, category, self.from_minor(amount), description, frequency, every, cron,
+                     self.from_day(start_day), self.from_day(end_day) if end_day is not None else None,
+                     self.from_day(last_day) if last_day >= start_day else None)
+                    for rule_id, trans_type, category, amount, description, frequency, every, cron,
+                    start_day, end_day, last_day in cursor.fetchall()]
+
+    @classmethod
+    def _parse_cron(cls, expression):
+        parts = (expression or "").split()
+        if len(parts) != len(cls.CRON_FIELDS):
+            raise ValueError("Özel tekrar 'gün ay haftanın-günü' biçiminde olmalı (ör. '1,15 * *')")
+
+        fields = []
+        for part, (low, high) in zip(parts, cls.CRON_FIELDS):
+            if part == "*":
+                fields.append(None)
+                continue
+            values = set()
+            try:
+                for item in part.split(","):
+                    item, slash, step = item.partition("/")
+                    step = int(step or 1)
+                    if item == "*":
+                        first, last = low, high
+                    elif "-" in item:
+                        first, last = map(int, item.split("-", 1))
+                    else:
+                        first = int(item)
+                        last = high if slash else first
+                    if not low <= first <= last <= high or step < 1:
+                        raise ValueError
+                    values.update(range(first, last + 1, step))
+            except ValueError:
+                raise ValueError(f"Geçersiz tekrar alanı: {part}")
+            fields.append(values)
+
+        if fields[2] is not None and 7 in fields[2]:
+            fields[2] = (fields[2] - {7}) | {0}
+        return fields
+
+    def _cron_matches(self, fields, day):
+        date = self.EPOCH + timedelta(days=day)
+        days, months, weekdays = fields
+        if months is not None and date.month not in months:
+            return False
+        weekday = (date.weekday() + 1) % 7
+        if days is not None and weekdays is not None:
+            return date.day in days or weekday in weekdays
+        return (days is None or date.day in days) and (weekdays is None or weekday in weekdays)
+
+    def _rule_days(self, frequency, every, cron, start_day, first, last):
+        first = max(first, start_day)
+        if first > last:
+            return []
+
+        if frequency in ("daily", "weekly"):
+            step = every * (7 if frequency == "weekly" else 1)
+            skipped = -(-(first - start_day) // step)
+            return list(range(start_day + skipped * step, last + 1, step))
+
+        if frequency == "monthly":
+            start = self.EPOCH + timedelta(days=start_day)
+            first_date = self.EPOCH + timedelta(days=first)
+            start_index = start.year * 12 + start.month - 1
+            index = start_index + (first_date.year * 12 + first_date.month - 1 - start_index) // every * every
+            days = []
+            while True:
+                year, month = divmod(index, 12)
+                month_end = calendar.monthrange(year, month + 1)[1]
+                day = (datetime(year, month + 1, min(start.day, month_end)) - self.EPOCH).days
+                if day > last:
+                    return days
+                if day >= first:
+                    days.append(day)
+                index += every
+
+        fields = self._parse_cron(cron)
+        return [day for day in range(first, last + 1) if self._cron_matches(fields, day)]
+
+    def run_recurring(self, today=None):
+        last = self.to_day(today or datetime.now().strftime("%Y-%m-%d"))
+        transactions, occurrences, caught_up = [], [], []
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            current_month = datetime.now().strftime("%Y-%m")
+            before = self._begin_write(cursor)
             cursor.execute("""
-                SELECT COALESCE(SUM(amount), 0) 
-                FROM transactions 
-                WHERE type = 'Expense' AND strftime('%Y-%m', date) = ?
-            """, (current_month,))
-            return cursor.fetchone()[0] or 0
+                SELECT id, type, category_id, amount, description, frequency, every, cron, start_day, end_day, last_day
+                FROM recurring_rules
+                WHERE last_day < MIN(?, COALESCE(end_day, ?))
+            """, (last, last))
+            for rule_id, trans_type, category_id, amount, description, frequency, every, cron, \
+                    start_day, end_day, last_day in cursor.fetchall():
+                through = last if end_day is None else min(last, end_day)
+                cursor.execute("SELECT day FROM recurring_occurrences WHERE rule_id = ? AND day > ?",
+                               (rule_id, last_day))
+                generated = {row[0] for row in cursor.fetchall()}
+                for day in self._rule_days(frequency, every, cron, start_day, last_day + 1, through):
+                    if day in generated:
+                        continue
+                    month = self.to_month(self.from_day(day))
+                    transactions.append((day, month, trans_type, category_id, amount, description,
+                                         self.BASE_CURRENCY))
+                    occurrences.append((rule_id, day))
+                cursor.execute("UPDATE recurring_rules SET last_day = ? WHERE id = ?", (through, rule_id))
+                caught_up.append((through, rule_id))
+
+            cursor.executemany("INSERT INTO recurring_occurrences (rule_id, day) VALUES (?, ?)", occurrences)
+            mirrored = [("UPDATE recurring_rules SET last_day = ? WHERE id = ?", caught_up, True),
+                        ("INSERT INTO recurring_occurrences (rule_id, day) VALUES (?, ?)", occurrences, True)]
+            self._insert_batch(cursor, transactions, mirrored)
+            change = self._change(cursor, before, self.LEDGER_WRITE_TABLES + ("recurring_rules",),
+                                  *self._day_span([row[0] for row in transactions]))
+            conn.commit()
 
-    def get_monthly_income(self):
-        with self.get_connection() as conn:
+        self._refresh_after_bulk_write(mirrored)
+        self.cache.publish(change)
+        return sorted(self.from_day(row[0]) for row in transactions)
+
+    def get_budget_status(self, date=None):
+        if not date:
+            date = datetime.now().strftime("%Y-%m-%d")
+
+        month = self.to_month(date)
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.name, b.period, b.amount, COALESCE(SUM(bc.spent), 0), b.block
+                FROM budgets b
+                JOIN categories c ON b.category_id = c.id
+                JOIN category_tree ct ON ct.ancestor_id = b.category_id
+                LEFT JOIN budget_counters bc ON bc.category_id = ct.descendant_id AND bc.period = b.period
+                    AND bc.period_key = CASE b.period WHEN 'month' THEN ? ELSE ? END
+                GROUP BY b.category_id, b.period
+                ORDER BY c.name, b.period
+            """, (month, month // 100))
+            return [(name, period, self.from_minor(limit), self.from_minor(spent), bool(block))
+                    for name, period, limit, spent, block in cursor.fetchall()]
+
+    def get_balance(self):
+        total_income, total_expenses = self._get_totals()
+        return total_income - total_expenses
+
+    def _day_range(self, start=None, end=None, column="day", conditions=()):
+        conditions, params = list(conditions), []
+        if start:
+            conditions.append(f"{column} >= ?")
+            params.append(self.to_day(start))
+        if end:
+            conditions.append(f"{column} <= ?")
+            params.append(self.to_day(end))
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+    def _get_totals(self, start=None, end=None, currency=None):
+        where, params = self._day_range(start, end)
+        rows = self._merge_totals(self._query_ledger(f"""
+            SELECT
+                COALESCE(SUM(CASE WHEN type = 'Income' THEN amount ELSE 0 END), 0),
+                COALESCE(SUM(CASE WHEN type = 'Expense' THEN amount ELSE 0 END), 0)
+            FROM {{transactions}}
+            {where}
+        """, params, start, end, rollups=True, currency=currency or self.reporting_currency), key_len=0)
+        return tuple(self.from_minor(value) for value in rows[0]) if rows else (0, 0)
+
+    def get_recent_transactions(self, limit=10):
+        recent = []
+        for part in self._ledger_parts():
+            recent += [(date, trans_type, category, self.from_minor(amount), description)
+                       for date, trans_type, category, amount, description in self._query_part(part, """
+                SELECT date(t.day * 86400, 'unixepoch'), t.type, c.name, t.amount, t.description
+                FROM {transactions} t
+                JOIN categories c ON t.category_id = c.id
+                ORDER BY t.day DESC, t.created_at DESC
+                LIMIT ?
+            """, (limit,))]
+            if len(recent) >= limit:
+                break
+        recent.sort(key=lambda row: row[0], reverse=True)
+        return recent[:limit]
+
+    def get_category_summary(self, start=None, end=None, limit=None):
+        where, params = self._day_range(start, end, "t.day")
+        rows = self._merge_totals(self._query_ledger(f"""
+            SELECT 
+                c.name as category,
+                t.type,
+                SUM(t.amount) as total_amount
+            FROM {{transactions}} t
+            JOIN categories c ON t.category_id = c.id
+            {where}
+            GROUP BY c.name, t.type
+        """, params, start, end, rollups=True, currency=self.reporting_currency), key_len=2)
+        rows.sort(key=lambda row: (row[1], -row[2], row[0]))
+        if limit:
+            rows = [(category, trans_type, total)
+                    for trans_type, group in itertools.groupby(rows, key=lambda row: row[1])
+                    for category, total in self._top_categories([(row[0], row[2]) for row in group], limit)]
+        columns = ["category", "type", "total_amount"]
+        return [dict(zip(columns, row)) for row in self._from_minor_rows(rows, key_len=2)]
+
+    def count_transactions(self):
+        return sum(rows[0][0] for rows in self._query_ledger("SELECT COUNT(*) FROM {transactions}"))
+
+    def get_all_transactions(self, start=None, end=None, include_archive=False):
+        transactions = list(self.iter_transactions({"start": start, "end": end,
+                                                    "include_archive": include_archive}))
+        transactions.sort(key=lambda row: row[1], reverse=True)
+        return transactions
+
+    def _transaction_filters(self, filters):
+        conditions, params = [], []
+        search = self.search_query(filters.get("search"))
+        if search:
+            conditions.append("f.transactions_fts MATCH ?")
+            params.append(search)
+        if filters.get("type") not in (None, "", "All"):
+            conditions.append("t.type = ?")
+            params.append(filters["type"])
+        if filters.get("tags"):
+            condition, ids = self._tag_condition(filters["tags"])
+            conditions.append(condition)
+            params.append(ids)
+        if filters.get("category") not in (None, "", "All"):
+            conditions.append("""t.category_id IN (
+                SELECT descendant_id FROM category_tree WHERE ancestor_id = (SELECT id FROM categories WHERE name = ?)
+            )""")
+            params.append(filters["category"])
+        if filters.get("start"):
+            conditions.append("t.day >= ?")
+            params.append(self.to_day(filters["start"]))
+        if filters.get("end"):
+            conditions.append("t.day <= ?")
+            params.append(self.to_day(filters["end"]))
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+    @staticmethod
+    def fold_text(text):
+        text = unicodedata.normalize("NFKD", (text or "").replace("ı", "i").replace("İ", "i"))
+        return "".join(char for char in text if not unicodedata.combining(char)).casefold()
+
+    @classmethod
+    def search_terms(cls, text):
+        terms = []
+        for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text or ""):
+            words = re.findall(r"\w+", cls.fold_text(phrase or word))
+            if words:
+                terms.append((words, word.endswith("*")))
+        return terms
+
+    @classmethod
+    def search_query(cls, text):
+        return " ".join(f'"{" ".join(words)}"' + ("*" if prefix else "") for words, prefix in cls.search_terms(text))
+
+    @classmethod
+    def highlight(cls, text, terms):
+        parts = re.split(r"(\w+)", text or "")
+        positions = list(range(1, len(parts), 2))
+        folded = [cls.fold_text(parts[i]) for i in positions]
+        marked = set()
+        for words, prefix in terms:
+            for start in range(len(folded) - len(words) + 1):
+                window = folded[start:start + len(words)]
+                if window[:-1] == words[:-1] and (window[-1].startswith(words[-1]) if prefix
+                                                  else window[-1] == words[-1]):
+                    marked.update(positions[start:start + len(words)])
+        return "".join(f"«{part}»" if i in marked else part for i, part in enumerate(parts))
+
+    def _iter_search_pages(self, filters, batch_size):
+        where, params = self._transaction_filters(filters)
+        sql = f"""
+            SELECT f.rank, t.id, date(t.day * 86400, 'unixepoch'), t.type, c.name, t.amount, t.description,
+                   t.currency
+            FROM {{search}} f
+            JOIN {{transactions}} t ON t.id = f.rowid
+            JOIN categories c ON t.category_id = c.id
+            {where}
+            ORDER BY f.rank
+        """
+        terms = self.search_terms(filters["search"])
+        parts = [itertools.chain.from_iterable(self._iter_part(part, sql, params, batch_size))
+                 for part in self._ledger_parts(filters.get("start"), filters.get("end"))]
+
+        rows = []
+        for rank, trans_id, date, trans_type, category, amount, description, currency in \
+                heapq.merge(*parts, key=lambda row: row[0]):
+            rows.append((trans_id, date, trans_type, category, self.from_minor(amount),
+                         self.highlight(description, terms), currency))
+            if len(rows) == batch_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+    def iter_transaction_pages(self, filters=None, batch_size=1000):
+        filters = filters or {}
+        if self.search_query(filters.get("search")):
+            yield from self._iter_search_pages(filters, batch_size)
+            if filters.get("include_archive"):
+                yield from self._iter_archive_pages(filters)
+            return
+
+        where, params = self._transaction_filters(filters)
+        sql = f"""
+                           SELECT t.id, date(t.day * 86400, 'unixepoch'), t.type, c.name, t.amount, t.description,
+                                  t.currency
+                           FROM {{transactions}} t
+                                    JOIN categories c ON t.category_id = c.id
+                           {where}
+                           ORDER BY t.day DESC, t.created_at DESC
+                           """
+        for part in self._ledger_parts(filters.get("start"), filters.get("end")):
+            for rows in self._iter_part(part, sql, params, batch_size):
+                yield [(trans_id, date, trans_type, category, self.from_minor(amount), description, currency)
+                       for trans_id, date, trans_type, category, amount, description, currency in rows]
+        if filters.get("include_archive"):
+            yield from self._iter_archive_pages(filters)
+
+    def iter_transactions(self, filters=None, batch_size=1000):
+        for rows in self.iter_transaction_pages(filters, batch_size):
+            yield from rows
+
+    def iter_transaction_batches(self, filters=None, batch_size=10000, as_frame=False):
+        for rows in self.iter_transaction_pages(filters, batch_size):
+            if as_frame:
+                yield pd.DataFrame.from_records(rows, columns=self.TRANSACTION_FIELDS)
+                continue
+
+            ids, dates, types, categories, amounts, descriptions, currencies = zip(*rows)
+            yield {
+                "id": np.array(ids, dtype=np.int64),
+                "date": np.array(dates, dtype="datetime64[D]"),
+                "type": np.array(types),
+                "category": np.array(categories, dtype=object),
+                "amount": np.array(amounts, dtype=np.float64),
+                "description": np.array(descriptions, dtype=object),
+                "currency": np.array(currencies),
+            }
+
+    def get_transaction_page(self, filters=None, limit=100, after=None):
+        # keyset pagination on (day, created_at, id), with a missing created_at sorting as ''; each part holds
+        # strictly older days than the one before, so parts are read in order until the page is full
+        filters = dict(filters or {})
+        where, params = self._transaction_filters(filters)
+        conditions = [where[len("WHERE "):]] if where else []
+        if after:
+            day, created_at, trans_id = after
+            conditions.append("t.day <= ? AND (t.day < ? OR COALESCE(t.created_at, '') < ? "
+                              "OR COALESCE(t.created_at, '') = ? AND t.id < ?)")
+            params += [day, day, created_at, created_at, trans_id]
+            end = self.from_day(day)
+            filters["end"] = min(filters["end"], end) if filters.get("end") else end
+        search = "JOIN {search} f ON f.rowid = t.id" if self.search_query(filters.get("search")) else ""
+        sql = f"""
+            SELECT t.id, date(t.day * 86400, 'unixepoch'), t.type, c.name, t.amount, t.description, t.currency,
+                   t.day, COALESCE(t.created_at, '')
+            FROM {{transactions}} t
+            JOIN categories c ON t.category_id = c.id
+            {search}
+            {f"WHERE {' AND '.join(conditions)}" if conditions else ""}
+            ORDER BY t.day DESC, COALESCE(t.created_at, '') DESC, t.id DESC
+            LIMIT ?
+        """
+
+        rows = []
+        for part in self._ledger_parts(filters.get("start"), filters.get("end")):
+            rows += self._query_part(part, sql, params + [limit + 1 - len(rows)])
+            if len(rows) > limit:
+                break
+        page = [(trans_id, date, trans_type, category, self.from_minor(amount), description, currency)
+                for trans_id, date, trans_type, category, amount, description, currency, _, _ in rows[:limit]]
+        if len(rows) <= limit:
+            return page, None
+        last = rows[limit - 1]
+        return page, (last[7], last[8], last[0])
+
+    def get_expenses_by_category(self, start=None, end=None, limit=None, parent=None, currency=None):
+        # totals roll each subtree up to the children of parent (the top-level categories when parent is None);
+        # spending booked directly on parent keeps its own slice
+        parent_id = self.get_category_id(parent) if parent else None
+        if parent and parent_id is None:
+            raise ValueError(f"Bilinmeyen kategori: {parent}")
+        where, params = self._day_range(start, end, "t.day", ["t.type = 'Expense'"])
+        rows = self._merge_totals(self._query_ledger(f"""
+            SELECT c.name, SUM(s.total) as total
+            FROM (
+                SELECT t.category_id, SUM(t.amount) AS total
+                FROM {{transactions}} t
+                {where}
+                GROUP BY t.category_id
+            ) s
+            JOIN category_tree ct ON ct.descendant_id = s.category_id
+            JOIN categories c ON c.id = ct.ancestor_id
+            WHERE c.parent_id IS ? OR c.id = ? AND ct.depth = 0
+            GROUP BY c.name
+        """, params + [parent_id, parent_id], start, end, rollups=True, currency=currency or self.reporting_currency))
+        rows = sorted((row for row in rows if row[1] > 0), key=lambda row: row[1], reverse=True)
+        return self._from_minor_rows(self._top_categories(rows, limit))
+
+    def _top_categories(self, rows, limit):
+        if not limit or len(rows) <= limit:
+            return rows
+        return rows[:limit] + [(self.OTHER_CATEGORY, sum(total for _, total in rows[limit:]))]
+
+    def _bucket_spec(self, bucket, fiscal_start=1):
+        if bucket not in self.TIME_BUCKETS:
+            raise ValueError(f"Bilinmeyen dönem: {bucket}")
+        if not 1 <= fiscal_start <= 12:
+            raise ValueError("Mali yıl başlangıç ayı 1 ile 12 arasında olmalı")
+        column, size, offset = self.TIME_BUCKETS[bucket]
+        return column, size, fiscal_start - 1 if offset is None else offset
+
+    def bucket_key(self, date, bucket, fiscal_start=1):
+        column, size, offset = self._bucket_spec(bucket, fiscal_start)
+        if column == "day":
+            return (self.to_day(date) - offset) // size
+        return (int(date[:4]) * 12 + int(date[5:7]) - 1 - offset) // size
+
+    def bucket_start(self, key, bucket, fiscal_start=1):
+        column, size, offset = self._bucket_spec(bucket, fiscal_start)
+        if column == "day":
+            return self.from_day(key * size + offset)
+        index = key * size + offset
+        return f"{index // 12:04d}-{index % 12 + 1:02d}-01"
+
+    def bucket_label(self, key, bucket, fiscal_start=1):
+        start = self.bucket_start(key, bucket, fiscal_start)
+        if bucket == "week":
+            year, week, _ = datetime.strptime(start, "%Y-%m-%d").isocalendar()
+            return f"{year}-W{week:02d}"
+        if bucket == "quarter":
+            return f"{start[:4]}-Q{(int(start[5:7]) - 1) // 3 + 1}"
+        if bucket == "fiscal" and fiscal_start != 1:
+            return f"{key}/{(key + 1) % 100:02d}"
+        return start[:{"day": 10, "month": 7}.get(bucket, 4)]
+
+    def get_summary(self, granularity="month", start=None, end=None, limit=None, fiscal_start=1, fill=True,
+                    currency=None, tags=None):
+        self._bucket_spec(granularity, fiscal_start)
+        return self._aggregate_buckets(granularity, start, end, limit, fiscal_start, fill,
+                                       currency or self.reporting_currency, tags)
+
+    def _aggregate_buckets(self, bucket, start, end, limit, fiscal_start, fill, currency, tags=None):
+        column, size, offset = self._bucket_spec(bucket, fiscal_start)
+        last = self.bucket_key(end, bucket, fiscal_start) if end else None
+        if limit:
+            if last is None:
+                latest = max((row[0] for rows in self._query_ledger("SELECT MAX(day) FROM {transactions}",
+                                                                    rollups=True)
+                              for row in rows if row[0] is not None), default=None)
+                if latest is None:
+                    return []
+                last = self.bucket_key(self.from_day(latest), bucket, fiscal_start)
+            first = self.bucket_start(last - limit + 1, bucket, fiscal_start)
+            start = max(start or first, first)
+
+        expression = f"({column} - {offset}) / {size}" if column == "day" else \
+            f"({column} / 100 * 12 + {column} % 100 - 1 - {offset}) / {size}"
+        columns = f"""
+                {expression} AS bucket,
+                COALESCE(SUM(CASE WHEN type = 'Income' THEN amount ELSE 0 END), 0) as income,
+                COALESCE(SUM(CASE WHEN type = 'Expense' THEN amount ELSE 0 END), 0) as expenses"""
+        # archived rollups carry no ids, so with a tag filter the archive is read from the tag rollups instead
+        condition, ids = self._tag_condition(tags, "id") if tags else (None, None)
+        where, params = self._day_range(start, end, conditions=[condition] if tags else ())
+        results = list(self._query_ledger(f"""
+            SELECT {columns}
+            FROM {{transactions}}
+            {where}
+            GROUP BY bucket
+        """, ([ids] if tags else []) + params, start, end, rollups=not tags, currency=currency))
+        if tags:
+            results.append(self._archived_tag_totals(tags, columns, "bucket", start, end, currency=currency))
+        totals = {row[0]: row[1:] for row in self._merge_totals(results)}
+
+        keys = sorted(totals)
+        if fill and (keys or start and last is not None):
+            first = self.bucket_key(start, bucket, fiscal_start) if start else keys[0]
+            keys = range(first, (keys[-1] if last is None else last) + 1)
+        return [(self.bucket_label(key, bucket, fiscal_start),) +
+                tuple(self.from_minor(value) for value in totals.get(key, (0, 0))) for key in keys]
+
+    def get_daily_summary(self, start=None, end=None, limit=None):
+        return self.get_summary("day", start, end, limit)
+
+    def _daily_rollup(self, start=None):
+        where, params = self._day_range(start)
+        return sorted(self._merge_totals(self._query_ledger(f"""
+            SELECT 
+                day,
+                COALESCE(SUM(CASE WHEN type = 'Income' THEN amount ELSE 0 END), 0) as income,
+                COALESCE(SUM(CASE WHEN type = 'Expense' THEN amount ELSE 0 END), 0) as expenses
+            FROM {{transactions}}
+            {where}
+            GROUP BY day
+        """, params, start, rollups=True, currency=self.reporting_currency)))
+
+    def get_monthly_summary(self, start=None, end=None, limit=None):
+        return self.get_summary("month", start, end, limit)
+
+    def get_yearly_summary(self, start=None, end=None, limit=None):
+        return self.get_summary("year", start, end, limit)
+
+    def data_version(self):
+        # one connection stays open for this: PRAGMA data_version only moves when another connection commits to
+        # the file, so the version table is read again only then
+        with self._version_lock:
+            if self._version_conn is None:
+                self._version_conn = sqlite3.connect(self.db_file, uri=True, check_same_thread=False)
+            cursor = self._version_conn.cursor()
+            changes = cursor.execute("PRAGMA data_version").fetchone()[0]
+            if changes != self._file_changes:
+                self._version = self._read_version(cursor)
+                self._file_changes = changes
+            return self._version
+
+    def get_monthly_category_matrix(self):
+        rows = self._merge_totals(self._query_ledger("""
+            SELECT t.month, c.name, t.type, SUM(t.amount)
+            FROM {transactions} t
+            JOIN categories c ON t.category_id = c.id
+            GROUP BY t.month, c.name, t.type
+        """, rollups=True, currency=self.reporting_currency), key_len=3)
+        if not rows:
+            return [], [], np.zeros((0, 0))
+
+        month_index = np.array([month // 100 * 12 + month % 100 - 1 for month, *_ in rows])
+        first, last = month_index.min(), month_index.max()
+        months = [index // 12 * 100 + index % 12 + 1 for index in range(first, last + 1)]
+        keys = sorted({(category, trans_type) for _, category, trans_type, _ in rows})
+        positions = {key: i for i, key in enumerate(keys)}
+
+        matrix = np.zeros((len(keys), len(months)))
+        np.add.at(matrix, (np.array([positions[(category, trans_type)] for _, category, trans_type, _ in rows]),
+                           month_index - first),
+                  np.array([amount for *_, amount in rows], dtype=float) / self.MINOR_UNITS)
+        return months, keys, matrix
+
+    def _archived_tag_totals(self, expression, columns, group_by, start=None, end=None, key_len=1, currency=None):
+        # the matching combinations' rollups or, for a negated match, the whole archive less the combinations it
+        # leaves out; rows net to zero are dropped so they do not show up as empty buckets
+        combinations, negated = self._archived_tag_combinations(expression)
+        matched = self._query_tag_rollups(columns, start, end, ["tag_ids IN (SELECT value FROM json_each(?))"],
+                                          [json.dumps(combinations)], group_by, currency) if combinations else []
+        if not negated:
+            return matched
+        where, params = self._day_range(start, end)
+        archived = self._query_part(self.ARCHIVED, f"SELECT {columns} FROM {{transactions}} {where} "
+                                                   f"GROUP BY {group_by}", params, currency or self.reporting_currency)
+        rows = self._merge_totals([archived, [tuple(row[:key_len]) + tuple(-value for value in row[key_len:])
+                                              for row in matched]], key_len)
+        return [row for row in rows if any(abs(value) >= 0.5 for value in row[key_len:])]
+
+    def _tagged_amounts(self, start=None, end=None, currency=None):
+        # one read of every tagged row in the reporting currency plus the archived tag rollups; each tag then picks
+        # its rows out of the arrays with a mask
+        bitmaps = {name: bitmap for name, bitmap in self._tag_bitmaps().items() if len(bitmap)}
+        tagged = Bitmap()
+        for bitmap in bitmaps.values():
+            tagged |= bitmap
+        rows = []
+        if len(tagged):
+            where, params = self._day_range(start, end,
+                                            conditions=["id IN (SELECT id FROM temp.id_sets WHERE set_id = ?)"])
+            rows = [row for rows in self._query_ledger(f"SELECT id, day, month, type, amount FROM {{transactions}} "
+                                                       f"{where}", [tagged] + params,
+                                                       start, end, currency=currency or self.reporting_currency)
+                    for row in rows]
+        combinations, members = self._archived_tag_combinations()
+        archived = self._query_tag_rollups("tag_ids, day, month, type, amount", start, end,
+                                           currency=currency) if combinations else []
+        if not rows and not archived:
+            return {}, None
+
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        positions = {combination: index for index, combination in enumerate(combinations)}
+        keys = np.array([positions[row[0]] for row in archived], dtype=np.int64)
+        masks = {}
+        for name in bitmaps.keys() | members.keys():
+            mask = np.concatenate((bitmaps[name].isin(ids) if name in bitmaps else np.zeros(len(ids), dtype=bool),
+                                   np.isin(keys, members.get(name, []))))
+            if mask.any():
+                masks[name] = mask
+        _, days, months, types, amounts = zip(*(rows + archived))
+        return masks, (np.array(days, dtype=np.int64), np.array(months, dtype=np.int64), np.array(types),
+                       np.array(amounts, dtype=float))
+
+    def get_tag_summary(self, start=None, end=None, currency=None):
+        masks, columns = self._tagged_amounts(start, end, currency)
+        if columns is None:
+            return []
+        _, _, types, amounts = columns
+        income = types == "Income"
+        rows = []
+        for name, tagged in masks.items():
+            rows.append((name, self.from_minor(float(amounts[tagged & income].sum())),
+                         self.from_minor(float(amounts[tagged & ~income].sum()))))
+        rows.sort(key=lambda row: (-row[2], row[0]))
+        return rows
+
+    def get_tag_matrix(self, granularity="month", start=None, end=None, fiscal_start=1):
+        # the tag counterpart of get_monthly_category_matrix: one row per (tag, type), one column per period
+        column, size, offset = self._bucket_spec(granularity, fiscal_start)
+        masks, columns = self._tagged_amounts(start, end)
+        if columns is None:
+            return [], [], np.zeros((0, 0))
+        days, months, types, amounts = columns
+        if column == "day":
+            buckets = (days - offset) // size
+        else:
+            buckets = (months // 100 * 12 + months % 100 - 1 - offset) // size
+        first = int(buckets.min())
+        labels = [self.bucket_label(key, granularity, fiscal_start) for key in range(first, int(buckets.max()) + 1)]
+
+        keys, matrix = [], []
+        for name in sorted(masks):
+            tagged = masks[name]
+            for trans_type in ("Income", "Expense"):
+                selected = tagged & (types == trans_type)
+                if selected.any():
+                    keys.append((name, trans_type))
+                    matrix.append(np.bincount(buckets[selected] - first, amounts[selected] / self.MINOR_UNITS,
+                                              minlength=len(labels)))
+        return labels, keys, np.array(matrix) if matrix else np.zeros((0, len(labels)))
+
+    def get_total_income(self, currency=None):
+        return self._get_totals(currency=currency)[0]
+
+    def get_total_expenses(self, currency=None):
+        return self._get_totals(currency=currency)[1]
+
+    def _current_month_range(self):
+        today = datetime.now()
+        last_day = calendar.monthrange(today.year, today.month)[1]
+        return today.strftime("%Y-%m-01"), today.strftime(f"%Y-%m-{last_day:02d}")
+
+    def get_monthly_expenses(self, currency=None):
+        return self._get_totals(*self._current_month_range(), currency)[1]
+
+    def get_monthly_income(self, currency=None):
+        return self._get_totals(*self._current_month_range(), currency)[0]
+
+    def archive_path(self):
+        root, ext = os.path.splitext(os.path.basename(self.db_file))
+        return self._resolve_shard(f"{root}_archive{ext or '.db'}")
+
+    def archive_transactions(self, cutoff, progress=None):
+        sources = [None] + [path for year, path, _ in self.get_shards() if f"{year}-01-01" < cutoff]
+        archived = 0
+        for index, part in enumerate(sources):
+            if progress:
+                progress(index / len(sources), f"{os.path.basename(part) if part else 'Ana tablo'} arşivleniyor")
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("ATTACH DATABASE ? AS archive", (self.archive_path(),))
+                self._init_storage(cursor, "archive")
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS archive.archive_chunks (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        first_date DATE NOT NULL,
+                        last_date DATE NOT NULL,
+                        row_count INTEGER NOT NULL,
+                        payload BLOB NOT NULL
+                    )
+                ''')
+                cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_chunks_dates "
+                               "ON archive_chunks (first_date, last_date)")
+
+                table = "main.transactions"
+                if part is not None:
+                    cursor.execute("ATTACH DATABASE ? AS cold", (self._resolve_shard(part),))
+                    table = "cold.transactions"
+
+                before = self._begin_write(cursor)
+                moved, rollups, tag_rollups = self._archive_rows(cursor, table, cutoff)
+                if part is not None:
+                    cursor.execute("UPDATE ledger_shards SET row_count = row_count - ? WHERE path = ?",
+                                   (moved, part))
+                change = self._change(cursor, before, ("transactions", "archived_rollups", "archived_tag_rollups"),
+                                      None, cutoff)
+                conn.commit()
+
+                if part is not None:
+                    cursor.execute("DETACH DATABASE cold")
+                cursor.execute("DETACH DATABASE archive")
+                archived += moved
+
+            self._mirror(self.ARCHIVED_ROLLUP_UPSERT, rollups, many=True)
+            self._mirror(self.TAG_ROLLUP_UPSERT, tag_rollups, many=True)
+            if part is None:
+                self._mirror("DELETE FROM transactions WHERE day < ?", (self.to_day(cutoff),))
+            else:
+                self._mirror("UPDATE ledger_shards SET row_count = row_count - ? WHERE path = ?", (moved, part))
+            self.cache.publish(change)
+        return archived
+
+    def _archive_rows(self, cursor, table, cutoff):
+        cutoff_day = self.to_day(cutoff)
+        cursor.execute(f"""
+            SELECT t.id, date(t.day * 86400, 'unixepoch'), t.type, c.name, t.amount, t.description, t.created_at,
+                   t.currency, t.day, t.month
+            FROM {table} t
+            LEFT JOIN categories c ON t.category_id = c.id
+            WHERE t.day < ?
+            ORDER BY t.day
+        """, (cutoff_day,))
+        selected = cursor.fetchall()
+        rows = [(trans_id, date, trans_type, category, self.from_minor(amount), description, created_at, currency)
+                for trans_id, date, trans_type, category, amount, description, created_at, currency, _, _
+                in selected]
+        if not rows:
+            return 0, [], []
+
+        chunks = {}
+        for row in rows:
+            chunks.setdefault(row[1][:7], []).append(row)
+        cursor.executemany("""
+            INSERT INTO archive.archive_chunks (first_date, last_date, row_count, payload)
+            VALUES (?, ?, ?, ?)
+        """, [(chunk[0][1], chunk[-1][1], len(chunk), zlib.compress(json.dumps(chunk).encode("utf-8"), 9))
+              for chunk in chunks.values()])
+
+        cursor.execute(f"""
+            SELECT day, month, type, category_id, SUM(amount), COUNT(*), currency
+            FROM {table}
+            WHERE day < ?
+            GROUP BY day, type, category_id, currency
+        """, (cutoff_day,))
+        rollups = cursor.fetchall()
+        cursor.executemany(self.ARCHIVED_ROLLUP_UPSERT, rollups)
+        # the tag bitmaps keep the archived ids, but the amounts have to stay reachable for tag reports
+        tag_rollups = self._tag_rollup_rows(cursor, [(row[0], row[8], row[9], row[2], row[4], row[7])
+                                                     for row in selected])
+        cursor.executemany(self.TAG_ROLLUP_UPSERT, tag_rollups)
+        # archiving is local housekeeping: the rows stay in other ledgers and are not deleted there
+        cursor.execute(f"UPDATE change_log SET archived = 1 "
+                       f"WHERE transaction_id IN (SELECT id FROM {table} WHERE day < ?)", (cutoff_day,))
+        cursor.execute(f"DELETE FROM {table} WHERE day < ?", (cutoff_day,))
+        return len(rows), rollups, tag_rollups
+
+    def search_archive(self, start=None, end=None):
+        transactions = []
+        for rows in self._iter_archive_pages({"start": start, "end": end}):
+            transactions += rows
+        return transactions
+
+    def _iter_archive_pages(self, filters):
+        if not os.path.exists(self.archive_path()):
+            return
+
+        start, end = filters.get("start"), filters.get("end")
+        trans_type = filters.get("type") if filters.get("type") not in ("", "All") else None
+        category = filters.get("category") if filters.get("category") not in (None, "", "All") else None
+        categories = {category, *self.get_subcategories(category, recursive=True)} if category else None
+        terms = self.search_terms(filters.get("search"))
+        # archived rows keep their bits in the tag bitmaps
+        tagged, negated = self.match_tags(filters["tags"]) if filters.get("tags") else (None, None)
+
+        uri = pathlib.Path(self.archive_path()).as_uri() + "?mode=ro"
+        conn = self._connect(uri, uri=True)
+        try:
             cursor = conn.cursor()
-            current_month = datetime.now().strftime("%Y-%m")
             cursor.execute("""
-                SELECT COALESCE(SUM(amount), 0) 
-                FROM transactions 
-                WHERE type = 'Income' AND strftime('%Y-%m', date) = ?
-            """, (current_month,))
-            return cursor.fetchone()[0] or 0
+                SELECT payload FROM archive_chunks
+                WHERE (? IS NULL OR last_date >= ?) AND (? IS NULL OR first_date <= ?)
+                ORDER BY first_date DESC
+            """, (start, start, end, end))
+            for payload, in cursor:
+                rows = []
+                # chunks archived before multi-currency support have no currency field
+                for trans_id, date, row_type, row_category, amount, description, _, *currency in \
+                        json.loads(zlib.decompress(payload).decode("utf-8")):
+                    if start and date < start or end and date > end:
+                        continue
+                    if trans_type and row_type != trans_type or categories and row_category not in categories:
+                        continue
+                    if tagged is not None and (trans_id in tagged) == negated:
+                        continue
+                    if terms:
+                        text = f"{description or ''} {row_category or ''}"
+                        if not all("«" in self.highlight(text, [term]) for term in terms):
+                            continue
+                        description = self.highlight(description, terms)
+                    rows.append((trans_id, date, row_type, row_category, amount, description,
+                                 currency[0] if currency else self.BASE_CURRENCY))
+                if rows:
+                    rows.reverse()
+                    yield rows
+        finally:
+            conn.close()
+
+    def database_files(self):
+        files = [("Ana defter", os.path.abspath(self.db_file))]
+        files += [(str(year), self._resolve_shard(path)) for year, path, _ in self.get_shards()]
+        files.append(("Arşiv", self.archive_path()))
+        return [(name, path) for name, path in files if os.path.exists(path)]
+
+    @staticmethod
+    def _storage_pages(cursor):
+        return tuple(cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                     for name in ("page_size", "page_count", "freelist_count", "auto_vacuum"))
+
+    def storage_stats(self):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT file, measured_at, fragmentation, unused FROM storage_log")
+            measured = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        stats = []
+        for name, path in self.database_files():
+            conn = self._connect(pathlib.Path(path).as_uri() + "?mode=ro", uri=True)
+            try:
+                page_size, pages, free_pages, auto_vacuum = self._storage_pages(conn.cursor())
+            finally:
+                conn.close()
+            measured_at, fragmentation, unused = measured.get(os.path.basename(path), (None, None, None))
+            stats.append({
+                "name": name,
+                "file": os.path.basename(path),
+                "size": sum(os.path.getsize(file) for file in (path, path + "-wal") if os.path.exists(file)),
+                "page_size": page_size,
+                "pages": pages,
+                "free_pages": free_pages,
+                "free_ratio": free_pages / pages if pages else 0.0,
+                "incremental": auto_vacuum == 2,
+                "fragmentation": fragmentation,
+                "unused": unused,
+                "measured_at": measured_at,
+            })
+        return stats
+
+    def get_maintenance_log(self):
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT task, ran_at, seconds, result FROM maintenance_log")
+            return {task: (ran_at, seconds, result) for task, ran_at, seconds, result in cursor.fetchall()}
+
+    def _needs_full_vacuum(self, incremental, fragmentation, unused):
+        # only a full VACUUM reorders pages, and it is also the one way to switch an older file to incremental
+        return not incremental or (fragmentation or 0) > self.FRAGMENTATION_LIMIT or (unused or 0) > self.UNUSED_LIMIT
+
+    def due_maintenance(self, now=None):
+        now = now or datetime.now()
+        log = self.get_maintenance_log()
+        due = {task for task, interval in self.MAINTENANCE_INTERVALS.items()
+               if task not in log or datetime.strptime(log[task][0], "%Y-%m-%d %H:%M:%S") + interval <= now}
+        if "vacuum" not in due and any(
+                stats["free_ratio"] >= self.VACUUM_FREE_RATIO
+                or self._needs_full_vacuum(stats["incremental"], stats["fragmentation"], stats["unused"])
+                for stats in self.storage_stats()):
+            due.add("vacuum")
+        return [task for task in self.MAINTENANCE_TASKS if task in due]
+
+    def run_maintenance(self, tasks=None, progress=None):
+        tasks = [task for task in self.MAINTENANCE_TASKS if tasks is None or task in tasks]
+        files = self.database_files()
+        results = []
+        for index, task in enumerate(tasks):
+            started = time.perf_counter()
+            outcomes = []
+            for number, (name, path) in enumerate(files):
+                fraction = (index + number / len(files)) / len(tasks)
+                message = f"{name}: {self.MAINTENANCE_TASKS[task].lower()}"
+                if progress:
+                    progress(fraction, message)
+                conn = self._connect(path, isolation_level=None)
+                interrupted = []
+                if progress:
+                    conn.set_progress_handler(self._maintenance_handler(progress, fraction, message, interrupted),
+                                              self.MAINTENANCE_OPCODES)
+                try:
+                    cursor = conn.cursor()
+                    if task == "vacuum":
+                        outcomes.append(self._vacuum_file(cursor, path))
+                    elif task == "analyze":
+                        outcomes.append(self._analyze_file(cursor))
+                    else:
+                        outcomes.extend(f"{name}: {problem}" for problem in self._integrity_file(cursor))
+                except sqlite3.OperationalError:
+                    if interrupted:
+                        raise JobCancelled()
+                    raise
+                finally:
+                    conn.set_progress_handler(None, 0)
+                    conn.close()
+
+            if task == "vacuum":
+                result, ok = f"{sum(outcomes) / 1048576:.1f} MB geri kazanıldı", True
+            elif task == "analyze":
+                result, ok = f"{sum(outcomes)} dizin istatistiği güncellendi", True
+            else:
+                result, ok = "; ".join(outcomes) or "Sorun bulunmadı", not outcomes
+            with self.get_connection() as conn:
+                conn.execute(self.MAINTENANCE_LOG_UPSERT, (task, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                                           time.perf_counter() - started, result))
+            results.append((task, result, ok))
+        if progress:
+            progress(1.0)
+        return results
+
+    def _maintenance_handler(self, progress, fraction, message, interrupted):
+        # SQLite calls this every MAINTENANCE_OPCODES steps; a cancelled job aborts the running statement, so even a
+        # full VACUUM gives the database back within MAINTENANCE_CHECK seconds
+        checked = [time.perf_counter()]
+
+        def handler():
+            now = time.perf_counter()
+            if now - checked[0] < self.MAINTENANCE_CHECK:
+                return 0
+            checked[0] = now
+            try:
+                progress(fraction, message)
+            except JobCancelled:
+                interrupted.append(True)
+                return 1
+            return 0
+        return handler
+
+    def _fragmentation(self, cursor):
+        try:
+            cursor.execute(self.FRAGMENTATION_SQL, (self.FRAGMENTATION_MIN_PAGES, self.FRAGMENTATION_MIN_PAGES))
+        except sqlite3.OperationalError as e:
+            # SQLite builds without SQLITE_ENABLE_DBSTAT_VTAB only report free pages
+            if "dbstat" not in str(e):
+                raise
+            return None, None
+        return cursor.fetchone()
+
+    def _log_storage(self, path, pages, free_pages, fragmentation, unused):
+        with self.get_connection() as conn:
+            measured_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            conn.execute(self.STORAGE_LOG_UPSERT,
+                         (os.path.basename(path), measured_at, pages, free_pages, fragmentation, unused))
+
+    def _vacuum_file(self, cursor, path):
+        page_size, pages, free_pages, auto_vacuum = self._storage_pages(cursor)
+        fragmentation, unused = self._fragmentation(cursor)
+        if self._needs_full_vacuum(auto_vacuum == 2, fragmentation, unused):
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+        elif free_pages:
+            # one short write transaction per step; the pragma frees a page per row, so every row must be read
+            while cursor.execute("PRAGMA freelist_count").fetchone()[0]:
+                cursor.execute(f"PRAGMA incremental_vacuum({self.VACUUM_STEP})").fetchall()
+        else:
+            self._log_storage(path, pages, free_pages, fragmentation, unused)
+            return 0
+
+        _, remaining, free_pages, _ = self._storage_pages(cursor)
+        self._log_storage(path, remaining, free_pages, *self._fragmentation(cursor))
+        # switching to incremental adds pointer-map pages, so a file with nothing to free can grow slightly
+        return max(pages - remaining, 0) * page_size
+
+    def _analyze_file(self, cursor):
+        # analysis_limit samples each index instead of reading it whole, which keeps ANALYZE short on a large ledger
+        cursor.execute(f"PRAGMA analysis_limit = {self.ANALYSIS_LIMIT}")
+        cursor.execute("ANALYZE")
+        cursor.execute("PRAGMA optimize")
+        cursor.execute("SELECT count(*) FROM sqlite_stat1")
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def _integrity_file(cursor):
+        cursor.execute("PRAGMA integrity_check(10)")
+        return [message for message, in cursor.fetchall() if message != "ok"]
+
+
+class RollingAnalytics:
+    WINDOWS = (7, 30, 90)
+
+    def __init__(self, db):
+        self.db = db
+        # report jobs read the rolling windows from worker threads while the Tk thread may refresh them
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute("""
+            CREATE TABLE daily (
+                day INTEGER PRIMARY KEY,
+                income INTEGER NOT NULL,
+                expenses INTEGER NOT NULL
+            )
+        """)
+        self._first_day = None
+        self._last_day = None
+        self._dirty_day = None
+        self._windows = {}
+        self._balance = []
+        self._month_over_month = None
+
+    def note_change(self, date):
+        with self._lock:
+            day = Database.to_day(date)
+            if self._dirty_day is None or day < self._dirty_day:
+                self._dirty_day = day
+
+    def invalidate(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM daily")
+            self._first_day = None
+            self._last_day = None
+            self._dirty_day = None
+            self._windows = {}
+            self._balance = []
+            self._month_over_month = None
+
+    def refresh(self):
+        with self._lock:
+            since = self._last_day
+            if self._dirty_day is not None and (since is None or self._dirty_day < since):
+                since = self._dirty_day
+            self._dirty_day = None
+
+            rows = self.db._daily_rollup(Database.from_day(since) if since is not None else None)
+            if since is not None:
+                self.conn.execute("UPDATE daily SET income = 0, expenses = 0 WHERE day >= ?", (since,))
+            self.conn.executemany("""
+                INSERT INTO daily (day, income, expenses) VALUES (?, ?, ?)
+                ON CONFLICT (day) DO UPDATE SET income = excluded.income, expenses = excluded.expenses
+            """, rows)
+
+            first, last = self.conn.execute("SELECT MIN(day), MAX(day) FROM daily").fetchone()
+            if first is None:
+                return
+            changed = max(first, since) if since is not None else first
+            if changed <= last:
+                self.conn.execute("""
+                    WITH RECURSIVE days(day) AS (
+                        SELECT ? UNION ALL SELECT day + 1 FROM days WHERE day < ?
+                    )
+                    INSERT OR IGNORE INTO daily (day, income, expenses) SELECT day, 0, 0 FROM days
+                """, (changed, last))
+            self.conn.commit()
+            self._first_day, self._last_day = first, last
+
+            for window in list(self._windows):
+                self._windows[window] = [row for row in self._windows[window] if row[0] < changed] + \
+                                        self._window_rows(window, changed)
+            self._balance = [row for row in self._balance if row[0] < changed]
+            self._balance += self._balance_rows(changed, self._balance[-1][1] if self._balance else 0)
+            self._month_over_month = None
+
+    def _window_rows(self, window, since):
+        return self.conn.execute(f"""
+            SELECT day, income, expenses FROM (
+                SELECT day,
+                       SUM(income) OVER w AS income,
+                       SUM(expenses) OVER w AS expenses
+                FROM daily
+                WHERE day >= ?
+                WINDOW w AS (ORDER BY day RANGE BETWEEN {int(window) - 1} PRECEDING AND CURRENT ROW)
+            )
+            WHERE day >= ?
+            ORDER BY day
+        """, (since - window + 1, since)).fetchall()
+
+    def _balance_rows(self, since, opening):
+        return self.conn.execute("""
+            SELECT day, ? + SUM(income - expenses) OVER (ORDER BY day ROWS UNBOUNDED PRECEDING)
+            FROM daily
+            WHERE day >= ?
+            ORDER BY day
+        """, (opening, since)).fetchall()
+
+    def moving(self, window):
+        with self._lock:
+            self.refresh()
+            if window not in self._windows:
+                self._windows[window] = self._window_rows(window, self._first_day) \
+                    if self._first_day is not None else []
+
+            series = []
+            for day, income, expenses in self._windows[window]:
+                income, expenses = Database.from_minor(income), Database.from_minor(expenses)
+                series.append((Database.from_day(day), income, expenses, income - expenses,
+                               income / window, expenses / window, (income - expenses) / window))
+            return series
+
+    def running_balance(self):
+        with self._lock:
+            self.refresh()
+            return [(Database.from_day(day), Database.from_minor(balance)) for day, balance in self._balance]
+
+    def month_over_month(self):
+        with self._lock:
+            self.refresh()
+            if self._month_over_month is None:
+                self._month_over_month = self.conn.execute("""
+                    WITH monthly AS (
+                        SELECT strftime('%Y-%m', day * 86400, 'unixepoch') AS month,
+                               SUM(income) AS income,
+                               SUM(expenses) AS expenses
+                        FROM daily
+                        GROUP BY month
+                    )
+                    SELECT month, income, expenses, income - expenses,
+                           income - LAG(income) OVER m,
+                           expenses - LAG(expenses) OVER m,
+                           (income - expenses) - LAG(income - expenses) OVER m
+                    FROM monthly
+                    WINDOW m AS (ORDER BY month)
+                    ORDER BY month
+                """).fetchall()
+            return [(month,) + tuple(None if value is None else Database.from_minor(value) for value in values)
+                    for month, *values in self._month_over_month]
+
+
+class Forecaster:
+    SEASON = 12
+    SMOOTHING_GRID = (0.1, 0.3, 0.6)
+    MODELS = ("holt_winters", "linear")
+
+    def __init__(self, db):
+        self.db = db
+        self._version = None
+        self._cache = {}
+
+    def forecast(self, horizon=6, model="holt_winters"):
+        if model not in self.MODELS:
+            raise ValueError(f"Bilinmeyen tahmin modeli: {model}")
+
+        version = self.db.data_version()
+        if version != self._version:
+            self._version = version
+            self._cache = {}
+        if (horizon, model) not in self._cache:
+            self._cache[(horizon, model)] = self._forecast(horizon, model)
+        return self._cache[(horizon, model)]
+
+    def _forecast(self, horizon, model):
+        months, keys, history = self.db.get_monthly_category_matrix()
+        if not months:
+            return None
+
+        fit = self.holt_winters if model == "holt_winters" else self.linear_trend
+        values = np.clip(fit(history, horizon), 0, None)
+
+        is_income = np.array([trans_type == "Income" for _, trans_type in keys])
+        income = values[is_income].sum(axis=0)
+        expenses = values[~is_income].sum(axis=0)
+
+        last = months[-1] // 100 * 12 + months[-1] % 100 - 1
+        future = [Database.month_label(index // 12 * 100 + index % 12 + 1)
+                  for index in range(last + 1, last + 1 + horizon)]
+        return {
+            "months": future,
+            "categories": {key: values[i] for i, key in enumerate(keys)},
+            "income": income,
+            "expenses": expenses,
+            "net": income - expenses
+        }
+
+    @staticmethod
+    def linear_trend(history, horizon):
+        n = history.shape[1]
+        if n < 2:
+            return np.repeat(history[:, -1:], horizon, axis=1)
+
+        t = np.arange(n) - (n - 1) / 2
+        slope = (history - history.mean(axis=1, keepdims=True)) @ t / (t ** 2).sum()
+        intercept = history.mean(axis=1) + slope * (n - 1) / 2
+        return intercept[:, None] + slope[:, None] * np.arange(1, horizon + 1)
+
+    @classmethod
+    def holt_winters(cls, history, horizon):
+        series, n = history.shape
+        m = cls.SEASON
+        if n < 3:
+            return cls.linear_trend(history, horizon)
+
+        seasonal = n >= 2 * m
+        grid = np.array(list(itertools.product(cls.SMOOTHING_GRID, cls.SMOOTHING_GRID,
+                                               cls.SMOOTHING_GRID if seasonal else (0.0,))))
+        alpha, beta, gamma = (grid[:, i, None] for i in range(3))
+
+        if seasonal:
+            level = history[:, :m].mean(axis=1)
+            trend = (history[:, m:2 * m].mean(axis=1) - level) / m
+            season = history[:, :m] - level[:, None]
+        else:
+            level = history[:, 0]
+            trend = history[:, 1] - history[:, 0]
+            season = np.zeros((series, m))
+
+        level = np.tile(level, (len(grid), 1))
+        trend = np.tile(trend, (len(grid), 1))
+        season = np.tile(season, (len(grid), 1, 1))
+        sse = np.zeros((len(grid), series))
+
+        for i in range(n):
+            observed = history[:, i]
+            current_season = season[:, :, i % m]
+            sse += (observed - (level + trend + current_season)) ** 2
+            new_level = alpha * (observed - current_season) + (1 - alpha) * (level + trend)
+            trend = beta * (new_level - level) + (1 - beta) * trend
+            season[:, :, i % m] = gamma * (observed - new_level) + (1 - gamma) * current_season
+            level = new_level
+
+        best = sse.argmin(axis=0)
+        columns = np.arange(series)
+        level, trend, season = level[best, columns], trend[best, columns], season[best, columns]
+        steps = np.arange(1, horizon + 1)
+        return level[:, None] + trend[:, None] * steps + season[:, (n + steps - 1) % m]
+
+
+class ReportData:
+    # data behind each screen and the Excel export, kept free of Tk so it can run headless
+    FORECAST_MONTHS = 6
+    DASHBOARD_MONTHS = 6
+    ANALYSIS_MONTHS = 12
+    TOP_CATEGORIES = 7
+    ANOMALY_DAYS = 30
+    DASHBOARD_PANELS = {
+        'summary': ('income', 'expenses', 'monthly_income', 'monthly_expenses'),
+        'budgets': ('budgets',),
+        'anomalies': ('anomalies',),
+        'charts': ('monthly', 'categories', 'forecast'),
+    }
+
+    def __init__(self, db, analytics=None, forecaster=None):
+        self.db = db
+        self.analytics = analytics or RollingAnalytics(db)
+        self.forecaster = forecaster or Forecaster(db)
+
+    def _dashboard_queries(self):
+        since = (datetime.now() - timedelta(days=self.ANOMALY_DAYS)).strftime("%Y-%m-%d")
+        return {
+            'income': ("get_total_income", {}),
+            'expenses': ("get_total_expenses", {}),
+            'monthly_income': ("get_monthly_income", {}),
+            'monthly_expenses': ("get_monthly_expenses", {}),
+            'budgets': ("get_budget_status", {}),
+            'anomalies': ("get_anomalies", {"limit": 5, "since": since}),
+            'monthly': ("get_monthly_summary", {"limit": self.DASHBOARD_MONTHS}),
+        }
+
+    def dashboard(self):
+        data = {key: getattr(self.db, name)(**kwargs) for key, (name, kwargs) in self._dashboard_queries().items()}
+        data['balance'] = data['income'] - data['expenses']
+        data['categories'] = self.category_breakdown(data['monthly'])
+        data['forecast'] = self.forecaster.forecast(self.FORECAST_MONTHS) if data['monthly'] else None
+        return data
+
+    def dashboard_changes(self, event):
+        queries = self._dashboard_queries()
+        # the breakdown starts at the first charted month and the forecast reads the whole history
+        queries['categories'] = ("get_expenses_by_category", {})
+        queries['forecast'] = ("get_monthly_category_matrix", {})
+        changed = {key for key, (name, kwargs) in queries.items()
+                   if event.affects(*self.db.query_scope(name, **kwargs))}
+        return [panel for panel, keys in self.DASHBOARD_PANELS.items() if changed.intersection(keys)]
+
+    async def dashboard_async(self, adb, panels=None):
+        # the independent queries run at once; the breakdown and forecast need the monthly summary first
+        keys = {key for panel in panels or self.DASHBOARD_PANELS for key in self.DASHBOARD_PANELS[panel]}
+        queries = {key: query for key, query in self._dashboard_queries().items() if key in keys}
+        results = await asyncio.gather(*(adb.read(name, **kwargs) for name, kwargs in queries.values()))
+        data = dict(zip(queries, results))
+        if 'income' in data:
+            data['balance'] = data['income'] - data['expenses']
+        if 'monthly' not in data:
+            return data
+        data['forecast'] = None
+        if data['monthly']:
+            data['categories'], data['forecast'] = await asyncio.gather(
+                adb.run(self.category_breakdown, data['monthly']),
+                adb.run(self.forecaster.forecast, self.FORECAST_MONTHS))
+        else:
+            data['categories'] = await adb.run(self.category_breakdown, data['monthly'])
+        return data
+
+    def category_breakdown(self, monthly, parent=None):
+        if not monthly:
+            return []
+        return self.db.get_expenses_by_category(f"{monthly[0][0]}-01", limit=self.TOP_CATEGORIES, parent=parent)
+
+    def report(self, period, overlay="Yok", fiscal_start=1, tags=None):
+        summary = self.db.get_summary(period, fiscal_start=fiscal_start, tags=tags or None)
+        # the forecast and the overlays follow the whole ledger, so they are left out of a tag report
+        if tags:
+            return {'summary': summary, 'forecast': None, 'overlay': None}
+        forecast = self.forecaster.forecast(self.FORECAST_MONTHS) if period == "month" and summary else None
+        if overlay == "Yok" or not summary:
+            return {'summary': summary, 'forecast': forecast, 'overlay': None}
+
+        if overlay == "Bakiye":
+            series = self.analytics.running_balance()
+        elif overlay == "Aylık değişim":
+            series = [(month, delta) for month, *_, delta in self.analytics.month_over_month()]
+        else:
+            series = [(date, net_sum) for date, _, _, net_sum, *_ in
+                      self.analytics.moving(int(overlay.split()[0]))]
+
+        values = {}
+        for date, value in series:
+            date = date if len(date) == 10 else f"{date}-01"
+            key = self.db.bucket_key(date, period, fiscal_start)
+            values[self.db.bucket_label(key, period, fiscal_start)] = value
+        return {
+            'summary': summary,
+            'forecast': forecast,
+            'overlay': np.array([values.get(label) for label, *_ in summary], dtype=float),
+        }
+
+    def statistics(self):
+        income_chunks, expense_chunks = [], []
+        rates = self.db.get_rate_series()
+        for batch in self.db.iter_transaction_batches():
+            amounts = self.db.convert_amounts(batch['amount'], batch['currency'],
+                                              batch['date'].astype(np.int64), rates=rates)
+            income_chunks.append(amounts[batch['type'] == 'Income'])
+            expense_chunks.append(amounts[batch['type'] == 'Expense'])
+
+        income_amounts = np.concatenate(income_chunks) if income_chunks else np.array([])
+        expense_amounts = np.concatenate(expense_chunks) if expense_chunks else np.array([])
+        return income_amounts, expense_amounts
+
+    def analysis_3d(self):
+        return self.db.get_monthly_summary(limit=self.ANALYSIS_MONTHS)
+
+    def export_excel(self, file_path, progress=None):
+        currency = self.db.reporting_currency
+        rates = self.db.get_rate_series()
+        total = self.db.count_transactions() if progress else 0
+        # archived rows too, so the sheet adds up to the category summary, which includes the archive rollups
+        batches = self.db.iter_transaction_batches({"include_archive": True}, batch_size=5000, as_frame=True)
+        first = next(batches, None)
+        if first is None:
+            return 0
+
+        start_row = 0
+        with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+            for df in itertools.chain([first], batches):
+                if progress:
+                    # total counts the hot rows only, so the archive's share is clamped
+                    progress(0.7 * min(start_row / max(total, 1), 1), f"{start_row} / {total} işlem yazıldı")
+                days = pd.to_datetime(df['date']).values.astype('datetime64[D]').astype(np.int64)
+                df[f'amount_{currency}'] = self.db.convert_amounts(df['amount'], df['currency'], days,
+                                                                   currency, rates).round(2)
+                df.to_excel(writer, sheet_name='İşlemler', index=False,
+                            header=start_row == 0, startrow=start_row)
+                start_row += len(df) + (1 if start_row == 0 else 0)
+
+            if progress:
+                progress(0.7, "Kategori özeti hazırlanıyor")
+            category_summary = self.db.get_category_summary()
+            if category_summary:
+                df_summary = pd.DataFrame(category_summary)
+                df_summary.to_excel(writer, sheet_name='Kategori Özeti', index=False)
+            tag_summary = self.db.get_tag_summary()
+            if tag_summary:
+                pd.DataFrame(tag_summary, columns=['tag', 'income', 'expenses']).to_excel(
+                    writer, sheet_name='Etiket Özeti', index=False)
+
+            workbook = writer.book
+            ws_trans = writer.sheets['İşlemler']
+
+            if progress:
+                progress(0.75, "Sütunlar biçimlendiriliyor")
+            for column in ws_trans.columns:
+                max_length = 0
+                column_letter = column[0].column_letter
+                for cell in column:
+                    try:
+                        if len(str(cell.value)) > max_length:
+                            max_length = len(str(cell.value))
+                    except:
+                        pass
+                adjusted_width = (max_length + 2) * 1.2
+                ws_trans.column_dimensions[column_letter].width = min(adjusted_width, 30)
+
+            if 'Kategori Özeti' in writer.sheets:
+                ws_summary = writer.sheets['Kategori Özeti']
+
+                self._create_pie_chart(workbook, ws_summary, df_summary, 'Gelir', 'Gelir Tablosu')
+                self._create_pie_chart(workbook, ws_summary, df_summary, 'Gider', 'Gider Tablosu')
+
+                total_income = df_summary[df_summary['type'] == 'Gelir']['total_amount'].sum()
+                total_expenses = df_summary[df_summary['type'] == 'Gider']['total_amount'].sum()
+                net_balance = total_income - total_expenses
+
+                stats = [
+                    ['Toplam Gelir', total_income],
+                    ['Toplam Gider', total_expenses],
+                    ['Net Bakiye', net_balance],
+                    ['Tasarruf Oranı',
+                     f"{(net_balance / total_income * 100 if total_income > 0 else 0):.1f}%" if total_income > 0 else 'N/A']
+                ]
+
+                ws_summary['E1'] = f'İstatistikler ({currency})'
+                ws_summary['E1'].font = Font(bold=True, size=12)
+
+                for i, (label, value) in enumerate(stats, start=2):
+                    ws_summary[f'E{i}'] = label
+                    ws_summary[f'F{i}'] = value
+                    ws_summary[f'E{i}'].font = Font(bold=True)
+                    if i == 3:
+                        ws_summary[f'F{i}'].font = Font(bold=True, color='FF0000' if net_balance < 0 else '008000')
+
+            if progress:
+                progress(0.85, "Dosya kaydediliyor")
+
+        return start_row - 1
+
+    def _create_pie_chart(self, workbook, ws, df, trans_type, title):
+        df_filtered = df[df['type'] == trans_type]
+        if df_filtered.empty:
+            return
+
+        pie = PieChart3D()
+        labels = Reference(ws, min_col=1, min_row=2, max_row=len(df_filtered) + 1)
+        data = Reference(ws, min_col=3, min_row=1, max_row=len(df_filtered) + 1)
+
+        pie.add_data(data, titles_from_data=True)
+        pie.set_categories(labels)
+        pie.title = title
+
+        max_row = ws.max_row + 2
+        ws.add_chart(pie, f"E{max_row}")
+
+        return pie
+
+
+class Bitmap:
+    # roaring-style compressed set of transaction ids: ids are split into chunks of 65536 and each chunk is kept
+    # as a sorted array of 16-bit offsets while sparse, or as a plain 8 KiB bitmap once that is smaller
+    CHUNK_BITS = 16
+    ARRAY_LIMIT = 4096
+    BITMAP_BYTES = (1 << CHUNK_BITS) // 8
+
+    def __init__(self, chunks=None):
+        self.chunks = chunks or {}
+
+    @classmethod
+    def from_ids(cls, ids):
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        if not ids.size:
+            return cls()
+        keys = ids >> cls.CHUNK_BITS
+        return cls({int(part[0] >> cls.CHUNK_BITS): (part & 0xFFFF).astype(np.uint16)
+                    for part in np.split(ids, np.flatnonzero(np.diff(keys)) + 1)})
+
+    @classmethod
+    def decode(cls, rows):
+        return cls({chunk: cls.decode_chunk(bits) for chunk, bits in rows})
+
+    @classmethod
+    def decode_chunk(cls, bits):
+        if len(bits) == cls.BITMAP_BYTES:
+            return np.flatnonzero(np.unpackbits(np.frombuffer(bits, np.uint8), bitorder="little")).astype(np.uint16)
+        return np.frombuffer(bits, "<u2").astype(np.uint16)
+
+    @classmethod
+    def encode_chunk(cls, offsets):
+        # arrays stay below 8 KiB, so the length alone tells the two forms apart
+        if len(offsets) < cls.ARRAY_LIMIT:
+            return np.asarray(offsets, dtype="<u2").tobytes()
+        bits = np.zeros(1 << cls.CHUNK_BITS, dtype=np.uint8)
+        bits[offsets] = 1
+        return np.packbits(bits, bitorder="little").tobytes()
+
+    def ids(self):
+        if not self.chunks:
+            return np.array([], dtype=np.int64)
+        return np.concatenate([(chunk << self.CHUNK_BITS) + self.chunks[chunk].astype(np.int64)
+                               for chunk in sorted(self.chunks)])
+
+    def isin(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        found = np.zeros(len(ids), dtype=bool)
+        keys = ids >> self.CHUNK_BITS
+        for chunk in np.unique(keys).tolist():
+            if chunk in self.chunks:
+                mask = keys == chunk
+                found[mask] = np.isin(ids[mask] & 0xFFFF, self.chunks[chunk])
+        return found
+
+    def __contains__(self, trans_id):
+        offsets = self.chunks.get(trans_id >> self.CHUNK_BITS)
+        if offsets is None:
+            return False
+        index = np.searchsorted(offsets, trans_id & 0xFFFF)
+        return index < len(offsets) and offsets[index] == trans_id & 0xFFFF
+
+    def __len__(self):
+        return sum(len(offsets) for offsets in self.chunks.values())
+
+    def __and__(self, other):
+        chunks = {chunk: np.intersect1d(offsets, other.chunks[chunk], assume_unique=True)
+                  for chunk, offsets in self.chunks.items() if chunk in other.chunks}
+        return Bitmap({chunk: offsets for chunk, offsets in chunks.items() if len(offsets)})
+
+    def __or__(self, other):
+        chunks = dict(self.chunks)
+        for chunk, offsets in other.chunks.items():
+            chunks[chunk] = np.union1d(chunks[chunk], offsets).astype(np.uint16) if chunk in chunks else offsets
+        return Bitmap(chunks)
+
+    def __sub__(self, other):
+        chunks = {chunk: np.setdiff1d(offsets, other.chunks[chunk], assume_unique=True) if chunk in other.chunks
+                  else offsets for chunk, offsets in self.chunks.items()}
+        return Bitmap({chunk: offsets for chunk, offsets in chunks.items() if len(offsets)})
+
+
+class ChangeEvent:
+    # published after a write commits; start/end bound the dates it touched, None meaning open ended
+    def __init__(self, tables, start=None, end=None, before=None, after=None):
+        self.tables = frozenset(tables)
+        self.start = start
+        self.end = end
+        self.before = before
+        self.after = after
+        self.generation = None
+
+    def affects(self, tables, start=None, end=None):
+        return bool(self.tables & tables) and (self.start is None or end is None or self.start <= end) and \
+            (self.end is None or start is None or start <= self.end)
+
+
+class QueryCache:
+    # getter results keyed by their arguments, each remembering the tables and dates it read, so a write only
+    # drops the entries it can have changed
+    SIZE = 512
+
+    def __init__(self, size=SIZE):
+        self.size = size
+        self.enabled = True
+        self.version = None
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def _drop(self, keys):
+        for key in keys:
+            del self._entries[key]
+        self.invalidations += len(keys)
+        self.generation += 1
+
+    def sync(self, version):
+        # a data_version this cache did not publish means another connection or process wrote
+        with self._lock:
+            if version != self.version:
+                self._drop(list(self._entries))
+                self.version = version
+
+    def get(self, key, scope, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._copy(self._entries[key][0])
+            self.misses += 1
+            generation = self.generation
+
+        result = compute()
+        with self._lock:
+            # a write published while this was computing may have changed what it read
+            if generation == self.generation:
+                self._entries[key] = (result, scope)
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return self._copy(result)
+
+    @classmethod
+    def _copy(cls, result):
+        # a deep copy, so a caller changing its result cannot change the cached one; tuples of plain values are
+        # immutable already and are shared
+        if isinstance(result, (str, int, float, type(None))):
+            return result
+        if isinstance(result, tuple):
+            items = [cls._copy(item) for item in result]
+            return result if all(new is old for new, old in zip(items, result)) else tuple(items)
+        if isinstance(result, list):
+            return [cls._copy(item) for item in result]
+        if isinstance(result, dict):
+            return {key: cls._copy(value) for key, value in result.items()}
+        return copy.deepcopy(result)
+
+    def publish(self, event):
+        with self._lock:
+            if event.before != self.version:
+                stale = list(self._entries)
+            else:
+                stale = [key for key, (_, scope) in self._entries.items() if event.affects(*scope)]
+            self._drop(stale)
+            self.version = event.after
+            event.generation = self.generation
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(event)
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        if self.connection.instrumentation is None:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.instrumentation.observe_query(self.connection, sql, parameters,
+                                                          time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        if self.connection.instrumentation is None:
+            return super().executemany(sql, seq_of_parameters)
+        seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.instrumentation.observe_query(
+                self.connection, sql, seq_of_parameters[0] if seq_of_parameters else (),
+                time.perf_counter() - started)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    instrumentation = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+
+class PooledConnection(InstrumentedConnection):
+    pool = None
+    key = None
+
+    def __exit__(self, *exc_info):
+        try:
+            return super().__exit__(*exc_info)
+        finally:
+            self.pool.release(self)
+
+    def close(self):
+        self.pool.release(self)
+
+
+class ConnectionPool:
+    # connections go back to the pool when their "with" block ends or close() is called;
+    # connections that are simply dropped are closed by the garbage collector as before
+    def __init__(self, size=8):
+        self.size = size
+        self.opened = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, database, instrumentation=None, **kwargs):
+        key = (database, tuple(sorted(kwargs.items())))
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            kwargs.update(factory=PooledConnection, check_same_thread=False)
+            conn = instrumentation.connect(database, **kwargs) if instrumentation else \
+                sqlite3.connect(database, **kwargs)
+            conn.pool, conn.key = self, key
+            with self._lock:
+                self.opened += 1
+        conn.instrumentation = instrumentation
+        return conn
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            cursor = sqlite3.Cursor(conn)
+            for _, name, _ in cursor.execute("PRAGMA database_list").fetchall():
+                if name not in ("main", "temp"):
+                    cursor.execute(f"DETACH DATABASE {name}")
+        except sqlite3.ProgrammingError:
+            return
+        with self._lock:
+            idle = self._idle.setdefault(conn.key, [])
+            if conn in idle:
+                return
+            if len(idle) < self.size:
+                idle.append(conn)
+                return
+        sqlite3.Connection.close(conn)
+
+    def idle_count(self):
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+    def clear(self):
+        with self._lock:
+            connections = [conn for idle in self._idle.values() for conn in idle]
+            self._idle = {}
+        for conn in connections:
+            sqlite3.Connection.close(conn)
+
+
+class Instrumentation:
+    LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    SLOW_LOG_SIZE = 100
+    CACHE_METRICS = {
+        "hits": "Sorgu önbelleğinden dönen sonuçlar",
+        "misses": "Önbellekte bulunamayıp hesaplanan sonuçlar",
+        "evictions": "Boyut sınırı yüzünden çıkarılan sonuçlar",
+        "invalidations": "Bir değişiklik yüzünden geçersizleşen sonuçlar",
+    }
+
+    def __init__(self, slow_query_ms=100, slow_log=None):
+        self.slow_query_ms = slow_query_ms
+        self.slow_log = slow_log
+        self.enabled = False
+        self.exporter_port = None
+        self.current_screen = None
+        self._prometheus = None
+        self.cache = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # (kind, name) -> [calls, total seconds, max seconds, rows, errors, bucket counts]
+            self.stats = {}
+            self.connections = 0
+            self.slow_queries = deque(maxlen=self.SLOW_LOG_SIZE)
+
+    @staticmethod
+    def public_methods(obj, prefix=""):
+        return [name for name, member in vars(type(obj)).items()
+                if inspect.isfunction(member) and name.startswith(prefix) and not name.startswith("_")]
+
+    def instrument(self, obj, kind, names=None):
+        for name in names or self.public_methods(obj):
+            setattr(obj, name, self._wrap(kind, name, getattr(obj, name)))
+
+    def attach(self, db):
+        db.instrumentation = self
+        self.cache = db.cache
+        self.instrument(db, "db")
+
+    def _wrap(self, kind, name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return method(*args, **kwargs)
+            if kind == "screen":
+                self.current_screen = name
+            started = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                self.observe(kind, name, time.perf_counter() - started, error=True)
+                raise
+            if inspect.isgenerator(result):
+                return self._wrap_generator(kind, name, result, time.perf_counter() - started)
+            if inspect.iscoroutine(result):
+                return self._wrap_coroutine(kind, name, result, started)
+            self.observe(kind, name, time.perf_counter() - started, self._row_count(result))
+            return result
+        return wrapper
+
+    def _wrap_generator(self, kind, name, generator, elapsed):
+        # only the time spent inside the generator counts, not the consumer's work between items
+        rows = 0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - started
+                rows += self._row_count(item) or 1
+                yield item
+        finally:
+            self.observe(kind, name, elapsed, rows)
+
+    async def _wrap_coroutine(self, kind, name, coro, started):
+        try:
+            result = await coro
+        except Exception:
+            self.observe(kind, name, time.perf_counter() - started, error=True)
+            raise
+        self.observe(kind, name, time.perf_counter() - started, self._row_count(result))
+        return result
+
+    @staticmethod
+    def _row_count(result):
+        if isinstance(result, (list, pd.DataFrame)):
+            return len(result)
+        if isinstance(result, dict) and result and all(isinstance(v, np.ndarray) for v in result.values()):
+            return len(next(iter(result.values())))
+        return None
+
+    def observe(self, kind, name, seconds, rows=None, error=False):
+        with self._lock:
+            stats = self.stats.get((kind, name))
+            if stats is None:
+                stats = self.stats[(kind, name)] = [0, 0.0, 0.0, 0, 0, [0] * (len(self.LATENCY_BUCKETS) + 1)]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3] += rows or 0
+            stats[4] += error
+            stats[5][bisect.bisect_left(self.LATENCY_BUCKETS, seconds)] += 1
+        if self._prometheus:
+            self._prometheus["calls"].labels(kind, name).inc()
+            self._prometheus["latency"].labels(kind, name).observe(seconds)
+            if rows:
+                self._prometheus["rows"].labels(kind, name).inc(rows)
+            if error:
+                self._prometheus["errors"].labels(kind, name).inc()
+
+    def connect(self, database, **kwargs):
+        kwargs.setdefault("factory", InstrumentedConnection)
+        conn = sqlite3.connect(database, **kwargs)
+        conn.instrumentation = self
+        with self._lock:
+            self.connections += 1
+        if self._prometheus:
+            self._prometheus["connections"].inc()
+        return conn
+
+    def observe_query(self, conn, sql, parameters, seconds):
+        statement = sql.split(None, 1)[0].upper() if sql.strip() else "?"
+        self.observe("sql", statement, seconds)
+        if seconds * 1000 < self.slow_query_ms or statement in ("BEGIN", "COMMIT", "ATTACH", "DETACH", "PRAGMA"):
+            return
+
+        try:
+            plan = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+        except sqlite3.Error as e:
+            plan = [(0, 0, 0, f"plan alınamadı: {e}")]
+        depth = {0: -1}
+        lines = []
+        for node, parent, _, detail in plan:
+            depth[node] = depth.get(parent, -1) + 1
+            lines.append("  " * depth[node] + detail)
+        entry = {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "ms": seconds * 1000,
+            "sql": " ".join(sql.split()),
+            "params": repr(parameters)[:200],
+            "plan": lines,
+        }
+        with self._lock:
+            self.slow_queries.append(entry)
+        if self._prometheus:
+            self._prometheus["slow"].inc()
+        if self.slow_log:
+            with open(self.slow_log, "a", encoding="utf-8") as f:
+                f.write(self.format_slow_query(entry) + "\n\n")
+
+    @staticmethod
+    def format_slow_query(entry):
+        return "\n".join([f"[{entry['time']}] {entry['ms']:.1f} ms", entry["sql"], f"params: {entry['params']}"] +
+                         [f"  {line}" for line in entry["plan"]])
+
+    def observe_draw(self, seconds):
+        if self.enabled:
+            self.observe("draw", self.current_screen or "?", seconds)
+
+    def start_exporter(self, port, addr="127.0.0.1"):
+        from prometheus_client import CollectorRegistry, Counter, Histogram, start_http_server
+
+        registry = CollectorRegistry()
+        self._prometheus = {
+            "calls": Counter("finance_calls", "Çağrı sayısı", ["kind", "name"], registry=registry),
+            "latency": Histogram("finance_call_duration_seconds", "Çağrı süresi", ["kind", "name"],
+                                 buckets=self.LATENCY_BUCKETS, registry=registry),
+            "rows": Counter("finance_rows_returned", "Dönen satır sayısı", ["kind", "name"], registry=registry),
+            "errors": Counter("finance_call_errors", "Hata ile biten çağrılar", ["kind", "name"], registry=registry),
+            "connections": Counter("finance_connections_opened", "Açılan SQLite bağlantıları", registry=registry),
+            "slow": Counter("finance_slow_queries", "Eşiği aşan sorgular", registry=registry),
+        }
+        registry.register(self)
+        start_http_server(port, addr=addr, registry=registry)
+        self.exporter_port = port
+        self.enabled = True
+
+    def collect(self):
+        # the query cache keeps its own counters, so they are read when Prometheus scrapes
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+        if self.cache is None:
+            return
+        stats = self.cache.stats()
+        for name, documentation in self.CACHE_METRICS.items():
+            yield CounterMetricFamily(f"finance_query_cache_{name}", documentation, value=stats[name])
+        yield GaugeMetricFamily("finance_query_cache_entries", "Önbellekteki sonuç sayısı", value=stats["entries"])
+
+    def percentile(self, buckets, count, fraction=0.95):
+        seen = 0
+        for bound, hits in zip(self.LATENCY_BUCKETS + (None,), buckets):
+            seen += hits
+            if seen >= count * fraction:
+                return bound
+        return None
+
+    def snapshot(self):
+        with self._lock:
+            rows = []
+            for (kind, name), (calls, total, peak, returned, errors, buckets) in self.stats.items():
+                p95 = self.percentile(buckets, calls)
+                rows.append((kind, name, calls, total * 1000, total * 1000 / calls,
+                             p95 * 1000 if p95 is not None else peak * 1000, peak * 1000, returned, errors))
+            rows.sort(key=lambda row: row[3], reverse=True)
+            return rows, self.connections, list(self.slow_queries)
+
+
+class AsyncDatabase:
+    # reads fan out over a small thread pool, writes go through one writer task so they keep their order
+    READERS = 4
+    WRITE_PREFIXES = ("add_", "set_", "delete_", "move_", "import_", "load_", "archive_", "rescore_", "rebuild_",
+                      "run_", "rotate_", "update_", "recategorize_", "undo", "redo", "apply_", "sync",
+                      "tag_")
+
+    def __init__(self, db, readers=READERS):
+        self.db = db
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+        self._writes = None
+        self._writer_task = None
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self._readers, functools.partial(fn, *args, **kwargs))
+
+    async def read(self, name, *args, **kwargs):
+        return await self.run(getattr(self.db, name), *args, **kwargs)
+
+    async def write(self, name, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        if self._writes is None:
+            self._writes = asyncio.Queue()
+            self._writer_task = loop.create_task(self._write_loop())
+        future = loop.create_future()
+        await self._writes.put((getattr(self.db, name), args, kwargs, future))
+        return await future
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            fn, args, kwargs, future = await self._writes.get()
+            try:
+                result = await loop.run_in_executor(self._writer, functools.partial(fn, *args, **kwargs))
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self._writes.task_done()
+
+    async def iterate(self, name, *args, **kwargs):
+        iterator = await self.read(name, *args, **kwargs)
+        done = object()
+        loop = asyncio.get_running_loop()
+        # unpooled connections belong to the thread that opened them, so the whole iteration (closing included)
+        # stays on one thread
+        executor = self._readers if self.db.pool is not None else \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-iter")
+        try:
+            while True:
+                item = await loop.run_in_executor(executor, next, iterator, done)
+                if item is done:
+                    return
+                yield item
+        finally:
+            if executor is not self._readers:
+                if hasattr(iterator, "close"):
+                    await loop.run_in_executor(executor, iterator.close)
+                executor.shutdown(wait=False)
+
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            return attr
+        if name.startswith("iter_"):
+            return functools.partial(self.iterate, name)
+        if name.startswith(self.WRITE_PREFIXES):
+            return functools.partial(self.write, name)
+        return functools.partial(self.read, name)
+
+    async def close(self):
+        if self._writes is not None:
+            await self._writes.join()
+            self._writer_task.cancel()
+        self._readers.shutdown(wait=False)
+        self._writer.shutdown()
+
+
+class TkAsyncBridge:
+    # steps an asyncio loop from Tk's after() timer, so coroutines resume on the Tk thread and may touch widgets
+    INTERVAL = 15
+
+    def __init__(self, root):
+        self.root = root
+        self.loop = asyncio.new_event_loop()
+        self._tick()
+
+    def _tick(self):
+        # a modal dialog opened from a coroutine runs a nested Tk loop that lands here while the loop is running
+        if not self.loop.is_running() and not self.loop.is_closed():
+            self.loop.call_soon(self.loop.stop)
+            self.loop.run_forever()
+        if not self.loop.is_closed():
+            self.root.after(self.INTERVAL, self._tick)
+
+    def run(self, coro):
+        return self.loop.create_task(coro)
+
+    def close(self, *coros):
+        for coro in coros:
+            self.loop.run_until_complete(coro)
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.close()
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    PENDING = "Bekliyor"
+    RUNNING = "Çalışıyor"
+    DONE = "Tamamlandı"
+    FAILED = "Hata"
+    CANCELLED = "İptal edildi"
+
+    def __init__(self, job_id, name, backend, on_done=None):
+        self.id = job_id
+        self.name = name
+        self.backend = backend
+        self.on_done = on_done
+        self.status = self.PENDING
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        self.handle = None
+        self.notified = False
+
+    @property
+    def done(self):
+        return self.status in (self.DONE, self.FAILED, self.CANCELLED)
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def report(self, fraction, message=None):
+        if self.started is None:
+            self.started = time.time()
+            self.status = self.RUNNING
+        self.progress = min(max(fraction, 0.0), 1.0)
+        if message:
+            self.message = message
+
+
+class ProcessProgress:
+    # picklable progress callback for process-pool jobs; updates travel back through a manager queue
+    def __init__(self, job_id, updates, cancelled):
+        self.job_id = job_id
+        self.updates = updates
+        self.cancelled = cancelled
+
+    def __call__(self, fraction, message=None):
+        if self.cancelled.is_set():
+            raise JobCancelled()
+        self.updates.put((self.job_id, fraction, message))
+
+
+def run_job(fn, args, progress):
+    progress(0.0)
+    try:
+        return fn(*args, progress=progress)
+    except JobCancelled:
+        # not re-raised: the exception would have to be unpickled by the parent; the queue knows it asked to cancel
+        return None
+
+
+def export_excel_job(db_file, sharded, file_path, progress=None):
+    return ReportData(Database(db_file, sharded=sharded)).export_excel(file_path, progress)
+
+
+def archive_transactions_job(db_file, sharded, cutoff, progress=None):
+    return Database(db_file, sharded=sharded).archive_transactions(cutoff, progress)
+
+
+def rescore_anomalies_job(db_file, sharded, progress=None):
+    return Database(db_file, sharded=sharded).rescore_anomalies(progress)
+
+
+def sync_job(db_file, sharded, path, progress=None):
+    return Database(db_file, sharded=sharded).sync(path, progress)
+
+
+def maintenance_job(db_file, sharded, tasks=None, progress=None):
+    return Database(db_file, sharded=sharded).run_maintenance(tasks, progress)
+
+
+# jobs that may run outside this process (process pool or Celery worker) must be listed here
+JOBS = {fn.__name__: fn for fn in (export_excel_job, archive_transactions_job, rescore_anomalies_job, sync_job,
+                                   maintenance_job)}
+
+
+class JobQueue:
+    BACKENDS = ("thread", "process", "celery")
+    CELERY_BROKER = "redis://localhost:6379/0"
+    CELERY_POLL_INTERVAL = 0.5
+    HISTORY = 50
+
+    def __init__(self, backend="thread", workers=2, celery_broker=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Bilinmeyen iş arka ucu: {backend}")
+        self.backend = backend
+        self.workers = workers
+        self.celery_broker = celery_broker
+        self.jobs = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._processes = None
+        self._manager = None
+        self._progress = None
+
+    def submit(self, name, fn, *args, on_done=None, remote=False):
+        # remote jobs are JOBS entries with picklable arguments; everything else runs on the thread pool
+        backend = self.backend if remote else "thread"
+        if remote and fn.__name__ not in JOBS:
+            raise ValueError(f"'{fn.__name__}' uzak iş olarak kayıtlı değil")
+        with self._lock:
+            job = Job(self._next_id, name, backend, on_done)
+            self._next_id += 1
+            self.jobs.append(job)
+            finished = [old for old in self.jobs if old.done and old.notified]
+            for old in finished[:max(0, len(self.jobs) - self.HISTORY)]:
+                self.jobs.remove(old)
+
+        try:
+            if backend == "celery":
+                self._submit_celery(job, fn, args)
+            elif backend == "process":
+                self._submit_process(job, fn, args)
+            else:
+                job.handle = self._threads.submit(run_job, fn, args, self._thread_progress(job))
+                job.handle.add_done_callback(lambda future: self._finish(job, future))
+        except Exception as e:
+            job.status, job.error, job.finished = Job.FAILED, str(e), time.time()
+        return job
+
+    def _thread_progress(self, job):
+        def progress(fraction, message=None):
+            if job.cancel_requested:
+                raise JobCancelled()
+            job.report(fraction, message)
+        return progress
+
+    def _submit_process(self, job, fn, args):
+        if self._processes is None:
+            # spawn, not fork: the parent holds Tk and SQLite handles that must not be duplicated
+            context = multiprocessing.get_context("spawn")
+            self._manager = context.Manager()
+            self._progress = self._manager.Queue()
+            self._processes = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        job.cancel_event = self._manager.Event()
+        job.handle = self._processes.submit(run_job, fn, args,
+                                            ProcessProgress(job.id, self._progress, job.cancel_event))
+        job.handle.add_done_callback(lambda future: self._finish(job, future))
+
+    def _finish(self, job, future):
+        if future.cancelled() or job.cancel_requested:
+            job.status = Job.CANCELLED
+        else:
+            error = future.exception()
+            if error is not None:
+                job.status, job.error = Job.FAILED, str(error) or type(error).__name__
+            else:
+                job.result, job.progress, job.status = future.result(), 1.0, Job.DONE
+        if job.started is None:
+            job.started = job.submitted
+        job.finished = time.time()
+
+    def _submit_celery(self, job, fn, args):
+        if self.celery_broker:
+            os.environ.setdefault("FINANCE_CELERY_BROKER", self.celery_broker)
+        try:
+            import tasks
+        except ImportError as e:
+            raise RuntimeError(f"Celery arka ucu kullanılamıyor: {e}")
+
+        job.handle = tasks.run_named_job.delay(fn.__name__, list(args))
+        threading.Thread(target=self._watch_celery, args=(job,), daemon=True).start()
+
+    def _watch_celery(self, job):
+        result = job.handle
+        while True:
+            try:
+                state, info = result.state, result.info
+            except Exception as e:
+                job.status, job.error, job.finished = Job.FAILED, f"Celery bağlantı hatası: {e}", time.time()
+                return
+            if state in ("STARTED", "PROGRESS"):
+                info = info if isinstance(info, dict) else {}
+                job.report(info.get("progress", 0.0), info.get("message"))
+            elif state == "SUCCESS":
+                job.report(1.0)
+                job.result, job.status = info, Job.DONE
+            elif state == "FAILURE":
+                job.status, job.error = Job.FAILED, str(info)
+            elif state == "REVOKED":
+                job.status = Job.CANCELLED
+            if job.done:
+                job.finished = time.time()
+                return
+            time.sleep(self.CELERY_POLL_INTERVAL)
+
+    def cancel(self, job):
+        if job.done:
+            return
+        job.cancel_requested = True
+        if job.backend == "celery":
+            job.handle.revoke(terminate=True)
+        elif job.backend == "process":
+            job.cancel_event.set()
+        if job.handle is not None and job.handle.cancel():
+            job.status, job.finished = Job.CANCELLED, time.time()
+
+    def dispatch(self):
+        # runs on the Tk thread: applies progress from worker processes and fires the on_done callbacks
+        if self._progress is not None:
+            while True:
+                try:
+                    job_id, fraction, message = self._progress.get_nowait()
+                except queue.Empty:
+                    break
+                job = next((job for job in self.jobs if job.id == job_id), None)
+                if job is not None and not job.done:
+                    job.report(fraction, message)
+
+        for job in list(self.jobs):
+            if job.done and not job.notified:
+                job.notified = True
+                if job.on_done:
+                    job.on_done(job)
+
+    def running(self):
+        return [job for job in self.jobs if not job.done]
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if not (job.done and job.notified)]
+
+    def shutdown(self):
+        for job in self.running():
+            self.cancel(job)
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kişisel Finans Yönetimi")
+    parser.add_argument("--db", default="finance.db", help="veritabanı dosyası")
+    parser.add_argument("--sharded", action="store_true",
+                        help="geçmiş yılları yıllık dosyalara taşı (finance_<yıl>.db)")
+    parser.add_argument("--parallel-shards", action="store_true",
+                        help="yıllık dosyalardaki sorguları paralel iş parçacıklarında çalıştır")
+    parser.add_argument("--archive-before", metavar="YYYY-MM-DD",
+                        help="bu tarihten önceki işlemleri arşive taşı ve çık")
+    parser.add_argument("--sync", metavar="YOL",
+                        help="başka bir defter dosyası ya da paylaşılan klasörle son eşitlemeden beri olan "
+                             "değişiklikleri alıp ver ve çık")
+    parser.add_argument("--maintain", action="store_true",
+                        help="boş alanı geri kazan, istatistikleri güncelle, bütünlüğü denetle ve çık")
+    parser.add_argument("--pool", action="store_true", help="bağlantıları arka plan okumaları için havuzda tut")
+    parser.add_argument("--wal", action="store_true",
+                        help="veritabanını kalıcı olarak WAL günlük kipine al (--pool ile birlikte)")
+    parser.add_argument("--memory", choices=["memory", "mmap"],
+                        help="okuma sorgularını bellekteki kopyaya (memory) veya mmap bağlantısına yönlendir")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Prometheus ölçümlerini 127.0.0.1:<port>/metrics adresinde yayınla")
+    parser.add_argument("--slow-query-ms", type=float, default=100,
+                        help="bu süreyi aşan sorguları sorgu planıyla birlikte kaydet (ms)")
+    parser.add_argument("--slow-log", metavar="DOSYA", help="yavaş sorguları bu dosyaya da yaz")
+    parser.add_argument("--debug", action="store_true", help="hata ayıklama panelini açık başlat")
+    parser.add_argument("--jobs", choices=JobQueue.BACKENDS, default="thread",
+                        help="ağır işlerin çalışacağı arka uç; process ve celery isteğe bağlı "
+                             "(celery için: celery -A tasks worker)")
+    parser.add_argument("--job-workers", type=int, default=2, help="eşzamanlı arka plan işi sayısı")
+    parser.add_argument("--celery-broker", help=f"Celery aracısı (varsayılan: {JobQueue.CELERY_BROKER})")
+    args = parser.parse_args()
+
+    db = Database(args.db, sharded=args.sharded, parallel=args.parallel_shards)
+    if args.archive_before:
+        print(f"{db.archive_transactions(args.archive_before)} işlem arşive taşındı: {db.archive_path()}")
+        raise SystemExit(0)
+    if args.sync:
+        pulled, pushed = db.sync(args.sync)
+        print(f"{args.sync}: {pulled} değişiklik alındı, {pushed} değişiklik gönderildi")
+        raise SystemExit(0)
+    if args.maintain:
+        results = db.run_maintenance()
+        for task, result, ok in results:
+            print(f"{Database.MAINTENANCE_TASKS[task]}: {result}")
+        raise SystemExit(0 if all(ok for task, result, ok in results) else 1)
+    if args.pool or args.wal:
+        db.enable_pool(AsyncDatabase.READERS + 1, wal=args.wal)
+    if args.memory:
+        db.enable_memory_mode(args.memory)
+        print(db.memory_report())
+
+    instrumentation = Instrumentation(args.slow_query_ms, args.slow_log)
+    if args.metrics_port:
+        instrumentation.start_exporter(args.metrics_port)
+
     root = tk.Tk()
-    app = FinanceTracker(root)
+    app = FinanceTracker(root, db, instrumentation, JobQueue(args.jobs, args.job_workers, args.celery_broker))
+    if args.debug:
+        app.open_debug_panel()
     root.mainloop()
+    app.shutdown()
@@ -0,0 +1,352 @@
+import argparse
+import base64
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import tornado.ioloop
+import tornado.web
+
+from main import Database
+
+DEFAULT_PORT = 8765
+TRANSACTION_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class ResponseCache:
+    # every write bumps data_version (see Database.VERSIONED_TABLES), so one cheap read per request tells whether
+    # the cached bodies are still valid, including writes made by the Tk window in another process
+    def __init__(self, db, size=512):
+        self.db = db
+        self.size = size
+        self.version = None
+        self.currency = Database.BASE_CURRENCY
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        version = self.db.data_version()
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._entries.clear()
+                # the reporting currency lives in the settings table and may have been changed in the window; it is
+                # handed to compute rather than set on the shared Database, which the window's own code reads
+                self.currency = self.db.get_setting("reporting_currency", Database.BASE_CURRENCY)
+            currency = self.currency
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        body = json.dumps(compute(currency), ensure_ascii=False)
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = body
+                if len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return body
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(text):
+    try:
+        day, created_at, trans_id = json.loads(base64.urlsafe_b64decode(text + "=" * (-len(text) % 4)))
+        if not isinstance(created_at, str):
+            raise TypeError(created_at)
+        return int(day), created_at, int(trans_id)
+    except (ValueError, TypeError):
+        raise ValueError("Geçersiz sayfa imleci")
+
+
+class ApiHandler(tornado.web.RequestHandler):
+    def initialize(self, api):
+        self.api = api
+
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json; charset=UTF-8")
+
+    def send_json(self, body, status=200):
+        self.set_status(status)
+        self.finish(body if isinstance(body, str) else json.dumps(body, ensure_ascii=False))
+
+    def write_error(self, status_code, **kwargs):
+        self.finish(json.dumps({"error": self._reason}, ensure_ascii=False))
+
+    def arg(self, name, cast=str, default=None):
+        value = self.get_query_argument(name, None)
+        if value in (None, ""):
+            return default
+        try:
+            return cast(value)
+        except ValueError:
+            raise ValueError(f"Geçersiz '{name}' değeri: {value}")
+
+    def date_arg(self, name):
+        value = self.arg(name)
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"'{name}' YYYY-AA-GG biçiminde olmalı: {value}")
+        return value
+
+    async def run(self, fn, *args):
+        return await tornado.ioloop.IOLoop.current().run_in_executor(self.api.executor, fn, *args)
+
+    async def cached(self, compute):
+        try:
+            body = await self.run(self.api.cache.get, self.request.uri, compute)
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
+            return
+        self.send_json(body)
+
+
+class BalanceHandler(ApiHandler):
+    async def get(self):
+        db = self.api.db
+
+        def compute(currency):
+            income, expenses = db.get_total_income(currency), db.get_total_expenses(currency)
+            return {
+                "currency": currency,
+                "balance": income - expenses,
+                "income": income,
+                "expenses": expenses,
+                "monthly_income": db.get_monthly_income(currency),
+                "monthly_expenses": db.get_monthly_expenses(currency),
+            }
+
+        await self.cached(compute)
+
+
+class SummaryHandler(ApiHandler):
+    async def get(self):
+        db = self.api.db
+        try:
+            granularity = self.arg("granularity", default="month")
+            start, end = self.date_arg("start"), self.date_arg("end")
+            limit, fiscal_start = self.arg("limit", int), self.arg("fiscal_start", int, 1)
+            tags = self.arg("tags")
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
+            return
+
+        def compute(currency):
+            rows = db.get_summary(granularity, start, end, limit, fiscal_start, currency=currency, tags=tags)
+            return {
+                "currency": currency,
+                "granularity": granularity,
+                "rows": [{"period": period, "income": income, "expenses": expenses}
+                         for period, income, expenses in rows],
+            }
+
+        await self.cached(compute)
+
+
+class CategoriesHandler(ApiHandler):
+    async def get(self):
+        db = self.api.db
+        try:
+            start, end = self.date_arg("start"), self.date_arg("end")
+            limit, parent = self.arg("limit", int), self.arg("parent")
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
+            return
+
+        def compute(currency):
+            return {
+                "currency": currency,
+                "tree": [{"name": name, "parent": parent_name, "depth": depth}
+                         for name, parent_name, depth in db.get_category_tree()],
+                "expenses": [{"category": category, "total": total}
+                             for category, total in db.get_expenses_by_category(start, end, limit, parent, currency)],
+            }
+
+        await self.cached(compute)
+
+
+class TagsHandler(ApiHandler):
+    async def get(self):
+        db = self.api.db
+        try:
+            start, end = self.date_arg("start"), self.date_arg("end")
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
+            return
+
+        def compute(currency):
+            totals = {name: (income, expenses) for name, income, expenses in db.get_tag_summary(start, end, currency)}
+            return {
+                "currency": currency,
+                "tags": [{"name": name, "income": totals.get(name, (0, 0))[0], "expenses": totals.get(name, (0, 0))[1]}
+                         for name in db.get_tags()],
+            }
+
+        await self.cached(compute)
+
+
+class TransactionsHandler(ApiHandler):
+    async def get(self):
+        db = self.api.db
+        try:
+            filters = {
+                "type": self.arg("type"),
+                "category": self.arg("category"),
+                "search": self.arg("search"),
+                "tags": self.arg("tags"),
+                "start": self.date_arg("start"),
+                "end": self.date_arg("end"),
+            }
+            limit = min(max(self.arg("limit", int, TRANSACTION_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+            after = self.arg("after", decode_cursor)
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
+            return
+
+        def compute(currency):
+            rows, next_key = db.get_transaction_page(filters, limit, after)
+            return {
+                "transactions": [dict(zip(Database.TRANSACTION_FIELDS, row)) for row in rows],
+                "next": encode_cursor(next_key) if next_key else None,
+            }
+
+        await self.cached(compute)
+
+    async def post(self):
+        try:
+            data = json.loads(self.request.body or b"{}")
+        except ValueError:
+            self.send_json({"error": "Gövde geçerli bir JSON değil"}, 400)
+            return
+        if not isinstance(data, dict):
+            self.send_json({"error": "Gövde bir JSON nesnesi olmalı"}, 400)
+            return
+
+        try:
+            status, body = await self.run(self.api.add_transaction, data)
+        except ValueError as e:
+            status, body = 400, {"error": str(e)}
+        self.send_json(body, status)
+
+
+class StatusHandler(ApiHandler):
+    def get(self):
+        pool, cache = self.api.db.pool, self.api.cache
+        self.send_json({
+            "db": os.path.abspath(self.api.db.db_file),
+            "data_version": cache.version,
+            "cache": {"entries": len(cache._entries), "hits": cache.hits, "misses": cache.misses},
+            "query_cache": self.api.db.cache.stats(),
+            "pool": {"size": pool.size, "opened": pool.opened, "idle": pool.idle_count()} if pool else None,
+            "storage": self.api.db.storage_stats(),
+            "maintenance": {task: {"ran_at": ran_at, "seconds": seconds, "result": result}
+                            for task, (ran_at, seconds, result) in self.api.db.get_maintenance_log().items()},
+        })
+
+
+class NotFoundHandler(ApiHandler):
+    def prepare(self):
+        raise tornado.web.HTTPError(404)
+
+
+class LedgerApi:
+    def __init__(self, db, workers=8, cache_size=512, wal=False):
+        self.db = db
+        self.db.enable_pool(workers, wal)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ledger-api")
+        self.cache = ResponseCache(db, cache_size)
+        # the budget check and the insert run under one lock, so two requests cannot both pass the same budget
+        self._write_lock = threading.Lock()
+
+    def add_transaction(self, data):
+        trans_type = data.get("type")
+        if trans_type not in ("Income", "Expense"):
+            raise ValueError("'type' Income veya Expense olmalı")
+        try:
+            amount = float(data.get("amount"))
+        except (TypeError, ValueError):
+            raise ValueError("'amount' sayısal olmalı")
+        if amount <= 0:
+            raise ValueError("'amount' sıfırdan büyük olmalı")
+        category = data.get("category")
+        if not category:
+            raise ValueError("'category' gerekli")
+        date = data.get("date")
+        if date:
+            try:
+                datetime.strptime(date, "%Y-%m-%d")
+            except (TypeError, ValueError):
+                raise ValueError(f"'date' YYYY-AA-GG biçiminde olmalı: {date}")
+        currency = data.get("currency")
+
+        with self._write_lock:
+            overruns = self.db.check_budget(trans_type, amount, category, date, currency)
+            if any(block for name, period, limit, spent, block in overruns) and not data.get("force"):
+                names = "', '".join(dict.fromkeys(name for name, period, limit, spent, block in overruns if block))
+                return 409, {
+                    "error": f"Bu işlem '{names}' bütçesini aşıyor ve engellendi.",
+                    "budgets": [{"category": name, "period": period, "limit": limit, "spent": spent}
+                                for name, period, limit, spent, block in overruns],
+                }
+
+            trans_id = self.db.add_transaction(trans_type, amount, category, data.get("description") or "", date,
+                                               currency)
+        return 201, {
+            "id": trans_id,
+            "budget_warnings": [{"category": name, "period": period, "limit": limit, "spent": spent}
+                                for name, period, limit, spent, block in overruns],
+        }
+
+    def application(self):
+        return tornado.web.Application([
+            (r"/api/balance", BalanceHandler, {"api": self}),
+            (r"/api/summary", SummaryHandler, {"api": self}),
+            (r"/api/categories", CategoriesHandler, {"api": self}),
+            (r"/api/tags", TagsHandler, {"api": self}),
+            (r"/api/transactions", TransactionsHandler, {"api": self}),
+            (r"/api/status", StatusHandler, {"api": self}),
+        ], default_handler_class=NotFoundHandler, default_handler_args={"api": self})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kişisel Finans Yönetimi - yerel JSON API")
+    parser.add_argument("--db", default="finance.db", help="veritabanı dosyası")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="dinlenecek adres (yerel ağdaki diğer makineler için 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=8, help="sorgu iş parçacığı ve havuzdaki bağlantı sayısı")
+    parser.add_argument("--cache-size", type=int, default=512, help="önbellekte tutulan yanıt sayısı")
+    parser.add_argument("--sharded", action="store_true", help="yıllık dosyalara bölünmüş defteri kullan")
+    parser.add_argument("--parallel-shards", action="store_true",
+                        help="yıllık dosyalardaki sorguları paralel iş parçacıklarında çalıştır")
+    parser.add_argument("--wal", action="store_true",
+                        help="veritabanını kalıcı olarak WAL günlük kipine al; masaüstü uygulaması yazarken okumalar "
+                             "beklemez")
+    args = parser.parse_args()
+
+    db = Database(args.db, sharded=args.sharded, parallel=args.parallel_shards)
+    api = LedgerApi(db, args.workers, args.cache_size, args.wal)
+    api.application().listen(args.port, args.host)
+    print(f"API hazır: http://{args.host}:{args.port}/api/ ({os.path.abspath(args.db)})", flush=True)
+    try:
+        tornado.ioloop.IOLoop.current().start()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
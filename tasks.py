@@ -0,0 +1,20 @@
+import os
+
+from celery import Celery
+
+import main
+
+# celery -A tasks worker --loglevel=info
+app = Celery("finance",
+             broker=os.environ.get("FINANCE_CELERY_BROKER", main.JobQueue.CELERY_BROKER),
+             backend=os.environ.get("FINANCE_CELERY_BACKEND",
+                                    os.environ.get("FINANCE_CELERY_BROKER", main.JobQueue.CELERY_BROKER)))
+app.conf.update(task_track_started=True, result_expires=24 * 60 * 60)
+
+
+@app.task(bind=True)
+def run_named_job(self, name, args):
+    def progress(fraction, message=None):
+        self.update_state(state="PROGRESS", meta={"progress": fraction, "message": message})
+
+    return main.run_job(main.JOBS[name], args, progress)
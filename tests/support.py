@@ -0,0 +1,21 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from main import Database
+
+
+class DatabaseTestCase(unittest.TestCase):
+    # keyword arguments for the Database under test
+    database_options = {}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = self.open_database()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def open_database(self, name="finance.db", **options):
+        return Database(os.path.join(self.directory, name), **{**self.database_options, **options})
@@ -0,0 +1,27 @@
+from tests.support import DatabaseTestCase
+
+
+class AnomalyTest(DatabaseTestCase):
+    def flagged(self):
+        return {row[0] for row in self.db.get_anomalies(limit=1000)}
+
+    def test_small_category_matches_rescore(self):
+        for amount in range(20, 30):
+            self.db.add_transaction("Expense", amount, "Ulaşım", "otobüs", "2026-03-04")
+        self.db.add_transaction("Expense", 27.0, "Ulaşım", "otobüs", "2026-03-05")
+        outlier = self.db.add_transaction("Expense", 400, "Ulaşım", "taksi", "2026-03-05")
+        self.db.add_transaction("Expense", 24.5, "Ulaşım", "otobüs", "2026-03-06")
+
+        incremental = self.flagged()
+        self.assertEqual(incremental, {outlier})
+        self.db.rescore_anomalies()
+        self.assertEqual(self.flagged(), incremental)
+
+    def test_import_scores_each_row_against_the_rows_before_it(self):
+        rows = [("Expense", 50 + amount, "Fatura", "", f"2026-04-{amount + 1:02d}") for amount in range(8)]
+        rows.append(("Expense", 900, "Fatura", "kaçak", "2026-04-20"))
+        rows.append(("Income", 5000, "Maaş", "", "2026-04-21"))
+
+        self.assertEqual(self.db.import_transactions(rows), 10)
+        self.assertEqual([(row[2], row[3]) for row in self.db.get_anomalies()], [("Fatura", 900)])
+        self.assertGreater(self.db.get_anomaly(self.db.get_anomalies()[0][0]), 3.5)
@@ -0,0 +1,24 @@
+from tests.support import DatabaseTestCase
+
+
+class ArchiveTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db.add_transaction("Expense", 40, "Yiyecek", "market", "2020-02-10")
+        self.db.add_transaction("Income", 500, "Maaş", "", "2020-03-01")
+        self.db.add_transaction("Expense", 25, "Ulaşım", "otobüs", "2026-01-05")
+
+    def test_archived_rows_keep_their_totals(self):
+        self.assertEqual(self.db.archive_transactions("2021-01-01"), 2)
+
+        self.assertEqual(len(self.db.get_all_transactions()), 1)
+        self.assertEqual(self.db.get_total_income(), 500)
+        self.assertEqual(self.db.get_total_expenses(), 65)
+        self.assertEqual(self.db.get_expenses_by_category(), [("Yiyecek", 40), ("Ulaşım", 25)])
+
+    def test_archived_rows_can_still_be_listed(self):
+        self.db.archive_transactions("2021-01-01")
+
+        archived = self.db.search_archive("2020-02-01", "2020-02-28")
+        self.assertEqual([(row[1], row[3], row[4]) for row in archived], [("2020-02-10", "Yiyecek", 40)])
+        self.assertEqual(len(self.db.get_all_transactions(include_archive=True)), 3)
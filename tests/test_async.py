@@ -0,0 +1,57 @@
+import asyncio
+import sqlite3
+
+from main import AsyncDatabase
+from tests.support import DatabaseTestCase
+
+
+class AsyncDatabaseTest(DatabaseTestCase):
+    def tearDown(self):
+        self.db.disable_pool()
+        super().tearDown()
+
+    def journal_mode(self):
+        conn = sqlite3.connect(self.db.db_file)
+        try:
+            return conn.execute("PRAGMA journal_mode").fetchone()[0]
+        finally:
+            conn.close()
+
+    def run_async(self, coro_fn):
+        async def main():
+            adb = AsyncDatabase(self.db)
+            try:
+                return await coro_fn(adb)
+            finally:
+                await adb.close()
+        return asyncio.run(main())
+
+    def test_writes_keep_their_order_and_reads_see_them(self):
+        async def scenario(adb):
+            await asyncio.gather(*(adb.add_transaction("Expense", amount, "Yiyecek", "", f"2026-01-{amount:02d}")
+                                   for amount in range(1, 6)))
+            return await adb.get_total_expenses(), [row async for row in adb.iter_transactions()]
+
+        total, rows = self.run_async(scenario)
+        self.assertEqual(total, 15)
+        self.assertEqual(sorted(row[0] for row in rows), [1, 2, 3, 4, 5])
+
+    def test_iteration_works_with_and_without_a_pool(self):
+        self.db.add_transaction("Income", 100, "Maaş", "", "2026-01-01")
+
+        async def scenario(adb):
+            return [len(rows) async for rows in adb.iter_transaction_pages(batch_size=1)]
+
+        self.assertEqual(self.run_async(scenario), [1])
+        self.db.enable_pool(4)
+        self.assertEqual(self.run_async(scenario), [1])
+
+    def test_journal_mode_changes_only_when_asked(self):
+        AsyncDatabase(self.db)
+        self.assertIsNone(self.db.pool)
+        self.assertEqual(self.journal_mode(), "delete")
+
+        self.db.enable_pool(4)
+        self.assertEqual(self.journal_mode(), "delete")
+        self.db.enable_pool(4, wal=True)
+        self.assertEqual(self.journal_mode(), "wal")
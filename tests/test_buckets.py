@@ -0,0 +1,38 @@
+from tests.support import DatabaseTestCase
+
+
+class TimeBucketTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db.add_transaction("Income", 100, "Maaş", "", "2025-12-29")
+        self.db.add_transaction("Expense", 10, "Yiyecek", "", "2026-01-04")
+        self.db.add_transaction("Expense", 20, "Yiyecek", "", "2026-01-19")
+        self.db.add_transaction("Expense", 30, "Fatura", "", "2026-04-01")
+
+    def test_weeks_start_on_monday_and_fill_gaps(self):
+        self.assertEqual(self.db.get_summary("week", end="2026-01-25"),
+                         [("2026-W01", 100, 10), ("2026-W02", 0, 0), ("2026-W03", 0, 0), ("2026-W04", 0, 20)])
+        self.assertEqual(self.db.get_summary("week", end="2026-01-25", fill=False),
+                         [("2026-W01", 100, 10), ("2026-W04", 0, 20)])
+
+    def test_quarters_and_limit(self):
+        self.assertEqual(self.db.get_summary("quarter"),
+                         [("2025-Q4", 100, 0), ("2026-Q1", 0, 30), ("2026-Q2", 0, 30)])
+        self.assertEqual(self.db.get_summary("quarter", limit=2), [("2026-Q1", 0, 30), ("2026-Q2", 0, 30)])
+
+    def test_fiscal_year_starting_in_april(self):
+        self.assertEqual(self.db.get_summary("fiscal", fiscal_start=4), [("2025/26", 100, 30), ("2026/27", 0, 30)])
+        self.assertEqual(self.db.bucket_label(self.db.bucket_key("2026-03-31", "fiscal", 4), "fiscal", 4), "2025/26")
+
+    def test_cached_summary_follows_new_writes(self):
+        self.assertEqual(self.db.get_summary("year"), [("2025", 100, 0), ("2026", 0, 60)])
+
+        self.db.add_transaction("Income", 50, "Maaş", "", "2026-05-01")
+
+        self.assertEqual(self.db.get_summary("year"), [("2025", 100, 0), ("2026", 50, 60)])
+
+    def test_unknown_bucket_and_fiscal_month_rejected(self):
+        with self.assertRaises(ValueError):
+            self.db.get_summary("decade")
+        with self.assertRaises(ValueError):
+            self.db.get_summary("fiscal", fiscal_start=13)
@@ -0,0 +1,57 @@
+from tests.support import DatabaseTestCase
+
+
+class BudgetTest(DatabaseTestCase):
+    def test_counters_follow_expenses(self):
+        self.db.set_budget("Yiyecek", "month", 100)
+        self.db.set_budget("Yiyecek", "year", 1000, block=True)
+        self.db.add_transaction("Expense", 30, "Yiyecek", "market", "2026-10-03")
+        self.db.add_transaction("Expense", 45, "Yiyecek", "market", "2026-09-04")
+        self.db.add_transaction("Income", 500, "Maaş", "", "2026-10-01")
+
+        self.assertEqual(self.db.get_budget_status("2026-10-15"), [("Yiyecek", "month", 100.0, 30.0, False),
+                                                                   ("Yiyecek", "year", 1000.0, 75.0, True)])
+
+    def test_check_reports_only_exceeded_budgets(self):
+        self.db.set_budget("Fatura", "month", 100, block=True)
+        self.db.add_transaction("Expense", 80, "Fatura", "", "2026-10-04")
+
+        self.assertEqual(self.db.check_budget("Expense", 20, "Fatura", "2026-10-20"), [])
+        self.assertEqual(self.db.check_budget("Expense", 30, "Fatura", "2026-10-20"),
+                         [("Fatura", "month", 100.0, 110.0, True)])
+        self.assertEqual(self.db.check_budget("Expense", 30, "Fatura", "2026-11-20"), [])
+        self.assertEqual(self.db.check_budget("Income", 300, "Fatura", "2026-10-20"), [])
+
+    def test_rebuild_recomputes_counters_from_the_ledger(self):
+        self.db.set_budget("Ulaşım", "month", 50)
+        self.db.add_transaction("Expense", 20, "Ulaşım", "", "2026-10-05")
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM budget_counters")
+
+        self.db.rebuild_budget_counters()
+        self.assertEqual(self.db.get_budget_status("2026-10-15"), [("Ulaşım", "month", 50.0, 20.0, False)])
+
+
+class BudgetHierarchyTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db.add_category("Restoran", parent="Yiyecek")
+
+    def test_parent_budget_counts_child_spend(self):
+        self.db.set_budget("Yiyecek", "month", 100)
+        self.db.add_transaction("Expense", 30, "Yiyecek", "market", "2026-10-03")
+        self.db.add_transaction("Expense", 45, "Restoran", "akşam yemeği", "2026-10-04")
+
+        self.assertEqual(self.db.get_budget_status("2026-10-15"), [("Yiyecek", "month", 100.0, 75.0, False)])
+
+    def test_child_expense_checks_parent_budget(self):
+        self.db.set_budget("Yiyecek", "month", 100, block=True)
+        self.db.set_budget("Restoran", "month", 500)
+        self.db.add_transaction("Expense", 80, "Restoran", "akşam yemeği", "2026-10-04")
+
+        self.assertEqual(self.db.check_budget("Expense", 10, "Restoran", "2026-10-20"), [])
+        self.assertEqual(self.db.check_budget("Expense", 30, "Restoran", "2026-10-20"),
+                         [("Yiyecek", "month", 100.0, 110.0, True)])
+        self.assertEqual(self.db.check_budget("Expense", 30, "Yiyecek", "2026-10-20"),
+                         [("Yiyecek", "month", 100.0, 110.0, True)])
+        self.assertEqual(self.db.check_budget("Expense", 30, "Restoran", "2026-11-20"), [])
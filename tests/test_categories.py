@@ -0,0 +1,33 @@
+from tests.support import DatabaseTestCase
+
+
+class CategoryTreeTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db.add_category("Restoran", parent="Yiyecek")
+        self.db.add_category("Kafe", parent="Restoran")
+        self.db.add_transaction("Expense", 10, "Yiyecek", "market", "2026-10-01")
+        self.db.add_transaction("Expense", 20, "Restoran", "", "2026-10-02")
+        self.db.add_transaction("Expense", 30, "Kafe", "", "2026-10-03")
+        self.db.add_transaction("Expense", 5, "Fatura", "", "2026-10-04")
+
+    def test_expenses_roll_up_to_the_requested_level(self):
+        self.assertEqual(self.db.get_expenses_by_category(), [("Yiyecek", 60.0), ("Fatura", 5.0)])
+        self.assertEqual(self.db.get_expenses_by_category(parent="Yiyecek"), [("Restoran", 50.0), ("Yiyecek", 10.0)])
+        self.assertEqual(self.db.get_subcategories("Yiyecek", recursive=True), ["Restoran", "Kafe"])
+
+    def test_move_rejects_own_subtree_and_updates_rollups(self):
+        with self.assertRaises(ValueError):
+            self.db.move_category("Yiyecek", "Kafe")
+
+        self.db.move_category("Kafe")
+
+        self.assertEqual(dict(self.db.get_expenses_by_category()), {"Yiyecek": 30.0, "Kafe": 30.0, "Fatura": 5.0})
+
+    def test_delete_moves_children_up_one_level(self):
+        self.db.add_category("Boş", parent="Yiyecek")
+        self.db.add_category("Alt", parent="Boş")
+
+        self.db.delete_category("Boş")
+
+        self.assertIn(("Alt", "Yiyecek", 1), self.db.get_category_tree())
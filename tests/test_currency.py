@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+
+from tests.support import DatabaseTestCase
+
+
+class CurrencyTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        path = os.path.join(self.directory, "rates.csv")
+        with open(path, "w") as file:
+            file.write("date,currency,rate\n2026-01-01,USD,30\n2026-02-01,USD,40\n2026-01-01,EUR,35\n")
+        self.assertEqual(self.db.load_fx_rates(path), 3)
+
+    def test_amounts_convert_with_the_rate_of_their_day(self):
+        self.db.add_transaction("Income", 3000, "Maaş", "", "2026-01-10")
+        self.db.add_transaction("Expense", 10, "Yiyecek", "", "2026-01-15", currency="USD")
+        self.db.add_transaction("Expense", 10, "Yiyecek", "", "2026-02-15", currency="usd")
+
+        self.assertEqual(self.db.get_total_expenses(), 700)
+        self.db.set_reporting_currency("USD")
+        self.assertEqual(self.db.get_total_income(), 100)
+        self.assertEqual(self.db.get_total_expenses(), 20)
+        self.assertEqual(self.db.get_setting("reporting_currency"), "USD")
+
+    def test_days_before_the_first_rate_use_the_earliest_one(self):
+        self.db.add_transaction("Expense", 2, "Ulaşım", "", "2025-06-01", currency="EUR")
+
+        self.assertEqual(self.db.get_total_expenses(), 70)
+        np.testing.assert_allclose(self.db.convert_amounts([70, 10], ["TRY", "USD"], [0, 20500], "EUR"), [2, 400 / 35])
+
+    def test_budgets_count_in_the_base_currency(self):
+        self.db.set_budget("Yiyecek", "month", 500)
+        self.db.add_transaction("Expense", 10, "Yiyecek", "", "2026-02-03", currency="USD")
+
+        self.assertEqual(self.db.get_budget_status("2026-02-10"), [("Yiyecek", "month", 500.0, 400.0, False)])
+        self.assertEqual(self.db.check_budget("Expense", 150, "Yiyecek", "2026-02-10"),
+                         [("Yiyecek", "month", 500.0, 550.0, False)])
+
+    def test_unknown_currencies_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.db.add_transaction("Expense", 10, "Yiyecek", "", "2026-02-03", currency="GBP")
+        with self.assertRaises(ValueError):
+            self.db.set_reporting_currency("GBP")
+        with self.assertRaises(ValueError):
+            self.db.import_transactions([("Expense", 10, "Yiyecek", "", "2026-02-03", "GBP")])
+
+    def test_archived_rollups_keep_their_currency(self):
+        self.db.add_transaction("Expense", 10, "Fatura", "", "2026-01-05", currency="USD")
+        self.db.add_transaction("Expense", 100, "Fatura", "", "2026-01-05")
+        self.db.archive_transactions("2026-01-06")
+        self.db.set_reporting_currency("USD")
+
+        self.assertAlmostEqual(self.db.get_total_expenses(), 10 + 100 / 30, places=2)
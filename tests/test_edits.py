@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from tests.support import DatabaseTestCase
+
+
+class TransactionEditTest(DatabaseTestCase):
+    def test_edit_moves_budget_spending_and_undo_restores_it(self):
+        self.db.set_budget("Yiyecek", "month", 500)
+        self.db.set_budget("Ulaşım", "month", 500)
+        trans_id = self.db.add_transaction("Expense", 120, "Yiyecek", "market", "2026-03-04")
+
+        self.assertEqual(self.db.update_transaction(trans_id, amount=80, category="Ulaşım"), 1)
+        self.assertEqual(self.db.get_transaction(trans_id)[2:6], ("Expense", "Ulaşım", 80, "market"))
+        self.assertEqual([row[3] for row in self.db.get_budget_status("2026-03-10")], [80, 0])
+        self.assertEqual(self.db.get_expenses_by_category(), [("Ulaşım", 80)])
+
+        self.assertEqual(self.db.undo(), f"{trans_id} numaralı işlem düzenlendi")
+        self.assertEqual(self.db.get_transaction(trans_id)[2:6], ("Expense", "Yiyecek", 120, "market"))
+        self.assertEqual([row[3] for row in self.db.get_budget_status("2026-03-10")], [0, 120])
+        self.assertIsNone(self.db.undo_label)
+
+        self.db.redo()
+        self.assertEqual(self.db.get_total_expenses(), 80)
+
+    def test_bulk_recategorize_and_delete(self):
+        ids = [self.db.add_transaction("Expense", 10 + index, "Diğer", "", "2026-04-01") for index in range(5)]
+
+        self.assertEqual(self.db.recategorize_transactions(ids, "Fatura"), 5)
+        self.assertEqual(self.db.get_expenses_by_category(), [("Fatura", 60)])
+        self.assertEqual(self.db.delete_transactions(ids[:2]), 2)
+        self.assertEqual(self.db.get_total_expenses(), 39)
+        self.assertIsNone(self.db.get_transaction(ids[0]))
+
+        self.db.undo()
+        self.assertEqual(self.db.get_total_expenses(), 60)
+
+    def test_undo_is_dropped_when_rows_changed_since(self):
+        trans_id = self.db.add_transaction("Expense", 50, "Yiyecek", "", "2026-05-01")
+        self.db.update_transaction(trans_id, amount=60)
+        self.open_database().update_transaction(trans_id, description="başka yerden")
+
+        with self.assertRaises(ValueError):
+            self.db.undo()
+        self.assertIsNone(self.db.undo_label)
+        self.assertEqual(self.db.get_transaction(trans_id)[4:6], (60, "başka yerden"))
+
+    def test_removed_expenses_leave_the_anomaly_stats(self):
+        ids = [self.db.add_transaction("Expense", amount, "Ulaşım", "", "2026-03-04") for amount in range(20, 30)]
+        outlier = self.db.add_transaction("Expense", 400, "Ulaşım", "taksi", "2026-03-05")
+        self.assertEqual([row[0] for row in self.db.get_anomalies()], [outlier])
+
+        self.db.delete_transactions(ids[:5] + [outlier])
+        self.assertEqual(self.db.get_anomalies(), [])
+        with self.db.get_read_connection() as conn:
+            count, sample = conn.execute("SELECT count, sample FROM category_stats").fetchone()
+        self.assertEqual(count, 5)
+        self.assertEqual(len(sample.split(",")), 5)
+
+        self.db.rescore_anomalies()
+        with self.db.get_read_connection() as conn:
+            self.assertEqual(conn.execute("SELECT count, sample FROM category_stats").fetchone(), (count, sample))
+
+    def test_edit_can_move_a_row_between_shards(self):
+        year = datetime.now().year
+        db = self.open_database("sharded.db", sharded=True)
+        trans_id = db.add_transaction("Expense", 40, "Fatura", "su", f"{year}-01-10")
+
+        db.update_transaction(trans_id, date=f"{year - 1}-12-20")
+        self.assertEqual(db.get_shards(), [(year - 1, f"sharded_{year - 1}.db", 1)])
+        self.assertEqual(db.get_transaction(trans_id)[1], f"{year - 1}-12-20")
+        self.assertEqual(next(db.iter_transactions({"search": "su"}))[0], trans_id)
+
+        db.undo()
+        self.assertEqual(db.get_shards(), [(year - 1, f"sharded_{year - 1}.db", 0)])
+        self.assertEqual(db.get_total_expenses(), 40)
+
+    def test_memory_copy_follows_edits(self):
+        trans_id = self.db.add_transaction("Expense", 30, "Yiyecek", "", "2026-06-01")
+        self.db.enable_memory_mode()
+        self.db.update_transaction(trans_id, category="Fatura")
+        self.db.add_transaction("Expense", 5, "Fatura", "", "2026-06-02")
+
+        self.assertEqual(self.db.get_expenses_by_category(), [("Fatura", 35)])
+        self.db.undo()
+        self.db.disable_memory_mode()
+        self.assertEqual(sorted(self.db.get_expenses_by_category()), [("Fatura", 5), ("Yiyecek", 30)])
@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+
+from main import Forecaster
+from tests.support import DatabaseTestCase
+
+
+class HoltWintersTest(unittest.TestCase):
+    def test_seasonal_series_repeats_its_pattern(self):
+        pattern = np.array([10, 12, 15, 20, 25, 30, 28, 26, 22, 18, 14, 11], dtype=float)
+        history = np.vstack([np.tile(pattern, 3), np.full(36, 50.0)])
+
+        forecast = Forecaster.holt_winters(history, 6)
+        np.testing.assert_allclose(forecast[0], pattern[:6])
+        np.testing.assert_allclose(forecast[1], np.full(6, 50.0))
+
+    def test_short_history_uses_the_linear_trend(self):
+        history = np.array([[1.0, 3.0], [4.0, 4.0]])
+
+        np.testing.assert_allclose(Forecaster.holt_winters(history, 3), [[5, 7, 9], [4, 4, 4]])
+        np.testing.assert_allclose(Forecaster.linear_trend(np.array([[2.0, 4.0, 6.0, 8.0]]), 2), [[10, 12]])
+
+
+class ForecasterTest(DatabaseTestCase):
+    def test_forecast_extends_the_ledger_by_month(self):
+        for month in range(1, 13):
+            self.db.add_transaction("Income", 1000, "Maaş", "", f"2025-{month:02d}-01")
+            self.db.add_transaction("Expense", 100 * month, "Fatura", "", f"2025-{month:02d}-05")
+        forecaster = Forecaster(self.db)
+
+        result = forecaster.forecast(horizon=3, model="linear")
+        self.assertEqual(result["months"], ["2026-01", "2026-02", "2026-03"])
+        np.testing.assert_allclose(result["income"], [1000, 1000, 1000])
+        np.testing.assert_allclose(result["expenses"], [1300, 1400, 1500])
+        np.testing.assert_allclose(result["net"], [-300, -400, -500])
+        self.assertIs(forecaster.forecast(horizon=3, model="linear"), result)
+
+        self.db.add_transaction("Expense", 1200, "Fatura", "", "2026-01-05")
+        self.assertEqual(forecaster.forecast(horizon=3, model="linear")["months"], ["2026-02", "2026-03", "2026-04"])
+
+    def test_forecast_of_an_empty_ledger(self):
+        self.assertIsNone(Forecaster(self.db).forecast())
+        with self.assertRaises(ValueError):
+            Forecaster(self.db).forecast(model="arima")
@@ -0,0 +1,47 @@
+from main import Instrumentation
+from tests.support import DatabaseTestCase
+
+
+class InstrumentationTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.instrumentation = Instrumentation(slow_query_ms=0)
+        self.instrumentation.attach(self.db)
+        self.db.add_transaction("Expense", 10, "Yiyecek", "", "2026-01-02")
+
+    def stats(self, kind):
+        rows, _, _ = self.instrumentation.snapshot()
+        return {name: (calls, returned, errors) for row_kind, name, calls, _, _, _, _, returned, errors in rows
+                if row_kind == kind}
+
+    def test_nothing_is_recorded_while_disabled(self):
+        self.db.get_all_transactions()
+
+        self.assertEqual(self.instrumentation.snapshot(), ([], 0, []))
+
+    def test_calls_rows_and_errors_are_counted(self):
+        self.instrumentation.enabled = True
+        self.db.get_all_transactions()
+        self.db.get_all_transactions()
+        with self.assertRaises(ValueError):
+            self.db.get_summary("decade")
+
+        stats = self.stats("db")
+        self.assertEqual(stats["get_all_transactions"], (2, 2, 0))
+        self.assertEqual(stats["get_summary"], (1, 0, 1))
+        self.assertIn("SELECT", self.stats("sql"))
+
+    def test_generators_count_the_items_they_yield(self):
+        self.instrumentation.enabled = True
+        self.db.add_transaction("Income", 100, "Maaş", "", "2026-01-01")
+
+        self.assertEqual(sum(len(rows) for rows in self.db.iter_transaction_pages(batch_size=1)), 2)
+        self.assertEqual(self.stats("db")["iter_transaction_pages"], (1, 2, 0))
+
+    def test_slow_queries_keep_their_plan(self):
+        self.instrumentation.enabled = True
+        self.db.get_all_transactions()
+
+        _, connections, slow_queries = self.instrumentation.snapshot()
+        self.assertGreater(connections, 0)
+        self.assertTrue(any(entry["sql"].startswith("SELECT") and entry["plan"] for entry in slow_queries))
@@ -0,0 +1,43 @@
+import numpy as np
+
+from tests.support import DatabaseTestCase
+
+
+class TransactionIteratorTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for day in range(1, 8):
+            self.db.add_transaction("Expense", day * 10, "Yiyecek", f"alışveriş {day}", f"2026-03-{day:02d}")
+        self.db.add_transaction("Income", 900, "Maaş", "", "2026-03-15")
+
+    def test_pages_are_batched_newest_first(self):
+        pages = list(self.db.iter_transaction_pages(batch_size=3))
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        dates = [row[1] for page in pages for row in page]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_filters_are_applied_in_the_query(self):
+        rows = list(self.db.iter_transactions({"type": "Expense", "start": "2026-03-03", "end": "2026-03-05"}))
+
+        self.assertEqual([(row[1], row[4]) for row in rows], [("2026-03-05", 50), ("2026-03-04", 40),
+                                                              ("2026-03-03", 30)])
+        self.assertEqual(list(self.db.iter_transactions({"category": "Maaş"}))[0][4], 900)
+
+    def test_batches_as_arrays_and_frames(self):
+        batch = next(self.db.iter_transaction_batches({"type": "Expense"}, batch_size=5))
+        self.assertEqual(batch["amount"].dtype, np.float64)
+        self.assertEqual(batch["date"].dtype, np.dtype("datetime64[D]"))
+        self.assertEqual(batch["amount"].sum(), 70 + 60 + 50 + 40 + 30)
+
+        frames = list(self.db.iter_transaction_batches(batch_size=5, as_frame=True))
+        self.assertEqual([len(frame) for frame in frames], [5, 3])
+        self.assertEqual(list(frames[0].columns), list(self.db.TRANSACTION_FIELDS))
+
+    def test_archived_rows_follow_the_live_ones(self):
+        self.db.add_transaction("Expense", 5, "Ulaşım", "", "2019-01-01")
+        self.db.archive_transactions("2020-01-01")
+
+        rows = list(self.db.iter_transactions({"include_archive": True}, batch_size=2))
+        self.assertEqual(len(rows), 9)
+        self.assertEqual(rows[-1][1], "2019-01-01")
@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+
+from main import Job, JobQueue, archive_transactions_job, export_excel_job
+from tests.support import DatabaseTestCase
+
+
+class JobQueueTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.jobs = JobQueue()
+
+    def tearDown(self):
+        self.jobs.shutdown()
+        super().tearDown()
+
+    def wait(self, job, timeout=30):
+        deadline = time.time() + timeout
+        while not job.done and time.time() < deadline:
+            time.sleep(0.01)
+        self.jobs.dispatch()
+        return job
+
+    def test_remote_jobs_run_on_threads_by_default(self):
+        self.db.add_transaction("Expense", 40, "Yiyecek", "market", "2020-02-10")
+        self.db.add_transaction("Expense", 25, "Ulaşım", "otobüs", "2026-01-05")
+        finished = []
+
+        job = self.jobs.submit("arşivle", archive_transactions_job, self.db.db_file, False, "2021-01-01",
+                               on_done=finished.append, remote=True)
+
+        self.assertEqual((self.jobs.backend, job.backend), ("thread", "thread"))
+        self.wait(job)
+        self.assertEqual((job.status, job.result, job.progress), (Job.DONE, 1, 1.0))
+        self.assertEqual(finished, [job])
+        self.assertEqual(len(self.db.get_all_transactions()), 1)
+
+    def test_export_of_an_empty_ledger_leaves_no_file(self):
+        file_path = os.path.join(self.directory, "finance_report.xlsx")
+
+        job = self.wait(self.jobs.submit("aktar", export_excel_job, self.db.db_file, False, file_path, remote=True))
+
+        self.assertEqual((job.status, job.result), (Job.DONE, 0))
+        self.assertFalse(os.path.exists(file_path))
+
+    def test_failures_and_cancellation_are_reported(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow(progress=None):
+            started.set()
+            release.wait(5)
+            progress(0.5)
+
+        def broken(progress=None):
+            raise ValueError("bozuk")
+
+        job = self.jobs.submit("yavaş", slow)
+        started.wait(5)
+        self.jobs.cancel(job)
+        release.set()
+        self.assertEqual(self.wait(job).status, Job.CANCELLED)
+        job = self.wait(self.jobs.submit("bozuk", broken))
+        self.assertEqual((job.status, job.error), (Job.FAILED, "bozuk"))
+
+    def test_only_registered_jobs_run_remotely(self):
+        with self.assertRaises(ValueError):
+            self.jobs.submit("bilinmeyen", print, remote=True)
+        with self.assertRaises(ValueError):
+            JobQueue("spark")
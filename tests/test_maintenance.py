@@ -0,0 +1,67 @@
+import os
+import sqlite3
+
+from main import Database, JobCancelled
+from tests.support import DatabaseTestCase
+
+
+class MaintenanceTest(DatabaseTestCase):
+    def fill_and_delete(self, count=3000):
+        rows = [("Expense", 10 + index % 50, "Yiyecek", "x" * 200, "2026-03-01") for index in range(count)]
+        self.db.import_transactions(rows)
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM transactions")
+
+    def test_new_files_are_incremental_and_everything_is_due_once(self):
+        stats = self.db.storage_stats()
+        self.assertEqual([entry["incremental"] for entry in stats], [True])
+        self.assertEqual(self.db.due_maintenance(), ["vacuum", "analyze", "integrity"])
+
+        results = self.db.run_maintenance()
+        self.assertEqual([(task, ok) for task, _, ok in results], [("vacuum", True), ("analyze", True),
+                                                                   ("integrity", True)])
+        self.assertEqual(results[2][1], "Sorun bulunmadı")
+        self.assertEqual(set(self.db.get_maintenance_log()), {"vacuum", "analyze", "integrity"})
+        self.assertEqual(self.db.due_maintenance(), [])
+
+    def test_free_pages_make_vacuum_due_and_are_released(self):
+        self.db.run_maintenance()
+        self.fill_and_delete()
+        self.assertEqual(self.db.due_maintenance(), ["vacuum"])
+        before = self.db.storage_stats()[0]
+        self.assertGreaterEqual(before["free_ratio"], Database.VACUUM_FREE_RATIO)
+
+        self.db.run_maintenance(["vacuum"])
+        after = self.db.storage_stats()[0]
+        self.assertEqual(after["free_pages"], 0)
+        self.assertLess(after["pages"], before["pages"])
+
+    def test_older_files_are_switched_to_incremental(self):
+        path = os.path.join(self.directory, "old.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA auto_vacuum = NONE")
+            conn.execute("CREATE TABLE legacy (id INTEGER PRIMARY KEY)")
+        db = self.open_database("old.db")
+        self.assertFalse(db.storage_stats()[0]["incremental"])
+        self.assertIn("vacuum", db.due_maintenance())
+
+        db.run_maintenance(["vacuum"])
+        self.assertTrue(db.storage_stats()[0]["incremental"])
+
+    def test_cancelling_aborts_a_running_vacuum(self):
+        self.fill_and_delete(6000)
+        self.db.MAINTENANCE_OPCODES, self.db.MAINTENANCE_CHECK = 100, 0
+        calls = []
+
+        def progress(fraction, message=None):
+            calls.append(fraction)
+            # the first call comes before the vacuum starts, the next ones from the SQLite progress handler
+            if len(calls) > 1:
+                raise JobCancelled()
+
+        with self.assertRaises(JobCancelled):
+            self.db.run_maintenance(["vacuum"], progress)
+        self.assertNotIn("vacuum", self.db.get_maintenance_log())
+        self.assertEqual(self.db.count_transactions(), 0)
+        self.db.add_transaction("Income", 100, "Maaş", "", "2026-03-02")
+        self.assertEqual(self.db.get_balance(), 100)
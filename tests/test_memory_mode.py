@@ -0,0 +1,85 @@
+import sqlite3
+from datetime import datetime
+
+from tests.support import DatabaseTestCase
+
+
+class MemoryModeTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db.add_transaction("Income", 1000, "Maaş", "", "2026-01-01")
+        self.db.enable_memory_mode("memory")
+
+    def tearDown(self):
+        self.db.disable_memory_mode()
+        super().tearDown()
+
+    def test_reads_come_from_the_memory_copy(self):
+        with sqlite3.connect(self.db.db_file) as conn:
+            conn.execute("DELETE FROM transactions")
+
+        self.assertEqual(self.db.get_total_income(), 1000)
+        self.db.disable_memory_mode()
+        self.assertEqual(self.db.get_total_income(), 0)
+
+    def test_writes_reach_disk_and_memory(self):
+        self.db.add_transaction("Expense", 150, "Yiyecek", "market", "2026-01-03")
+
+        self.assertEqual(self.db.get_total_expenses(), 150)
+        self.db.disable_memory_mode()
+        self.assertEqual(self.db.get_total_expenses(), 150)
+
+    def test_archiving_updates_the_memory_copy(self):
+        self.db.add_transaction("Expense", 70, "Fatura", "", "2019-06-01")
+
+        self.assertEqual(self.db.archive_transactions("2020-01-01"), 1)
+        self.assertEqual(len(self.db.get_all_transactions()), 1)
+        self.assertEqual(self.db.get_expenses_by_category(), [("Fatura", 70)])
+
+    def test_counter_rebuild_updates_the_memory_copy(self):
+        self.db.set_budget("Yiyecek", "month", 100)
+        self.db.add_transaction("Expense", 30, "Yiyecek", "", "2026-01-03")
+        self.db._memory_conn.execute("DELETE FROM budget_counters")
+
+        self.db.rebuild_budget_counters()
+        self.assertEqual(self.db.get_budget_status("2026-01-15"), [("Yiyecek", "month", 100.0, 30.0, False)])
+
+    def test_recurring_catch_up_updates_the_memory_copy(self):
+        rule_id = self.db.add_recurring_rule("Expense", 10, "Ulaşım", "daily", "2026-01-01")
+        self.assertEqual(self.db.get_recurring_rules()[0][0], rule_id)
+
+        self.assertEqual(len(self.db.run_recurring("2026-01-05")), 5)
+        self.assertEqual(self.db.get_total_expenses(), 50)
+        self.assertEqual(self.db.get_recurring_rules()[0][-1], "2026-01-05")
+        self.db.delete_recurring_rule(rule_id)
+        self.assertEqual(self.db.get_recurring_rules(), [])
+
+    def test_import_and_rescore_update_the_memory_copy(self):
+        rows = [("Expense", 50 + amount, "Fatura", "", f"2026-04-{amount + 1:02d}") for amount in range(8)]
+        self.db.import_transactions(rows + [("Expense", 900, "Fatura", "", "2026-04-20")])
+
+        self.assertEqual(self.db.get_total_expenses(), sum(row[1] for row in rows) + 900)
+        self.assertEqual([row[3] for row in self.db.get_anomalies()], [900])
+        self.db._memory_conn.execute("DELETE FROM anomalies")
+        self.assertEqual(self.db.rescore_anomalies(), 1)
+        self.assertEqual([row[3] for row in self.db.get_anomalies()], [900])
+
+    def test_mmap_mode_reads_the_disk_file(self):
+        self.db.enable_memory_mode("mmap")
+        self.db.add_transaction("Expense", 20, "Ulaşım", "", "2026-01-04")
+
+        self.assertEqual(self.db.get_balance(), 980)
+
+
+class ShardedMemoryModeTest(DatabaseTestCase):
+    database_options = {"sharded": True}
+
+    def test_cold_year_insert_updates_the_memory_catalog(self):
+        year = datetime.now().year
+        self.db.enable_memory_mode("memory")
+        self.db.add_transaction("Expense", 60, "Sağlık", "", f"{year - 1}-04-04")
+        self.db.add_transaction("Expense", 40, "Sağlık", "", f"{year}-01-04")
+
+        self.assertEqual(self.db.get_shards(), [(year - 1, f"finance_{year - 1}.db", 1)])
+        self.assertEqual(self.db.get_total_expenses(), 100)
+        self.db.disable_memory_mode()
@@ -0,0 +1,60 @@
+from main import Instrumentation
+from tests.support import DatabaseTestCase
+
+
+class QueryCacheTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db.add_transaction("Income", 1000, "Maaş", "", "2025-03-01")
+        self.db.add_transaction("Expense", 200, "Yiyecek", "", "2025-03-05")
+
+    def lookups(self, fn, *args):
+        before = self.db.cache.stats()
+        result = fn(*args)
+        after = self.db.cache.stats()
+        return result, after["hits"] - before["hits"], after["misses"] - before["misses"]
+
+    def test_repeated_reads_are_served_from_the_cache(self):
+        self.assertEqual(self.lookups(self.db.get_total_income), (1000, 0, 1))
+        self.assertEqual(self.lookups(self.db.get_total_income), (1000, 1, 0))
+
+    def test_writes_drop_only_overlapping_entries(self):
+        summary = self.db.get_summary("month", "2025-01-01", "2025-12-31")
+        self.db.get_total_expenses()
+        events = []
+        self.db.cache.subscribe(events.append)
+
+        self.db.add_transaction("Expense", 50, "Fatura", "", "2026-02-01")
+
+        self.assertEqual(self.lookups(self.db.get_summary, "month", "2025-01-01", "2025-12-31"), (summary, 1, 0))
+        self.assertEqual(self.lookups(self.db.get_total_expenses), (250, 0, 1))
+        self.assertEqual((events[0].start, events[0].end), ("2026-02-01", "2026-02-01"))
+        self.assertIn("transactions", events[0].tables)
+
+    def test_writes_from_another_connection_flush_the_cache(self):
+        self.assertEqual(self.db.get_total_income(), 1000)
+
+        self.open_database().add_transaction("Income", 500, "Maaş", "", "2025-04-01")
+
+        self.assertEqual(self.db.get_total_income(), 1500)
+
+    def test_callers_get_their_own_copy(self):
+        self.db.get_category_summary()[0]["total_amount"] = 0
+        self.db.get_summary("month").append(("2030-01", 1, 1))
+        months, keys, matrix = self.db.get_monthly_category_matrix()
+        matrix[:] = 0
+
+        self.assertEqual(self.db.get_category_summary()[0]["total_amount"], 200)
+        self.assertEqual(self.db.get_summary("month"), [("2025-03", 1000, 200)])
+        self.assertEqual(self.db.get_monthly_category_matrix()[2].sum(), 1200)
+
+    def test_cache_hits_open_no_connection(self):
+        instrumentation = Instrumentation()
+        instrumentation.attach(self.db)
+        self.db.get_total_income()
+        instrumentation.enabled = True
+
+        for _ in range(3):
+            self.db.get_total_income()
+
+        self.assertEqual(instrumentation.snapshot()[1], 0)
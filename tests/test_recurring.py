@@ -0,0 +1,41 @@
+from tests.support import DatabaseTestCase
+
+
+class RecurringCatchUpTest(DatabaseTestCase):
+    def test_catch_up_creates_each_missed_occurrence_once(self):
+        self.db.add_recurring_rule("Expense", 100, "Konut", "monthly", "2026-01-31", description="kira")
+
+        self.assertEqual(self.db.run_recurring("2026-04-15"), ["2026-01-31", "2026-02-28", "2026-03-31"])
+        self.assertEqual(self.db.run_recurring("2026-04-15"), [])
+        self.assertEqual(self.db.run_recurring("2026-04-30"), ["2026-04-30"])
+        self.assertEqual(self.db.get_total_expenses(), 400)
+        self.assertEqual(self.db.get_recurring_rules()[0][-1], "2026-04-30")
+
+    def test_weekly_daily_and_cron_schedules(self):
+        self.db.add_recurring_rule("Expense", 5, "Ulaşım", "weekly", "2026-03-02", every=2, end_date="2026-03-31")
+        self.db.add_recurring_rule("Income", 1, "Yatırımlar", "daily", "2026-03-29")
+        self.db.add_recurring_rule("Expense", 20, "Fatura", "cron", "2026-03-01", cron="1,15 * *")
+
+        created = self.db.run_recurring("2026-04-01")
+        self.assertEqual(created, ["2026-03-01", "2026-03-02", "2026-03-15", "2026-03-16", "2026-03-29",
+                                   "2026-03-30", "2026-03-30", "2026-03-31", "2026-04-01", "2026-04-01"])
+
+    def test_catch_up_counts_towards_budgets(self):
+        self.db.set_budget("Konut", "month", 150)
+        self.db.add_recurring_rule("Expense", 100, "Konut", "monthly", "2026-05-01")
+        self.db.run_recurring("2026-06-10")
+
+        self.assertEqual(self.db.get_budget_status("2026-06-10"), [("Konut", "month", 150.0, 100.0, False)])
+
+    def test_invalid_rules_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.db.add_recurring_rule("Expense", 5, "Ulaşım", "hourly", "2026-03-02")
+        with self.assertRaises(ValueError):
+            self.db.add_recurring_rule("Expense", 5, "Ulaşım", "cron", "2026-03-02", cron="32 * *")
+
+    def test_deleted_rule_stops_generating(self):
+        rule_id = self.db.add_recurring_rule("Expense", 5, "Ulaşım", "daily", "2026-03-01")
+        self.db.delete_recurring_rule(rule_id)
+
+        self.assertEqual(self.db.run_recurring("2026-03-05"), [])
+        self.assertEqual(self.db.get_recurring_rules(), [])
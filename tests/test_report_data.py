@@ -0,0 +1,29 @@
+import os
+
+import openpyxl
+
+from main import ReportData
+from tests.support import DatabaseTestCase
+
+
+class ExcelExportTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.report_data = ReportData(self.db)
+        self.file_path = os.path.join(self.directory, "finance_report.xlsx")
+
+    def test_empty_ledger_writes_no_file(self):
+        self.assertEqual(self.report_data.export_excel(self.file_path), 0)
+        self.assertFalse(os.path.exists(self.file_path))
+
+    def test_export_includes_archived_rows(self):
+        self.db.add_transaction("Expense", 40, "Yiyecek", "market", "2020-02-10")
+        self.db.add_transaction("Income", 500, "Maaş", "", "2026-01-01")
+        self.db.add_transaction("Expense", 25, "Ulaşım", "otobüs", "2026-01-05")
+        self.db.archive_transactions("2021-01-01")
+
+        self.assertEqual(self.report_data.export_excel(self.file_path), 3)
+
+        workbook = openpyxl.load_workbook(self.file_path)
+        self.assertEqual(workbook.sheetnames, ["İşlemler", "Kategori Özeti"])
+        self.assertEqual(workbook["İşlemler"].max_row, 4)
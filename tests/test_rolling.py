@@ -0,0 +1,35 @@
+from main import RollingAnalytics
+from tests.support import DatabaseTestCase
+
+
+class RollingAnalyticsTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db.add_transaction("Income", 100, "Maaş", "", "2026-01-01")
+        self.db.add_transaction("Expense", 10, "Yiyecek", "", "2026-01-02")
+        self.db.add_transaction("Expense", 20, "Yiyecek", "", "2026-01-04")
+        self.analytics = RollingAnalytics(self.db)
+
+    def test_moving_window_sums_fill_empty_days(self):
+        series = self.analytics.moving(2)
+
+        self.assertEqual([(date, income, expenses) for date, income, expenses, *_ in series],
+                         [("2026-01-01", 100, 0), ("2026-01-02", 100, 10), ("2026-01-03", 0, 10),
+                          ("2026-01-04", 0, 20)])
+        self.assertEqual(series[1][3:], (90, 50, 5, 45))
+
+    def test_running_balance_and_month_over_month(self):
+        self.db.add_transaction("Expense", 40, "Fatura", "", "2026-02-01")
+
+        self.assertEqual(self.analytics.running_balance()[-1], ("2026-02-01", 30))
+        self.assertEqual(self.analytics.month_over_month(),
+                         [("2026-01", 100, 30, 70, None, None, None), ("2026-02", 0, 40, -40, -100, 10, -110)])
+
+    def test_refresh_recomputes_from_the_changed_day(self):
+        self.assertEqual(self.analytics.running_balance()[-1], ("2026-01-04", 70))
+
+        self.db.add_transaction("Expense", 5, "Yiyecek", "", "2026-01-02")
+        self.analytics.note_change("2026-01-02")
+
+        self.assertEqual([balance for _, balance in self.analytics.running_balance()], [100, 85, 85, 65])
+        self.assertEqual(self.analytics.moving(2)[1][2], 15)
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from tests.support import DatabaseTestCase
+
+
+class FullTextSearchTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.db.add_transaction("Expense", 100, "Konut", "Kira ödemesi Ekim", "2026-10-01")
+        self.db.add_transaction("Expense", 30, "Yiyecek", "Akşam yemeği, ılık çorba", "2026-10-02")
+        self.db.add_transaction("Expense", 12, "Ulaşım", "otobüs kartı", "2026-10-03")
+
+    def search(self, text, **filters):
+        return [(row[3], row[5]) for row in self.db.iter_transactions({"search": text, **filters})]
+
+    def test_matches_ignore_case_and_turkish_accents(self):
+        self.assertEqual(self.search("KIRA"), [("Konut", "«Kira» ödemesi Ekim")])
+        self.assertEqual(self.search("ilik"), [("Yiyecek", "Akşam yemeği, «ılık» çorba")])
+
+    def test_prefix_and_phrase_queries(self):
+        self.assertEqual(self.search("odeme*"), [("Konut", "Kira «ödemesi» Ekim")])
+        self.assertEqual(self.search('"aksam yemegi"'), [("Yiyecek", "«Akşam» «yemeği», ılık çorba")])
+        self.assertEqual(self.search('"yemegi aksam"'), [])
+
+    def test_category_names_are_searchable(self):
+        self.assertEqual(self.search("ulasim"), [("Ulaşım", "otobüs kartı")])
+        self.assertEqual(self.search("yiyecek corba"), [("Yiyecek", "Akşam yemeği, ılık «çorba»")])
+
+    def test_search_combines_with_filters(self):
+        self.db.add_transaction("Income", 50, "Diğer", "kira iadesi", "2026-09-01")
+
+        self.assertEqual(len(self.search("kira")), 2)
+        self.assertEqual(self.search("kira", type="Income"), [("Diğer", "«kira» iadesi")])
+        self.assertEqual(self.search("kira", start="2026-10-01"), [("Konut", "«Kira» ödemesi Ekim")])
+
+    def test_archived_rows_are_searched(self):
+        self.db.add_transaction("Expense", 90, "Konut", "kira 2019", "2019-05-01")
+        self.db.archive_transactions("2020-01-01")
+
+        self.assertEqual(self.search("kira", include_archive=True),
+                         [("Konut", "«Kira» ödemesi Ekim"), ("Konut", "«kira» 2019")])
+
+
+class ShardedSearchTest(DatabaseTestCase):
+    database_options = {"sharded": True}
+
+    def test_cold_shards_are_searched(self):
+        year = datetime.now().year
+        self.db.add_transaction("Expense", 40, "Fatura", "elektrik faturası", f"{year - 1}-02-01")
+        self.db.add_transaction("Expense", 45, "Fatura", "elektrik faturası", f"{year}-02-01")
+
+        self.assertEqual(sorted(row[1] for row in self.db.iter_transactions({"search": "elektrik"})),
+                         [f"{year - 1}-02-01", f"{year}-02-01"])
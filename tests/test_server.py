@@ -0,0 +1,101 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from tornado.testing import AsyncHTTPTestCase
+
+from server import LedgerApi, decode_cursor, encode_cursor
+from tests.support import DatabaseTestCase
+
+
+class LedgerApiTest(AsyncHTTPTestCase, DatabaseTestCase):
+    def get_app(self):
+        self.db.add_transaction("Income", 3000, "Maaş", "", "2026-01-10")
+        self.db.add_transaction("Expense", 300, "Yiyecek", "", "2026-01-15")
+        self.api = LedgerApi(self.db, workers=4)
+        return self.api.application()
+
+    def tearDown(self):
+        self.api.executor.shutdown()
+        self.db.disable_pool()
+        super().tearDown()
+
+    def get_json(self, path):
+        response = self.fetch(path)
+        return response.code, json.loads(response.body)
+
+    def post_json(self, path, data):
+        response = self.fetch(path, method="POST", body=json.dumps(data))
+        return response.code, json.loads(response.body)
+
+    def test_reporting_currency_is_read_per_version_without_touching_the_database(self):
+        path = os.path.join(self.directory, "rates.csv")
+        with open(path, "w") as file:
+            file.write("date,currency,rate\n2026-01-01,USD,30\n")
+        window = self.open_database()
+        window.load_fx_rates(path)
+        self.assertEqual(self.get_json("/api/balance")[1]["balance"], 2700)
+
+        window.set_reporting_currency("USD")
+
+        code, body = self.get_json("/api/balance")
+        self.assertEqual((code, body["currency"], body["balance"]), (200, "USD", 90))
+        self.assertEqual(self.get_json("/api/summary?granularity=year")[1]["rows"],
+                         [{"period": "2026", "income": 100, "expenses": 10}])
+        self.assertEqual(self.db.reporting_currency, "TRY")
+
+    def test_tag_reports_follow_the_reporting_currency(self):
+        self.db.add_transaction("Expense", 600, "Ulaşım", "", "2026-01-20", tags=["tatil"])
+        path = os.path.join(self.directory, "rates.csv")
+        with open(path, "w") as file:
+            file.write("date,currency,rate\n2026-01-01,USD,30\n")
+        self.db.load_fx_rates(path)
+        self.open_database().set_reporting_currency("USD")
+
+        code, body = self.get_json("/api/tags")
+        self.assertEqual((code, body), (200, {"currency": "USD",
+                                              "tags": [{"name": "tatil", "income": 0, "expenses": 20}]}))
+        self.assertEqual(self.get_json("/api/summary?granularity=year&tags=-tatil")[1]["rows"],
+                         [{"period": "2026", "income": 100, "expenses": 10}])
+
+    def test_blocked_budget_names_the_budget_category(self):
+        self.db.add_category("Restoran", parent="Yiyecek")
+        self.db.set_budget("Yiyecek", "month", 400, block=True)
+
+        code, body = self.post_json("/api/transactions", {"type": "Expense", "amount": 150, "category": "Restoran",
+                                                          "date": "2026-01-20"})
+        self.assertEqual(code, 409)
+        self.assertEqual(body["budgets"], [{"category": "Yiyecek", "period": "month", "limit": 400, "spent": 450}])
+
+        code, body = self.post_json("/api/transactions", {"type": "Expense", "amount": 50, "category": "Restoran",
+                                                          "date": "2026-01-20"})
+        self.assertEqual((code, body["budget_warnings"]), (201, []))
+
+    def test_concurrent_writes_cannot_both_pass_a_blocking_budget(self):
+        self.db.set_budget("Yiyecek", "month", 400, block=True)
+        data = {"type": "Expense", "amount": 60, "category": "Yiyecek", "date": "2026-01-20"}
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            statuses = sorted(status for status, _ in executor.map(self.api.add_transaction, [data] * 4))
+
+        self.assertEqual(statuses, [201, 409, 409, 409])
+        self.assertEqual(self.db.get_budget_status("2026-01-31"), [("Yiyecek", "month", 400, 360, True)])
+
+    def test_pages_follow_the_cursor_through_rows_without_created_at(self):
+        for day in range(1, 6):
+            self.db.add_transaction("Expense", day, "Ulaşım", "", f"2026-02-0{day}")
+        with self.db.get_connection() as conn:
+            conn.execute("UPDATE transactions SET created_at = NULL WHERE amount < 400")
+
+        seen, cursor = [], None
+        while True:
+            code, body = self.get_json("/api/transactions?limit=2" + (f"&after={cursor}" if cursor else ""))
+            self.assertEqual(code, 200)
+            seen += [row["amount"] for row in body["transactions"]]
+            cursor = body["next"]
+            if not cursor:
+                break
+
+        self.assertEqual(seen, [5, 4, 3, 2, 1, 300, 3000])
+        self.assertEqual(decode_cursor(encode_cursor([20000, "", 7])), (20000, "", 7))
+        self.assertEqual(self.get_json("/api/transactions?after=bm90LWpzb24")[0], 400)
@@ -0,0 +1,45 @@
+import os
+from datetime import datetime
+
+from tests.support import DatabaseTestCase
+
+
+class ShardedLedgerTest(DatabaseTestCase):
+    database_options = {"sharded": True}
+
+    def setUp(self):
+        super().setUp()
+        self.year = datetime.now().year
+
+    def test_rotation_moves_past_years_to_shards(self):
+        unsharded = self.open_database("ledger.db", sharded=False)
+        unsharded.add_transaction("Income", 1000, "Maaş", "", f"{self.year - 2}-03-01")
+        unsharded.add_transaction("Expense", 200, "Yiyecek", "", f"{self.year - 1}-05-10")
+        unsharded.add_transaction("Expense", 50, "Yiyecek", "", f"{self.year}-01-02")
+
+        db = self.open_database("ledger.db")
+
+        self.assertEqual(db.get_shards(), [(self.year - 1, f"ledger_{self.year - 1}.db", 1),
+                                           (self.year - 2, f"ledger_{self.year - 2}.db", 1)])
+        self.assertTrue(os.path.exists(os.path.join(self.directory, f"ledger_{self.year - 2}.db")))
+        self.assertEqual(db.get_total_income(), 1000)
+        self.assertEqual(db.get_total_expenses(), 250)
+        self.assertEqual(len(db.get_all_transactions()), 3)
+
+    def test_cold_year_insert_goes_to_its_shard(self):
+        self.db.add_transaction("Expense", 80, "Fatura", "elektrik", f"{self.year - 1}-11-30")
+        self.db.add_transaction("Expense", 20, "Fatura", "su", f"{self.year}-02-01")
+
+        self.assertEqual(self.db.get_shards(), [(self.year - 1, f"finance_{self.year - 1}.db", 1)])
+        self.assertEqual(self.db.get_total_expenses(), 100)
+        self.assertEqual(self.db.get_balance(), -100)
+
+    def test_queries_merge_results_across_shards(self):
+        for year in (self.year - 2, self.year - 1, self.year):
+            self.db.add_transaction("Expense", 10, "Ulaşım", "", f"{year}-01-15")
+
+        self.assertEqual(self.db.get_expenses_by_category(), [("Ulaşım", 30)])
+        self.assertEqual([row[0] for row in self.db.get_yearly_summary()],
+                         [str(self.year - 2), str(self.year - 1), str(self.year)])
+        self.assertEqual(self.db._get_totals(f"{self.year - 1}-01-01", f"{self.year - 1}-12-31"), (0, 10))
+        self.assertTrue(self.db.is_category_in_use("Ulaşım"))
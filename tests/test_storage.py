@@ -0,0 +1,57 @@
+import os
+import sqlite3
+
+from main import Database
+from tests.support import DatabaseTestCase
+
+
+class MinorUnitStorageTest(DatabaseTestCase):
+    def test_amounts_round_half_up_to_minor_units(self):
+        self.assertEqual(Database.to_minor(19.99), 1999)
+        self.assertEqual(Database.to_minor(0.005), 1)
+        self.assertEqual(Database.to_minor("2.675"), 268)
+        self.assertEqual(Database.from_minor(None), 0)
+
+    def test_days_round_trip(self):
+        self.assertEqual(Database.to_day("1970-01-01"), 0)
+        self.assertEqual(Database.from_day(Database.to_day("2024-02-29")), "2024-02-29")
+        self.assertEqual(Database.to_month("2026-03-15"), 202603)
+
+    def test_sums_are_exact(self):
+        for _ in range(10):
+            self.db.add_transaction("Expense", 0.1, "Yiyecek", "", "2026-03-01")
+        self.db.add_transaction("Income", 0.3, "Maaş", "", "2026-03-02")
+
+        self.assertEqual(self.db.get_total_expenses(), 1.0)
+        self.assertEqual(self.db.get_balance(), -0.7)
+        with self.db.get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT typeof(amount), typeof(day) FROM transactions LIMIT 1").fetchone(),
+                             ("integer", "integer"))
+
+    def test_legacy_file_is_migrated(self):
+        path = os.path.join(self.directory, "legacy.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE categories (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL)")
+            conn.execute("""
+                CREATE TABLE transactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date DATE NOT NULL,
+                    type TEXT NOT NULL,
+                    category_id INTEGER NOT NULL,
+                    amount REAL NOT NULL,
+                    description TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("INSERT INTO categories (name) VALUES ('Yiyecek')")
+            conn.executemany("INSERT INTO transactions (id, date, type, category_id, amount, description) "
+                             "VALUES (?, ?, 'Expense', 1, ?, ?)",
+                             [(5, "2025-12-31", 19.99, "market"), (9, "2026-01-02", 0.1, "simit")])
+
+        db = self.open_database("legacy.db")
+        self.assertEqual(db.get_total_expenses(), 20.09)
+        self.assertEqual([row[:2] + row[4:6] for row in db.get_all_transactions()],
+                         [(9, "2026-01-02", 0.1, "simit"), (5, "2025-12-31", 19.99, "market")])
+        self.assertEqual(db.get_monthly_summary(), [("2025-12", 0, 19.99), ("2026-01", 0, 0.1)])
+        db.add_transaction("Expense", 1, "Yiyecek", "", "2026-01-03")
+        self.assertEqual(db.get_all_transactions()[0][0], 10)
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from tests.support import DatabaseTestCase
+
+
+class SummaryWindowTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for month in ("2025-11", "2025-12", "2026-01", "2026-02", "2026-03"):
+            self.db.add_transaction("Income", 1000, "Maaş", "", f"{month}-01")
+            self.db.add_transaction("Expense", 100, "Yiyecek", "", f"{month}-15")
+
+    def test_limit_keeps_the_latest_buckets(self):
+        self.assertEqual(self.db.get_monthly_summary(limit=2), [("2026-02", 1000, 100), ("2026-03", 1000, 100)])
+        self.assertEqual([row[0] for row in self.db.get_yearly_summary(limit=1)], ["2026"])
+        self.assertEqual(self.db.get_yearly_summary(), [("2025", 2000, 200), ("2026", 3000, 300)])
+
+    def test_date_range_and_limit_combine(self):
+        self.assertEqual([row[0] for row in self.db.get_monthly_summary("2025-12-01", "2026-02-28")],
+                         ["2025-12", "2026-01", "2026-02"])
+        self.assertEqual([row[0] for row in self.db.get_monthly_summary(end="2026-01-31", limit=2)],
+                         ["2025-12", "2026-01"])
+        self.assertEqual(self.db.get_daily_summary("2026-03-01", "2026-03-01"), [("2026-03-01", 1000, 0)])
+
+    def test_category_limit_folds_the_rest(self):
+        self.db.add_transaction("Expense", 50, "Ulaşım", "", "2026-03-02")
+        self.db.add_transaction("Expense", 20, "Fatura", "", "2026-03-03")
+        self.db.add_transaction("Expense", 10, "Eğlence", "", "2026-03-04")
+
+        self.assertEqual(self.db.get_expenses_by_category(limit=2),
+                         [("Yiyecek", 500), ("Ulaşım", 50), ("Diğerleri", 30)])
+        self.assertEqual(self.db.get_expenses_by_category("2026-03-01", "2026-03-31", limit=3),
+                         [("Yiyecek", 100), ("Ulaşım", 50), ("Fatura", 20), ("Diğerleri", 10)])
+
+    def test_limit_spans_yearly_shards(self):
+        year = datetime.now().year
+        db = self.open_database("sharded.db", sharded=True)
+        for offset in (3, 2, 1, 0):
+            db.add_transaction("Expense", 10 * (offset + 1), "Fatura", "", f"{year - offset}-06-01")
+
+        self.assertEqual(db.get_yearly_summary(limit=2), [(str(year - 1), 0, 20), (str(year), 0, 10)])
+        self.assertEqual(db.get_expenses_by_category(f"{year - 3}-01-01", f"{year - 2}-12-31"), [("Fatura", 70)])
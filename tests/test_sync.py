@@ -0,0 +1,76 @@
+import json
+import os
+
+from tests.support import DatabaseTestCase
+
+
+class LedgerSyncTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = self.open_database("other.db")
+
+    def test_file_sync_copies_both_ways(self):
+        self.db.add_transaction("Income", 1000, "Maaş", "", "2026-10-01")
+        self.other.add_transaction("Expense", 40, "Ulaşım", "taksi", "2026-10-04")
+
+        self.assertEqual(self.db.sync(self.other.db_file), (1, 1))
+        self.assertEqual(self.db.sync(self.other.db_file), (0, 0))
+        self.assertEqual(self.db.get_balance(), 960)
+        self.assertEqual(self.other.get_balance(), 960)
+
+    def test_last_writer_wins_and_deletes_propagate(self):
+        trans_id = self.db.add_transaction("Expense", 20, "Yiyecek", "market", "2026-10-02")
+        self.db.sync(self.other.db_file)
+        other_id = self.other.get_all_transactions()[0][0]
+
+        self.db.update_transaction(trans_id, amount=25)
+        self.other.update_transaction(other_id, amount=30)
+        self.db.sync(self.other.db_file)
+        self.assertEqual(self.db.get_total_expenses(), self.other.get_total_expenses())
+
+        self.other.delete_transaction(other_id)
+        self.db.sync(self.other.db_file)
+        self.assertIsNone(self.db.get_transaction(trans_id))
+
+    def test_new_categories_are_created_with_their_parent(self):
+        self.other.add_category("Kira", parent="Fatura")
+        self.other.add_transaction("Expense", 700, "Kira", "", "2026-10-01")
+
+        self.db.sync(self.other.db_file)
+        self.assertEqual(self.db.get_expenses_by_category(parent="Fatura"), [("Kira", 700)])
+
+    def test_ledger_cannot_sync_with_itself(self):
+        with self.assertRaises(ValueError):
+            self.db.sync(self.db.db_file)
+
+
+class FolderSyncTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = os.path.join(self.directory, "shared")
+        os.makedirs(self.folder)
+        self.first = self.open_database("first.db")
+        self.second = self.open_database("second.db")
+
+    def exported_replicas(self, db):
+        replicas = set()
+        source = os.path.join(self.folder, db.replica_id)
+        for file_name in os.listdir(source):
+            with open(os.path.join(source, file_name), encoding="utf-8") as f:
+                replicas |= {change["replica"] for change in json.load(f)["changes"]}
+        return replicas
+
+    def test_round_trip_does_not_reexport_foreign_changes(self):
+        self.first.add_transaction("Expense", 12.5, "Yiyecek", "market", "2026-10-03")
+        self.first.add_transaction("Income", 1000, "Maaş", "maaş", "2026-10-01")
+        self.second.add_transaction("Expense", 40, "Ulaşım", "taksi", "2026-10-04")
+        self.second.add_transaction("Expense", 8, "Yiyecek", "kahve", "2026-10-05")
+
+        self.assertEqual(self.first.sync(self.folder), (0, 2))
+        self.assertEqual(self.second.sync(self.folder), (2, 2))
+        self.assertEqual(self.first.sync(self.folder), (2, 0))
+        self.assertEqual(self.second.sync(self.folder), (0, 0))
+
+        self.assertEqual(self.exported_replicas(self.first), {self.first.replica_id})
+        self.assertEqual(self.exported_replicas(self.second), {self.second.replica_id})
+        self.assertEqual(self.first.get_balance(), self.second.get_balance())
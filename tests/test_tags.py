@@ -0,0 +1,95 @@
+from tests.support import DatabaseTestCase
+
+
+class TagFilterTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ids = {}
+        for key, trans_type, amount, tags, date in [
+            ("market", "Expense", 20, ["tatil"], "2026-03-01"),
+            ("otel", "Expense", 300, ["tatil", "iş"], "2026-03-02"),
+            ("maaş", "Income", 1000, ["iş"], "2026-03-03"),
+            ("kahve", "Expense", 5, [], "2026-04-01"),
+        ]:
+            self.ids[key] = self.db.add_transaction(trans_type, amount, "Diğer", key, date, tags=tags)
+
+    def matching(self, expression, db=None):
+        return {row[5] for row in (db or self.db).iter_transactions({"tags": expression})}
+
+    def test_expressions(self):
+        self.assertEqual(self.matching("tatil"), {"market", "otel"})
+        self.assertEqual(self.matching("tatil VE iş"), {"otel"})
+        self.assertEqual(self.matching("tatil VEYA iş"), {"market", "otel", "maaş"})
+        self.assertEqual(self.matching("-tatil"), {"maaş", "kahve"})
+        self.assertEqual(self.matching("iş -tatil"), {"maaş"})
+        self.assertEqual(self.matching("DEĞİL (tatil VEYA iş)"), {"kahve"})
+
+    def test_bad_expressions_are_rejected(self):
+        for expression in ("tatil VE", "(tatil", "yok"):
+            with self.assertRaises(ValueError):
+                self.matching(expression)
+
+    def test_filters_page_and_summary(self):
+        page, _ = self.db.get_transaction_page({"tags": "tatil"}, limit=1)
+        self.assertEqual(page[0][0], self.ids["otel"])
+        self.assertEqual(self.db.get_summary("month", tags="-iş", fill=False),
+                         [("2026-03", 0, 20), ("2026-04", 0, 5)])
+
+    def test_retagging_moves_rows_between_filters(self):
+        self.db.tag_transactions([self.ids["kahve"]], add=["iş"])
+        self.db.tag_transactions([self.ids["otel"]], remove=["iş"])
+
+        self.assertEqual(self.matching("iş"), {"maaş", "kahve"})
+        self.assertEqual(self.db.get_transaction_tags([self.ids["otel"]]), {self.ids["otel"]: ["tatil"]})
+
+    def test_filters_work_on_pooled_and_read_only_connections(self):
+        self.db.enable_pool(2)
+        for _ in range(2):
+            self.assertEqual(self.matching("tatil"), {"market", "otel"})
+            self.assertEqual(self.matching("iş"), {"otel", "maaş"})
+        self.db.disable_pool()
+
+        for mode in ("memory", "mmap"):
+            self.db.enable_memory_mode(mode)
+            self.assertEqual(self.matching("tatil -iş"), {"market"})
+            self.db.disable_memory_mode()
+
+
+class ArchivedTagTest(DatabaseTestCase):
+    EXPRESSIONS = ["tatil", "tatil VE iş", "tatil VEYA proje", "-tatil", "tatil -iş"]
+
+    def setUp(self):
+        super().setUp()
+        for trans_type, amount, category, tags, date in [
+            ("Expense", 12.5, "Yiyecek", ["tatil"], "2023-03-04"),
+            ("Expense", 40, "Ulaşım", ["tatil", "iş"], "2023-05-04"),
+            ("Income", 1000, "Maaş", ["iş"], "2023-05-10"),
+            ("Expense", 7, "Yiyecek", [], "2023-06-01"),
+            ("Expense", 30, "Yiyecek", ["tatil"], "2026-03-04"),
+            ("Expense", 5, "Yiyecek", ["proje"], "2026-04-04"),
+        ]:
+            self.db.add_transaction(trans_type, amount, category, "", date, tags=tags)
+
+    def reports(self):
+        return self.db.get_tag_summary(), {expression: self.db.get_summary("month", tags=expression, fill=False)
+                                           for expression in self.EXPRESSIONS}
+
+    def test_archiving_keeps_tagged_totals(self):
+        before = self.reports()
+        self.assertEqual(self.db.archive_transactions("2025-01-01"), 4)
+        self.assertEqual(self.reports(), before)
+        self.assertEqual(before[0], [("tatil", 0.0, 82.5), ("iş", 1000.0, 40.0), ("proje", 0.0, 5.0)])
+
+    def test_tag_rollups_are_rebuilt_from_the_archive(self):
+        before = self.reports()
+        self.db.archive_transactions("2025-01-01")
+        with self.db.get_connection() as conn:
+            conn.execute("DROP TABLE archived_tag_rollups")
+        self.db = self.open_database()
+        self.assertEqual(self.reports(), before)
+
+    def test_memory_copy_keeps_tagged_totals_after_archiving(self):
+        before = self.reports()
+        self.db.enable_memory_mode()
+        self.db.archive_transactions("2025-01-01")
+        self.assertEqual(self.reports(), before)